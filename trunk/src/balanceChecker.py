@@ -5,6 +5,8 @@ import numpy as np
 import radUtilities as RU
 import globalConstants as GC
 from math import sqrt
+from hydroState import createHydroStateArray
+from transientSource import getBDF2Weights
 
 ## Default dictionary to pass to balance checker
 #
@@ -22,14 +24,17 @@ class BalanceChecker:
     #
     #  @param[in] mesh          need spatial mesh for volumes
     #  @param[in] time_stepper  not implemented for all methods necessarily
-    #  @param[in] dt            assumed constant essentially
+    #  @param[in] dt            time step size
+    #  @param[in] dt_ratio      ratio of the time step size to the previous
+    #                           time step size, used for BDF2
     #----------------------------------------------------------------------------
-    def __init__(self, mesh, problem_type, timestepper, dt):
+    def __init__(self, mesh, problem_type, timestepper, dt, dt_ratio=1.0):
 
         self.mesh = mesh
         self.time_stepper  = timestepper
         self.dt   = dt
         self.prob = problem_type
+        self.bdf2_weights = getBDF2Weights(dt_ratio)
 
     #----------------------------------------------------------------------------
     ## Compute balance on a simple steady state problem
@@ -68,6 +73,8 @@ class BalanceChecker:
     #----------------------------------------------------------------------------
     ## Compute balance for a coupled rad-hydro problem
     #
+    #  @return mass, momentum, and energy excesses
+    #
     def computeBalance(self, rad_BC=None, hydro_new=None,
             hydro_old=None, rad_old=None, rad_new=None, hydro_F_left=None, hydro_F_right=None, 
             src_totals={"rad":0.0,"rho":0.0,"erg":0.0,"mom":0.0}, 
@@ -82,14 +89,19 @@ class BalanceChecker:
         #assume uniform volume
         vol = self.mesh.getElement(0).dx
         dt  = self.dt
+        w_new, w_old, w_older = self.bdf2_weights
+
+        # get hydro states as arrays
+        hydro_new = createHydroStateArray(hydro_new)
+        hydro_old = createHydroStateArray(hydro_old)
 
         # compute mass in domain
-        mass_new = sum([i.rho*vol for i in hydro_new])
-        mass_old = sum([i.rho*vol for i in hydro_old])
+        mass_new = np.sum(hydro_new.rho*vol)
+        mass_old = np.sum(hydro_old.rho*vol)
 
         # compute hydro momentum in domain
-        mom_new_hydro = sum([vol*(i.rho*i.u) for i in hydro_new])
-        mom_old_hydro = sum([vol*(i.rho*i.u) for i in hydro_old])
+        mom_new_hydro = np.sum(vol*(hydro_new.rho*hydro_new.u))
+        mom_old_hydro = np.sum(vol*(hydro_old.rho*hydro_old.u))
 
         # compute radiation momentum in domain
         c = GC.SPD_OF_LGT
@@ -101,8 +113,8 @@ class BalanceChecker:
         mom_old = mom_old_hydro + mom_old_rad
 
         # compute hydro energy in domain
-        erg_new_hydro = sum([i.E()*vol for i in hydro_new])
-        erg_old_hydro = sum([i.E()*vol for i in hydro_old])
+        erg_new_hydro = np.sum(hydro_new.E()*vol)
+        erg_old_hydro = np.sum(hydro_old.E()*vol)
 
         # compute radiation energy in domain
         erg_new_rad = sum([0.5*(i[0]+i[1])*vol for i in rad_new.E])
@@ -113,12 +125,12 @@ class BalanceChecker:
         erg_old = erg_old_hydro + erg_old_rad
 
         # compute internal energy in domain
-        em_new = sum([i.e*vol*i.rho for i in hydro_new])
-        em_old = sum([i.e*vol*i.rho for i in hydro_old])
+        em_new = np.sum(hydro_new.e*vol*hydro_new.rho)
+        em_old = np.sum(hydro_old.e*vol*hydro_old.rho)
 
         # compute kinetic energy in domain
-        KE_new = sum([vol*(0.5*i.rho*i.u**2) for i in hydro_new])
-        KE_old = sum([vol*(0.5*i.rho*i.u**2) for i in hydro_old])
+        KE_new = np.sum(vol*(0.5*hydro_new.rho*hydro_new.u**2))
+        KE_old = np.sum(vol*(0.5*hydro_old.rho*hydro_old.u**2))
 
         #Compute momentum deposited to material in a rad_mat only problem,
         #This must still be added, hardcoded as BE for now
@@ -141,12 +153,12 @@ class BalanceChecker:
                     mom_deposition += 0.5*(mom_l + mom_r)
             elif self.time_stepper == 'BDF2':
                 for i in xrange(len(rad_new.F)):
-                    mom_l = 2./3.*cx_new[i][0].sig_t*rad_new.F[i][0]*vol/c \
-                            + 1./6*cx_new[i][0].sig_t*rad_old.F[i][0]*vol/c \
-                            + 1./6*cx_new[i][0].sig_t*rad_older.F[i][0]*vol/c
-                    mom_r = 2./3.*cx_new[i][1].sig_t*rad_new.F[i][1]*vol/c \
-                            + 1./6*cx_new[i][1].sig_t*rad_old.F[i][1]*vol/c \
-                            + 1./6*cx_new[i][1].sig_t*rad_older.F[i][1]*vol/c
+                    mom_l = w_new*cx_new[i][0].sig_t*rad_new.F[i][0]*vol/c \
+                            + w_old*cx_new[i][0].sig_t*rad_old.F[i][0]*vol/c \
+                            + w_older*cx_new[i][0].sig_t*rad_older.F[i][0]*vol/c
+                    mom_r = w_new*cx_new[i][1].sig_t*rad_new.F[i][1]*vol/c \
+                            + w_old*cx_new[i][1].sig_t*rad_old.F[i][1]*vol/c \
+                            + w_older*cx_new[i][1].sig_t*rad_older.F[i][1]*vol/c
                     mom_deposition += 0.5*(mom_l + mom_r)
 
             print "WARNING: Momentum balance in TRT problems only works for"\
@@ -215,12 +227,12 @@ class BalanceChecker:
 
            mass_bal = mass_new - mass_old - dt*(mass_netflow_hydro) - src_totals["rho"]
            mom_bal  = mom_new  - mom_old  - dt*(mom_netflow_hydro
-              + 2./3.*mom_netflow_new_rad + 1./6.*mom_netflow_old_rad
-              + 1./6.*mom_netflow_older_rad) \
+              + w_new*mom_netflow_new_rad + w_old*mom_netflow_old_rad
+              + w_older*mom_netflow_older_rad) \
               - src_totals["mom"]
            erg_bal  = erg_new  - erg_old  - dt*(erg_netflow_hydro
-              + 1./6.*erg_netflow_old_rad + 1./6.*erg_netflow_older_rad \
-              + 2./3.*erg_netflow_new_rad) \
+              + w_old*erg_netflow_old_rad + w_older*erg_netflow_older_rad \
+              + w_new*erg_netflow_new_rad) \
               - src_totals["erg"] - src_totals["rad"]
                      
 
@@ -268,6 +280,5 @@ class BalanceChecker:
             print "=====================================================\n"
 
             #See how well we satisfy each of the equations
-            
-
 
+        return mass_bal, mom_bal, erg_bal
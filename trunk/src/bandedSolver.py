@@ -0,0 +1,110 @@
+## @package src.bandedSolver
+#  Provides an O(N) direct solver for the S-2 system.
+#
+#  In the global dof numbering given by getIndex, every coupling in the S-2
+#  system lies within two diagonals of the main diagonal, except for the two
+#  wrap-around couplings introduced by periodic boundary conditions. The
+#  banded part of the matrix is factored with a LAPACK band LU, and the
+#  wrap-around entries are handled with a low-rank Sherman-Morrison-Woodbury
+#  correction:
+#  \f[
+#     (B + UV^T)^{-1} = B^{-1} - B^{-1}U\left(I + V^TB^{-1}U\right)^{-1}V^TB^{-1}
+#  \f]
+
+import numpy as np
+from scipy.linalg.lapack import dgbtrf, dgbtrs
+
+## Number of sub-diagonals in the banded part of the S-2 system
+S2_N_LOWER = 2
+
+## Number of super-diagonals in the banded part of the S-2 system
+S2_N_UPPER = 2
+
+## Factorization of a banded matrix with optional entries outside of the band.
+#
+#  The factorization is computed once in the constructor; each call to solve()
+#  then only applies the triangular solves.
+#
+class BandedFactorization(object):
+
+   ## Constructor. Factors the matrix given in coordinate format.
+   #
+   #  @param[in] n        size of the matrix
+   #  @param[in] rows     row indices of the nonzero entries
+   #  @param[in] cols     column indices of the nonzero entries
+   #  @param[in] vals     values of the nonzero entries
+   #  @param[in] n_lower  number of sub-diagonals in the band
+   #  @param[in] n_upper  number of super-diagonals in the band
+   #
+   def __init__(self, n, rows, cols, vals, n_lower=S2_N_LOWER,
+      n_upper=S2_N_UPPER):
+
+      self.n = n
+      self.n_lower = n_lower
+      self.n_upper = n_upper
+
+      # split entries into those in the band and those outside of it
+      offsets = rows - cols
+      in_band = np.logical_and(offsets <= n_lower, -offsets <= n_upper)
+      outside = np.logical_not(in_band)
+
+      # store banded part in LAPACK band storage, with room for fill-in
+      # from pivoting: A[i,j] is stored at ab[n_lower+n_upper+i-j, j]
+      n_rows = 2*n_lower + n_upper + 1
+      ab_index = (n_lower + n_upper + offsets[in_band])*n + cols[in_band]
+      ab = np.bincount(ab_index, weights=vals[in_band],
+         minlength=n_rows*n).reshape(n_rows, n)
+
+      # factor the banded part
+      self.lu, self.piv, info = dgbtrf(ab, n_lower, n_upper, overwrite_ab=1)
+      if info > 0:
+         raise ValueError("Banded matrix is singular")
+
+      # entries outside of the band are written as U V^T, where column k of
+      # U is val_k*e_{row_k} and column k of V is e_{col_k}
+      self.outside_cols = cols[outside]
+      n_outside = len(self.outside_cols)
+      if n_outside > 0:
+
+         U = np.zeros((n, n_outside))
+         U[rows[outside], np.arange(n_outside)] = vals[outside]
+
+         # compute B^{-1} U and the capacitance matrix I + V^T B^{-1} U
+         self.B_inv_U = self.solveBanded(U)
+         self.capacitance = np.eye(n_outside) + self.B_inv_U[self.outside_cols,:]
+
+   ## Solves the system with the banded part of the matrix only, \f$B x = b\f$
+   #
+   #  @param[in] rhs  right hand side vector, or 2-D array with one right hand
+   #                  side per column
+   #
+   #  @return solution with the same shape as rhs
+   #
+   def solveBanded(self, rhs):
+
+      b = np.asarray(rhs, dtype=float)
+      x, info = dgbtrs(self.lu, self.n_lower, self.n_upper,
+         b.reshape(self.n, -1), self.piv)
+      if info != 0:
+         raise ValueError("Invalid argument passed to banded solve")
+
+      return x.reshape(b.shape)
+
+   ## Solves the full system, including entries outside of the band
+   #
+   #  @param[in] rhs  right hand side vector, or 2-D array with one right hand
+   #                  side per column
+   #
+   #  @return solution with the same shape as rhs
+   #
+   def solve(self, rhs):
+
+      # solve with banded part
+      x = self.solveBanded(rhs)
+
+      # apply Woodbury correction for entries outside of the band
+      if len(self.outside_cols) > 0:
+         x -= np.dot(self.B_inv_U,
+            np.linalg.solve(self.capacitance, x[self.outside_cols]))
+
+      return x
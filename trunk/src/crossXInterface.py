@@ -1,6 +1,27 @@
 ## @package src.crossXInterface
 #  Contains cross section classes.
 
+## Names of the cross section attributes whose changes are counted by the
+#  cross section version, see getCrossSectionVersion
+CROSS_SECTION_NAMES = ('sig_s', 'sig_t', 'sig_a')
+
+# number of changes of the cross sections of all objects
+_version = 0
+
+## Returns the version of the cross sections.
+#
+#  The version is incremented whenever \f$\sigma_s\f$, \f$\sigma_t\f$, or
+#  \f$\sigma_a\f$ of any cross section object changes, whether by updateCrossX
+#  or by assigning to the attribute directly. Quantities computed from the
+#  cross sections, e.g., cached factorizations, are current as long as the
+#  version is unchanged, which is checked in O(1) without comparing values.
+#
+#  @return cross section version
+#
+def getCrossSectionVersion():
+
+    return _version
+
 #================================================================================
 ## Cross section class.
 #
@@ -32,6 +53,22 @@ class CrossXInterface(object):
         self.sig_t = sigma_t
         ## \f$\sigma_a\f$, the absorption cross section
         self.sig_a = sigma_t - sigma_s
+
+    #----------------------------------------------------------------------------
+    ## Sets an attribute, incrementing the cross section version if a cross
+    #  section changes.
+    #
+    #  @param[in] self   self
+    #  @param[in] name   name of the attribute
+    #  @param[in] value  new value of the attribute
+    #----------------------------------------------------------------------------
+    def __setattr__(self, name, value):
+
+        global _version
+        if name in CROSS_SECTION_NAMES and getattr(self, name, None) != value:
+            _version += 1
+
+        object.__setattr__(self, name, value)
                
     #----------------------------------------------------------------------------
     ## Print string definition.
@@ -54,6 +91,9 @@ class CrossXInterface(object):
     #
     #  In this base class, cross sections are not updated by default; if it is
     #  necessary to update cross sections, this will be done by a derived class.
+    #  A derived class must assign new values to the attributes rather than
+    #  modify them in place, since copies of the cross sections made by
+    #  nonlinearSolve share the objects of their attributes.
     #
     #  @param[in] args   arbitrary number of arguments
     #  @param[in] kwargs arbitrary number of keyword arguments
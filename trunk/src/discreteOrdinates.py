@@ -0,0 +1,351 @@
+## @package src.discreteOrdinates
+#  Provides a general S-N discrete ordinates engine with Gauss-Legendre
+#  angular quadrature.
+#
+#  Angular fluxes are stored as arrays with shape (n_angles,n_elems,2),
+#  indexed by [angle, cell, side], using the same lumped linear discontinuous
+#  spatial discretization as the S-2 system. The streaming, collision, and
+#  scattering kernels, as well as the transport sweep, operate on all angles
+#  at once, so increasing the number of angles adds work to array operations
+#  rather than to Python loops. The only sequential loop is the recurrence
+#  over cells in the sweep, which advances all angles together.
+#
+#  For S-2, the quadrature is \f$\mu=\pm1/\sqrt{3}\f$ with unit weights, and
+#  the discrete equations are identical to those solved by radiationSolveSS.
+#
+#  Radiation-only transients are run with the S-N engine by passing a
+#  quadrature to transient.runLinearTransient, which takes each time step
+#  with takeDiscreteOrdinatesStep. Coupling to the material and hydrodynamics
+#  is not yet available; those problems are solved with S-2.
+#
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
+
+from krylovSolver import solveKrylov
+from transportSweep import sweepAngles, orderInFlowDirection
+from transientSource import getBDF2Weights
+from utilityFunctions import getCrossSectionArray
+from globalConstants import SPD_OF_LGT as c
+
+## Gauss-Legendre angular quadrature set.
+#
+#  Directions are sorted in increasing order, so that the first half are
+#  negative and the second half positive. Weights sum to 2, so that the
+#  scalar flux is \f$\phi = \sum_a w_a\Psi_a\f$ as for S-2.
+#
+class GaussLegendreQuadrature(object):
+
+   ## Constructor
+   #
+   #  @param[in] n_angles  number of directions, e.g., 2, 4, 8, or 16
+   #
+   def __init__(self, n_angles):
+
+      # an odd number of directions would include \mu = 0
+      if n_angles < 2 or n_angles % 2 != 0:
+         raise ValueError("Number of directions must be a positive even number")
+
+      self.n_angles = n_angles
+      self.mu, self.weights = np.polynomial.legendre.leggauss(n_angles)
+
+      # flag for directions with positive \mu
+      self.positive = self.mu > 0.0
+
+   ## Computes the scalar flux, \f$\phi = \sum_a w_a\Psi_a\f$
+   #
+   #  @param[in] psi  angular fluxes indexed by [angle, ...]
+   #
+   def computeScalarFlux(self, psi):
+
+      return np.tensordot(self.weights, psi, axes=1)
+
+   ## Computes the current, \f$\sum_a w_a\mu_a\Psi_a\f$
+   #
+   #  @param[in] psi  angular fluxes indexed by [angle, ...]
+   #
+   def computeCurrent(self, psi):
+
+      return np.tensordot(self.weights*self.mu, psi, axes=1)
+
+
+## Solves the S-N equations with transport sweeps.
+#
+#  The scattering source is converged either with source iteration, or with
+#  GMRES applied to the scalar flux equation
+#  \f[
+#    (I - DL^{-1}MS)\phi = DL^{-1}Q,
+#  \f]
+#  where \f$L^{-1}\f$ is a transport sweep, which converges much faster than
+#  source iteration when scattering dominates.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] cross_x         list of cross sections for each element
+#  @param[in] Q               source for each direction with shape
+#                             (n_angles,n_elems,2), or an isotropic source
+#                             with shape (n_elems,2)
+#  @param[in] rad_BC          radiation BC object; Dirichlet incident fluxes
+#                             are applied to all incoming directions
+#  @param[in] quadrature      angular quadrature, e.g.,
+#                             GaussLegendreQuadrature
+#  @param[in] diag_add_term   \f$\alpha\f$
+#  @param[in] implicit_scale  \f$\beta\f$
+#  @param[in] method          string identifier for the iteration method,
+#                             either 'gmres' or 'source_iteration'
+#  @param[in] tol             relative tolerance on the scalar flux
+#  @param[in] max_iterations  maximum number of iterations
+#
+#  @return angular fluxes with shape (n_angles,n_elems,2), and number of
+#          iterations taken
+#
+def solveSN(mesh, cross_x, Q, rad_BC, quadrature, diag_add_term=0.0,
+   implicit_scale=1.0, method='gmres', tol=1.0e-12, max_iterations=1000):
+
+    # abbreviation for the scale term
+    beta = implicit_scale
+
+    # coefficients of the streaming and collision operator
+    hm = computeStreamingCoefficients(mesh, quadrature, implicit_scale)
+    sig_t = beta*getCrossSectionArray(cross_x, 'sig_t') + diag_add_term
+    sig_s = getCrossSectionArray(cross_x, 'sig_s')
+
+    # sources and incident fluxes for each direction
+    shape = (quadrature.n_angles, mesh.n_elems, 2)
+    src = np.broadcast_to(np.asarray(Q, dtype=float), shape)
+    periodic = rad_BC.bc_type == 'periodic'
+    inflow = computeIncidentFluxes(rad_BC, quadrature)
+
+    # sweeps the given source, returning angular fluxes
+    def sweep(source, incident):
+       return sweepAngles(hm, sig_t, source, quadrature.positive, incident,
+          periodic)
+
+    if method == 'gmres':
+
+       # uncollided scalar flux
+       phi_0 = quadrature.computeScalarFlux(sweep(src, inflow)).ravel()
+
+       # operator for the scalar flux equation, with homogeneous BC
+       no_inflow = np.zeros(quadrature.n_angles)
+       def applyOperator(phi):
+          scat = computeScatteringSource(phi.reshape(mesh.n_elems, 2), sig_s,
+             beta)
+          psi = sweep(np.broadcast_to(scat, shape), no_inflow)
+          return phi - quadrature.computeScalarFlux(psi).ravel()
+
+       n = 2*mesh.n_elems
+       operator = LinearOperator((n, n), matvec=applyOperator)
+       phi, iterations = solveKrylov(operator, phi_0, method='gmres', tol=tol,
+          max_iterations=max_iterations)
+
+       # final sweep to recover the angular fluxes
+       scat = computeScatteringSource(phi.reshape(mesh.n_elems, 2), sig_s, beta)
+       return sweep(src + scat, inflow), iterations
+
+    elif method == 'source_iteration':
+
+       phi = np.zeros((mesh.n_elems, 2))
+       for iteration in xrange(1, max_iterations + 1):
+
+          psi = sweep(src + computeScatteringSource(phi, sig_s, beta), inflow)
+          phi_new = quadrature.computeScalarFlux(psi)
+
+          # check convergence
+          change = np.max(np.abs(phi_new - phi))
+          phi = phi_new
+          if change <= tol*np.max(np.abs(phi)):
+             return psi, iteration
+
+       raise RuntimeError("Source iteration did not converge in %d iterations"
+          % max_iterations)
+
+    else:
+       raise NotImplementedError("Invalid S-N iteration method")
+
+
+## Takes a single radiation-only time step of the S-N equations.
+#
+#  With the weights \f$w\f$ of the time-stepper, see
+#  transientSource.getBDF2Weights, and the transport operator
+#  \f$A\Psi = Q - \mu\partial_x\Psi - \sigma_t\Psi + \frac{1}{2}\sigma_s\phi\f$,
+#  the new angular fluxes satisfy
+#  \f[
+#    \frac{\Psi^{n+1} - \Psi^{n}}{c\Delta t} = w^{n+1}A\Psi^{n+1}
+#      + w^n A\Psi^{n} + w^{n-1}A\Psi^{n-1},
+#  \f]
+#  which is the steady-state problem of solveSN with
+#  \f$\alpha = 1/c\Delta t\f$, \f$\beta = w^{n+1}\f$, and the old and
+#  older terms moved to the source. For S-2, this is the same system as
+#  takeRadiationStep solves for a radiation-only problem.
+#
+#  @param[in] mesh          a mesh object
+#  @param[in] time_stepper  string identifier for the chosen time-stepper,
+#                           e.g., 'CN'
+#  @param[in] dt            time step size
+#  @param[in] cross_x       list of cross sections for each element
+#  @param[in] rad_BC        radiation BC object
+#  @param[in] quadrature    angular quadrature
+#  @param[in] psi_old       old angular fluxes with shape (n_angles,n_elems,2)
+#  @param[in] Q_new         new source, with the shapes allowed by solveSN
+#  @param[in] Q_old         old source, required for CN and BDF2
+#  @param[in] psi_older     older angular fluxes, required for BDF2
+#  @param[in] Q_older       older source, required for BDF2
+#  @param[in] dt_ratio      ratio of the current to the previous time step size
+#  @param[in] method        string identifier for the iteration method of
+#                           solveSN
+#
+#  @return new angular fluxes with shape (n_angles,n_elems,2), and number of
+#          iterations taken
+#
+def takeDiscreteOrdinatesStep(mesh, time_stepper, dt, cross_x, rad_BC,
+   quadrature, psi_old, Q_new, Q_old=None, psi_older=None, Q_older=None,
+   dt_ratio=1.0, method='gmres'):
+
+    # weights of the new, old, and older transport operators
+    if time_stepper == 'BE':
+       w_new, w_old, w_older = 1., 0., 0.
+    elif time_stepper == 'CN':
+       w_new, w_old, w_older = 0.5, 0.5, 0.
+    elif time_stepper == 'BDF2':
+       w_new, w_old, w_older = getBDF2Weights(dt_ratio)
+    else:
+       raise NotImplementedError("Specified an invalid time-stepper")
+
+    # old intensity and new source
+    alpha = 1.0/(c*dt)
+    Q = alpha*psi_old + w_new*np.asarray(Q_new, dtype=float)
+
+    # explicit old and older terms
+    hm = computeStreamingCoefficients(mesh, quadrature)
+    sig_t = getCrossSectionArray(cross_x, 'sig_t')
+    sig_s = getCrossSectionArray(cross_x, 'sig_s')
+    inflow = computeIncidentFluxes(rad_BC, quadrature)
+    periodic = rad_BC.bc_type == 'periodic'
+    for w, psi, Q_level in [(w_old, psi_old, Q_old),
+                            (w_older, psi_older, Q_older)]:
+       if w != 0.0:
+          assert psi is not None and Q_level is not None, \
+             "Old and older solutions must be provided for CN or BDF2"
+          phi = quadrature.computeScalarFlux(psi)
+          Q = Q + w*(Q_level - computeStreamingTerm(psi, hm,
+             quadrature.positive, inflow, periodic)
+             - computeCollisionTerm(psi, sig_t)
+             + computeScatteringSource(phi, sig_s))
+
+    return solveSN(mesh, cross_x, Q, rad_BC, quadrature, diag_add_term=alpha,
+       implicit_scale=w_new, method=method)
+
+
+## Converts a source in S-2 global dof ordering to a source for each
+#  direction, using the \f$+\f$ source for the positive directions and the
+#  \f$-\f$ source for the negative directions.
+#
+#  @param[in] Q           source vector in S-2 global dof ordering, e.g.,
+#                         from transientSource.computeRadiationExtraneousSource
+#  @param[in] quadrature  angular quadrature
+#
+#  @return source with shape (n_angles,n_elems,2)
+#
+def expandS2Source(Q, quadrature):
+
+    # source indexed by [cell, side, direction], with direction 0 for -
+    Q_s2 = np.asarray(Q, dtype=float).reshape(-1, 2, 2)
+    return np.where(quadrature.positive[:,np.newaxis,np.newaxis],
+       Q_s2[np.newaxis,:,:,1], Q_s2[np.newaxis,:,:,0])
+
+
+## Computes the streaming coefficients \f$h_\mu = \beta|\mu_a|/h_i\f$.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] quadrature      angular quadrature
+#  @param[in] implicit_scale  \f$\beta\f$
+#
+#  @return streaming coefficients with shape (n_angles,n_elems)
+#
+def computeStreamingCoefficients(mesh, quadrature, implicit_scale=1.0):
+
+    return implicit_scale*np.outer(np.abs(quadrature.mu),
+       1.0/mesh.getCellWidths())
+
+
+## Returns the incident flux for each direction from a radiation BC.
+#
+#  Positive directions receive the left incident flux and negative
+#  directions the right incident flux. For periodic BC, the incident fluxes
+#  are part of the solution and zero is returned.
+#
+#  @param[in] rad_BC      radiation BC object
+#  @param[in] quadrature  angular quadrature
+#
+#  @return incident flux for each direction
+#
+def computeIncidentFluxes(rad_BC, quadrature):
+
+    if rad_BC.bc_type == 'periodic':
+       return np.zeros(quadrature.n_angles)
+
+    psi_left, psi_right = rad_BC.getIncidentFluxes()
+    return np.where(quadrature.positive, psi_left, psi_right)
+
+
+## Computes the isotropic scattering source for each direction,
+#  \f$\frac{1}{2}\beta\sigma_s\phi\f$.
+#
+#  @param[in] phi             scalar flux with shape (n_elems,2)
+#  @param[in] sig_s           scattering cross sections with shape (n_elems,2)
+#  @param[in] implicit_scale  \f$\beta\f$
+#
+#  @return scattering source with shape (n_elems,2), which broadcasts over
+#          directions
+#
+def computeScatteringSource(phi, sig_s, implicit_scale=1.0):
+
+    return 0.5*implicit_scale*sig_s*phi
+
+
+## Computes the collision term, \f$(\beta\sigma_t + \alpha)\Psi_a\f$, for all
+#  directions.
+#
+#  @param[in] psi    angular fluxes with shape (n_angles,n_elems,2)
+#  @param[in] sig_t  effective total cross sections with shape (n_elems,2)
+#
+#  @return collision term with shape (n_angles,n_elems,2)
+#
+def computeCollisionTerm(psi, sig_t):
+
+    return sig_t[np.newaxis,:,:]*psi
+
+
+## Computes the streaming term for all directions.
+#
+#  In each cell, with the upwind face value \f$\Psi_{upwind}\f$, the
+#  streaming term on the inflow and outflow sides is
+#  \f[
+#    h_\mu(\Psi_{in} + \Psi_{out} - 2\Psi_{upwind}), \qquad
+#    h_\mu(\Psi_{out} - \Psi_{in}).
+#  \f]
+#
+#  @param[in] psi       angular fluxes with shape (n_angles,n_elems,2)
+#  @param[in] hm        streaming coefficients with shape (n_angles,n_elems)
+#  @param[in] positive  flags for directions with positive \f$\mu\f$
+#  @param[in] inflow    incident flux for each direction
+#  @param[in] periodic  flag for periodic BC
+#
+#  @return streaming term with shape (n_angles,n_elems,2)
+#
+def computeStreamingTerm(psi, hm, positive, inflow, periodic=False):
+
+    # angular fluxes ordered in the direction of flow
+    psi_flow = orderInFlowDirection(psi, positive)
+
+    # upwind values are the outflow values of the preceding cell
+    upwind = np.roll(psi_flow[:,:,1], 1, axis=1)
+    if not periodic:
+       upwind[:,0] = inflow
+
+    hm_flow = orderInFlowDirection(hm, positive)
+    streaming = np.empty(psi.shape)
+    streaming[:,:,0] = hm_flow*(psi_flow[:,:,0] + psi_flow[:,:,1] - 2.0*upwind)
+    streaming[:,:,1] = hm_flow*(psi_flow[:,:,1] - psi_flow[:,:,0])
+
+    return orderInFlowDirection(streaming, positive)
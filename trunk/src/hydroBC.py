@@ -155,9 +155,14 @@ class HydroBC(object):
 
          raise NotImplementedError("Invalid hydro BC type")
 
-      # update boundary states
-      self.state_L = deepcopy(states[0]) #easiest way to update is copy then change
-      self.state_R = deepcopy(states[0])
+      # update boundary states, which have the material properties of the
+      # cell that the boundary values are taken from
+      if self.bc_type == 'periodic':
+         self.state_L = deepcopy(states[self.n-1])
+         self.state_R = deepcopy(states[0])
+      else:
+         self.state_L = deepcopy(states[0])
+         self.state_R = deepcopy(states[self.n-1])
       self.state_L.updateState(rho=self.rho_L, mom=self.mom_L, erg=self.erg_L)
       self.state_R.updateState(rho=self.rho_R, mom=self.mom_R, erg=self.erg_R)
 
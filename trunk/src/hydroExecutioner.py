@@ -1,114 +1,223 @@
 ## @package src.hydroExecutioner
-#  Runs a hydrodynamics problem.
+#  Runs pure hydrodynamics problems.
+#
+#  runHydroTransient() advances the hydro states with the MUSCL-Hancock
+#  kernels alone, without assembling or solving any radiation systems. The
+#  states are kept in a HydroStateArray and each step writes into
+#  preallocated HydroWorkspace buffers. Running this module compares its
+#  throughput with that of runNonlinearTransient on the Sod and Lax shock
+#  tubes.
 
 import numpy as np
-from numpy import       array
+from time import        time
 from mesh import        Mesh
-from math import        sqrt
-from hydroState import HydroState
-from hydroSlopes import HydroSlopes
+from hydroState import HydroState, createHydroStateArray
 from hydroBC import HydroBC
-from musclHancock import hydroPredictor, hydroCorrector
+from musclHancock import HydroWorkspace
+from transient import computeCFLTimeStepSize, takeTimeStepHydro,\
+   runNonlinearTransient
+from crossXInterface import ConstantCrossSection
+from radiation import Radiation
+from radBC import RadBC
 from plotUtilities import plotHydroSolutions
 
-## Main executioner for Hydro solve. Currently in a testing state.
-def solveHydroProblem():
-
-    # option to print solution
-    print_solution = False
-
-    #-------------------------------------------------------------------------------
-    # Construct initial hydro states, probably create an initializer class
-    #-------------------------------------------------------------------------------
-    width = 1.0
-    t_end = 0.05
-
-    t = 0.0
-    cfl = 0.5
-    n = 500
-
-    #Left and right BC and initial values
-    gamma = 1.4 #gas constant
-    p_left = 1.0
-    u_left  = .750
-    rho_left = 1.
-
-    p_right = 0.1
-    u_right = 0.0
-    rho_right = 0.125
-
-    #made up spec heat
-    spec_heat = 1.0
-
-    #Create a mesh, currently hardcoded
-    mesh = Mesh(n, width)
-    dx = mesh.getElement(0).dx
-
-    if n % 2 != 0: #simple error raise, % has lots of diff meanings in python
-        raise ValueError("Must be even number of cells")
-
-    i_left = int(0.3*n)
-    i_right = int(0.7*n)
 
-    #Create cell centered variables
-    states_a = [HydroState(u=u_left,p=p_left,gamma=gamma,rho=rho_left,
-       spec_heat=spec_heat) for i in range(i_left)]
-    states_a = states_a + [HydroState(u=u_right,p=p_right,gamma=gamma,
-       spec_heat=spec_heat,rho=rho_right) for i in range(i_right)]
-
-    # initialize BC object
-    bc = HydroBC(bc_type='reflective', mesh=mesh)
-
-    #-----------------------------------------------------------------
-    # Solve Problem
-    #----------------------------------------------------------------
-
-    #loop over time steps
+## Runs a pure hydrodynamics transient.
+#
+#  @param[in] mesh            mesh object
+#  @param[in] hydro_IC        initial hydro states, as a HydroStateArray or a
+#                             list of hydro states
+#  @param[in] hydro_BC        hydro BC object
+#  @param[in] t_start         start time
+#  @param[in] t_end           end time
+#  @param[in] dt_option       string identifier for the time step size option,
+#                             'constant' or 'CFL'
+#  @param[in] dt_constant     time step size for 'constant'
+#  @param[in] CFL             CFL number for 'CFL'
+#  @param[in] slope_limiter   string identifier for the slope limiter
+#  @param[in] riemann_solver  string identifier for the Riemann solver; see
+#                             riemannSolvers.RIEMANN_SOLVERS
+#  @param[in] verbosity       0 prints nothing, 1 prints each time step
+#
+#  @return
+#     -# final hydro states, as a HydroStateArray
+#     -# number of time steps taken
+#
+def runHydroTransient(mesh, hydro_IC, hydro_BC, t_start=0.0, t_end=1.0,
+    dt_option='CFL', dt_constant=None, CFL=0.5, slope_limiter="vanleer",
+    riemann_solver='hllc', verbosity=1):
+
+    # check input arguments
+    if dt_option == 'constant':
+       assert dt_constant != None, "If time step size option is chosen to \
+          be 'constant', then a time step size must be provided."
+
+    # copy the initial states into arrays, and preallocate the buffers of
+    # the MUSCL-Hancock steps
+    hydro_old = createHydroStateArray(hydro_IC).copy()
+    hydro_workspace = HydroWorkspace(hydro_old)
+
+    # transient loop
+    t_old = t_start
     time_index = 0
-    while (t < t_end):
+    transient_incomplete = True # boolean flag signalling end of transient
+    while transient_incomplete:
 
         # increment time index
         time_index += 1
 
-        #Compute a new time step size based on CFL
-        c = [sqrt(i.p*i.gamma/i.rho)+abs(i.u) for i in states_a]
-        dt_vals = [cfl*(mesh.elements[i].dx)/c[i] for i in range(len(c))]
-        dt = min(dt_vals)
-
-        t += dt
-        #shorten last step to be exact
-        if (t > t_end):
-            t -= dt
-            dt = t_end - t + 0.000000001
-            t += dt
-
-        print("Time step %d: t = %f -> %f" % (time_index,t-dt,t))
-
-        # update boundary values
-        bc.update(states=states_a, t=t-dt)
-
-        # compute slopes
-        slopes = HydroSlopes(states_a, bc=bc)
+        # get time step size
+        if dt_option == 'constant':
+           dt = dt_constant
+        elif dt_option == 'CFL':
+           dt = computeCFLTimeStepSize(mesh, hydro_old, CFL)
+        else:
+           raise NotImplementedError('Invalid time step size option')
+
+        # adjust time step size if it would overshoot the end of the transient
+        if t_old + dt >= t_end:
+           dt = t_end - t_old
+           t_new = t_end
+           transient_incomplete = False # signal end of transient
+        else:
+           t_new = t_old + dt
+
+        # print each time step
+        if verbosity > 0:
+           print("Time step %d: t = %f -> %f" % (time_index, t_old, t_new))
+
+        # take time step; the new states are a workspace buffer other than
+        # the old states, so no copies are needed
+        hydro_old = takeTimeStepHydro(mesh, dt, hydro_old, hydro_BC, t_old,
+           slope_limiter, riemann_solver=riemann_solver,
+           hydro_workspace=hydro_workspace)[0]
+
+        t_old = t_new
+
+    # return states that are not overwritten by later runs
+    return hydro_old.copy(), time_index
+
+
+## Creates the initial states of a shock tube problem
+#
+#  @param[in] mesh         mesh object
+#  @param[in] x_diaphragm  position of the diaphragm
+#  @param[in] left         tuple of density, velocity, and pressure on the left
+#  @param[in] right        tuple of density, velocity, and pressure on the right
+#  @param[in] gamma        ratio of specific heats
+#  @param[in] spec_heat    specific heat
+#
+#  @return list of hydro states
+#
+def createShockTubeIC(mesh, x_diaphragm, left, right, gamma=1.4,
+    spec_heat=1.0):
+
+    states = list()
+    for i in xrange(mesh.n_elems):
+        if mesh.getElement(i).x_cent < x_diaphragm:
+            rho, u, p = left
+        else:
+            rho, u, p = right
+        states.append(HydroState(u=u, p=p, gamma=gamma, rho=rho,
+           spec_heat=spec_heat))
+
+    return states
+
+
+## Shock tube problems run by the benchmark: name, diaphragm position,
+#  left and right density, velocity, and pressure, and end time
+SHOCK_TUBE_PROBLEMS = [
+    ("Sod", 0.5, (1.0, 0.0, 1.0), (0.125, 0.0, 0.1), 0.2),
+    ("Lax", 0.5, (0.445, 0.698, 3.528), (0.5, 0.0, 0.571), 0.13)]
+
+
+## Benchmarks runHydroTransient against runNonlinearTransient on the Sod and
+#  Lax shock tubes.
+#
+#  runNonlinearTransient is run as a 'rad_hydro' problem with zero radiation
+#  and no absorption, which is how pure hydro problems were run before. The
+#  wall time per time step and the \f$L^1\f$ difference of the final densities
+#  are printed.
+#
+#  @param[in] n_elems  number of cells
+#  @param[in] CFL      CFL number
+#
+def runShockTubeBenchmark(n_elems=400, CFL=0.5):
+
+    mesh = Mesh(n_elems, 1.0)
+    dx = mesh.getCellWidths()
+
+    print("%6s %10s %16s %16s %10s %14s" % ("problem", "steps",
+       "hydro-only (s)", "rad-hydro (s)", "speedup", "L1 difference"))
+
+    for name, x_diaphragm, left, right, t_end in SHOCK_TUBE_PROBLEMS:
+
+        hydro_IC = createShockTubeIC(mesh, x_diaphragm, left, right)
+
+        # both drivers take the same constant time steps, small enough to
+        # satisfy the CFL condition as the waves speed up
+        dt = computeCFLTimeStepSize(mesh, hydro_IC, 0.5*CFL)
+
+        # hydro-only driver
+        t_start = time()
+        hydro, n_steps = runHydroTransient(mesh, hydro_IC,
+           HydroBC(bc_type='reflective', mesh=mesh), t_end=t_end,
+           dt_option='constant', dt_constant=dt, verbosity=0)
+        time_hydro = (time() - t_start)/n_steps
+
+        # radiation-hydrodynamics driver with zero radiation
+        cross_sects = [(ConstantCrossSection(1.0, 1.0),
+           ConstantCrossSection(1.0, 1.0))]*n_elems
+        t_start = time()
+        hydro_ref = runNonlinearTransient(
+           mesh         = mesh,
+           problem_type = 'rad_hydro',
+           dt_option    = 'constant',
+           dt_constant  = dt,
+           t_end        = t_end,
+           rad_BC       = RadBC(mesh, "dirichlet", psi_left=0.0,
+                                psi_right=0.0),
+           cross_sects  = cross_sects,
+           rad_IC       = Radiation([0.0]*(4*n_elems)),
+           hydro_IC     = hydro_IC,
+           hydro_BC     = HydroBC(bc_type='reflective', mesh=mesh),
+           verbosity    = 0)[1]
+        time_ref = (time() - t_start)/n_steps
+
+        rho = np.array([s.rho for s in hydro])
+        rho_ref = np.array([s.rho for s in hydro_ref])
+        print("%6s %10d %16.4e %16.4e %10.1f %14.4e" % (name, n_steps,
+           time_hydro, time_ref, time_ref/time_hydro,
+           np.sum(np.abs(rho - rho_ref)*dx)))
+
+
+## Runs the Sod-like shock tube with a moving left state and plots the
+#  solution.
+def solveHydroProblem():
 
-        #Solve predictor step
-        states_a = hydroPredictor(mesh, states_a, slopes, dt)
+    # option to print solution
+    print_solution = False
 
-        # update boundary values
-        bc.update(states=states_a, t=t-0.5*dt)
+    #Create a mesh, currently hardcoded
+    n = 500
+    mesh = Mesh(n, 1.0)
 
-        #Solve corrector step
-        states_a = hydroCorrector(mesh, states_a, dt, bc=bc)
+    #Left and right initial values: density, velocity, and pressure
+    hydro_IC = createShockTubeIC(mesh, 0.3, (1.0, 0.75, 1.0),
+       (0.125, 0.0, 0.1))
 
+    # solve problem
+    states, n_steps = runHydroTransient(mesh, hydro_IC,
+       HydroBC(bc_type='reflective', mesh=mesh), t_end=0.05, CFL=0.5)
 
     # plot solution
-    plotHydroSolutions(mesh,states=states_a)
+    plotHydroSolutions(mesh, states=list(states))
 
     # print solution
     if print_solution:
-       for state in states_a:
+       for state in states:
           print state
-    
 
-if __name__ == "__main__":
-    solveHydroProblem()
 
+if __name__ == "__main__":
+    runShockTubeBenchmark()
@@ -2,7 +2,11 @@
 #  Contains class for computing and storing hydro slopes.
 
 import numpy as np
-from math import isinf
+from hydroState import createHydroStateArray
+
+## Names of the available slope limiters
+SLOPE_LIMITERS = ["minmod", "double-minmod", "minbee", "superbee", "vanleer",
+   "none", "step"]
 
 ## Class for computing and storing hydro slopes
 #
@@ -17,20 +21,19 @@ class HydroSlopes:
     def __init__(self, states, bc, limiter):
 
        # save slope limiter
+       if limiter not in SLOPE_LIMITERS:
+          raise ValueError("Invalid slope limiter\n")
        self.limiter = limiter
 
-       # extract vectors of conservative variables
-       rho = [s.rho                     for s in states]
-       mom = [s.rho*s.u                 for s in states]
-       erg = [s.rho*(0.5*s.u*s.u + s.e) for s in states]
+       # extract conservative variables, stacked as rows
+       u = np.array(createHydroStateArray(states).getConservativeVariables())
 
        # get boundary values
        rho_L, rho_R, mom_L, mom_R, erg_L, erg_R = bc.getBoundaryValues()
 
-       # compute slopes
-       self.rho_slopes = self.computeSlopes(rho, rho_L, rho_R)
-       self.mom_slopes = self.computeSlopes(mom, mom_L, mom_R)
-       self.erg_slopes = self.computeSlopes(erg, erg_L, erg_R)
+       # compute slopes for all variables at once
+       self.rho_slopes, self.mom_slopes, self.erg_slopes = self.computeSlopes(
+          u, np.array([rho_L, mom_L, erg_L]), np.array([rho_R, mom_R, erg_R]))
 
     ## Computes edge values for each conservative variable:
     #  \f$\rho_{i,L},\rho_{i,R},(\rho u)_{i,L},(\rho u)_{i,R},E_{i,L},E_{i,R}\f$.
@@ -42,76 +45,66 @@ class HydroSlopes:
     #
     def computeEdgeConservativeVariablesValues(self, states):
 
-       n = len(states)
-       rho_l = np.zeros(n)
-       rho_r = np.zeros(n)
-       mom_l = np.zeros(n)
-       mom_r = np.zeros(n)
-       erg_l = np.zeros(n)
-       erg_r = np.zeros(n)
-       for i in xrange(n):
-          rho, mom, erg = states[i].getConservativeVariables()
-          rho_l[i] = rho - 0.5*self.rho_slopes[i]
-          rho_r[i] = rho + 0.5*self.rho_slopes[i]
-          mom_l[i] = mom - 0.5*self.mom_slopes[i]
-          mom_r[i] = mom + 0.5*self.mom_slopes[i]
-          erg_l[i] = erg - 0.5*self.erg_slopes[i]
-          erg_r[i] = erg + 0.5*self.erg_slopes[i]
+       rho, mom, erg = createHydroStateArray(states).getConservativeVariables()
+
+       rho_l = rho - 0.5*self.rho_slopes
+       rho_r = rho + 0.5*self.rho_slopes
+       mom_l = mom - 0.5*self.mom_slopes
+       mom_r = mom + 0.5*self.mom_slopes
+       erg_l = erg - 0.5*self.erg_slopes
+       erg_r = erg + 0.5*self.erg_slopes
 
        return rho_l, rho_r, mom_l, mom_r, erg_l, erg_r
 
 
-    ## Computes slopes for a single conservative variable \f$y\f$
+    ## Computes slopes for conservative variables \f$y\f$
+    #
+    #  All cells, and optionally several variables, are computed at once. Cell
+    #  values are indexed by [..., cell], and boundary values by [...].
     #
     #  @param[in] u     cell-average values for each cell, \f$y_i\f$
     #  @param[in] bc_L  value for left boundary ghost cell, \f$y_0\f$
     #  @param[in] bc_R  value for right boundary ghost cell, \f$y_{N+1}\f$
     #
-    #  @return limited slopes for each cell, \f$\Delta y_i\f$
+    #  @return limited slopes for each cell, \f$\Delta y_i\f$, with the same
+    #          shape as u
     #
     def computeSlopes(self, u, bc_L, bc_R):
     
         # omega of 0 gives centered approximation
         omega = 0.
-    
-        # compute slopes
-        u_slopes = np.zeros(len(u))
-        for i in range(len(u)):
-
-            # get neighboring cell values
-            if i == 0: # left boundary
-               u_L = bc_L
-               u_R = u[i+1]
-            elif i == len(u)-1: # right boundary
-               u_L = u[i-1]
-               u_R = bc_R
-            else:
-               u_L = u[i-1]
-               u_R = u[i+1]
-            
-            # compute differences over left and right edges of cell
-            del_L = u[i] - u_L
-            del_R = u_R  - u[i]
 
-            # compute un-limited slope
-            del_i = 0.5*(1.+omega)*del_L + 0.5*(1.-omega)*del_R
-   
+        # get neighboring cell values
+        u = np.asarray(u, dtype=float)
+        bc_L = np.asarray(bc_L, dtype=float)[...,np.newaxis]
+        bc_R = np.asarray(bc_R, dtype=float)[...,np.newaxis]
+        u_L = np.concatenate((bc_L, u[...,:-1]), axis=-1)
+        u_R = np.concatenate((u[...,1:], bc_R), axis=-1)
+
+        # compute differences over left and right edges of cell
+        del_L = u - u_L
+        del_R = u_R  - u
+
+        # compute un-limited slope
+        del_i = 0.5*(1.+omega)*del_L + 0.5*(1.-omega)*del_R
+
+        # masked divisions are not used
+        with np.errstate(divide='ignore', invalid='ignore'):
+
             # compute ratio of slopes, avoiding division by zero
-            if abs(del_R) < 1.0e-15:
-                if abs(del_L) < 1.0e-15:
-                    r = 1.0
-                else:
-                    r = -1.
-            else:
-                r = del_L/del_R
+            r = np.where(np.abs(del_R) < 1.0e-15,
+                   np.where(np.abs(del_L) < 1.0e-15, 1.0, -1.),
+                   del_L/del_R)
 
             # compute zeta_R, used by several limiters
             beta = 1.
             den = 1.-omega+(1.+omega)*r
-            if abs(den) < 1.0e-15:
-                zeta_R = 1.0e15 # arbitrary large number, just needs to be > 2
-            else:
-                zeta_R = 2.*beta/den
+            zeta_R = np.where(np.abs(den) < 1.0e-15,
+                        1.0e15, # arbitrary large number, just needs to be > 2
+                        2.*beta/den)
+
+            # ratios for which the slope is zero in the ratio-based limiters
+            zero = np.logical_or(r <= 0.0, np.isinf(r))
 
             # compute limited slope
             #---------------------------------------------
@@ -119,45 +112,34 @@ class HydroSlopes:
             # minmod limiter
             if self.limiter == "minmod":
 
-                del_i = minMod3(del_R,del_L,del_i)
+                del_i = computeMinMod3(del_R,del_L,del_i)
 
             elif self.limiter == "double-minmod":
              
                 #Implemented from McClarren Lowrie paper in JCP 227 (2008) 9711-9726
-                del_i = minMod3(2*del_R,2*del_L,del_i)
+                del_i = computeMinMod3(2*del_R,2*del_L,del_i)
 
             # MINBEE limiter
             elif self.limiter == "minbee":
 
-                if r <= 0.0 or isinf(r):
-                    zeta = 0.0
-                elif r <= 1.0:
-                    zeta = r
-                else:
-                    zeta = min(1.0,zeta_R)
+                zeta = np.select([zero, r <= 1.0],
+                                 [0.0, r],
+                                 np.minimum(1.0,zeta_R))
                 del_i = zeta*del_i
 
             # SUPERBEE limiter
             elif self.limiter == "superbee":
 
-                if r <= 0.0 or isinf(r):
-                    zeta = 0.0
-                elif r <= 0.5:
-                    zeta = 2.0*r
-                elif r <= 1.0:
-                    zeta = 1.0
-                else:
-                    zeta = min(min(r,zeta_R),2.0)
+                zeta = np.select([zero, r <= 0.5, r <= 1.0],
+                                 [0.0, 2.0*r, 1.0],
+                                 np.minimum(np.minimum(r,zeta_R),2.0))
                 del_i = zeta*del_i
 
             # vanLeer limiter
             elif self.limiter == "vanleer":
 
-                if r <= 0.0 or isinf(r):
-                    del_i = 0.0
-                else:
-                    zeta =  min(2.*r/(1.+r), zeta_R)
-                    del_i = zeta*del_i
+                zeta = np.minimum(2.*r/(1.+r), zeta_R)
+                del_i = np.where(zero, 0.0, zeta*del_i)
             
             # no limiter; Lax-Wendroff
             elif self.limiter == "none":
@@ -165,15 +147,12 @@ class HydroSlopes:
 
             # zero slopes; Godunov scheme
             elif self.limiter == "step":
-                del_i = 0.0
+                del_i = np.zeros(u.shape)
 
             else:
                 raise ValueError("Invalid slope limiter\n")
 
-            # save slope
-            u_slopes[i] = del_i
-
-        return u_slopes
+        return del_i
 
 
 # ----------------------------------------------------------------------------------
@@ -210,5 +189,22 @@ def minMod3(a,b,c):
     else:
         return 0.
 
+# ----------------------------------------------------------------------------------
+## Computes the minmod() function for 3 arrays of parameters, element by
+#  element.
+#
+#  @param[in] a  first values
+#  @param[in] b  second values
+#  @param[in] c  third values
+#
+#  @return minmod(a,b,c)
+#
+def computeMinMod3(a,b,c):
 
+    positive = np.logical_and(np.logical_and(a > 0, b > 0), c > 0)
+    negative = np.logical_and(np.logical_and(a < 0, b < 0), c < 0)
 
+    return np.select([positive, negative],
+                     [np.minimum(np.minimum(a,b),c),
+                      np.maximum(np.maximum(a,b),c)],
+                     0.)
@@ -7,9 +7,10 @@ from copy            import deepcopy
 import globalConstants as GC
 import numpy as np
 import utilityFunctions as UT
-from utilityFunctions import getNu, computeEdgeVelocities, computeEdgeTemperatures,\
-   computeEdgeDensities, computeHydroInternalEnergies, evalEdgeSource, \
-   evalAverageSource
+from hydroState       import createHydroStateArray, updateEachState
+from utilityFunctions import getNu, computeEdgeVelocities, \
+   computeHydroInternalEnergies, evalEdgeSource, evalAverageSource, \
+   computeEdgeDensitiesArray, computeEdgeVelocitiesArray, getCrossSectionArray
 
 #--------------------------------------------------------------------------------
 ## Updates cell-average velocities \f$u_i\f$.
@@ -19,21 +20,22 @@ from utilityFunctions import getNu, computeEdgeVelocities, computeEdgeTemperatur
 #     \f$\mathbf{H}^*_i\f$
 #  @param[in,out] hydro_new   new hydro cell-average states,
 #     \f$\mathbf{H}^{k+1}_i\f$
+#  @param[in]     src_handler optional VelocityUpdateSourceHandler, e.g., one
+#     that caches its fixed part over the iterations of a time step
 #
-def updateVelocity(mesh, time_stepper, dt, hydro_star=None, hydro_new=None, **kwargs):
+def updateVelocity(mesh, time_stepper, dt, hydro_star=None, hydro_new=None,
+    src_handler=None, **kwargs):
  
     # compute source
-    src_handler = VelocityUpdateSourceHandler(mesh, time_stepper)
+    if src_handler is None:
+        src_handler = VelocityUpdateSourceHandler(mesh, time_stepper)
     Q = src_handler.computeTerm(**kwargs)
 
-    # loop over cells
-    for i in range(mesh.n_elems):
-
-        # update velocity
-        rho_new = hydro_new[i].rho
-        rho_star = hydro_star[i].rho
-        u_new = (rho_star*hydro_star[i].u + dt*Q[i]) / rho_new
-        hydro_new[i].updateVelocity(u_new)
+    # update velocities
+    rho_new = createHydroStateArray(hydro_new).rho
+    states_star = createHydroStateArray(hydro_star)
+    u_new = (states_star.rho*states_star.u + dt*np.asarray(Q)) / rho_new
+    updateEachState(hydro_new, 'updateVelocity', u_new)
 
 #--------------------------------------------------------------------------------
 ## Updates cell-average densities from ext source \f$Q_{rho}\f$.
@@ -50,13 +52,10 @@ def updateDensity(mesh, time_stepper, dt, hydro_star, hydro_new, hydro_prev, **k
     src_handler = DensityUpdateSourceHandler(mesh, time_stepper)
     Q = src_handler.computeTerm(**kwargs)
 
-    # loop over cells
-    for i in range(mesh.n_elems):
-
-        # update density
-        rho_new = hydro_star[i].rho + dt*Q[i]
-        hydro_new[i].updateDensity(rho_new)
-        hydro_prev[i].updateDensity(rho_new) #must also update previous
+    # update densities
+    rho_new = createHydroStateArray(hydro_star).rho + dt*np.asarray(Q)
+    updateEachState(hydro_new, 'updateDensity', rho_new)
+    updateEachState(hydro_prev, 'updateDensity', rho_new) #must also update previous
 
 #--------------------------------------------------------------------------------
 ## Updates internal energy slopes \f$\delta e_i\f$.
@@ -75,73 +74,48 @@ def updateInternalEnergy(time_stepper, dt, QE, cx_prev, rad_new, hydro_new,
     scales = {"CN":0.5, "BE":1., "BDF2":2./3.}
     scale = scales[time_stepper]
 
-    # initialize new internal energy slopes
-    e_rad_new = np.empty((len(hydro_new),2))
-
-    # loop over cells
-    for i in xrange(len(hydro_new)):
-
-        # get hydro states
-        state_new  = hydro_new[i]
-        state_prev = hydro_prev[i]
-        state_star = hydro_star[i]
-
-        # compute edge densities
-        rho = computeEdgeDensities(i, state_new, slopes_old)
-
-        # compute edge velocities
-        u_new  = computeEdgeVelocities(i, state_new,  slopes_old)
-
-        # compute edge temperatures
-        T_prev = computeEdgeTemperatures(state_prev.spec_heat, e_rad_prev[i])
-
-        # compute edge internal energies
-        e_prev = e_rad_prev[i]
+    # get hydro states
+    states_new  = createHydroStateArray(hydro_new)
+    states_prev = createHydroStateArray(hydro_prev)
+    states_star = createHydroStateArray(hydro_star)
 
-        #Compute the total energy at left and right
-        E_star = [hydro_star[i].E() - 0.5*E_slopes_star[i],
-                  hydro_star[i].E() + 0.5*E_slopes_star[i]]
+    # compute edge densities
+    rho = computeEdgeDensitiesArray(states_new, slopes_old)
 
-        # Compute the total energy before and after
-        E_l = E_star[0]
-        E_r = E_star[1]
-
-        # loop over edges to compute new internal energies
-        e_new = np.zeros(2)
-        for x in range(2):
-
-            # get new quantities
-            Er = rad_new.E[i][x]
-
-            # get previous quantities
-            aT4 = a*T_prev[x]**4
-            sig_a = cx_prev[i][x].sig_a
-            spec_heat = state_prev.spec_heat
+    # compute edge velocities
+    u_new  = computeEdgeVelocitiesArray(states_new, slopes_old)
 
-            # compute effective scattering ratio
-            nu = getNu(T_prev[x], sig_a, rho[x], spec_heat, dt, scale)
+    # compute edge temperatures
+    spec_heat = states_prev.spec_heat[:,np.newaxis]
+    e_prev = np.asarray(e_rad_prev)
+    T_prev = e_prev / spec_heat
 
-            # evaluate additional source terms
-            QE_elem = QE[i][x]
+    #Compute the total energy at left and right
+    E_slopes_star = np.asarray(E_slopes_star)
+    E_star = np.column_stack((states_star.E() - 0.5*E_slopes_star,
+                              states_star.E() + 0.5*E_slopes_star))
 
-            # compute new internal energy
-            e_new[x] = (1.0-nu)*scale*dt/rho[x] * (sig_a*c*(Er - aT4) + QE_elem/scale)\
-               + (1.0-nu)*E_star[x]/rho[x] + nu*e_prev[x]\
-               - 0.5*(1.0-nu)*(u_new[x]**2)
+    # get new radiation energies and previous quantities
+    Er = rad_new.E
+    aT4 = a*T_prev**4
+    sig_a = getCrossSectionArray(cx_prev, 'sig_a')
 
-        #Compute a new total energy at each edge, that is what we are really
-        #conserving and this will ensure regular hydro is unchanged
-        E_new = [rho[x]*(0.5*u_new[x]**2 + e_new[x]) for x in range(2)]
-        E_new_avg = 0.5*(E_new[0] + E_new[1])
-        e_new_avg = E_new_avg/state_new.rho - 0.5*(state_new.u)**2
+    # compute effective scattering ratios
+    nu = getNu(T_prev, sig_a, rho, spec_heat, dt, scale)
 
-        # put new internal energy in the new hydro state
-        hydro_new[i].updateStateInternalEnergy(e_new_avg)
+    # compute new edge internal energies
+    e_rad_new = (1.0-nu)*scale*dt/rho * (sig_a*c*(Er - aT4) + np.asarray(QE)/scale)\
+       + (1.0-nu)*E_star/rho + nu*e_prev\
+       - 0.5*(1.0-nu)*(u_new**2)
 
-        # compute new internal energy slope
-        for x in range(2):
-            e_rad_new[i][x] = e_new[x]
+    #Compute a new total energy at each edge, that is what we are really
+    #conserving and this will ensure regular hydro is unchanged
+    E_new = rho*(0.5*u_new**2 + e_rad_new)
+    E_new_avg = 0.5*(E_new[:,0] + E_new[:,1])
+    e_new_avg = E_new_avg/states_new.rho - 0.5*(states_new.u)**2
 
+    # put new internal energies in the new hydro states
+    updateEachState(hydro_new, 'updateStateInternalEnergy', e_new_avg)
 
     # return new internal energy slopes
     return e_rad_new
@@ -215,12 +189,15 @@ class QEHandler(TransientSourceTerm):
     #
     def computeTerm(self, **kwargs):
 
+        # evaluate the source of each element from its fixed and iterate parts
+        Q_elems = self.evalElementTerms(**kwargs)
+
         # loop over all cells and build source 
         Q = [[0.0,0.0] for i in range(self.mesh.n_elems)]
         for i in range(self.mesh.n_elems):
             
             # add the source from element i
-            Q_elem = list(self.func(i, **kwargs))
+            Q_elem = list(Q_elems[i])
             for x in range(2):
 
                 Q[i][x] = Q_elem[x]
@@ -322,12 +299,15 @@ class VelocityUpdateSourceHandler(TransientSourceTerm):
     #----------------------------------------------------------------------------
     def computeTerm(self, **kwargs):
 
+        # evaluate the source of each element from its fixed and iterate parts
+        Q_elems = self.evalElementTerms(**kwargs)
+
         # loop over all cells and build source 
         Q = [0.0 for i in range(self.mesh.n_elems)]
         for i in range(self.mesh.n_elems):
             
             # add the source from element i
-            Q_elem = self.func(i, **kwargs)
+            Q_elem = Q_elems[i]
             Q[i] += Q_elem
 
         return Q
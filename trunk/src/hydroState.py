@@ -2,6 +2,7 @@
 #  Contains class for describing a hydrodynamic state.
 
 from math import sqrt
+import numpy as np
 
 ## Class for defining the hydrodynamic state at a point
 #
@@ -173,6 +174,265 @@ class HydroState:
 
 
 
+## Class for storing the hydrodynamic states of all cells as arrays
+#
+#  The state variables are stored as one contiguous array per variable
+#  instead of one HydroState object per cell, so that state operations are
+#  array operations. Indexing or iterating returns HydroStateView objects,
+#  so a HydroStateArray may be passed wherever a list of HydroState objects
+#  is expected.
+#
+class HydroStateArray(object):
+
+    ## Constructor
+    #
+    #  @param[in] rho        densities \f$\rho\f$
+    #  @param[in] u          velocities \f$u\f$
+    #  @param[in] gamma      ratio of specific heats \f$\gamma\f$, scalar or
+    #                        array
+    #  @param[in] spec_heat  specific heat \f$c_v\f$, scalar or array
+    #  @param[in] p          pressures \f$p\f$
+    #  @param[in] e          specific internal energies \f$e\f$
+    #
+    def __init__(self, rho, u, gamma, spec_heat, p=None, e=None):
+
+        self.rho = np.array(rho, dtype=float)
+        self.u   = np.array(u, dtype=float)
+        n = len(self.rho)
+        self.gamma     = np.array(np.broadcast_to(gamma, n), dtype=float)
+        self.spec_heat = np.array(np.broadcast_to(spec_heat, n), dtype=float)
+
+        # exactly one of pressure and internal energy must be given
+        if (p is None) == (e is None):
+            raise IOError("You must specify either pressure or internal\
+               energy in HydroStateArray constructor")
+
+        if p is not None:
+            self.p = np.array(p, dtype=float)
+            self.e = getIntErg(self.gamma, self.rho, self.p)
+        else:
+            self.e = np.array(e, dtype=float)
+            self.p = getPressure(self.gamma, self.rho, self.e)
+
+    ## Returns the number of cells
+    #
+    def __len__(self):
+
+        return len(self.rho)
+
+    ## Returns a view of the state of cell i
+    #
+    #  @param[in] i  cell index
+    #
+    #  @return HydroStateView of cell i, or list of views for a slice
+    #
+    def __getitem__(self, i):
+
+        if isinstance(i, slice):
+            return [HydroStateView(self, j)
+               for j in xrange(*i.indices(len(self)))]
+
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("HydroStateArray index out of range")
+
+        return HydroStateView(self, i)
+
+    ## Iterates over views of the state of each cell
+    #
+    def __iter__(self):
+
+        for i in xrange(len(self)):
+            yield HydroStateView(self, i)
+
+    ## Returns a copy with its own arrays
+    #
+    def copy(self):
+
+        new = HydroStateArray.__new__(HydroStateArray)
+        for name in HYDRO_STATE_VARIABLES:
+            setattr(new, name, getattr(self, name).copy())
+
+        return new
+
+    ## Updates all states from conservative variables
+    #
+    #  @param[in] rho  densities \f$\rho\f$
+    #  @param[in] mom  momenta \f$\rho u\f$
+    #  @param[in] erg  total energies \f$E\f$
+    #
+    def updateState(self, rho, mom, erg):
+
+        self.rho[:] = rho
+        self.u[:] = mom/self.rho
+        self.e[:] = erg/self.rho - 0.5*self.u*self.u
+        self.p[:] = getPressure(self.gamma, self.rho, self.e)
+
+    ## Updates velocities.
+    #
+    #  @param[in] u  new velocities \f$u\f$
+    #
+    def updateVelocity(self, u):
+
+        self.u[:] = u
+
+    ## Updates densities only
+    #
+    #  @param[in] rho  new densities \f$\rho\f$
+    #
+    def updateDensity(self, rho):
+
+        self.rho[:] = rho
+
+    ## Updates states based on densities and internal energies, see
+    #  HydroState.updateStateInternalEnergy()
+    #
+    #  @param[in] e  new internal energies \f$e\f$
+    #
+    def updateStateInternalEnergy(self, e):
+
+        self.e[:] = e
+        self.p[:] = getPressure(self.gamma, self.rho, self.e)
+
+    ## Computes sound speeds.
+    #
+    def getSoundSpeed(self):
+
+        return np.sqrt(self.gamma*self.p/self.rho)
+
+    ## Gets temperatures based on internal energy and specific heat
+    #
+    def getTemperature(self):
+
+        return self.e/(self.spec_heat)
+
+    ## Returns conservative variables
+    #
+    #  @return arrays of conservative variables:
+    #     -# \f$\rho\f$
+    #     -# \f$\rho u\f$
+    #     -# \f$E\f$
+    #
+    def getConservativeVariables(self):
+
+        rho = self.rho
+        u   = self.u
+        mom = rho * u
+        erg = rho * (0.5*u*u + self.e)
+
+        return rho.copy(), mom, erg
+
+    ## Returns total energy densities \f$E\f$
+    #
+    def E(self):
+
+        return self.rho*(0.5*self.u*self.u + self.e)
+
+
+## Names of the variables stored by HydroStateArray
+HYDRO_STATE_VARIABLES = ['rho', 'u', 'e', 'p', 'gamma', 'spec_heat']
+
+
+## Creates a property that accesses one entry of a HydroStateArray variable
+#
+def _arrayEntryProperty(name):
+
+    def get(self):
+        return getattr(self.states, name)[self.index]
+
+    def set(self, value):
+        getattr(self.states, name)[self.index] = value
+
+    return property(get, set)
+
+
+## View of the state of one cell of a HydroStateArray.
+#
+#  The view has the interface of HydroState, and reading or updating it reads
+#  or updates the arrays it belongs to. Copying a view creates an independent
+#  HydroState.
+#
+class HydroStateView(HydroState, object):
+
+    rho       = _arrayEntryProperty('rho')
+    u         = _arrayEntryProperty('u')
+    e         = _arrayEntryProperty('e')
+    p         = _arrayEntryProperty('p')
+    gamma     = _arrayEntryProperty('gamma')
+    spec_heat = _arrayEntryProperty('spec_heat')
+
+    ## Constructor
+    #
+    #  @param[in] states  HydroStateArray
+    #  @param[in] index   cell index
+    #
+    def __init__(self, states, index):
+
+        self.states = states
+        self.index = index
+
+    ## Returns an independent HydroState with the values of the view
+    #
+    def __copy__(self):
+
+        return HydroState(self.rho, self.u, self.gamma, self.spec_heat,
+           e=self.e)
+
+    ## Returns an independent HydroState with the values of the view
+    #
+    def __deepcopy__(self, memo):
+
+        return self.__copy__()
+
+    ## Compare function
+    #
+    def __eq__(self, other):
+
+        if isinstance(other, HydroState):
+            return all(getattr(self, name) == getattr(other, name)
+               for name in HYDRO_STATE_VARIABLES)
+        else:
+            return False
+
+
+## Returns states as a HydroStateArray
+#
+#  @param[in] states  HydroStateArray, or list of HydroState objects
+#
+#  @return the given HydroStateArray, or a new one with the values of the list
+#
+def createHydroStateArray(states):
+
+    if isinstance(states, HydroStateArray):
+        return states
+
+    state_array = HydroStateArray(rho=[s.rho for s in states],
+       u=[s.u for s in states], gamma=[s.gamma for s in states],
+       spec_heat=[s.spec_heat for s in states], e=[s.e for s in states])
+
+    # keep the pressures exactly as given rather than recomputing them
+    state_array.p = np.array([s.p for s in states], dtype=float)
+
+    return state_array
+
+
+## Calls an update method of each state with the new value of its cell
+#
+#  @param[in,out] states  HydroStateArray, or list of hydro states
+#  @param[in]     method  name of the update method, e.g., 'updateVelocity'
+#  @param[in]     values  new values of all cells
+#
+def updateEachState(states, method, values):
+
+    if isinstance(states, HydroStateArray):
+        getattr(states, method)(values)
+        return
+
+    for state, value in zip(states, values):
+        getattr(state, method)(value)
+
+
 ## Computes volume
 #
 def getVolume(x1,x2):
@@ -0,0 +1,217 @@
+## @package src.krylovSolver
+#  Provides a preconditioned Krylov solver for the S-2 system.
+#
+#  The system is solved with GMRES or BiCGStab from scipy, preconditioned by
+#  combinations of two O(N) preconditioners:
+#
+#  * block Jacobi: each block couples the four unknowns of one cell, so the
+#    local streaming, collision, and scattering couplings are inverted
+#    exactly and the upwind couplings between cells are left to the Krylov
+#    iteration. This is effective when cells are optically thick, but
+#    converges slowly when they are thin, since then the upwind couplings
+#    dominate.
+#  * sweep: the streaming and collision operator is inverted exactly by a
+#    transport sweep, leaving only scattering to the Krylov iteration. This
+#    is effective when cells are thin, but converges slowly when they are
+#    thick and scattering dominated.
+#
+#  Applying block Jacobi and then a sweep to the remaining residual, with
+#  TwoStagePreconditioner, is effective in both regimes.
+#
+#  An initial guess, such as the previous nonlinear iterate or time step, may
+#  be provided so that the solve only needs to remove the difference between
+#  consecutive solutions.
+
+import numpy as np
+from scipy.sparse.linalg import LinearOperator, gmres, bicgstab
+
+from transportSweep import computeSweepCoefficients, sweepS2
+
+## Number of unknowns per cell in the S-2 system
+S2_BLOCK_SIZE = 4
+
+## Block Jacobi preconditioner for a matrix given in coordinate format.
+#
+#  The inverses of the diagonal blocks are computed once in the constructor;
+#  each call to apply() then only performs a block-wise matrix-vector product.
+#
+class BlockJacobiPreconditioner(object):
+
+   ## Constructor. Extracts and inverts the diagonal blocks.
+   #
+   #  @param[in] n           size of the matrix
+   #  @param[in] rows        row indices of the nonzero entries
+   #  @param[in] cols        column indices of the nonzero entries
+   #  @param[in] vals        values of the nonzero entries
+   #  @param[in] block_size  number of unknowns in each diagonal block
+   #
+   def __init__(self, n, rows, cols, vals, block_size=S2_BLOCK_SIZE):
+
+      self.n = n
+      self.block_size = block_size
+      n_blocks = n / block_size
+
+      # sum entries that lie within a diagonal block
+      rows = np.asarray(rows)
+      cols = np.asarray(cols)
+      inside = rows / block_size == cols / block_size
+      index = (rows[inside] * block_size) + cols[inside] % block_size
+      blocks = np.bincount(index, weights=np.asarray(vals)[inside],
+         minlength=n*block_size).reshape(n_blocks, block_size, block_size)
+
+      # invert all blocks at once
+      self.inverse_blocks = np.linalg.inv(blocks)
+
+   ## Applies the preconditioner, \f$M^{-1}r\f$
+   #
+   #  @param[in] r  vector to precondition
+   #
+   #  @return preconditioned vector
+   #
+   def apply(self, r):
+
+      r_blocks = np.asarray(r).reshape(-1, self.block_size)
+      return np.einsum('ijk,ik->ij', self.inverse_blocks, r_blocks).reshape(-1)
+
+   ## Returns the preconditioner as a scipy LinearOperator
+   #
+   def getLinearOperator(self):
+
+      return LinearOperator((self.n, self.n), matvec=self.apply)
+
+
+## Transport sweep preconditioner for the S-2 system.
+#
+#  Applies the inverse of the streaming and collision operator, i.e., the S-2
+#  operator without scattering.
+#
+class SweepPreconditioner(object):
+
+   ## Constructor. Computes the sweep coefficients.
+   #
+   #  @param[in] mesh            a mesh object
+   #  @param[in] cross_x         list of cross sections for each element
+   #  @param[in] rad_BC          radiation BC object
+   #  @param[in] diag_add_term   \f$\alpha\f$
+   #  @param[in] implicit_scale  \f$\beta\f$
+   #
+   def __init__(self, mesh, cross_x, rad_BC, diag_add_term=0.0,
+      implicit_scale=1.0):
+
+      self.n_elems = mesh.n_elems
+      self.hm, self.sig_t = computeSweepCoefficients(mesh, cross_x,
+         diag_add_term, implicit_scale)
+      self.periodic = rad_BC.bc_type == 'periodic'
+
+   ## Applies the preconditioner, \f$M^{-1}r\f$
+   #
+   #  @param[in] r  vector to precondition
+   #
+   #  @return preconditioned vector
+   #
+   def apply(self, r):
+
+      src = np.asarray(r, dtype=float).reshape(self.n_elems, 2, 2)
+      return sweepS2(self.hm, self.sig_t, src, self.periodic).reshape(-1)
+
+   ## Returns the preconditioner as a scipy LinearOperator
+   #
+   def getLinearOperator(self):
+
+      n = 4*self.n_elems
+      return LinearOperator((n, n), matvec=self.apply)
+
+
+## Two-stage preconditioner, which applies a second preconditioner to the
+#  residual left by the first:
+#  \f[
+#    x_1 = M_1^{-1}r, \qquad M^{-1}r = x_1 + M_2^{-1}(r - Ax_1)
+#  \f]
+#
+class TwoStagePreconditioner(object):
+
+   ## Constructor
+   #
+   #  @param[in] matrix  system matrix \f$A\f$
+   #  @param[in] first   first preconditioner \f$M_1\f$
+   #  @param[in] second  second preconditioner \f$M_2\f$
+   #
+   def __init__(self, matrix, first, second):
+
+      self.matrix = matrix
+      self.first = first
+      self.second = second
+
+   ## Applies the preconditioner, \f$M^{-1}r\f$
+   #
+   #  @param[in] r  vector to precondition
+   #
+   #  @return preconditioned vector
+   #
+   def apply(self, r):
+
+      x = self.first.apply(r)
+      return x + self.second.apply(r - self.matrix.dot(x))
+
+   ## Returns the preconditioner as a scipy LinearOperator
+   #
+   def getLinearOperator(self):
+
+      return LinearOperator(self.matrix.shape, matvec=self.apply)
+
+
+## Solves a linear system with a preconditioned Krylov method.
+#
+#  @param[in] matrix          system matrix, e.g., in CSR format
+#  @param[in] rhs             right hand side vector
+#  @param[in] preconditioner  preconditioner object with a getLinearOperator
+#                             function, e.g., TwoStagePreconditioner
+#  @param[in] initial_guess   initial guess for the solution; zero if None
+#  @param[in] method          string identifier for the Krylov method, either
+#                             'gmres' or 'bicgstab'
+#  @param[in] tol             tolerance on the residual norm relative to the
+#                             norm of the right hand side
+#  @param[in] max_iterations  maximum number of iterations
+#
+#  @return solution vector and number of iterations taken
+#
+def solveKrylov(matrix, rhs, preconditioner=None, initial_guess=None,
+   method='gmres', tol=1.0e-12, max_iterations=1000):
+
+    # the solution of a homogeneous system is zero
+    rhs = np.asarray(rhs, dtype=float)
+    if not np.any(rhs):
+       return np.zeros(len(rhs)), 0
+
+    # an initial guess may already satisfy the tolerance, e.g., when the
+    # nonlinear iteration has converged
+    if initial_guess is not None:
+       initial_guess = np.asarray(initial_guess, dtype=float)
+       residual = rhs - matrix.dot(initial_guess)
+       if np.linalg.norm(residual) <= tol*np.linalg.norm(rhs):
+          return initial_guess.copy(), 0
+
+    # convert preconditioner
+    M = None
+    if preconditioner is not None:
+       M = preconditioner.getLinearOperator()
+
+    # count iterations with a callback
+    n_iterations = [0]
+    def countIteration(arg):
+       n_iterations[0] += 1
+
+    if method == 'gmres':
+       solution, info = gmres(matrix, rhs, x0=initial_guess, tol=tol, atol=0.0,
+          restart=50, maxiter=max_iterations, M=M, callback=countIteration)
+    elif method == 'bicgstab':
+       solution, info = bicgstab(matrix, rhs, x0=initial_guess, tol=tol,
+          atol=0.0, maxiter=max_iterations, M=M, callback=countIteration)
+    else:
+       raise NotImplementedError("Invalid Krylov method")
+
+    if info != 0:
+       raise RuntimeError("Krylov solve did not converge to tolerance %.3e"
+          % tol)
+
+    return solution, n_iterations[0]
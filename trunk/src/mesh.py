@@ -59,6 +59,13 @@ class Mesh:
     def getCellCenters(self):
        return [el.x_cent for el in self.elements]
 
+    ## Returns array of cell widths
+    #
+    #  @return cell widths, \f$h_i,\quad i=1\ldots N\f$
+    #
+    def getCellWidths(self):
+       return np.array([el.dx for el in self.elements])
+
     ## Returns list of cell edges
     #
     #  @return cell edges, \f$x_{i-\frac{1}{2}},\quad i=1\ldots N+1\f$
@@ -1,13 +1,24 @@
 ## @package src.musclHancock
 #  Contains functions for implementing MUSCL-Hancock.
+#
+#  The predictor and corrector are implemented as kernels that operate on
+#  arrays of the conservative variables \f$\rho\f$, \f$\rho u\f$, and \f$E\f$
+#  for all cells at once. hydroPredictor() and hydroCorrector() wrap these
+#  kernels for lists of HydroState objects. The interface fluxes are computed
+#  by one of the array Riemann solvers in riemannSolvers, selected by name.
+#
+#  To avoid allocating new states in every step, a HydroWorkspace may be
+#  passed to the wrappers, in which case the new states are written into
+#  buffers owned by the workspace.
 
 import numpy as np
 from pylab import *
 from math import sqrt, isinf
-from copy import deepcopy
+from copy import copy
 from utilityFunctions import *
-from hydroState import HydroState
+from hydroState import HydroState, HydroStateArray, createHydroStateArray
 from hydroSlopes import HydroSlopes
+from riemannSolvers import getRiemannSolver, computeFluxArrays
 
 ## Predictor solver for hydro.
 #
@@ -15,278 +26,176 @@ from hydroSlopes import HydroSlopes
 #  @param[in] states_old  old cell-average states, \f$\mathbf{H}^n_i\f$
 #  @param[in] slopes      slopes, \f$\Delta_i\f$
 #  @param[in] dt          full time step size, \f$\Delta t\f$
+#  @param[in] workspace   optional HydroWorkspace into which the predicted
+#                         states are written
 # 
 #  @return
 #     -# predicted cell-average states, \f$\mathbf{H}^{n+\frac{1}{2}_i}\f$
 #
-def hydroPredictor(mesh, states_old, slopes, dt):
-
-    # mesh size. NOTE: uniform mesh size is assumed here
-    dx = mesh.getElement(0).dx
-
-    # number of elements
-    n = mesh.n_elems
-
-    ###### THIS ALL PRODUCES THE SAME RESULTS AS CURRENT CODE, LEFT FOR REFERENCE
-    ##Create vectors of conserved quantities
-    #rho = [s.rho for s in states]
-    #mom = [s.rho*s.u for s in states]
-    #erg = [s.rho*(0.5*s.u*s.u + s.e) for s in states]
-    #rho_l, rho_r, mom_l, mom_r, erg_l, erg_r =\
-    #   slopes.computeEdgeConservativeVariablesValues(states)
-
-    ##Compute left and right states
-    #states_l = [deepcopy(i) for i in states] #initialize 
-    #states_r = [deepcopy(i) for i in states]
-    #for i in xrange(len(rho_l)):
-    #    states_l[i].updateState(rho_l[i], mom_l[i], erg_l[i])
-    #    states_r[i].updateState(rho_r[i], mom_r[i], erg_r[i])
-
-    ##Initialize predicited conserved quantities
-    #rho_l_p = [0.0 for i in xrange(len(rho_l))]
-    #rho_r_p = [0.0 for i in xrange(len(rho_l))]
-    #mom_l_p = [0.0 for i in xrange(len(rho_l))]
-    #mom_r_p = [0.0 for i in xrange(len(rho_l))]
-    #erg_l_p = [0.0 for i in xrange(len(rho_l))]
-    #erg_r_p = [0.0 for i in xrange(len(rho_l))]
-
-    ##Advance in time each edge variable
-    #for i in xrange(len(rho_l)):
-
-    #    #rho
-    #    rho_l_p[i] = advCons(rho_l[i],dx,0.5*dt,rhoFlux(states_l[i]),rhoFlux(states_r[i])) 
-    #    rho_r_p[i] = advCons(rho_r[i],dx,0.5*dt,rhoFlux(states_l[i]),rhoFlux(states_r[i])) 
-
-    #    #mom
-    #    mom_l_p[i] = advCons(mom_l[i],dx,0.5*dt,momFlux(states_l[i]),momFlux(states_r[i])) 
-    #    mom_r_p[i] = advCons(mom_r[i],dx,0.5*dt,momFlux(states_l[i]),momFlux(states_r[i])) 
-
-    #    #erg
-    #    erg_l_p[i] = advCons(erg_l[i],dx,0.5*dt,ergFlux(states_l[i]),ergFlux(states_r[i])) 
-    #    erg_r_p[i] = advCons(erg_r[i],dx,0.5*dt,ergFlux(states_l[i]),ergFlux(states_r[i])) 
-
-    ##Advance the primitive variables at the edges
-    #for i in xrange(len(rho_l)):
-    #    states_l[i].updateState(rho_l_p[i], mom_l_p[i], erg_l_p[i])
-    #    states_r[i].updateState(rho_r_p[i], mom_r_p[i], erg_r_p[i])
-
-    ##Return the new averages
-    #for i in xrange(len(states)):
-    #    states[i].updateState(0.5*(rho_l_p[i]+rho_r_p[i]),
-    #                       0.5*(mom_l_p[i]+mom_r_p[i]),
-    #                       0.5*(erg_l_p[i]+erg_r_p[i]))
-
-    #Create vectors of conserved quantities
-    rho = np.zeros(n)
-    mom = np.zeros(n)
-    erg = np.zeros(n)
-    for i in xrange(n):
-       rho[i], mom[i], erg[i] = states_old[i].getConservativeVariables()
+def hydroPredictor(mesh, states_old, slopes, dt, workspace=None):
 
-    # compute edge values
-    rho_L, rho_R, mom_L, mom_R, erg_L, erg_R =\
-       slopes.computeEdgeConservativeVariablesValues(states_old)
+    state_array = createHydroStateArray(states_old)
+    rho, mom, erg = state_array.getConservativeVariables()
 
-    # compute left and right edge states
-    states_L = [deepcopy(i) for i in states_old]
-    states_R = [deepcopy(i) for i in states_old]
-    for i in xrange(n):
-        states_L[i].updateState(rho_L[i], mom_L[i], erg_L[i])
-        states_R[i].updateState(rho_R[i], mom_R[i], erg_R[i])
+    rho_p, mom_p, erg_p = hydroPredictorArrays(rho, mom, erg, slopes,
+       state_array.gamma, mesh.getCellWidths(), dt)
 
-    # initialize predicited conserved quantities
-    rho_p = np.zeros(n)
-    mom_p = np.zeros(n)
-    erg_p = np.zeros(n)
+    if workspace is not None:
+       return updateStates(workspace.getBuffer(states_old), states_old,
+          rho_p, mom_p, erg_p)
 
-    # advance each conservation variable by half a time step
-    for i in xrange(n):
+    return createUpdatedStates(states_old, rho_p, mom_p, erg_p)
 
-        #rho
-        rho_p[i] = advCons(rho[i],dx,0.5*dt,rhoFlux(states_L[i]),rhoFlux(states_R[i])) 
 
-        #mom
-        mom_p[i] = advCons(mom[i],dx,0.5*dt,momFlux(states_L[i]),momFlux(states_R[i])) 
+## Predictor kernel for hydro, operating on arrays of conservative variables.
+#
+#  The edge values of each cell are advanced by half a time step with the
+#  physical fluxes evaluated at the edges, and the predicted cell average is
+#  the average of the advanced edge values.
+#
+#  @param[in] rho     old cell-average densities, \f$\rho^n_i\f$
+#  @param[in] mom     old cell-average momenta, \f$(\rho u)^n_i\f$
+#  @param[in] erg     old cell-average total energies, \f$E^n_i\f$
+#  @param[in] slopes  slopes, \f$\Delta_i\f$
+#  @param[in] gamma   ratios of specific heats of the cells, \f$\gamma_i\f$
+#  @param[in] dx      cell widths, \f$\Delta x_i\f$
+#  @param[in] dt      full time step size, \f$\Delta t\f$
+#
+#  @return predicted cell-average conservative variables:
+#     -# \f$\rho^{n+\frac{1}{2}}_i\f$
+#     -# \f$(\rho u)^{n+\frac{1}{2}}_i\f$
+#     -# \f$E^{n+\frac{1}{2}}_i\f$
+#
+def hydroPredictorArrays(rho, mom, erg, slopes, gamma, dx, dt):
 
-        #erg
-        erg_p[i] = advCons(erg[i],dx,0.5*dt,ergFlux(states_L[i]),ergFlux(states_R[i])) 
-        
-    # compute the predicted cell-average states
-    states_half = deepcopy(states_old)
-    for i in xrange(n):
-        states_half[i].updateState(rho_p[i], mom_p[i], erg_p[i])
+    # compute edge values
+    rho_L, rho_R = computeEdgeValues(rho, slopes.rho_slopes)
+    mom_L, mom_R = computeEdgeValues(mom, slopes.mom_slopes)
+    erg_L, erg_R = computeEdgeValues(erg, slopes.erg_slopes)
+
+    # compute physical fluxes at left and right edges
+    rho_F_L, mom_F_L, erg_F_L = computeFluxArrays(rho_L, mom_L, erg_L, gamma)
+    rho_F_R, mom_F_R, erg_F_R = computeFluxArrays(rho_R, mom_R, erg_R, gamma)
+
+    # advance each conservation variable by half a time step
+    rho_p = advCons(rho, dx, 0.5*dt, rho_F_L, rho_F_R)
+    mom_p = advCons(mom, dx, 0.5*dt, mom_F_L, mom_F_R)
+    erg_p = advCons(erg, dx, 0.5*dt, erg_F_L, erg_F_R)
 
-    return states_half
+    return rho_p, mom_p, erg_p
 
     
-### Corrector solver for hydro. This is an alternative version
-#   That passed the cell-averge values to Riemann solver instead of
-#   the predicted edge values.  In theory both options are second order
-##
-## @param[in] mesh         mesh object
-## @param[in] states_half  predicted cell-average states,
-##    \f$\mathbf{H}^{n+\frac{1}{2}}\f$
-## @param[in] states_old   old cell-average states, \f$\mathbf{H}^n\f$
-## @param[in] slopes_old   old slopes, \f$\Delta^n\f$
-## @param[in] dt           full time step size, \f$\Delta t\f$
-## @param[in] bc           hydro BC object
-##
-## @return
-##    -#  new cell-average states, \f$\mathbf{H}^{n+1}_i\f$
-##
-#def hydroCorrectorAlternative(mesh, states_old, states_half, slopes_old, dt, bc):
-#
-#    #Choose riemann solver
-#    riem_solver = HLLCSolver #HLLSolver, HLLCSolver
-#
-#    #Solve for fluxes and values at faces
-#    n = mesh.n_elems
-#
-#    #Create vectors of predicted variables
-#    rho_p = [s.rho                     for s in states_half]
-#    mom_p = [s.rho*s.u                 for s in states_half]
-#    erg_p = [s.rho*(0.5*s.u*s.u + s.e) for s in states_half]
-#
-#    # get boundary values and states
-#    rho_BC_L, rho_BC_R, mom_BC_L, mom_BC_R, erg_BC_L, erg_BC_R =\
-#       bc.getBoundaryValues()
-#    state_BC_L, state_BC_R = bc.getBoundaryStates()
-#
-#    rho_F = np.zeros(n+1)
-#    mom_F = np.zeros(n+1)
-#    erg_F = np.zeros(n+1)
-#
-#    # solve Riemann problem at each interface
-#    for i in xrange(0,n+1):
-#
-#        # get left and right states for Riemann problem at interface
-#        if i == 0: # left boundary edge
-#            rho_L = rho_BC_L
-#            rho_R = rho_p[i]
-#            mom_L = mom_BC_L
-#            mom_R = mom_p[i]
-#            erg_L = erg_BC_L
-#            erg_R = erg_p[i]
-#            state_L = state_BC_L
-#            state_R = states_half[i]
-#        elif i == n: # right boundary edge
-#            rho_L = rho_p[i-1]
-#            rho_R = rho_BC_R
-#            mom_L = mom_p[i-1]
-#            mom_R = mom_BC_R
-#            erg_L = erg_p[i-1]
-#            erg_R = erg_BC_R
-#            state_L = states_half[i-1]
-#            state_R = state_BC_R
-#        else: # interior edge
-#            rho_L = rho_p[i-1]
-#            rho_R = rho_p[i]
-#            mom_L = mom_p[i-1]
-#            mom_R = mom_p[i]
-#            erg_L = erg_p[i-1]
-#            erg_R = erg_p[i]
-#            state_L = states_half[i-1]
-#            state_R = states_half[i]
-#
-#        # solve Riemann problem at interface
-#        rho_F[i] = riem_solver(rho_L, rho_R, state_L, state_R, rhoFlux)
-#        #print "Fluxes in", momFlux(state_L,state_R)
-#        mom_F[i] = riem_solver(mom_L, mom_R, state_L, state_R, momFlux)
-#        #print "Flux out", mom_F[i]
-#        #print ""
-#        erg_F[i] = riem_solver(erg_L, erg_R, state_L, state_R, ergFlux)
-#
-#    #Intialize cell average quantity arrays at t_old
-#    rho = [s.rho for s in states_old]
-#    mom = [s.rho*s.u for s in states_old]
-#    erg = [s.rho*(0.5*s.u**2. + s.e) for s in states_old]
-#    
-#    #Advance conserved values at centers based on edge fluxes
-#    for i in xrange(len(rho)):
-#
-#        dx = mesh.getElement(i).dx
-#
-#        #Example of edge fluxes:
-#        #   i is 0 for 1st element, so edge 0 and edge 1 is i and i+1
-#        rho[i] = advCons(rho[i],dx,dt,rho_F[i],rho_F[i+1])
-#        mom[i] = advCons(mom[i],dx,dt,mom_F[i],mom_F[i+1])
-#        erg[i] = advCons(erg[i],dx,dt,erg_F[i],erg_F[i+1])
-#
-#    # store the boundary fluxes
-#    bound_F_left = {}
-#    bound_F_right = {}
-#    bound_F_left['rho'] = rho_F[0]
-#    bound_F_left['mom'] = mom_F[0]
-#    bound_F_left['erg'] = erg_F[0]
-#    bound_F_right['rho'] = rho_F[-1]
-#    bound_F_right['mom'] = mom_F[-1]
-#    bound_F_right['erg'] = erg_F[-1]
-#
-#    #Advance primitive variables
-#    states_new = [deepcopy(i) for i in states_old] 
-#    for i in xrange(len(states_new)):
-#        states_new[i].updateState(rho[i],mom[i],erg[i])
-#
-#    return states_new, bound_F_left, bound_F_right
-#
-
-def hydroCorrector(mesh, states_old, states_half, slopes_old, dt, bc):
-
-    # choose riemann solver
-    riem_solver = HLLCSolver #HLLSolver, HLLCSolver
-
-    #Create edge values
-    rho_half_L, rho_half_R, mom_half_L, mom_half_R, erg_half_L, erg_half_R =\
-       slopes_old.computeEdgeConservativeVariablesValues(states_half)
-
-    # Create edge states
-    states_L = deepcopy(states_half) 
-    states_R = deepcopy(states_half)
-    for i in xrange(len(rho_half_L)):
-        states_L[i].updateState(rho_half_L[i], mom_half_L[i], erg_half_L[i])
-        states_R[i].updateState(rho_half_R[i], mom_half_R[i], erg_half_R[i])
-
-    # get boundary values and states
-    rho_BC_L, rho_BC_R, mom_BC_L, mom_BC_R, erg_BC_L, erg_BC_R =\
-       bc.getBoundaryValues()
-    state_BC_L, state_BC_R = bc.getBoundaryStates()
+## Corrector solver for hydro.
+#
+#  @param[in] mesh         mesh object
+#  @param[in] states_old   old cell-average states, \f$\mathbf{H}^n\f$
+#  @param[in] states_half  predicted cell-average states,
+#     \f$\mathbf{H}^{n+\frac{1}{2}}\f$
+#  @param[in] slopes_old   old slopes, \f$\Delta^n\f$
+#  @param[in] dt           full time step size, \f$\Delta t\f$
+#  @param[in] bc           hydro BC object
+#  @param[in] riemann_solver  string identifier for the Riemann solver, e.g.,
+#                             'hllc'; see riemannSolvers.RIEMANN_SOLVERS
+#  @param[in] workspace    optional HydroWorkspace into which the new states
+#                          are written
+#
+#  @return
+#     -# new cell-average states, \f$\mathbf{H}^{n+1}_i\f$
+#     -# dictionary of fluxes on the left boundary
+#     -# dictionary of fluxes on the right boundary
+#
+def hydroCorrector(mesh, states_old, states_half, slopes_old, dt, bc,
+    riemann_solver='hllc', workspace=None):
 
-    n = mesh.n_elems
-    rho_F = np.zeros(n+1)
-    mom_F = np.zeros(n+1)
-    erg_F = np.zeros(n+1)
+    state_array = createHydroStateArray(states_old)
+    rho_old, mom_old, erg_old = state_array.getConservativeVariables()
+    rho_half, mom_half, erg_half = getConservativeVariableArrays(states_half)
 
-    #Check if it is reflective, if so we need to reset the states due to the way the
-    #edge values work. This is kind of crappy coding
-    if bc.bc_type == "reflective":
+    rho, mom, erg, bound_F_left, bound_F_right = hydroCorrectorArrays(
+       rho_old, mom_old, erg_old, rho_half, mom_half, erg_half, slopes_old,
+       state_array.gamma, mesh.getCellWidths(), dt, bc, riemann_solver)
 
-        rho_F[0] = rhoFlux(states_L[0])
-        mom_F[0] = momFlux(states_L[0])
-        erg_F[0] = ergFlux(states_L[0])
+    if workspace is not None:
+       states_new = updateStates(workspace.getBuffer(states_old, states_half),
+          states_old, rho, mom, erg)
+    else:
+       states_new = createUpdatedStates(states_old, rho, mom, erg)
 
-        rho_F[-1] = rhoFlux(states_R[-1])
-        mom_F[-1] = momFlux(states_R[-1])
-        erg_F[-1] = ergFlux(states_R[-1])
+    return states_new, bound_F_left, bound_F_right
 
-    else: # Dirichlet
 
-        rho_F[0] = riem_solver(rho_BC_L, rho_half_L[0], state_BC_L, states_L[0], rhoFlux)
-        mom_F[0] = riem_solver(mom_BC_L, mom_half_L[0], state_BC_L, states_L[0], momFlux)
-        erg_F[0] = riem_solver(erg_BC_L, erg_half_L[0], state_BC_L, states_L[0], ergFlux)
+## Corrector kernel for hydro, operating on arrays of conservative variables.
+#
+#  Edge values are reconstructed from the predicted cell averages with the
+#  old slopes, fluxes are computed at all interfaces, and the old cell
+#  averages are advanced by a full time step.
+#
+#  @param[in] rho_old     old cell-average densities, \f$\rho^n_i\f$
+#  @param[in] mom_old     old cell-average momenta, \f$(\rho u)^n_i\f$
+#  @param[in] erg_old     old cell-average total energies, \f$E^n_i\f$
+#  @param[in] rho_half    predicted cell-average densities
+#  @param[in] mom_half    predicted cell-average momenta
+#  @param[in] erg_half    predicted cell-average total energies
+#  @param[in] slopes_old  old slopes, \f$\Delta^n\f$
+#  @param[in] gamma       ratios of specific heats of the cells,
+#                         \f$\gamma_i\f$
+#  @param[in] dx          cell widths, \f$\Delta x_i\f$
+#  @param[in] dt          full time step size, \f$\Delta t\f$
+#  @param[in] bc          hydro BC object
+#  @param[in] riemann_solver  string identifier for the Riemann solver, e.g.,
+#                         'hllc'; see riemannSolvers.RIEMANN_SOLVERS
+#
+#  @return
+#     -# new cell-average densities, \f$\rho^{n+1}_i\f$
+#     -# new cell-average momenta, \f$(\rho u)^{n+1}_i\f$
+#     -# new cell-average total energies, \f$E^{n+1}_i\f$
+#     -# dictionary of fluxes on the left boundary
+#     -# dictionary of fluxes on the right boundary
+#
+def hydroCorrectorArrays(rho_old, mom_old, erg_old, rho_half, mom_half,
+    erg_half, slopes_old, gamma, dx, dt, bc, riemann_solver='hllc'):
 
-        rho_F[-1] = riem_solver(rho_BC_R, rho_half_R[-1], state_BC_R, states_R[-1], rhoFlux)
-        mom_F[-1] = riem_solver(mom_BC_R, mom_half_R[-1], state_BC_R, states_R[-1], momFlux)
-        erg_F[-1] = riem_solver(erg_BC_R, erg_half_R[-1], state_BC_R, states_R[-1], ergFlux)
+    # create edge values
+    rho_half_L, rho_half_R = computeEdgeValues(rho_half, slopes_old.rho_slopes)
+    mom_half_L, mom_half_R = computeEdgeValues(mom_half, slopes_old.mom_slopes)
+    erg_half_L, erg_half_R = computeEdgeValues(erg_half, slopes_old.erg_slopes)
+
+    # get boundary values
+    rho_BC_L, rho_BC_R, mom_BC_L, mom_BC_R, erg_BC_L, erg_BC_R =\
+       bc.getBoundaryValues()
 
-    #Do the interior cells
-    for i in xrange(0,n-1):
+    # ratios of specific heats on both sides of each interface; the boundary
+    # values have the ratio of the cell they are taken from, which is the
+    # cell on the opposite end of the domain for periodic BC
+    gamma = np.broadcast_to(np.asarray(gamma, dtype=float), rho_old.shape)
+    if bc.bc_type == "periodic":
+       gamma_BC_L, gamma_BC_R = gamma[-1:], gamma[:1]
+    else:
+       gamma_BC_L, gamma_BC_R = gamma[:1], gamma[-1:]
+    gamma_l = np.concatenate((gamma_BC_L, gamma[:-1], gamma_BC_R))
+    gamma_r = np.concatenate((gamma, gamma[-1:]))
+
+    # Riemann problems at all interfaces: interface i lies between the right
+    # edge of cell i-1 and the left edge of cell i. On the right boundary, the
+    # boundary value is passed as the left value and the right edge of the
+    # last cell as the right value.
+    rho_F, mom_F, erg_F = getRiemannSolver(riemann_solver)(
+       np.concatenate(([rho_BC_L], rho_half_R[:-1], [rho_BC_R])),
+       np.concatenate(([mom_BC_L], mom_half_R[:-1], [mom_BC_R])),
+       np.concatenate(([erg_BC_L], erg_half_R[:-1], [erg_BC_R])),
+       np.concatenate((rho_half_L, rho_half_R[-1:])),
+       np.concatenate((mom_half_L, mom_half_R[-1:])),
+       np.concatenate((erg_half_L, erg_half_R[-1:])),
+       gamma_l, gamma_r)
+
+    # for reflective BC, the boundary fluxes are the physical fluxes at the
+    # boundary edges
+    if bc.bc_type == "reflective":
 
-        rho_F[i+1] = riem_solver(rho_half_R[i], rho_half_L[i+1], states_R[i],
-                states_L[i+1], rhoFlux)
-        mom_F[i+1] = riem_solver(mom_half_R[i], mom_half_L[i+1], states_R[i],
-                states_L[i+1], momFlux)
-        erg_F[i+1] = riem_solver(erg_half_R[i], erg_half_L[i+1], states_R[i],
-                states_L[i+1], ergFlux)
+       rho_F[0], mom_F[0], erg_F[0] = computeFluxArrays(rho_half_L[0],
+          mom_half_L[0], erg_half_L[0], gamma[0])
+       rho_F[-1], mom_F[-1], erg_F[-1] = computeFluxArrays(rho_half_R[-1],
+          mom_half_R[-1], erg_half_R[-1], gamma[-1])
 
     #Store the boundary condition fluxes
     bound_F_left = {}
@@ -298,28 +207,131 @@ def hydroCorrector(mesh, states_old, states_half, slopes_old, dt, bc):
     bound_F_right['mom'] = mom_F[-1]
     bound_F_right['erg'] = erg_F[-1]
 
-    #Intialize cell average quantity arrays at t_old
-    rho = [s.rho for s in states_old]
-    mom = [s.rho*s.u for s in states_old]
-    erg = [s.rho*(0.5*s.u**2. + s.e) for s in states_old]
-    
-    #Advance conserved values at centers based on edge fluxes
-    for i in xrange(len(rho)):
+    # advance conserved values at centers based on edge fluxes; cell i has
+    # edges i and i+1
+    rho = advCons(rho_old, dx, dt, rho_F[:-1], rho_F[1:])
+    mom = advCons(mom_old, dx, dt, mom_F[:-1], mom_F[1:])
+    erg = advCons(erg_old, dx, dt, erg_F[:-1], erg_F[1:])
 
-        dx = mesh.getElement(i).dx
+    return rho, mom, erg, bound_F_left, bound_F_right
 
-        #Example of edge fluxes:
-        #   i is 0 for 1st element, so edge 0 and edge 1 is i and i+1
-        rho[i] = advCons(rho[i],dx,dt,rho_F[i],rho_F[i+1])
-        mom[i] = advCons(mom[i],dx,dt,mom_F[i],mom_F[i+1])
-        erg[i] = advCons(erg[i],dx,dt,erg_F[i],erg_F[i+1])
 
-    #Advance primitive variables
-    states_new = [deepcopy(i) for i in states_old] 
+## Returns arrays of the conservative variables of a list of states
+#
+#  @param[in] states  HydroStateArray, or list of hydro states
+#
+#  @return arrays of \f$\rho\f$, \f$\rho u\f$, and \f$E\f$
+#
+def getConservativeVariableArrays(states):
+
+    return createHydroStateArray(states).getConservativeVariables()
+
+
+## Computes left and right edge values from cell averages and slopes
+#
+#  @param[in] values  cell-average values, \f$y_i\f$
+#  @param[in] slopes  slopes, \f$\Delta y_i\f$
+#
+#  @return left and right edge values, \f$y_i\mp\frac{1}{2}\Delta y_i\f$
+#
+def computeEdgeValues(values, slopes):
+
+    return values - 0.5*slopes, values + 0.5*slopes
+
+
+## Creates new states by updating copies of existing states with new
+#  conservative variables
+#
+#  @param[in] states  HydroStateArray, or list of hydro states, to copy
+#  @param[in] rho     new densities, \f$\rho\f$
+#  @param[in] mom     new momenta, \f$\rho u\f$
+#  @param[in] erg     new total energies, \f$E\f$
+#
+#  @return new states, of the same type as the given states
+#
+def createUpdatedStates(states, rho, mom, erg):
+
+    if isinstance(states, HydroStateArray):
+        states_new = states.copy()
+        states_new.updateState(rho, mom, erg)
+        return states_new
+
+    # update shallow copies of each state
+    states_new = [copy(s) for s in states]
     for i in xrange(len(states_new)):
-        states_new[i].updateState(rho[i],mom[i],erg[i])
+        states_new[i].updateState(rho[i], mom[i], erg[i])
 
-    return states_new, bound_F_left, bound_F_right
+    return states_new
+
+
+## Updates existing states in place with new conservative variables
+#
+#  The ratio of specific heats and the specific heat of each state are taken
+#  from the corresponding reference state.
+#
+#  @param[in,out] states  HydroStateArray, or list of hydro states, to update
+#  @param[in] states_ref  HydroStateArray, or list of hydro states, from which
+#                         the material properties are taken
+#  @param[in] rho         new densities, \f$\rho\f$
+#  @param[in] mom         new momenta, \f$\rho u\f$
+#  @param[in] erg         new total energies, \f$E\f$
+#
+#  @return the updated states
+#
+def updateStates(states, states_ref, rho, mom, erg):
+
+    if isinstance(states, HydroStateArray):
+        states_ref = createHydroStateArray(states_ref)
+        states.gamma[:] = states_ref.gamma
+        states.spec_heat[:] = states_ref.spec_heat
+        states.updateState(rho, mom, erg)
+        return states
+
+    for i in xrange(len(states)):
+        states[i].gamma = states_ref[i].gamma
+        states[i].spec_heat = states_ref[i].spec_heat
+        states[i].updateState(rho[i], mom[i], erg[i])
+
+    return states
+
+
+## Preallocated state buffers for the MUSCL-Hancock step.
+#
+#  The workspace owns three buffers of the same type as the states it is
+#  created from: one for the predicted states, and two that are used in turn
+#  for the new states. A buffer that is passed as an input to a step is never
+#  written by that step, so the new states of one step may be passed as the
+#  old states of the next step. Any other state returned by the workspace is
+#  overwritten by later steps and must be copied if it is to be kept.
+#
+class HydroWorkspace(object):
+
+    ## Constructor
+    #
+    #  @param[in] states  HydroStateArray, or list of hydro states, from which
+    #                     the buffers are copied
+    #
+    def __init__(self, states):
+
+        if isinstance(states, HydroStateArray):
+            self.buffers = [states.copy() for i in xrange(3)]
+        else:
+            self.buffers = [[copy(s) for s in states] for i in xrange(3)]
+
+    ## Returns the first buffer that is not one of the given states
+    #
+    #  @param[in] states_in  states that are inputs to the step, which may
+    #                        not be overwritten
+    #
+    #  @return buffer for the output states of the step
+    #
+    def getBuffer(self, *states_in):
+
+        for buffer in self.buffers:
+            if not [states for states in states_in if states is buffer]:
+                return buffer
+
+        raise ValueError("All workspace buffers are inputs to the step")
 
 
 #------------------------------------------------------------------------------------
@@ -2,18 +2,56 @@
 #  Provides functions for performing nonlinear solves
 #
 
-from copy import deepcopy
+from copy import copy
+import numpy as np
+from scipy.sparse.linalg import LinearOperator
 
 from takeRadiationStep import takeRadiationStep
 from utilityFunctions import computeL2RelDiff, computeEffectiveOpacities,\
    updateCrossSections, computeHydroInternalEnergies
 from hydroSource import updateVelocity, updateInternalEnergy, QEHandler, \
-                        updateDensity
+                        updateDensity, VelocityUpdateSourceHandler
+from transientSource import createRadiationSourceTerms
 from radSlopesHandler import computeTotalEnergySlopes
+from krylovSolver import solveKrylov
+from radiation import Radiation
+from hydroState import HydroStateArray, HYDRO_STATE_VARIABLES, \
+   createHydroStateArray, updateEachState
 
 
 ## Performs nonlinear solve
 #
+#  Each Picard iteration linearizes the Planckian about the previous iterate
+#  and solves the velocity, radiation, and internal energy updates. These
+#  iterations are either repeated until convergence, possibly with Anderson
+#  acceleration, see performAndersonIterations(), or used as the
+#  preconditioner of a Jacobian-free Newton-Krylov method, see
+#  performNewtonIterations().
+#
+#  @param[in] dt_ratio  ratio of the time step size to the previous time step
+#                       size, used by the BDF2 time-stepper
+#  @param[in] nonlinear_solver  string identifier for the nonlinear solver,
+#                       'picard', 'anderson', or 'jfnk'
+#  @param[in] anderson_depth  history depth of Anderson acceleration
+#  @param[in] tol       tolerance for the relative change between iterates
+#  @param[in] time_error  estimate of the relative local time discretization
+#                       error of the step, e.g., that of the previous step;
+#                       if provided, the tolerance is adapted to it, see
+#                       NonlinearConvergenceTest
+#  @param[in] nonlinear_safety  ratio of the adapted tolerance to the time
+#                       discretization error
+#
+#  @param[in] initial_guess  initial nonlinear iterate: 'old' for the old
+#                       solution, or 'extrapolated' for the linear
+#                       extrapolation of the old and older solutions to the
+#                       new time, see extrapolateInitialIterate(), if the
+#                       older solutions are provided
+#  @param[in] workspace  optional NonlinearWorkspace holding the buffer of
+#                       the hydro iterates, which is reused by later solves
+#
+#  The hydro states, radiation, and edge internal energies of the old and
+#  star solutions are only read, never modified.
+#
 #  @return new hydro and rad solutions
 #
 def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
@@ -21,7 +59,10 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
    Qpsi_new, Qmom_new, Qerg_new, Qpsi_old, Qmom_old, Qerg_old, Qpsi_older,
    Qmom_older, Qerg_older, Qrho_new=None, Qrho_old=None, Qrho_older=None,
    rad_older=None, cx_older=None, hydro_older=None, slopes_older=None,
-   e_rad_older=None, e_rad_save=None, tol=1.0e-12, verbosity=2):
+   e_rad_older=None, e_rad_save=None, tol=1.0e-12, verbosity=2,
+   rad_solver='banded', dt_ratio=1.0, nonlinear_solver='picard',
+   anderson_depth=3, time_error=None, nonlinear_safety=0.1,
+   initial_guess='old', workspace=None):
 
    # assert that that older arguments were passed if using BDF2
    if time_stepper == 'BDF2':
@@ -31,18 +72,33 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
       assert(slopes_older   != None)
       assert(e_rad_older.size != 0)
 
-   # initialize iterates to the old quantities
-   hydro_new  = deepcopy(hydro_star)
-   hydro_prev = deepcopy(hydro_star)
-   rad_prev   = deepcopy(rad_old)
-   cx_prev    = deepcopy(cx_old)
+   # initialize iterates to the old quantities; the radiation and edge
+   # internal energies of each iterate are new objects, so the old ones are
+   # referenced rather than copied
+   if workspace is None:
+      workspace = NonlinearWorkspace()
+   hydro_new, hydro_prev = workspace.getIterates(hydro_star)
+   rad_prev   = rad_old
+   cx_prev    = copyCrossSections(cx_old)
 
    #Guess that e_rad previous is erad_old
-   e_rad_prev = deepcopy(e_rad_old)
+   e_rad_prev = e_rad_old
+
+   # predict the radiation and edge internal energies at the new time, and
+   # evaluate the cross sections with the predicted internal energies
+   if initial_guess not in ['old', 'extrapolated']:
+      raise NotImplementedError("Invalid initial guess option")
+   if initial_guess == 'extrapolated' and rad_older is not None and\
+      e_rad_older is not None:
+      rad_prev, e_rad_prev = extrapolateInitialIterate(rad_old, rad_older,
+         e_rad_old, e_rad_older, dt_ratio)
+      updateCrossSections(cx_prev, hydro_prev, slopes_old, e_rad_prev)
 
    # initialize convergence flag and iteration counter
    converged = False
    k = 0
+   convergence_test = NonlinearConvergenceTest(tol, time_error,
+      nonlinear_safety)
 
    # Compute E_slopes in 1 of 2 ways explained below
    use_hydro_star_slopes = False
@@ -76,10 +132,8 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
    else:
 
       #Use e_rad_old if no save available
-      if e_rad_save == None:
-          e_rad_save = deepcopy(e_rad_old)
-      else:
-          print "HELLO DOLLY!"
+      if e_rad_save is None:
+          e_rad_save = e_rad_old
 
     
       E_slopes_star  = computeTotalEnergySlopes(hydro_star, slopes_old,
@@ -89,11 +143,21 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
       if hydro_older != None:
           E_slopes_older = slopes_older.erg_slopes
 
-   # perform nonlinear iterations:
-   while not converged:
+   # create the source handlers of the time step; the parts of the sources
+   # that depend only on the old and older quantities are computed in the
+   # first iteration and reused in all later iterations
+   rad_source_terms = createRadiationSourceTerms(mesh, time_stepper,
+      problem_type, cache_fixed_terms=True)
+   QE_handler = QEHandler(mesh, time_stepper)
+   QE_handler.cacheFixedTerm()
+   velocity_handler = VelocityUpdateSourceHandler(mesh, time_stepper)
+   velocity_handler.cacheFixedTerm()
 
-       # increment iteration counter
-       k += 1
+   # Performs one Picard iteration: solves the velocity, radiation, and
+   # internal energy updates linearized about the previous iterate. The new
+   # densities, velocities, and internal energies are put in hydro_new,
+   # overwriting all of its values that change between iterates.
+   def picardUpdate(hydro_prev, rad_prev, e_rad_prev, cx_prev):
 
        # If MMS, may need to update rho
        updateDensity(
@@ -105,7 +169,8 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
              hydro_prev   = hydro_prev,
              Qrho_new     = Qrho_new,
              Qrho_old     = Qrho_old,
-             Qrho_older   = Qrho_older)
+             Qrho_older   = Qrho_older,
+             dt_ratio     = dt_ratio)
 
 
        # update velocity
@@ -116,6 +181,7 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
              dt           = dt,
              hydro_star   = hydro_star,
              hydro_new    = hydro_new,
+             src_handler  = velocity_handler,
              cx_older     = cx_older,
              cx_old       = cx_old,
              cx_prev      = cx_prev,
@@ -129,12 +195,12 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
              slopes_older = slopes_older,
              Qmom_new     = Qmom_new,
              Qmom_old     = Qmom_old,
-             Qmom_older   = Qmom_older)
+             Qmom_older   = Qmom_older,
+             dt_ratio     = dt_ratio)
 
     
        # compute QE
-       src_handler = QEHandler(mesh, time_stepper)
-       QE = src_handler.computeTerm(
+       QE = QE_handler.computeTerm(
           cx_prev     = cx_prev,
           cx_old      = cx_old,
           cx_older    = cx_older,
@@ -153,7 +219,8 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
           e_rad_older = e_rad_older,
           Qerg_new     = Qerg_new,
           Qerg_old     = Qerg_old,
-          Qerg_older   = Qerg_older)
+          Qerg_older   = Qerg_older,
+          dt_ratio     = dt_ratio)
 
        # get the modified scattering cross sections
        cx_mod_prev = computeEffectiveOpacities(
@@ -167,8 +234,10 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
        # perform radiation solve
        rad_new = takeRadiationStep(
            mesh          = mesh,
+           rad_solver    = rad_solver,
            time_stepper  = time_stepper,
            problem_type  = problem_type,
+           source_terms  = rad_source_terms,
            dt            = dt,
            rad_BC        = rad_BC,
            cx_new        = cx_mod_prev,
@@ -194,7 +263,8 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
            e_rad_older = e_rad_older,
            Qpsi_new      = Qpsi_new,
            Qpsi_old      = Qpsi_old,
-           Qpsi_older    = Qpsi_older)
+           Qpsi_older    = Qpsi_older,
+           dt_ratio      = dt_ratio)
 
        # update internal energy
        e_rad_new = updateInternalEnergy(
@@ -210,24 +280,579 @@ def nonlinearSolve(mesh, time_stepper, problem_type, dt, rad_BC,
           E_slopes_star= E_slopes_star,
           e_rad_prev   = e_rad_prev)
 
+       return rad_new, e_rad_new
+
+   if nonlinear_solver not in ['picard', 'anderson', 'jfnk']:
+      raise NotImplementedError("Invalid nonlinear solver")
+
+   # perform Newton iterations on the residual of the Picard update
+   if nonlinear_solver == 'jfnk':
+      rad_new, e_rad_new = performNewtonIterations(picardUpdate, hydro_new,
+         hydro_prev, rad_prev, e_rad_prev, cx_prev, slopes_old,
+         include_velocity=problem_type != 'rad_mat',
+         convergence_test=convergence_test,
+         verbosity=verbosity)
+      converged = True
+
+   # perform Picard iterations with Anderson acceleration
+   if nonlinear_solver == 'anderson':
+      rad_new, e_rad_new = performAndersonIterations(picardUpdate, hydro_new,
+         hydro_prev, rad_prev, e_rad_prev, cx_prev, slopes_old,
+         include_velocity=problem_type != 'rad_mat',
+         convergence_test=convergence_test,
+         depth=anderson_depth, verbosity=verbosity)
+      converged = True
+
+   # perform nonlinear iterations:
+   while not converged:
+
+       # increment iteration counter
+       k += 1
+
+       # perform Picard iteration
+       rad_new, e_rad_new = picardUpdate(hydro_prev, rad_prev, e_rad_prev,
+          cx_prev)
+
        # check nonlinear convergence
-       # TODO: compute diff of rad solution as well to add to convergence criteria
-       rel_diff = computeL2RelDiff(hydro_new, hydro_prev, aux_func=lambda x: x.E())
+       rel_diff, converged = convergence_test.check(hydro_new, hydro_prev,
+          rad_new, rad_prev)
 
        if verbosity > 1:
           print("      Iteration %d: Difference = %7.3e" % (k,rel_diff))
-       if rel_diff < tol:
+       if converged:
           if verbosity > 1:
-             print("      Nonlinear iteration converged to tolerance %.3e" % tol)
+             print("      Nonlinear iteration converged to tolerance %.3e" %
+                convergence_test.tol_current)
           break
 
-       # reset previous iteration quantities if needed
-       hydro_prev = deepcopy(hydro_new)
-       rad_prev   = deepcopy(rad_new)
-       e_rad_prev = deepcopy(e_rad_new)
+       # the new iterate becomes the previous iterate by swapping the hydro
+       # buffers, so the next iteration overwrites the states of the
+       # previous iterate
        updateCrossSections(cx_prev,hydro_new,slopes_old,e_rad_new)      
+       hydro_prev, hydro_new = hydro_new, hydro_prev
+       rad_prev   = rad_new
+       e_rad_prev = e_rad_new
 
-   # return new hydro and radiation
+   # return new hydro and radiation; the buffer of the previous iterate is
+   # kept for the next solve
+   workspace.release(hydro_prev)
    return hydro_new, rad_new, cx_prev, e_rad_new
 
 
+## Buffers for the hydro states of the nonlinear iterates.
+#
+#  The nonlinear iterations keep the new and previous hydro iterates in two
+#  buffers, which the Picard iterations swap after each iteration instead of
+#  copying the new iterate. Only the buffer of the converged iterate is
+#  returned; it is kept by the caller, e.g., as a time level, so it is newly
+#  created by each solve. The other buffer is given back to the workspace
+#  and reused by the next solve.
+#
+class NonlinearWorkspace(object):
+
+   ## Constructor
+   #
+   def __init__(self):
+
+      # buffer not in use by a solve, if any
+      self.buffer = None
+
+   ## Returns the hydro states of the new and previous iterates, both set to
+   #  the given states
+   #
+   #  @param[in] states  HydroStateArray, or list of hydro states
+   #
+   #  @return new and previous hydro iterates
+   #
+   def getIterates(self, states):
+
+      states_new = copyHydroStates(states)
+
+      # reuse the buffer if it is compatible with the states
+      states_prev, self.buffer = self.buffer, None
+      if isinstance(states, HydroStateArray):
+         if isinstance(states_prev, HydroStateArray) and\
+            len(states_prev) == len(states):
+            for name in HYDRO_STATE_VARIABLES:
+               getattr(states_prev, name)[:] = getattr(states, name)
+         else:
+            states_prev = copyHydroStates(states)
+      elif isinstance(states_prev, list) and len(states_prev) == len(states):
+         for state_prev, state in zip(states_prev, states):
+            state_prev.__dict__.update(state.__dict__)
+      else:
+         states_prev = copyHydroStates(states)
+
+      return states_new, states_prev
+
+   ## Gives a buffer back to the workspace, after which it may be
+   #  overwritten by later solves
+   #
+   #  @param[in] states  hydro states no longer used by the caller
+   #
+   def release(self, states):
+
+      self.buffer = states
+
+
+## Returns a copy of hydro states that shares no data with them
+#
+#  @param[in] states  HydroStateArray, or list of hydro states
+#
+def copyHydroStates(states):
+
+   if isinstance(states, HydroStateArray):
+      return states.copy()
+
+   # the attributes of the states are floats, so shallow copies suffice
+   return [copy(s) for s in states]
+
+
+## Returns a copy of the cross sections of all cells, which may be updated
+#  without changing the given cross sections
+#
+#  The cross sections are updated by rebinding their attributes, see
+#  crossXInterface.CrossXInterface.updateCrossX, so shallow copies of the
+#  cross section objects suffice.
+#
+#  @param[in] cx  list of the cross sections of the edges of each cell
+#
+def copyCrossSections(cx):
+
+   return [type(cx_i)(copy(x) for x in cx_i) for cx_i in cx]
+
+
+## Extrapolates the old and older radiation and edge internal energies
+#  linearly in time to the new time, for the initial nonlinear iterate.
+#
+#  With the ratio \f$r = \Delta t_n/\Delta t_{n-1}\f$ of the current to the
+#  previous time step size, the extrapolation is
+#  \f$y^n + r\left(y^n - y^{n-1}\right)\f$. Where it gives non-physical
+#  values, i.e., negative angular fluxes or non-positive internal energies,
+#  the old values are used instead.
+#
+#  @param[in] rad_old      old radiation
+#  @param[in] rad_older    older radiation
+#  @param[in] e_rad_old    old edge internal energies
+#  @param[in] e_rad_older  older edge internal energies
+#  @param[in] dt_ratio     ratio of the current to the previous time step size
+#
+#  @return extrapolated radiation and edge internal energies
+#
+def extrapolateInitialIterate(rad_old, rad_older, e_rad_old, e_rad_older,
+   dt_ratio=1.0):
+
+   psi_old = rad_old.psi
+   psi = psi_old + dt_ratio*(psi_old - rad_older.psi)
+   psi = np.where(psi >= 0.0, psi, psi_old)
+
+   e_old = np.asarray(e_rad_old, dtype=float)
+   e = e_old + dt_ratio*(e_old - np.asarray(e_rad_older, dtype=float))
+   e = np.where(e > 0.0, e, e_old)
+
+   return Radiation(psi), e
+
+
+## Stopping test of the nonlinear iterations.
+#
+#  The change between two iterates is the larger of the \f$L^2\f$ relative
+#  differences of the total energy and of the radiation energy density.
+#
+#  With a fixed tolerance, the iterations are converged when the change is
+#  below the tolerance. If an estimate of the local time discretization
+#  error of the step is provided, the tolerance is adapted to it: iterating
+#  beyond the time discretization error does not make the solution more
+#  accurate. The change is then converted into an estimate of the remaining
+#  iteration error, \f$\frac{\rho}{1-\rho}\|x_{k+1} - x_k\|\f$, with the
+#  contraction factor \f$\rho\f$ estimated as the ratio of the last two
+#  changes, and the iterations are converged when this estimate is below
+#  the time discretization error times a safety factor, or when the change
+#  is below the fixed tolerance. Iterations that do not contract are only
+#  converged with the fixed tolerance.
+#
+class NonlinearConvergenceTest(object):
+
+   ## Constructor
+   #
+   #  @param[in] tol         fixed tolerance for the relative change
+   #  @param[in] time_error  estimate of the relative local time
+   #                         discretization error, or None for a fixed
+   #                         tolerance
+   #  @param[in] safety      ratio of the adapted tolerance to the time
+   #                         discretization error
+   #
+   def __init__(self, tol=1.0e-12, time_error=None, safety=0.1):
+
+      self.tol = tol
+      self.tol_adapted = None
+      if time_error is not None:
+         self.tol_adapted = max(tol, safety*time_error)
+
+      # tolerance used by the last check
+      self.tol_current = tol
+
+      # change of the previous check
+      self.rel_diff_old = None
+
+   ## Checks convergence of an iterate
+   #
+   #  @param[in] hydro_new  hydro states of the new iterate
+   #  @param[in] hydro_prev hydro states of the previous iterate
+   #  @param[in] rad_new    radiation of the new iterate
+   #  @param[in] rad_prev   radiation of the previous iterate
+   #
+   #  @return relative change between the iterates, and a flag signalling
+   #          convergence
+   #
+   def check(self, hydro_new, hydro_prev, rad_new, rad_prev):
+
+      rel_diff = max(
+         computeL2RelDiff(hydro_new, hydro_prev, aux_func=lambda s: s.E()),
+         computeL2RelDiff(np.ravel(rad_new.E), np.ravel(rad_prev.E)))
+
+      converged = rel_diff < self.tol
+      self.tol_current = self.tol
+      if not converged and self.tol_adapted is not None and\
+         self.rel_diff_old is not None:
+
+         rho = rel_diff/self.rel_diff_old
+         if rho < 1.0:
+            converged = rho/(1.0 - rho)*rel_diff < self.tol_adapted
+            self.tol_current = self.tol_adapted
+
+      self.rel_diff_old = rel_diff
+      return rel_diff, converged
+
+
+## Performs Jacobian-free Newton-Krylov (JFNK) iterations.
+#
+#  Newton's method is applied to the residual of the Picard update,
+#  \f$F(x) = x - G(x)\f$, where the iterate \f$x\f$ contains the angular
+#  fluxes, the cell-average and edge internal energies, and the velocities,
+#  and \f$G\f$ is one Picard iteration. Since the Picard update already
+#  solves the linearized radiation and material equations, it acts as a
+#  physics-based preconditioner: only the few slowly converging modes of the
+#  Picard iteration are left to the Krylov solver. The Newton systems are
+#  solved inexactly with GMRES, using finite-difference Jacobian-vector
+#  products,
+#  \f[
+#    F'(x)v \approx v - \frac{G(x + \epsilon v) - G(x)}{\epsilon},
+#  \f]
+#  so each GMRES iteration costs one Picard iteration. The variables are
+#  scaled by their root-mean-square values so that all have comparable
+#  magnitudes. A Newton step is only accepted if it gives positive internal
+#  energies and reduces the residual norm; otherwise, a Picard step is taken
+#  instead.
+#
+#  The convergence criterion is the same as for Picard iteration, applied
+#  to the change between \f$x\f$ and \f$G(x)\f$.
+#
+#  @param[in]     picardUpdate  function performing one Picard iteration,
+#                               see nonlinearSolve()
+#  @param[in,out] hydro_new     new hydro states, set to the Picard update of
+#                               the final iterate
+#  @param[in,out] hydro_prev    hydro states, set to those of the iterate
+#  @param[in]     rad_prev      initial radiation iterate
+#  @param[in]     e_rad_prev    initial edge internal energies
+#  @param[in,out] cx_prev       cross sections, updated for each iterate
+#  @param[in]     slopes_old    old hydro slopes
+#  @param[in]     include_velocity  flag to include the velocities in the
+#                               iterate, which are constant for 'rad_mat'
+#  @param[in]     convergence_test  NonlinearConvergenceTest; by default,
+#                               the fixed tolerance of nonlinearSolve()
+#  @param[in]     max_krylov_iterations  maximum number of GMRES iterations
+#                               per Newton step
+#
+#  @return new radiation solution and edge internal energies
+#
+def performNewtonIterations(picardUpdate, hydro_new, hydro_prev, rad_prev,
+   e_rad_prev, cx_prev, slopes_old, include_velocity=True, convergence_test=None,
+   max_krylov_iterations=50, verbosity=2):
+
+   if convergence_test is None:
+      convergence_test = NonlinearConvergenceTest()
+
+   # scaled initial iterate and Picard update
+   x, scale, evaluate = createScaledPicardMap(picardUpdate, hydro_new,
+      hydro_prev, rad_prev, e_rad_prev, cx_prev, slopes_old, include_velocity)
+   g, rad_new, e_rad_new = evaluate(x)
+
+   k = 0
+   while True:
+
+      # increment iteration counter
+      k += 1
+
+      # check nonlinear convergence
+      rel_diff, converged = convergence_test.check(hydro_new, hydro_prev,
+         rad_new, getIterateRadiation(x*scale, len(hydro_prev)))
+      if verbosity > 1:
+         print("      Iteration %d: Difference = %7.3e" % (k,rel_diff))
+      if converged:
+         if verbosity > 1:
+            print("      Newton iteration converged to tolerance %.3e" %
+               convergence_test.tol_current)
+         return rad_new, e_rad_new
+
+      # Newton system F'(x) dx = -F(x) = G(x) - x
+      residual = g - x
+      residual_norm = np.linalg.norm(residual)
+      def applyJacobian(v):
+         v_norm = np.linalg.norm(v)
+         if v_norm == 0.0:
+            return np.zeros(len(v))
+         eps = 1.0e-8*(1.0 + np.linalg.norm(x))/v_norm
+         return v - (evaluate(x + eps*v)[0] - g)/eps
+      jacobian = LinearOperator((len(x), len(x)), matvec=applyJacobian,
+         dtype=float)
+
+      # solve inexactly, with a forcing term decreasing with the residual,
+      # and take the Newton step if it is acceptable
+      forcing = max(1.0e-6, min(0.1, residual_norm/np.linalg.norm(x)))
+      try:
+         dx = solveKrylov(jacobian, residual, tol=forcing,
+            max_iterations=max_krylov_iterations)[0]
+         x_trial = x + dx
+         accept = isIteratePhysical(x_trial*scale, len(hydro_prev))
+      except RuntimeError:
+         accept = False
+
+      if accept:
+         g_trial, rad_trial, e_rad_trial = evaluate(x_trial)
+         accept = np.all(np.isfinite(g_trial)) and\
+            np.linalg.norm(g_trial - x_trial) < residual_norm
+
+      if accept:
+         x, g, rad_new, e_rad_new = x_trial, g_trial, rad_trial, e_rad_trial
+      else:
+         if verbosity > 1:
+            print("      Newton step rejected; taking a Picard step")
+         x = g
+         g, rad_new, e_rad_new = evaluate(x)
+
+
+## Performs Picard iterations with Anderson acceleration.
+#
+#  Each new iterate is a combination of the latest Picard updates,
+#  \f[
+#    x_{k+1} = G(x_k) - \sum_j \gamma_j \left(G(x_{k-j+1}) - G(x_{k-j})\right),
+#  \f]
+#  where the coefficients \f$\gamma_j\f$ minimize the norm of the same
+#  combination of the residuals \f$f = G(x) - x\f$, in the form of Walker and
+#  Ni. The iterate is the same as for performNewtonIterations(). Anderson
+#  acceleration only changes the iterates, not the converged solution, so the
+#  discretization and its conservation properties are unchanged.
+#
+#  The history is cleared, restarting the acceleration, when the residual
+#  norm grows by more than restart_factor. Smaller growth is kept, since the
+#  residual of an oscillating Picard iteration alternately grows and
+#  shrinks, and the acceleration is what damps the oscillation. If the
+#  combination gives non-positive internal energies, its difference to the
+#  Picard update is halved until they are positive; if they are still not
+#  positive after max_damping_steps halvings, the Picard update is taken
+#  instead and the history is cleared as well.
+#
+#  @param[in] depth  maximum number of residual differences kept in the
+#                    history; with 0, this is plain Picard iteration
+#  @param[in] max_damping_steps  maximum number of halvings of the
+#                    acceleration
+#  @param[in] restart_factor  factor of residual norm growth above which
+#                    the history is cleared
+#
+#  See performNewtonIterations() for the other parameters and return values.
+#
+def performAndersonIterations(picardUpdate, hydro_new, hydro_prev, rad_prev,
+   e_rad_prev, cx_prev, slopes_old, include_velocity=True, convergence_test=None,
+   depth=3, max_damping_steps=5, restart_factor=2.0,
+   verbosity=2):
+
+   if convergence_test is None:
+      convergence_test = NonlinearConvergenceTest()
+
+   # scaled initial iterate and Picard update
+   x, scale, evaluate = createScaledPicardMap(picardUpdate, hydro_new,
+      hydro_prev, rad_prev, e_rad_prev, cx_prev, slopes_old, include_velocity)
+   g, rad_new, e_rad_new = evaluate(x)
+   f = g - x
+
+   # differences of consecutive residuals and Picard updates, latest last
+   df_history = list()
+   dg_history = list()
+
+   k = 0
+   while True:
+
+      # increment iteration counter
+      k += 1
+
+      # check nonlinear convergence
+      rel_diff, converged = convergence_test.check(hydro_new, hydro_prev,
+         rad_new, getIterateRadiation(x*scale, len(hydro_prev)))
+      if verbosity > 1:
+         print("      Iteration %d: Difference = %7.3e" % (k,rel_diff))
+      if converged:
+         if verbosity > 1:
+            print("      Anderson iteration converged to tolerance %.3e" %
+               convergence_test.tol_current)
+         return rad_new, e_rad_new
+
+      # combine the Picard updates; the correction to the Picard update is
+      # halved until the internal energies are positive
+      x_new = g
+      if df_history:
+         gamma = np.linalg.lstsq(np.transpose(df_history), f, rcond=1.0e-10)[0]
+         correction = np.dot(gamma, dg_history)
+         for i in xrange(max_damping_steps + 1):
+            x_new = g - 0.5**i*correction
+            if isIteratePhysical(x_new*scale, len(hydro_prev)):
+               break
+         else:
+            if verbosity > 1:
+               print("      Non-physical iterate; restarting acceleration")
+            x_new = g
+            df_history = list()
+            dg_history = list()
+
+      # evaluate Picard update
+      g_new, rad_new, e_rad_new = evaluate(x_new)
+      f_new = g_new - x_new
+
+      # update history, or restart if the residual grows
+      if np.linalg.norm(f_new) > restart_factor*np.linalg.norm(f):
+         df_history = list()
+         dg_history = list()
+      elif depth > 0:
+         df_history = (df_history + [f_new - f])[-depth:]
+         dg_history = (dg_history + [g_new - g])[-depth:]
+
+      x, g, f = x_new, g_new, f_new
+
+
+## Creates the Picard update as a function of a scaled nonlinear iterate
+#  vector, see getIterateVector(). Each entry of the vector is scaled by
+#  the root-mean-square value of its block in the initial iterate.
+#
+#  @param[in]     picardUpdate  function performing one Picard iteration,
+#                               see nonlinearSolve()
+#  @param[in,out] hydro_new     new hydro states, set to the Picard update by
+#                               each evaluation
+#  @param[in,out] hydro_prev    hydro states, set to those of the evaluated
+#                               iterate
+#  @param[in]     rad_prev      initial radiation iterate
+#  @param[in]     e_rad_prev    initial edge internal energies
+#  @param[in,out] cx_prev       cross sections, updated for each evaluated
+#                               iterate
+#  @param[in]     slopes_old    old hydro slopes
+#  @param[in]     include_velocity  flag to include the velocities in the
+#                               iterate
+#
+#  @return
+#     -# scaled initial iterate
+#     -# vector of scales
+#     -# function evaluating the scaled Picard update of a scaled iterate,
+#        which returns the scaled update, the new radiation solution, and the
+#        new edge internal energies
+#
+def createScaledPicardMap(picardUpdate, hydro_new, hydro_prev, rad_prev,
+   e_rad_prev, cx_prev, slopes_old, include_velocity=True):
+
+   x = getIterateVector(hydro_prev, rad_prev, e_rad_prev, include_velocity)
+   scale = computeIterateScale(x, len(hydro_prev), include_velocity)
+
+   def evaluate(x):
+      rad, e_rad = setIterate(x*scale, hydro_prev, include_velocity)
+      updateCrossSections(cx_prev, hydro_prev, slopes_old, e_rad)
+      rad_new, e_rad_new = picardUpdate(hydro_prev, rad, e_rad, cx_prev)
+      g = getIterateVector(hydro_new, rad_new, e_rad_new, include_velocity)
+      return g/scale, rad_new, e_rad_new
+
+   return x/scale, scale, evaluate
+
+
+## Returns the nonlinear iterate as a vector: the angular fluxes, the
+#  cell-average internal energies, the edge internal energies, and, if
+#  included, the velocities
+#
+#  @param[in] hydro             hydro states
+#  @param[in] rad               radiation solution
+#  @param[in] e_rad             edge internal energies
+#  @param[in] include_velocity  flag to include the velocities
+#
+#  @return iterate vector
+#
+def getIterateVector(hydro, rad, e_rad, include_velocity=True):
+
+   states = createHydroStateArray(hydro)
+   blocks = [rad.psi, states.e, np.ravel(e_rad)]
+   if include_velocity:
+      blocks.append(states.u)
+
+   return np.concatenate(blocks)
+
+
+## Sets the hydro states of a nonlinear iterate vector, see getIterateVector()
+#
+#  @param[in]     x                 iterate vector
+#  @param[in,out] hydro             hydro states, whose densities are kept
+#  @param[in]     include_velocity  flag signalling that the vector includes
+#                                   the velocities
+#
+#  @return radiation solution and edge internal energies of the iterate
+#
+def setIterate(x, hydro, include_velocity=True):
+
+   n = len(hydro)
+   e = x[4*n:5*n]
+   e_rad = x[5*n:7*n].reshape(n, 2)
+   if include_velocity:
+      updateEachState(hydro, 'updateVelocity', x[7*n:8*n])
+   updateEachState(hydro, 'updateStateInternalEnergy', e)
+
+   return getIterateRadiation(x, n), e_rad
+
+
+## Returns the radiation solution of a nonlinear iterate vector, see
+#  getIterateVector()
+#
+#  @param[in] x  iterate vector
+#  @param[in] n  number of cells
+#
+def getIterateRadiation(x, n):
+
+   return Radiation(x[:4*n])
+
+
+## Computes the scale of each entry of a nonlinear iterate vector: the
+#  root-mean-square value of the block of the entry
+#
+#  @param[in] x                 iterate vector, see getIterateVector()
+#  @param[in] n                 number of cells
+#  @param[in] include_velocity  flag signalling that the vector includes
+#                               the velocities
+#
+#  @return vector of scales
+#
+def computeIterateScale(x, n, include_velocity=True):
+
+   sizes = [4*n, n, 2*n] + ([n] if include_velocity else [])
+   scale = np.empty(len(x))
+   start = 0
+   for size in sizes:
+      block_scale = np.sqrt(np.mean(x[start:start+size]**2))
+      scale[start:start+size] = block_scale if block_scale > 0.0 else 1.0
+      start += size
+
+   return scale
+
+
+## Checks that the internal energies of a nonlinear iterate vector are
+#  positive and finite
+#
+#  @param[in] x  iterate vector, see getIterateVector()
+#  @param[in] n  number of cells
+#
+#  @return True if the iterate is physical
+#
+def isIteratePhysical(x, n):
+
+   return np.all(np.isfinite(x)) and np.all(x[4*n:7*n] > 0.0)
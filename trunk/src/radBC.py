@@ -90,17 +90,17 @@ class RadBC(object):
 
    ## Updates the boundary value for a MMS type boundary condition
    #
-   #  @param[in] t       time at which to evaluate time-dependent BC
+   #  @param[in] t_new    time at which to evaluate the implicit BC
+   #  @param[in] t_old    time at the beginning of the time step
+   #  @param[in] t_older  time at the beginning of the previous time step,
+   #                      which need not be t_old minus the current time step
+   #                      size if the time step size has changed
    #
    #--------------------------------------------------------------------------------
    def update(self, t_new=None, t_old=None, t_older=None):
 
       if self.bc_type == 'dirichlet' and self.has_mms_func:
 
-         print """NOTE: this uses an assumption that older variables are evaluated at
-         t_{n} - \Delta T_{n}, which is not correct if the time step has changed. It
-         will work, however, for the 2 cycle algorithm."""
-
          #Make values match desired points in time if provided, else copy, although
          #this will not always be correct
          if t_older == None:
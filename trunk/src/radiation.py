@@ -3,7 +3,7 @@
 #
 
 from math import sqrt
-from copy import deepcopy
+import numpy as np
 
 from radUtilities import mu
 from globalConstants import SPD_OF_LGT as c
@@ -12,7 +12,10 @@ from globalConstants import SPD_OF_LGT as c
 #
 #  Angular fluxes \f$\Psi^\pm\f$, scalar flux \f$\phi\f$,
 #  radiation energy \f$\mathcal{E}\f$, and radiation flux \f$\mathcal{F}\f$
-#  are computed from a solution vector.
+#  are computed from a solution vector. The solution vector is stored in one
+#  contiguous buffer, and \f$\Psi^\pm\f$ are views into it with shape
+#  (n_elems,2), so that, e.g., psim[i]\f$=(\Psi^-_{i,L},\Psi^-_{i,R})\f$.
+#  The moments are (n_elems,2) arrays indexed the same way.
 #
 class Radiation(object):
 
@@ -34,11 +37,11 @@ class Radiation(object):
    #
    def update(self, psi):
 
-      # copy solution vector
-      self.psi = deepcopy(psi)
+      # copy solution vector into a contiguous buffer
+      self.psi = np.array(psi, dtype=float)
 
       # get number of dofs
-      self.n_dofs = len(psi)
+      self.n_dofs = len(self.psi)
 
       # assert that number of dofs is multiple of 4
       if self.n_dofs % 4 != 0:
@@ -48,20 +51,64 @@ class Radiation(object):
       # compute number of elements
       self.n_elems = self.n_dofs / 4
 
-      # update angular fluxes
-      self.psim = [(psi[4*i],  psi[4*i+2]) for i in xrange(self.n_elems)]
-      self.psip = [(psi[4*i+1],psi[4*i+3]) for i in xrange(self.n_elems)]
+      # update angular fluxes; global dof index is 4*i + 2*side + direction
+      psi_elem = self.psi.reshape(self.n_elems, 2, 2)
+      self.psim = psi_elem[:,:,0]
+      self.psip = psi_elem[:,:,1]
 
       # update scalar flux
-      self.phi = [(self.psim[i][0]+self.psip[i][0],
-                   self.psim[i][1]+self.psip[i][1])
-                   for i in xrange(self.n_elems)]
+      self.phi = self.psim + self.psip
 
       # update radiation energy
-      self.E = [(self.phi[i][0]/c, self.phi[i][1]/c) for i in xrange(self.n_elems)]
+      self.E = self.phi/c
 
       # update radiation flux
-      self.F = [((self.psip[i][0]-self.psim[i][0])/sqrt(3.0),
-                 (self.psip[i][1]-self.psim[i][1])/sqrt(3.0))
-                 for i in xrange(self.n_elems)]
+      self.F = (self.psip - self.psim)/sqrt(3.0)
 
+
+## Stores and handles radiation quantities for a general S-N quadrature
+#
+#  Angular fluxes \f$\Psi_a\f$ are stored as an array with shape
+#  (n_angles,n_elems,2), indexed by [angle, cell, side]. The scalar flux
+#  \f$\phi\f$, radiation energy \f$\mathcal{E}\f$, and radiation flux
+#  \f$\mathcal{F}\f$ are (n_elems,2) arrays, computed as quadrature moments
+#  over all directions at once. For S-2, these are the same as those of
+#  Radiation.
+#
+class DiscreteOrdinatesRadiation(object):
+
+   ## Constructor
+   #
+   #  @param[in] psi         angular fluxes with shape (n_angles,n_elems,2)
+   #  @param[in] quadrature  angular quadrature, e.g., GaussLegendreQuadrature
+   #
+   def __init__(self, psi, quadrature):
+
+      self.quadrature = quadrature
+
+      # update quantities
+      self.update(psi)
+
+   ## Updates all radiation quantities
+   #
+   #  @param[in] psi  angular fluxes with shape (n_angles,n_elems,2)
+   #
+   def update(self, psi):
+
+      # copy angular fluxes into a contiguous buffer
+      self.psi = np.array(psi, dtype=float)
+
+      if self.psi.ndim != 3 or self.psi.shape[0] != self.quadrature.n_angles \
+         or self.psi.shape[2] != 2:
+         raise ValueError('angular fluxes must have shape (n_angles,n_elems,2)')
+
+      self.n_angles, self.n_elems = self.psi.shape[:2]
+
+      # update scalar flux
+      self.phi = self.quadrature.computeScalarFlux(self.psi)
+
+      # update radiation energy
+      self.E = self.phi/c
+
+      # update radiation flux
+      self.F = self.quadrature.computeCurrent(self.psi)
@@ -2,23 +2,42 @@
 #  Provides functions to solve the steady-state S-2 equations. Also provides
 #  means of employing solver to be used in temporal discretizations.
 #
-#  TODO: Currently this code builds the matrix as a full matrix and then
-#  converts it over to a sparse matrix for solving (the sparse solver is much faster).
-#  It would probably be significantly more efficient to build the matrix as a CSR matrix directly.  We didn't
-#  have time to figure out the python syntax for storing rows.  A banded
-#  matrix cannot be used directly due to periodic boundary conditions, but this
-#  could be used if you do it properly.  See http://www4.ncsu.edu/~stsynkov/book_sample_material/Sections_5.4-5.5.pdf
+#  The system matrix is assembled directly in sparse (COO) form from
+#  vectorized per-cell coefficient arrays, so assembly cost and memory grow
+#  linearly with the number of cells.
+#
+#  By default, the system is solved with the banded solver in bandedSolver,
+#  which treats the periodic wrap-around couplings with a low-rank correction,
+#  so a solve is also O(N). The general sparse direct solver is available as
+#  the 'sparse' option, and a matrix-free solve by transport sweeps with
+#  DSA-accelerated source iteration, in transportSweep, as the 'sweep' option.
+#  Preconditioned Krylov solves, in krylovSolver, are available as the 'gmres'
+#  and 'bicgstab' options; these may be warm-started with an initial guess.
+#
+#  When the same operator is solved against many sources, e.g., in source
+#  sensitivity studies, radiationSolveSSMultiple factors the matrix once and
+#  solves for all sources together.
+#
+#  When the same operator is solved repeatedly, e.g., in a radiation-only
+#  transient with constant cross sections and time step size, an
+#  S2FactorizationCache may be passed so that the matrix is only refactored
+#  when its inputs change.
 
 import math
 import numpy as np
 from numpy import array
 
 from mesh import Mesh
-from utilityFunctions import getIndex
+from utilityFunctions import getIndex, getCrossSectionArray
 from radUtilities import mu, computeScalarFlux
+from crossXInterface import getCrossSectionVersion
 import globalConstants as GC
 from radiation import Radiation
-from scipy.sparse import csr_matrix, linalg
+from bandedSolver import BandedFactorization
+from transportSweep import solveS2SourceIteration
+from krylovSolver import BlockJacobiPreconditioner, SweepPreconditioner,\
+   TwoStagePreconditioner, solveKrylov
+from scipy.sparse import coo_matrix, linalg
 
 ## Steady-state solve function for the S-2 equations.
 #
@@ -28,124 +47,363 @@ from scipy.sparse import csr_matrix, linalg
 #  @param[in] Q        \f$\tilde{\mathcal{Q}}\f$ as defined in documentation
 #                      for time-dependent solvers. This is passed in as a vector
 #                      with the same global numbering as $\Psi$ unknowns.
+#  @param[in] rad_BC   radiation BC object
 #  @param[in] diag_add_term       \f$\alpha\f$ as defined in documentation for
 #                                 time-dependent solvers
 #  @param[in] implicit_scale      \f$\beta\f$ as defined in documentation for
 #                                 time-dependent solvers
-#  @param[in] bound_curr_lt       left  boundary current data, \f$j^+\f$
-#  @param[in] bound_curr_rt       right boundary current data, \f$j^-\f$
-#  @param[in] bound_flux_left     left  boundary psi
-#  @param[in] bound_flux_right    right boundary psi
+#  @param[in] solver   string identifier for the linear solver: 'banded',
+#                      'sparse', 'sweep', 'gmres', or 'bicgstab'
+#  @param[in] factor_cache  optional S2FactorizationCache used to reuse the
+#                           banded or sparse factorization between solves;
+#                           not used by the other solvers
+#  @param[in] initial_guess optional S-2 solution vector used as the initial
+#                           guess by the Krylov solvers
 #
-#  @return 
+#  @return Radiation object containing
 #          -# \f$\Psi^+\f$, angular flux in plus directions multiplied by \f$2\pi\f$
 #          -# \f$\Psi^-\f$, angular flux in minus directions multiplied by \f$2\pi\f$
 #          -# \f$\mathcal{E}\f$: radiation energy
 #          -# \f$\mathcal{F}\f$: radiation flux
 #
-def radiationSolveSS(mesh, cross_x, Q, rad_BC, diag_add_term=0.0, implicit_scale=1.0):
+def radiationSolveSS(mesh, cross_x, Q, rad_BC, diag_add_term=0.0, implicit_scale=1.0,
+   solver='banded', factor_cache=None, initial_guess=None):
 
-    # abbreviation for the scale term
-    beta = implicit_scale
+    # build rhs
+    rhs = assembleS2RHS(mesh, Q, rad_BC, implicit_scale)
+
+    if solver == 'banded':
+
+       # factor banded system, or reuse cached factorization, and solve
+       factorization = getS2Factorization(mesh, cross_x, rad_BC, diag_add_term,
+          implicit_scale, factor_cache)
+       solution = factorization.solve(rhs)
+
+    elif solver == 'sparse':
+
+       # factor sparse matrix, or reuse cached factorization, and solve
+       factorization = getS2Factorization(mesh, cross_x, rad_BC, diag_add_term,
+          implicit_scale, factor_cache, factor_type='sparse')
+       solution = factorization.solve(rhs)
+
+    elif solver == 'sweep':
+
+       # solve with source iteration and transport sweeps, accelerated by DSA
+       solution, n_iterations = solveS2SourceIteration(mesh, cross_x, rhs,
+          rad_BC, diag_add_term, implicit_scale)
+
+    elif solver == 'gmres' or solver == 'bicgstab':
+
+       # solve with a Krylov method, preconditioned by block Jacobi followed
+       # by a transport sweep
+       rows, cols, vals = computeS2MatrixEntries(mesh, cross_x, rad_BC,
+          diag_add_term, implicit_scale)
+       n = 4*mesh.n_elems
+       matrix = coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsr()
+       preconditioner = TwoStagePreconditioner(matrix,
+          BlockJacobiPreconditioner(n, rows, cols, vals),
+          SweepPreconditioner(mesh, cross_x, rad_BC, diag_add_term,
+             implicit_scale))
+       solution, n_iterations = solveKrylov(matrix, rhs, preconditioner,
+          initial_guess=initial_guess, method=solver)
 
-    # Handle boundary conditions  
-    if rad_BC.bc_type == 'periodic':
-        bc_psi_left = bc_psi_right = None
     else:
-        bc_psi_left, bc_psi_right = rad_BC.getIncidentFluxes()
 
-    # initialize numpy arrays for system matrix and rhs
+       raise NotImplementedError("Invalid radiation solver type")
+
+    #return solution
+    return Radiation(solution)
+
+
+## Steady-state solve function for the S-2 equations with multiple sources.
+#
+#  The system matrix is factored once and all sources are solved with that
+#  factorization, so solving for K sources costs one factorization and K
+#  triangular solves rather than K factorizations.
+#
+#  @param[in] mesh     a mesh object
+#  @param[in] cross_x  list of cross sections for each element, stored as tuple
+#                      for each cell.
+#  @param[in] Q        2-D array of sources \f$\tilde{\mathcal{Q}}\f$ with
+#                      shape (n_sources, n_dofs), where each row has the same
+#                      global numbering as $\Psi$ unknowns
+#  @param[in] rad_BC   radiation BC object
+#  @param[in] diag_add_term       \f$\alpha\f$
+#  @param[in] implicit_scale      \f$\beta\f$
+#  @param[in] solver   string identifier for the linear solver, either
+#                      'banded' or 'sparse'
+#  @param[in] factor_cache  optional S2FactorizationCache used to reuse the
+#                           banded or sparse factorization between solves
+#
+#  @return list of Radiation objects, one for each row of Q
+#
+def radiationSolveSSMultiple(mesh, cross_x, Q, rad_BC, diag_add_term=0.0,
+   implicit_scale=1.0, solver='banded', factor_cache=None):
+
+    # build rhs for each source, one per row
+    rhs = assembleS2RHS(mesh, np.atleast_2d(Q), rad_BC, implicit_scale)
+
+    if solver == 'banded':
+
+       # factor banded system once and solve for all right hand sides
+       factorization = getS2Factorization(mesh, cross_x, rad_BC, diag_add_term,
+          implicit_scale, factor_cache)
+       solutions = factorization.solve(rhs.T).T
+
+    elif solver == 'sparse':
+
+       # factor sparse matrix once and solve for all right hand sides
+       factorization = getS2Factorization(mesh, cross_x, rad_BC, diag_add_term,
+          implicit_scale, factor_cache, factor_type='sparse')
+       solutions = factorization.solve(np.ascontiguousarray(rhs.T)).T
+
+    else:
+
+       raise NotImplementedError("Invalid radiation solver type")
+
+    return [Radiation(solution) for solution in solutions]
+
+
+## Gets the factorization of the S-2 system matrix, either by factoring
+#  the matrix or from a factorization cache.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] cross_x         list of cross sections for each element
+#  @param[in] rad_BC          radiation BC object
+#  @param[in] diag_add_term   \f$\alpha\f$
+#  @param[in] implicit_scale  \f$\beta\f$
+#  @param[in] factor_cache    S2FactorizationCache, or None to always factor
+#  @param[in] factor_type     'banded' or 'sparse'; see factorS2Matrix
+#
+#  @return factorization object of the system matrix, with a solve method
+#
+def getS2Factorization(mesh, cross_x, rad_BC, diag_add_term, implicit_scale,
+   factor_cache=None, factor_type='banded'):
+
+    if factor_cache is None:
+       return factorS2Matrix(mesh, cross_x, rad_BC, diag_add_term,
+          implicit_scale, factor_type)
+    else:
+       return factor_cache.getFactorization(mesh, cross_x, rad_BC,
+          diag_add_term, implicit_scale, factor_type)
+
+
+## Assembles the S-2 system matrix in CSR format.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] cross_x         list of cross sections for each element
+#  @param[in] rad_BC          radiation BC object
+#  @param[in] diag_add_term   \f$\alpha\f$
+#  @param[in] implicit_scale  \f$\beta\f$
+#
+#  @return system matrix as a CSR matrix
+#
+def assembleS2Matrix(mesh, cross_x, rad_BC, diag_add_term=0.0, implicit_scale=1.0):
+
+    rows, cols, vals = computeS2MatrixEntries(mesh, cross_x, rad_BC,
+       diag_add_term, implicit_scale)
+
+    n = 4*mesh.n_elems
+    return coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsr()
+
+
+## Computes the factorization of the S-2 system matrix.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] cross_x         list of cross sections for each element
+#  @param[in] rad_BC          radiation BC object
+#  @param[in] diag_add_term   \f$\alpha\f$
+#  @param[in] implicit_scale  \f$\beta\f$
+#  @param[in] factor_type     'banded' for a BandedFactorization, or 'sparse'
+#                             for a sparse LU factorization by splu
+#
+#  @return factorization object of the system matrix, with a solve method
+#
+def factorS2Matrix(mesh, cross_x, rad_BC, diag_add_term=0.0, implicit_scale=1.0,
+   factor_type='banded'):
+
+    rows, cols, vals = computeS2MatrixEntries(mesh, cross_x, rad_BC,
+       diag_add_term, implicit_scale)
+
     n = 4*mesh.n_elems
-    matrix = np.zeros((n, n))
-    rhs    = np.zeros(n)
-
-    # loop over interior cells
-    for i in xrange(mesh.n_elems):
-       # compute indices
-       iprevRplus  = getIndex(i-1,"R","+") # dof i-1,R,+
-       iLminus     = getIndex(i,  "L","-") # dof i,  L,-
-       iLplus      = getIndex(i,  "L","+") # dof i,  L,+
-       iRminus     = getIndex(i,  "R","-") # dof i,  R,-
-       iRplus      = getIndex(i,  "R","+") # dof i,  R,+
-       inextLminus = getIndex(i+1,"L","-") # dof i+1,L,-
-
-       # get cell size
-       h = mesh.getElement(i).dx
-
-       # get cross sections
-       cx_sL = cross_x[i][0].sig_s # Left  scattering
-       cx_sR = cross_x[i][1].sig_s # Right scattering
-       cx_tL = cross_x[i][0].sig_t # Left  total
-       cx_tR = cross_x[i][1].sig_t # Right total
-
-       # get sources
-       QLminus = Q[iLminus] # minus direction, Left
-       QLplus  = Q[iLplus]  # plus  direction, Left
-       QRminus = Q[iRminus] # minus direction, Right
-       QRplus  = Q[iRplus]  # plus  direction, Right
+    if factor_type == 'banded':
+       return BandedFactorization(n, rows, cols, vals)
+    elif factor_type == 'sparse':
+       return linalg.splu(coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsc())
+    else:
+       raise NotImplementedError("Invalid factorization type")
+
+
+## Caches the factorization of the S-2 system matrix between solves.
+#
+#  A single factorization is held, keyed on the identity of the mesh and of
+#  the cross section list, the cross section version, \f$\alpha\f$,
+#  \f$\beta\f$, the radiation BC type, and the factorization type. Whenever
+#  any of these inputs change, the cached factorization is evicted and the
+#  matrix is refactored; otherwise, a solve only applies the triangular
+#  solves. Checking the key costs O(1), so a cache hit is free of any
+#  per-cell work.
+#
+#  The cross section version, see crossXInterface.getCrossSectionVersion,
+#  changes whenever any cross section changes, so cross sections modified in
+#  place, e.g., by updateCrossX, evict the factorization without a call to
+#  invalidate().
+#
+class S2FactorizationCache(object):
+
+   ## Constructor
+   #
+   def __init__(self):
 
+      self.key = None
+      self.factorization = None
+
+      # mesh and cross sections of the cached factorization, held so that
+      # their ids are not reused while they are part of the key
+      self.inputs = None
+
+      # number of factorizations performed, for diagnostics
+      self.n_factorizations = 0
+
+   ## Returns the factorization for the given inputs, refactoring if the
+   #  inputs differ from those of the cached factorization
+   #
+   #  @param[in] mesh            a mesh object
+   #  @param[in] cross_x         list of cross sections for each element
+   #  @param[in] rad_BC          radiation BC object
+   #  @param[in] diag_add_term   \f$\alpha\f$
+   #  @param[in] implicit_scale  \f$\beta\f$
+   #  @param[in] factor_type     'banded' or 'sparse'; see factorS2Matrix
+   #
+   #  @return factorization object of the system matrix
+   #
+   def getFactorization(self, mesh, cross_x, rad_BC, diag_add_term=0.0,
+      implicit_scale=1.0, factor_type='banded'):
+
+      # inputs to the matrix; the mesh and cross sections by identity, and
+      # changes of the cross sections by their version
+      key = (id(mesh), id(cross_x), getCrossSectionVersion(), diag_add_term,
+         implicit_scale, rad_BC.bc_type, factor_type)
+
+      # refactor if the key changed
+      if key != self.key:
+         self.factorization = factorS2Matrix(mesh, cross_x, rad_BC,
+            diag_add_term, implicit_scale, factor_type)
+         self.key = key
+         self.inputs = (mesh, cross_x)
+         self.n_factorizations += 1
+
+      return self.factorization
+
+   ## Evicts the cached factorization, e.g., to free its memory
+   #
+   def invalidate(self):
+
+      self.key = None
+      self.factorization = None
+      self.inputs = None
+
+
+## Computes the nonzero entries of the S-2 system matrix in coordinate format.
+#
+#  All coefficients are evaluated as whole-mesh arrays; there is no loop
+#  over cells.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] cross_x         list of cross sections for each element
+#  @param[in] rad_BC          radiation BC object
+#  @param[in] diag_add_term   \f$\alpha\f$
+#  @param[in] implicit_scale  \f$\beta\f$
+#
+#  @return row indices, column indices, and values of the nonzero entries
+#
+def computeS2MatrixEntries(mesh, cross_x, rad_BC, diag_add_term=0.0,
+   implicit_scale=1.0):
+
+    # abbreviation for the scale term
+    beta = implicit_scale
+
+    # get cell sizes
+    h = mesh.getCellWidths()
+
+    # get cross sections
+    sig_s = getCrossSectionArray(cross_x, 'sig_s')
+    sig_t = getCrossSectionArray(cross_x, 'sig_t')
+    cx_sL = sig_s[:,0] # Left  scattering
+    cx_sR = sig_s[:,1] # Right scattering
+    cx_tL = sig_t[:,0] # Left  total
+    cx_tR = sig_t[:,1] # Right total
+
+    # compute indices for all cells
+    cells  = np.arange(mesh.n_elems)
+    iLminus = getIndex(cells,"L","-") # dof i,L,-
+    iLplus  = getIndex(cells,"L","+") # dof i,L,+
+    iRminus = getIndex(cells,"R","-") # dof i,R,-
+    iRplus  = getIndex(cells,"R","+") # dof i,R,+
+
+    # list of (row, column, value) arrays for each coupling
+    entries = [
        # Left control volume, minus direction
-       row = np.zeros(n)
-       row[iLminus]    = -beta*mu["-"]/h + (beta*cx_tL + diag_add_term) - 0.5*beta*cx_sL
-       row[iLplus]     = -0.5*beta*cx_sL
-       row[iRminus]    = beta*mu["-"]/h
-       matrix[iLminus] = row
-       rhs[iLminus]    = QLminus
-      
-       # Left control volume, plus direction
-       row = np.zeros(n)
-
-       #Handle BC's
-       if i == 0:
-          if rad_BC.bc_type == 'periodic':
-             rhs[iLplus] = 0.0    #If periodic no term to add 
-             iPerPlus = getIndex(mesh.n_elems-1,"R","+") #periodic outflow index
-             row[iPerPlus] = -2.0*beta*mu["+"]/h #negative because on LHS of eq
-          else:
-             rhs[iLplus] = 2.0*beta*mu["+"]/h*bc_psi_left
-       else:
-          row[iprevRplus] = -2.0*beta*mu["+"]/h
-
-       row[iLminus]    = -0.5*beta*cx_sL
-       row[iLplus]     = beta*mu["+"]/h + (beta*cx_tL + diag_add_term) - 0.5*beta*cx_sL
-       row[iRplus]     = beta*mu["+"]/h
-       matrix[iLplus]  = row
-       rhs[iLplus]    += QLplus
-
-       # Right control volume, minus direction
-       row = np.zeros(n)
-       row[iLminus]     = -beta*mu["-"]/h
-       row[iRminus]     = -beta*mu["-"]/h + (beta*cx_tR + diag_add_term) - 0.5*beta*cx_sR
-       row[iRplus]      = -0.5*beta*cx_sR
-
-       #Handle BC
-       if i == mesh.n_elems-1:
-          if rad_BC.bc_type == 'periodic':
-             rhs[iRminus] = 0.0
-             iPerMinus = getIndex(0,"L","-")
-             row[iPerMinus] = 2.0*beta*mu["-"]/h #no negative because on LHS of eq
-          else:
-             rhs[iRminus] = -2.0*beta*mu["-"]/h*bc_psi_right
-       else:
-          row[inextLminus] = 2.0*beta*mu["-"]/h
-
-       matrix[iRminus]  = row
-       rhs[iRminus]    += QRminus
+       (iLminus, iLminus, -beta*mu["-"]/h + (beta*cx_tL + diag_add_term) - 0.5*beta*cx_sL),
+       (iLminus, iLplus,  -0.5*beta*cx_sL),
+       (iLminus, iRminus, beta*mu["-"]/h),
+
+       # Left control volume, plus direction; upwind inflow from cell i-1
+       (iLplus[1:], iRplus[:-1], -2.0*beta*mu["+"]/h[1:]),
+       (iLplus, iLminus, -0.5*beta*cx_sL),
+       (iLplus, iLplus,  beta*mu["+"]/h + (beta*cx_tL + diag_add_term) - 0.5*beta*cx_sL),
+       (iLplus, iRplus,  beta*mu["+"]/h),
+
+       # Right control volume, minus direction; upwind inflow from cell i+1
+       (iRminus, iLminus, -beta*mu["-"]/h),
+       (iRminus, iRminus, -beta*mu["-"]/h + (beta*cx_tR + diag_add_term) - 0.5*beta*cx_sR),
+       (iRminus, iRplus,  -0.5*beta*cx_sR),
+       (iRminus[:-1], iLminus[1:], 2.0*beta*mu["-"]/h[:-1]),
 
        # Right control volume, plus direction
-       row = np.zeros(n)
-       row[iLplus]      = -beta*mu["+"]/h
-       row[iRminus]     = -0.5*beta*cx_sR
-       row[iRplus]      = beta*mu["+"]/h + (beta*cx_tR + diag_add_term) - 0.5*beta*cx_sR
-       matrix[iRplus]   = row
-       rhs[iRplus]      = QRplus
+       (iRplus, iLplus,  -beta*mu["+"]/h),
+       (iRplus, iRminus, -0.5*beta*cx_sR),
+       (iRplus, iRplus,  beta*mu["+"]/h + (beta*cx_tR + diag_add_term) - 0.5*beta*cx_sR)]
 
-    # solve linear system as a sparse matrix
-    sparse_matrix = csr_matrix(matrix)
-    solution = linalg.spsolve(sparse_matrix, rhs)
+    # Handle periodic BC's: inflow comes from opposite end of domain
+    if rad_BC.bc_type == 'periodic':
+       entries += [
+          (iLplus[:1], iRplus[-1:], -2.0*beta*mu["+"]/h[:1]), #negative because on LHS of eq
+          (iRminus[-1:], iLminus[:1], 2.0*beta*mu["-"]/h[-1:])] #no negative because on LHS of eq
 
- #   solution = np.linalg.solve(matrix,rhs)
+    rows = np.concatenate([entry[0] for entry in entries])
+    cols = np.concatenate([entry[1] for entry in entries])
+    vals = np.concatenate([entry[2] for entry in entries])
 
-    #return solution
-    return Radiation(solution)
+    return rows, cols, vals
+
+
+## Assembles the right hand side of the S-2 system.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] Q               \f$\tilde{\mathcal{Q}}\f$ in global dof ordering,
+#                             or a 2-D array with one source per row
+#  @param[in] rad_BC          radiation BC object
+#  @param[in] implicit_scale  \f$\beta\f$
+#
+#  @return right hand side vector, or 2-D array with one right hand side per row
+#
+def assembleS2RHS(mesh, Q, rad_BC, implicit_scale=1.0):
+
+    # abbreviation for the scale term
+    beta = implicit_scale
+
+    # sources
+    rhs = np.array(Q, dtype=float)
+
+    # Handle boundary conditions; if periodic no term to add
+    if rad_BC.bc_type != 'periodic':
+
+       bc_psi_left, bc_psi_right = rad_BC.getIncidentFluxes()
+       h_left  = mesh.getElement(0).dx
+       h_right = mesh.getElement(mesh.n_elems-1).dx
+
+       rhs[...,getIndex(0,"L","+")] += 2.0*beta*mu["+"]/h_left*bc_psi_left
+       rhs[...,getIndex(mesh.n_elems-1,"R","-")] += -2.0*beta*mu["-"]/h_right*bc_psi_right
 
+    return rhs
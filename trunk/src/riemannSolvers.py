@@ -0,0 +1,504 @@
+## @package src.riemannSolvers
+#  Provides approximate Riemann solvers for the Euler equations that operate
+#  on arrays of interfaces.
+#
+#  Each solver takes the conservative variables on the left and right sides
+#  of all interfaces and returns the density, momentum, and energy fluxes
+#  together as an array with shape (3,n_interfaces). The wave speeds are
+#  computed once per interface and shared by the three fluxes, and the
+#  upwinding is selected with masks rather than by branching on each
+#  interface.
+#
+#  The ratio of specific heats may differ between the two sides of an
+#  interface, e.g., at a material interface: gamma is the ratio on the left
+#  side, and gamma_r the ratio on the right side, which defaults to gamma.
+
+import numpy as np
+
+from hydroState import getPressure
+
+## Computes the HLLC flux at each interface, using the pressure-based wave
+#  speed estimates of Toro, page 331.
+#
+#  @param[in] rho_l  densities on the left side of each interface
+#  @param[in] mom_l  momenta on the left side of each interface
+#  @param[in] erg_l  total energies on the left side of each interface
+#  @param[in] rho_r  densities on the right side of each interface
+#  @param[in] mom_r  momenta on the right side of each interface
+#  @param[in] erg_r  total energies on the right side of each interface
+#  @param[in] gamma  ratio of specific heats on the left side of each
+#                    interface, \f$\gamma\f$
+#  @param[in] gamma_r  ratio of specific heats on the right side of each
+#                    interface; if None, gamma is used on both sides
+#
+#  @return array of density, momentum, and energy fluxes with shape
+#          (3,n_interfaces)
+#
+def solveHLLC(rho_l, mom_l, erg_l, rho_r, mom_r, erg_r, gamma,
+    gamma_r=None):
+
+    gamma_l = gamma
+    if gamma_r is None:
+       gamma_r = gamma
+
+    U_l, u_l, e_l, p_l, a_l, F_l = computeInterfaceSide(rho_l, mom_l, erg_l,
+       gamma_l)
+    U_r, u_r, e_r, p_r, a_r, F_r = computeInterfaceSide(rho_r, mom_r, erg_r,
+       gamma_r)
+
+    # branches that are not selected may divide by zero
+    with np.errstate(divide='ignore', invalid='ignore'):
+
+       # pressure estimate from the primitive variable Riemann solver
+       rho_bar = 0.5*(rho_l + rho_r)
+       a_bar   = 0.5*(a_l + a_r)
+       p_pvrs = 0.5*(p_l + p_r) - 0.5*(u_r - u_l)*rho_bar*a_bar
+       p_star = np.maximum(0.0, p_pvrs)
+
+       # wave speeds
+       q_l = np.where(p_star <= p_l, 1.0,
+          np.sqrt(1.0 + (gamma_l + 1.0)/(2.0*gamma_l)*(p_star/p_l - 1.0)))
+       q_r = np.where(p_star <= p_r, 1.0,
+          np.sqrt(1.0 + (gamma_r + 1.0)/(2.0*gamma_r)*(p_star/p_r - 1.0)))
+       S_l = u_l - a_l*q_l
+       S_r = u_r + a_r*q_r
+
+       S_star = ( (p_r - p_l + rho_l*u_l*(S_l - u_l) - rho_r*u_r*(S_r - u_r))
+          / (rho_l*(S_l - u_l) - rho_r*(S_r - u_r)) )
+
+       # check for zero velocity differences
+       S_star = np.where(np.logical_and(u_l == u_r, a_l == a_r), u_l, S_star)
+
+       # star states
+       U_lstar = computeHLLCStarState(rho_l, u_l, e_l, p_l, S_l, S_star)
+       U_rstar = computeHLLCStarState(rho_r, u_r, e_r, p_r, S_r, S_star)
+       F_lstar = F_l + S_l*(U_lstar - U_l)
+       F_rstar = F_r + S_r*(U_rstar - U_r)
+
+    # select the flux in the region containing the interface
+    conditions = [S_r < 0.0,
+       np.logical_and(S_l <= 0.0, S_star >= 0.0),
+       np.logical_and(S_star <= 0.0, S_r >= 0.0),
+       S_l > 0.0]
+    checkWaveSpeeds(conditions, "HLLC")
+
+    return np.select(conditions, [F_r, F_lstar, F_rstar, F_l])
+
+
+## Computes the HLL flux at each interface, using the wave speed estimates of
+#  Davis.
+#
+#  @param[in] rho_l  densities on the left side of each interface
+#  @param[in] mom_l  momenta on the left side of each interface
+#  @param[in] erg_l  total energies on the left side of each interface
+#  @param[in] rho_r  densities on the right side of each interface
+#  @param[in] mom_r  momenta on the right side of each interface
+#  @param[in] erg_r  total energies on the right side of each interface
+#  @param[in] gamma  ratio of specific heats on the left side of each
+#                    interface, \f$\gamma\f$
+#  @param[in] gamma_r  ratio of specific heats on the right side of each
+#                    interface; if None, gamma is used on both sides
+#
+#  @return array of density, momentum, and energy fluxes with shape
+#          (3,n_interfaces)
+#
+def solveHLL(rho_l, mom_l, erg_l, rho_r, mom_r, erg_r, gamma,
+    gamma_r=None):
+
+    gamma_l = gamma
+    if gamma_r is None:
+       gamma_r = gamma
+
+    U_l, u_l, e_l, p_l, a_l, F_l = computeInterfaceSide(rho_l, mom_l, erg_l,
+       gamma_l)
+    U_r, u_r, e_r, p_r, a_r, F_r = computeInterfaceSide(rho_r, mom_r, erg_r,
+       gamma_r)
+
+    # bounding wave speeds
+    S_l = np.minimum(u_l - a_l, u_r - a_r)
+    S_r = np.maximum(u_l + a_l, u_r + a_r)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+       F_hll = (S_r*F_l - S_l*F_r + S_l*S_r*(U_r - U_l)) / (S_r - S_l)
+
+    conditions = [S_r < 0.0,
+       np.logical_and(S_l <= 0.0, S_r >= 0.0),
+       S_l > 0.0]
+    checkWaveSpeeds(conditions, "HLL")
+
+    return np.select(conditions, [F_r, F_hll, F_l])
+
+
+## Computes the Rusanov, or local Lax-Friedrichs, flux at each interface,
+#  \f$\frac{1}{2}(F_l + F_r) - \frac{1}{2}S_{max}(U_r - U_l)\f$.
+#
+#  @param[in] rho_l  densities on the left side of each interface
+#  @param[in] mom_l  momenta on the left side of each interface
+#  @param[in] erg_l  total energies on the left side of each interface
+#  @param[in] rho_r  densities on the right side of each interface
+#  @param[in] mom_r  momenta on the right side of each interface
+#  @param[in] erg_r  total energies on the right side of each interface
+#  @param[in] gamma  ratio of specific heats on the left side of each
+#                    interface, \f$\gamma\f$
+#  @param[in] gamma_r  ratio of specific heats on the right side of each
+#                    interface; if None, gamma is used on both sides
+#
+#  @return array of density, momentum, and energy fluxes with shape
+#          (3,n_interfaces)
+#
+def solveRusanov(rho_l, mom_l, erg_l, rho_r, mom_r, erg_r, gamma,
+    gamma_r=None):
+
+    gamma_l = gamma
+    if gamma_r is None:
+       gamma_r = gamma
+
+    U_l, u_l, e_l, p_l, a_l, F_l = computeInterfaceSide(rho_l, mom_l, erg_l,
+       gamma_l)
+    U_r, u_r, e_r, p_r, a_r, F_r = computeInterfaceSide(rho_r, mom_r, erg_r,
+       gamma_r)
+
+    # maximum wave speed
+    S_max = np.maximum(np.abs(u_l) + a_l, np.abs(u_r) + a_r)
+
+    return 0.5*(F_l + F_r) - 0.5*S_max*(U_r - U_l)
+
+
+## Computes the Roe flux at each interface, with the Harten-Hyman entropy fix
+#  for the acoustic waves.
+#
+#  @param[in] rho_l  densities on the left side of each interface
+#  @param[in] mom_l  momenta on the left side of each interface
+#  @param[in] erg_l  total energies on the left side of each interface
+#  @param[in] rho_r  densities on the right side of each interface
+#  @param[in] mom_r  momenta on the right side of each interface
+#  @param[in] erg_r  total energies on the right side of each interface
+#  @param[in] gamma  ratio of specific heats on the left side of each
+#                    interface, \f$\gamma\f$
+#  @param[in] gamma_r  ratio of specific heats on the right side of each
+#                    interface; if None, gamma is used on both sides
+#
+#  @return array of density, momentum, and energy fluxes with shape
+#          (3,n_interfaces)
+#
+def solveRoe(rho_l, mom_l, erg_l, rho_r, mom_r, erg_r, gamma,
+    gamma_r=None):
+
+    gamma_l = gamma
+    if gamma_r is None:
+       gamma_r = gamma
+
+    U_l, u_l, e_l, p_l, a_l, F_l = computeInterfaceSide(rho_l, mom_l, erg_l,
+       gamma_l)
+    U_r, u_r, e_r, p_r, a_r, F_r = computeInterfaceSide(rho_r, mom_r, erg_r,
+       gamma_r)
+
+    # Roe averages
+    w_l = np.sqrt(U_l[0])
+    w_r = np.sqrt(U_r[0])
+    rho_hat = w_l*w_r
+    u_hat = (w_l*u_l + w_r*u_r)/(w_l + w_r)
+    H_hat = (w_l*(U_l[2] + p_l)/U_l[0] + w_r*(U_r[2] + p_r)/U_r[0]) \
+       /(w_l + w_r)
+    gamma_hat = (w_l*gamma_l + w_r*gamma_r)/(w_l + w_r)
+    a_hat = np.sqrt((gamma_hat - 1.0)*(H_hat - 0.5*u_hat*u_hat))
+
+    # wave strengths
+    d_rho = U_r[0] - U_l[0]
+    d_u = u_r - u_l
+    d_p = p_r - p_l
+    alpha = np.array([(d_p - rho_hat*a_hat*d_u)/(2.0*a_hat*a_hat),
+       d_rho - d_p/(a_hat*a_hat),
+       (d_p + rho_hat*a_hat*d_u)/(2.0*a_hat*a_hat)])
+
+    # wave speeds, with the entropy fix applied to the acoustic waves, which
+    # smooths |lambda| where a wave is a transonic rarefaction
+    speeds = np.array([u_hat - a_hat, u_hat, u_hat + a_hat])
+    abs_speeds = np.abs(speeds)
+    for k, sign in [(0, -1.0), (2, 1.0)]:
+       delta = np.maximum(0.0, np.maximum(speeds[k] - (u_l + sign*a_l),
+          (u_r + sign*a_r) - speeds[k]))
+       with np.errstate(divide='ignore', invalid='ignore'):
+          fixed = (speeds[k]*speeds[k] + delta*delta)/(2.0*delta)
+       abs_speeds[k] = np.where(abs_speeds[k] < delta, fixed, abs_speeds[k])
+
+    # right eigenvectors, indexed by [wave, component, interface]
+    ones = np.ones(u_hat.shape)
+    eigenvectors = np.array([
+       [ones, u_hat - a_hat, H_hat - u_hat*a_hat],
+       [ones, u_hat, 0.5*u_hat*u_hat],
+       [ones, u_hat + a_hat, H_hat + u_hat*a_hat]])
+
+    dissipation = np.sum((abs_speeds*alpha)[:,np.newaxis,:]*eigenvectors,
+       axis=0)
+
+    return 0.5*(F_l + F_r) - 0.5*dissipation
+
+
+## Computes the Godunov flux at each interface from the exact solution of the
+#  Riemann problem, following Toro, chapter 4.
+#
+#  The star pressure is found with Newton iterations on all interfaces at
+#  once, and the solution is then sampled at the interface, \f$x/t=0\f$.
+#
+#  @param[in] rho_l  densities on the left side of each interface
+#  @param[in] mom_l  momenta on the left side of each interface
+#  @param[in] erg_l  total energies on the left side of each interface
+#  @param[in] rho_r  densities on the right side of each interface
+#  @param[in] mom_r  momenta on the right side of each interface
+#  @param[in] erg_r  total energies on the right side of each interface
+#  @param[in] gamma  ratio of specific heats on the left side of each
+#                    interface, \f$\gamma\f$
+#  @param[in] gamma_r  ratio of specific heats on the right side of each
+#                    interface; if None, gamma is used on both sides
+#  @param[in] tol    relative tolerance on the star pressure
+#  @param[in] max_iterations  maximum number of Newton iterations
+#
+#  @return array of density, momentum, and energy fluxes with shape
+#          (3,n_interfaces)
+#
+def solveExact(rho_l, mom_l, erg_l, rho_r, mom_r, erg_r, gamma, gamma_r=None,
+    tol=1.0e-12, max_iterations=50):
+
+    gamma_l = gamma
+    if gamma_r is None:
+       gamma_r = gamma
+
+    U_l, u_l, e_l, p_l, a_l, F_l = computeInterfaceSide(rho_l, mom_l, erg_l,
+       gamma_l)
+    U_r, u_r, e_r, p_r, a_r, F_r = computeInterfaceSide(rho_r, mom_r, erg_r,
+       gamma_r)
+    rho_l = U_l[0]
+    rho_r = U_r[0]
+
+    # check that no vacuum is generated
+    if np.any(2.0*a_l/(gamma_l - 1.0) + 2.0*a_r/(gamma_r - 1.0) <= u_r - u_l):
+       raise ValueError("Exact Riemann solver: initial data generate vacuum")
+
+    # Newton iterations for the star pressure, starting from the primitive
+    # variable estimate
+    p_star = np.maximum(tol*np.minimum(p_l, p_r), 0.5*(p_l + p_r)
+       - 0.125*(u_r - u_l)*(rho_l + rho_r)*(a_l + a_r))
+    for k in xrange(max_iterations):
+
+       f_l, df_l = computePressureFunction(p_star, rho_l, p_l, a_l, gamma_l)
+       f_r, df_r = computePressureFunction(p_star, rho_r, p_r, a_r, gamma_r)
+       p_new = p_star - (f_l + f_r + u_r - u_l)/(df_l + df_r)
+       p_new = np.maximum(p_new, tol*np.minimum(p_l, p_r))
+
+       change = np.max(2.0*np.abs(p_new - p_star)/(p_new + p_star))
+       p_star = p_new
+       if change <= tol:
+          break
+    else:
+       raise RuntimeError("Exact Riemann solver did not converge in %d "
+          "iterations" % max_iterations)
+
+    f_l = computePressureFunction(p_star, rho_l, p_l, a_l, gamma_l)[0]
+    f_r = computePressureFunction(p_star, rho_r, p_r, a_r, gamma_r)[0]
+    u_star = 0.5*(u_l + u_r) + 0.5*(f_r - f_l)
+
+    # sample the solution on each side of the contact
+    left = sampleExactSolution(p_star, u_star, rho_l, u_l, p_l, a_l, gamma_l)
+    right = sampleExactSolution(p_star, -u_star, rho_r, -u_r, p_r, a_r,
+       gamma_r)
+    right[1] = -right[1]
+
+    rho, u, p = np.where(u_star >= 0.0, left, right)
+    e = p/((np.where(u_star >= 0.0, gamma_l, gamma_r) - 1.0)*rho)
+
+    return np.array([rho*u, rho*u*u + p, (rho*(0.5*u*u + e) + p)*u])
+
+
+## Computes the pressure function \f$f_K(p)\f$ of the exact Riemann solver
+#  and its derivative for one side of each interface.
+#
+#  @param[in] p      star pressures
+#  @param[in] rho_K  densities on this side
+#  @param[in] p_K    pressures on this side
+#  @param[in] a_K    sound speeds on this side
+#  @param[in] gamma  ratio of specific heats, \f$\gamma\f$
+#
+#  @return \f$f_K(p)\f$ and \f$f'_K(p)\f$
+#
+def computePressureFunction(p, rho_K, p_K, a_K, gamma):
+
+    # shock branch
+    A = 2.0/((gamma + 1.0)*rho_K)
+    B = (gamma - 1.0)/(gamma + 1.0)*p_K
+    root = np.sqrt(A/(p + B))
+    f_shock = (p - p_K)*root
+    df_shock = root*(1.0 - 0.5*(p - p_K)/(p + B))
+
+    # rarefaction branch
+    ratio = p/p_K
+    exponent = (gamma - 1.0)/(2.0*gamma)
+    f_rare = 2.0*a_K/(gamma - 1.0)*(ratio**exponent - 1.0)
+    df_rare = ratio**(-(gamma + 1.0)/(2.0*gamma))/(rho_K*a_K)
+
+    shock = p > p_K
+    return np.where(shock, f_shock, f_rare), np.where(shock, df_shock, df_rare)
+
+
+## Samples the exact Riemann solution at \f$x/t=0\f$ for the left side of the
+#  contact. The right side is sampled by reflecting the velocities.
+#
+#  @param[in] p_star  star pressures
+#  @param[in] u_star  star velocities
+#  @param[in] rho_K   densities on this side
+#  @param[in] u_K     velocities on this side
+#  @param[in] p_K     pressures on this side
+#  @param[in] a_K     sound speeds on this side
+#  @param[in] gamma   ratio of specific heats, \f$\gamma\f$
+#
+#  @return array of sampled density, velocity, and pressure with shape
+#          (3,n_interfaces)
+#
+def sampleExactSolution(p_star, u_star, rho_K, u_K, p_K, a_K, gamma):
+
+    g1 = (gamma - 1.0)/(gamma + 1.0)
+    ratio = p_star/p_K
+
+    # state between the wave and the contact
+    rho_star = np.where(ratio > 1.0,
+       rho_K*(ratio + g1)/(g1*ratio + 1.0),
+       rho_K*ratio**(1.0/gamma))
+    star = np.array([rho_star, u_star, p_star])
+    outer = np.array([rho_K, u_K, p_K])
+
+    # state inside the rarefaction fan
+    a_fan = 2.0/(gamma + 1.0)*(a_K + 0.5*(gamma - 1.0)*u_K)
+    fan = np.array([rho_K*(a_fan/a_K)**(2.0/(gamma - 1.0)), a_fan,
+       p_K*(a_fan/a_K)**(2.0*gamma/(gamma - 1.0))])
+
+    # the interface lies outside of the wave if its head moves right
+    S_shock = u_K - a_K*np.sqrt((gamma + 1.0)/(2.0*gamma)*ratio
+       + (gamma - 1.0)/(2.0*gamma))
+    S_head = u_K - a_K
+    S_tail = u_star - a_K*ratio**((gamma - 1.0)/(2.0*gamma))
+
+    shock = ratio > 1.0
+    return np.select(
+       [np.logical_and(shock, S_shock >= 0.0), shock,
+        S_head >= 0.0, S_tail < 0.0],
+       [outer, star, outer, star], fan)
+
+
+## Dictionary of the available Riemann solvers, keyed by string identifier
+RIEMANN_SOLVERS = {
+   'hll'     : solveHLL,
+   'hllc'    : solveHLLC,
+   'rusanov' : solveRusanov,
+   'roe'     : solveRoe,
+   'exact'   : solveExact}
+
+
+## Returns a Riemann solver function from its string identifier
+#
+#  @param[in] name  string identifier of the Riemann solver; one of the keys
+#                   of RIEMANN_SOLVERS: 'hll', 'hllc', 'rusanov', 'roe', or
+#                   'exact'
+#
+#  @return Riemann solver function
+#
+def getRiemannSolver(name):
+
+    if name not in RIEMANN_SOLVERS:
+       raise NotImplementedError("Invalid Riemann solver")
+
+    return RIEMANN_SOLVERS[name]
+
+
+## Computes the quantities needed by the Riemann solvers on one side of each
+#  interface.
+#
+#  @param[in] rho    densities, \f$\rho\f$
+#  @param[in] mom    momenta, \f$\rho u\f$
+#  @param[in] erg    total energies, \f$E\f$
+#  @param[in] gamma  ratio of specific heats, \f$\gamma\f$
+#
+#  @return
+#     -# conservative variables with shape (3,n_interfaces)
+#     -# velocities \f$u\f$
+#     -# specific internal energies \f$e\f$
+#     -# pressures \f$p\f$
+#     -# sound speeds \f$a\f$
+#     -# physical fluxes with shape (3,n_interfaces)
+#
+def computeInterfaceSide(rho, mom, erg, gamma):
+
+    rho = np.asarray(rho, dtype=float)
+    mom = np.asarray(mom, dtype=float)
+    erg = np.asarray(erg, dtype=float)
+
+    u, e, p = computePrimitiveVariableArrays(rho, mom, erg, gamma)
+    a = np.sqrt(gamma*p/rho)
+    F = np.array(computeFluxArrays(rho, mom, erg, gamma))
+
+    return np.array([rho, mom, erg]), u, e, p, a, F
+
+
+## Computes the HLLC star state on one side of each interface
+#
+#  @param[in] rho     densities, \f$\rho\f$
+#  @param[in] u       velocities, \f$u\f$
+#  @param[in] e       specific internal energies, \f$e\f$
+#  @param[in] p       pressures, \f$p\f$
+#  @param[in] S       wave speeds on this side, \f$S_l\f$ or \f$S_r\f$
+#  @param[in] S_star  contact wave speeds, \f$S_*\f$
+#
+#  @return star state with shape (3,n_interfaces)
+#
+def computeHLLCStarState(rho, u, e, p, S, S_star):
+
+    coeff = rho*(S - u)/(S - S_star)
+
+    return np.array([coeff, coeff*S_star,
+       coeff*( (0.5*u*u + e) + (S_star - u)*(S_star + p/(rho*(S - u))) )])
+
+
+## Raises an error if the wave speeds of any interface satisfy none of the
+#  conditions for selecting a flux, e.g., because they are NaN.
+#
+#  @param[in] conditions  list of boolean arrays, one for each flux
+#  @param[in] name        name of the Riemann solver
+#
+def checkWaveSpeeds(conditions, name):
+
+    if not np.all(np.logical_or.reduce(conditions)):
+       raise ValueError("%s solver produced unrealistic fluxes\n" % name)
+
+
+## Computes arrays of primitive variables from conservative variables, in the
+#  same way as HydroState.updateState()
+#
+#  @param[in] rho    densities, \f$\rho\f$
+#  @param[in] mom    momenta, \f$\rho u\f$
+#  @param[in] erg    total energies, \f$E\f$
+#  @param[in] gamma  ratio of specific heats, \f$\gamma\f$
+#
+#  @return arrays of \f$u\f$, \f$e\f$, and \f$p\f$
+#
+def computePrimitiveVariableArrays(rho, mom, erg, gamma):
+
+    u = mom/rho
+    e = erg/rho - 0.5*u*u
+    p = getPressure(gamma, rho, e)
+
+    return u, e, p
+
+
+## Computes arrays of the physical fluxes of the conservative variables
+#
+#  @param[in] rho    densities, \f$\rho\f$
+#  @param[in] mom    momenta, \f$\rho u\f$
+#  @param[in] erg    total energies, \f$E\f$
+#  @param[in] gamma  ratio of specific heats, \f$\gamma\f$
+#
+#  @return arrays of density, momentum, and energy fluxes
+#
+def computeFluxArrays(rho, mom, erg, gamma):
+
+    u, e, p = computePrimitiveVariableArrays(rho, mom, erg, gamma)
+
+    return rho*u, rho*u*u + p, (rho*(0.5*u*u + e) + p)*u
@@ -17,10 +17,24 @@ beta = {"CN":0.5, "BDF2":2./3., "BE":1.}
 #  @param[in] mesh          mesh object
 #  @param[in] time_stepper  string identifier for the chosen time-stepper,
 #                           e.g., 'CN'
+#  @param[in] factor_cache  optional S2FactorizationCache to reuse the
+#                           factorization of the radiation operator
+#  @param[in] rad_solver    string identifier for the radiation solver, e.g.,
+#                           'banded' or 'sweep'; see radiationSolveSS
+#
+#  @param[in] source_terms  optional list of transient source terms, e.g.,
+#                           terms that cache their fixed parts over the
+#                           nonlinear iterations of a time step; see
+#                           createRadiationSourceTerms
+#
+#  Iterative radiation solvers are warm-started from the previous nonlinear
+#  iterate, rad_prev, if it is provided, or else from the old solution,
+#  rad_old.
 #
 def takeRadiationStep(mesh, time_stepper, problem_type, dt,
    cx_new, rad_BC,
-   Qpsi_older, Qpsi_old, Qpsi_new, **kwargs):
+   Qpsi_older, Qpsi_old, Qpsi_new, factor_cache=None, rad_solver='banded',
+   source_terms=None, **kwargs):
 
    # assert that the appropriate sources were provided
    assert Qpsi_new.size != 0, 'New source must be provided'
@@ -34,6 +48,7 @@ def takeRadiationStep(mesh, time_stepper, problem_type, dt,
       mesh           = mesh,
       time_stepper   = time_stepper,
       problem_type   = problem_type,
+      source_terms   = source_terms,
       dt             = dt,
       rad_BC         = rad_BC,
       Qpsi_older     = Qpsi_older,
@@ -44,6 +59,12 @@ def takeRadiationStep(mesh, time_stepper, problem_type, dt,
    # compute diagonal modifier
    alpha = 1./(c*dt)
 
+   # get initial guess for iterative solvers
+   rad_guess = kwargs.get('rad_prev')
+   if rad_guess is None:
+      rad_guess = kwargs.get('rad_old')
+   initial_guess = None if rad_guess is None else rad_guess.psi
+
    # solve transient system
    rad_new = radiationSolveSS(
       mesh           = mesh,
@@ -51,7 +72,10 @@ def takeRadiationStep(mesh, time_stepper, problem_type, dt,
       Q              = Q_tr,
       rad_BC         = rad_BC,
       diag_add_term  = alpha,
-      implicit_scale = beta[time_stepper] )
+      implicit_scale = beta[time_stepper],
+      solver         = rad_solver,
+      factor_cache   = factor_cache,
+      initial_guess  = initial_guess)
 
    return rad_new
 
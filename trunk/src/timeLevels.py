@@ -0,0 +1,201 @@
+## @package src.timeLevels
+#  Contains classes to store the solutions of a transient at a fixed number
+#  of time levels.
+#
+#  The levels are kept in a ring and rotated by reference: at the end of a
+#  step, the new level becomes the old level, the old level becomes the older
+#  level, and the container of the oldest level is recycled for the next new
+#  level. No solution is copied. This relies on the solutions at a level never
+#  being modified in place once they are stored, which holds because each
+#  time step creates its new solutions as new objects. To enforce this, the
+#  arrays of the stored solutions are made read-only while they are in the
+#  ring, so that an in-place modification raises an error instead of silently
+#  changing the old and older solutions.
+
+import numpy as np
+
+
+## Solutions at a single time level.
+#
+#  The solutions are stored as attributes, e.g., level.rad or level.hydro.
+#  Solutions that have not been stored are None.
+#
+class TimeLevel(object):
+
+   ## Constructor
+   #
+   #  @param[in] ring  ring of time levels that contains this level, if any
+   #
+   def __init__(self, ring=None):
+
+      self.ring = ring
+
+      # solutions stored at this level
+      self.solutions = dict()
+
+      # arrays made read-only when the solutions were stored
+      self.frozen_arrays = list()
+
+   ## Returns a stored solution, or None if it has not been stored
+   #
+   def __getattr__(self, name):
+
+      # only called for names that are not regular attributes
+      if name in ('ring', 'solutions', 'frozen_arrays') or\
+         name.startswith('__'):
+         raise AttributeError(name)
+      return self.solutions.get(name)
+
+   ## Stores solutions by reference and makes their arrays read-only
+   #
+   #  Arrays that are already read-only are only recorded by this level if
+   #  they were made read-only by another level of the ring, so that arrays
+   #  that were read-only before they were stored stay read-only.
+   #
+   #  @param[in] solutions  solutions to store, given as keyword arguments
+   #
+   def update(self, **solutions):
+
+      held_arrays = self.ring.getHeldArrays() if self.ring else set()
+      self.solutions.update(solutions)
+      for solution in solutions.values():
+         freezeArrays(solution, self.frozen_arrays, held_arrays)
+
+   ## Returns stored solutions
+   #
+   #  @param[in] names  names of the solutions
+   #
+   #  @return tuple of the solutions, with None for any that are not stored
+   #
+   def get(self, *names):
+
+      return tuple(self.solutions.get(name) for name in names)
+
+   ## Removes all solutions and makes their arrays writeable again, except
+   #  for arrays that are still held by other levels
+   #
+   #  @param[in] held_arrays  set of ids of arrays held by other levels
+   #
+   def clear(self, held_arrays=frozenset()):
+
+      releaseArrays([a for a in self.frozen_arrays
+         if id(a) not in held_arrays])
+
+      self.solutions = dict()
+      self.frozen_arrays = list()
+
+
+## Ring of time levels.
+#
+#  Level 0 is the new level, level 1 the old level, and level 2 the older
+#  level. The new solutions of a step are stored in the new level, and
+#  rotate() then shifts all levels by one.
+#
+class TimeLevels(object):
+
+   ## Constructor
+   #
+   #  @param[in] n_levels  number of time levels, including the new level
+   #
+   def __init__(self, n_levels=3):
+
+      self.levels = [TimeLevel(self) for i in xrange(n_levels)]
+
+      # position of the new level in the ring
+      self.head = 0
+
+   ## Returns the level of a given age: 0 for new, 1 for old, 2 for older
+   #
+   def __getitem__(self, age):
+
+      return self.levels[(self.head + age) % len(self.levels)]
+
+   ## New level
+   @property
+   def new(self):
+      return self[0]
+
+   ## Old level
+   @property
+   def old(self):
+      return self[1]
+
+   ## Older level
+   @property
+   def older(self):
+      return self[2]
+
+   ## Shifts the levels by one, so that the new level becomes the old level.
+   #  The oldest level is cleared and becomes the new level.
+   #
+   def rotate(self):
+
+      self.head = (self.head - 1) % len(self.levels)
+      self.new.clear(self.getHeldArrays(exclude=self.new))
+
+   ## Removes all solutions and makes their arrays writeable again, which
+   #  hands the solutions back to the caller, e.g., at the end of a transient
+   #
+   def release(self):
+
+      releaseArrays([a for level in self.levels for a in level.frozen_arrays])
+      for level in self.levels:
+         level.clear()
+
+   ## Returns the ids of the arrays held by the levels
+   #
+   #  @param[in] exclude  level whose arrays are not included
+   #
+   #  @return set of array ids
+   #
+   def getHeldArrays(self, exclude=None):
+
+      return set(id(a) for level in self.levels if level is not exclude
+         for a in level.frozen_arrays)
+
+
+## Makes the arrays of a solution read-only.
+#
+#  Arrays are found in the solution itself, in lists, tuples, and dicts, and
+#  in the attributes of objects, e.g., the angular fluxes of a Radiation
+#  object or the arrays of a HydroStateArray.
+#
+#  @param[in]     solution       solution
+#  @param[in,out] frozen_arrays  list to which the arrays that are made
+#                                read-only are appended
+#  @param[in]     held_arrays    ids of read-only arrays that are appended
+#                                as well
+#
+def freezeArrays(solution, frozen_arrays, held_arrays=frozenset()):
+
+   if isinstance(solution, np.ndarray):
+      if solution.flags.writeable:
+         solution.flags.writeable = False
+         frozen_arrays.append(solution)
+      elif id(solution) in held_arrays:
+         frozen_arrays.append(solution)
+   elif isinstance(solution, (list, tuple)):
+      for item in solution:
+         freezeArrays(item, frozen_arrays, held_arrays)
+   elif isinstance(solution, dict):
+      for item in solution.values():
+         freezeArrays(item, frozen_arrays, held_arrays)
+   elif hasattr(solution, '__dict__'):
+      for item in vars(solution).values():
+         if isinstance(item, np.ndarray):
+            freezeArrays(item, frozen_arrays, held_arrays)
+
+
+## Makes arrays writeable again.
+#
+#  Arrays that own their data are made writeable before views, and views of
+#  arrays that are still read-only stay read-only.
+#
+#  @param[in] arrays  arrays made read-only by freezeArrays()
+#
+def releaseArrays(arrays):
+
+   isView = lambda a: isinstance(a.base, np.ndarray)
+   for array in sorted(arrays, key=isView):
+      if not isView(array) or array.base.flags.writeable:
+         array.flags.writeable = True
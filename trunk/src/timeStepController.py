@@ -0,0 +1,431 @@
+## @package src.timeStepController
+#  Contains a class to select time step sizes from estimates of the local
+#  truncation error, and functions to compute these estimates.
+#
+#  The local error of a step is estimated without an additional solve by
+#  comparing the new solution \f$y^{n+1}\f$ with the polynomial extrapolation
+#  \f$y^{n+1}_{ext}\f$ of the previous solutions (Milne's device). For a
+#  time-stepper of order \f$p-1\f$, the extrapolation through \f$p\f$
+#  previous solutions has an error of the same order as the time-stepper,
+#  \f[
+#    y(t_{n+1}) - y^{n+1}_{ext} = B\,y^{(p)}, \quad
+#    B = \frac{1}{p!}\prod_{j=0}^{p-1}\left(t_{n+1} - t_{n-j}\right),
+#  \f]
+#  while the local error of the time-stepper is
+#  \f$y^{n+1} - y(t_{n+1}) = A\,y^{(p)}\f$. The local error is thus estimated
+#  as \f$\frac{A}{A+B}\left|y^{n+1} - y^{n+1}_{ext}\right|\f$.
+
+import numpy as np
+from hydroState import createHydroStateArray
+
+
+## Time step size controller.
+#
+#  A step is accepted if its error estimate, normalized by the tolerance, is
+#  at most one. After an accepted step, the next step size is chosen with
+#  a PI controller,
+#  \f[
+#    \Delta t_{n+1} = s\,\Delta t_n\,\epsilon_n^{-0.7/p}\,\epsilon_{n-1}^{0.4/p},
+#  \f]
+#  where \f$\epsilon\f$ are the normalized error estimates, \f$s\f$ is a
+#  safety factor, and \f$p\f$ is the order of the local error in the step
+#  size. After a rejected step, the step size is reduced with the integral
+#  part alone, and it is not increased on the next accepted step. The change
+#  in step size is limited so that the step size ratio does not exceed the
+#  ratio for which the BDF2 weights are non-negative.
+#
+#  The controller keeps the history of accepted solutions needed for the
+#  error estimates in a LocalErrorEstimator. Until enough solutions are
+#  available, steps are accepted and the step size is kept. These start-up
+#  steps are checked with the first error estimate, see
+#  estimateStartupErrors(): if the error of any of them exceeds the
+#  tolerance, the controller requests a restart of the transient from the
+#  initial conditions with a smaller step size. Otherwise the error of the
+#  start-up steps, which the later steps cannot correct, would bound the
+#  accuracy of the transient regardless of the tolerance.
+#
+class TimeStepController(object):
+
+   ## Constructor
+   #
+   #  @param[in] dt_initial      initial time step size
+   #  @param[in] values_initial  list of arrays of the error control
+   #                             variables at the initial time
+   #  @param[in] time_stepper    string identifier for the time-stepper,
+   #                             'BE', 'CN', or 'BDF2'
+   #  @param[in] tol             relative tolerance for the local error
+   #  @param[in] dt_min          minimum time step size; steps of this size
+   #                             are always accepted
+   #  @param[in] dt_max          maximum time step size
+   #  @param[in] safety          safety factor applied to new step sizes
+   #  @param[in] max_growth      maximum ratio of new to old step size
+   #  @param[in] min_shrink      minimum ratio of new to old step size
+   #
+   def __init__(self, dt_initial, values_initial, time_stepper='BDF2',
+      tol=1.0e-3, dt_min=0.0, dt_max=None, safety=0.9, max_growth=2.0,
+      min_shrink=0.2):
+
+      self.dt = dt_initial
+      self.time_stepper = time_stepper
+      self.order = ERROR_ORDERS[time_stepper]
+      self.estimator = LocalErrorEstimator(values_initial, time_stepper)
+      self.tol = tol
+      self.dt_min = dt_min
+      self.dt_max = np.inf if dt_max is None else dt_max
+      self.safety = safety
+      self.max_growth = max_growth
+      self.min_shrink = min_shrink
+
+      # normalized error of the last accepted step
+      self.err_old = None
+
+      # flag signalling that the last step was rejected
+      self.rejected = False
+
+      # flag signalling that the start-up steps were rejected, so that the
+      # transient must be restarted from the initial conditions
+      self.restart = False
+
+      # flag signalling that the start-up steps have been checked
+      self.startup_checked = False
+
+      # step counters
+      self.n_accepted = 0
+      self.n_rejected = 0
+
+   ## Decides whether a step is accepted and computes the next step size,
+   #  which is stored in self.dt
+   #
+   #  @param[in] dt          size of the step just taken
+   #  @param[in] values_new  list of arrays of the new error control variables
+   #
+   #  @return True if the step is accepted, and False if it must be repeated
+   #          with the new step size, or, if self.restart is set, if the
+   #          transient must be restarted from the initial conditions with
+   #          the new step size
+   #
+   def update(self, dt, values_new):
+
+      p = float(self.order)
+      self.restart = False
+
+      error = self.estimator.estimate(dt, values_new)
+
+      # check the start-up steps with the first error estimate, and restart
+      # with a smaller step size if they are rejected; the start-up steps
+      # are then counted as rejected
+      if error is not None and not self.startup_checked:
+
+         factor = self.computeStartupFactor(dt, values_new)
+         if factor is not None:
+            n_startup = len(self.estimator.dt_history)
+            self.n_accepted -= n_startup
+            self.n_rejected += n_startup + 1
+            self.dt = min(self.dt_max, max(self.dt_min,
+               factor*self.estimator.dt_history[-1]))
+            self.estimator.restart()
+            self.err_old = None
+            self.rejected = False
+            self.restart = True
+            return False
+
+         self.startup_checked = True
+
+      if error is None:
+
+         # not enough history for an error estimate
+         accepted = True
+         factor = 1.0
+
+      else:
+
+         # normalized error, bounded away from zero
+         err = max(error/self.tol, 1.0e-10)
+         accepted = err <= 1.0 or dt <= self.dt_min
+
+         if accepted:
+
+            # PI controller, or I controller if there is no error history
+            if self.err_old is None:
+               factor = self.safety*err**(-1.0/p)
+            else:
+               factor = self.safety*err**(-0.7/p)*self.err_old**(0.4/p)
+            factor = min(self.max_growth, max(self.min_shrink, factor))
+
+            # do not grow the step size directly after a rejection
+            if self.rejected:
+               factor = min(factor, 1.0)
+            self.err_old = err
+
+         else:
+            factor = max(self.min_shrink, self.safety*err**(-1.0/p))
+
+      # update history, counters, and flags
+      if accepted:
+         self.estimator.accept(dt, values_new)
+         self.n_accepted += 1
+      else:
+         self.n_rejected += 1
+      self.rejected = not accepted
+
+      self.dt = min(self.dt_max, max(self.dt_min, factor*dt))
+
+      return accepted
+
+   ## Computes the factor by which the step size of the start-up steps must
+   #  be reduced for their errors to be within the tolerance
+   #
+   #  @param[in] dt          size of the first step with an error estimate
+   #  @param[in] values_new  list of arrays of the new error control variables
+   #
+   #  @return step size factor, or None if the start-up steps are accepted
+   #
+   def computeStartupFactor(self, dt, values_new):
+
+      # steps of the minimum size are always accepted
+      dt_startup = self.estimator.dt_history[-1]
+      if dt_startup <= self.dt_min:
+         return None
+
+      errors = self.estimator.estimateStartupErrors(dt, values_new)
+      time_steppers = getStartupTimeSteppers(self.time_stepper)
+      factors = [self.safety*(error/self.tol)**(-1.0/ERROR_ORDERS[stepper])
+         for error, stepper in zip(errors, time_steppers)
+         if error > self.tol]
+      if not factors:
+         return None
+
+      return max(self.min_shrink, min(factors))
+
+
+## Estimator of the local error of steps from the history of accepted
+#  solutions, see estimateLocalError()
+#
+class LocalErrorEstimator(object):
+
+   ## Constructor
+   #
+   #  @param[in] values_initial  list of arrays of the error control
+   #                             variables at the initial time
+   #  @param[in] time_stepper    string identifier for the time-stepper,
+   #                             'BE', 'CN', or 'BDF2'
+   #
+   def __init__(self, values_initial, time_stepper='BDF2'):
+
+      self.time_stepper = time_stepper
+      self.order = ERROR_ORDERS[time_stepper]
+
+      # accepted solutions and step sizes, latest first
+      self.values_history = [values_initial]
+      self.dt_history = list()
+
+   ## Estimates the relative local error of a step
+   #
+   #  @param[in] dt          size of the step
+   #  @param[in] values_new  list of arrays of the new error control variables
+   #
+   #  @return relative error estimate, or None if there are not enough
+   #          accepted solutions for an estimate
+   #
+   def estimate(self, dt, values_new):
+
+      if len(self.values_history) < self.order:
+         return None
+
+      return estimateLocalError(values_new, self.values_history, dt,
+         self.dt_history, self.time_stepper)
+
+   ## Estimates the relative local errors of the start-up steps, see
+   #  estimateStartupErrors(). Valid for the first step with an error
+   #  estimate, for which the history holds all solutions since the initial
+   #  time.
+   #
+   #  @param[in] dt          size of the step
+   #  @param[in] values_new  list of arrays of the new error control variables
+   #
+   #  @return list of the relative error estimates of the start-up steps
+   #
+   def estimateStartupErrors(self, dt, values_new):
+
+      return estimateStartupErrors(self.values_history[::-1] + [values_new],
+         self.dt_history[::-1] + [dt],
+         getStartupTimeSteppers(self.time_stepper))
+
+   ## Removes all solutions but the initial one from the history, to restart
+   #  from the initial conditions
+   #
+   def restart(self):
+
+      self.values_history = self.values_history[-1:]
+      self.dt_history = list()
+
+   ## Adds the solution of an accepted step to the history
+   #
+   #  @param[in] dt          size of the step
+   #  @param[in] values_new  list of arrays of the new error control variables
+   #
+   def accept(self, dt, values_new):
+
+      self.values_history = [values_new] + self.values_history[:self.order-1]
+      self.dt_history = [dt] + self.dt_history[:self.order-2]
+
+
+## Order of the local error in the time step size for each time-stepper
+#
+ERROR_ORDERS = {"BE":2, "CN":3, "BDF2":3}
+
+
+## Computes the coefficient \f$A\f$ of the local error of a time-stepper,
+#  \f$y^{n+1} - y(t_{n+1}) = A\,y^{(p)}\f$
+#
+#  @param[in] time_stepper  string identifier for the time-stepper
+#  @param[in] dt            current time step size, \f$\Delta t_n\f$
+#  @param[in] dt_old        previous time step size, \f$\Delta t_{n-1}\f$,
+#                           used for BDF2
+#
+#  @return error coefficient \f$A\f$
+#
+def computeErrorCoefficient(time_stepper, dt, dt_old):
+
+   if time_stepper == 'BE':
+      return 0.5*dt**2
+   elif time_stepper == 'CN':
+      return dt**3/12.
+   elif time_stepper == 'BDF2':
+      return dt**2*(2.0*dt + dt_old)/12.
+   else:
+      raise NotImplementedError("Invalid time-stepper for error estimation")
+
+
+## Estimates the relative local error of a step
+#
+#  The error of each variable is the \f$L^2\f$ norm of the scaled difference
+#  between the new value and the extrapolation of the previous values,
+#  relative to the \f$L^2\f$ norm of the new value. The largest error over
+#  all variables is returned.
+#
+#  @param[in] values_new      list of arrays of new values, \f$y^{n+1}\f$
+#  @param[in] values_history  previous values, latest first: \f$y^n\f$,
+#                             \f$y^{n-1}\f$, ...; \f$p\f$ are used
+#  @param[in] dt              current time step size, \f$\Delta t_n\f$
+#  @param[in] dt_history      previous time step sizes, latest first:
+#                             \f$\Delta t_{n-1}\f$, ...; \f$p-1\f$ are used
+#  @param[in] time_stepper    string identifier for the time-stepper
+#
+#  @return relative error estimate
+#
+def estimateLocalError(values_new, values_history, dt, dt_history,
+   time_stepper):
+
+   p = ERROR_ORDERS[time_stepper]
+
+   # times of the previous values relative to the new time
+   t = -np.cumsum([dt] + list(dt_history[:p-1]))
+
+   # Lagrange weights to extrapolate the previous values to the new time
+   weights = [np.prod([t[k]/(t[k] - t[j]) for k in xrange(p) if k != j])
+      for j in xrange(p)]
+
+   # error coefficients of the extrapolation and of the time-stepper
+   B = np.prod(-t)/np.prod(np.arange(1, p+1))
+   A = computeErrorCoefficient(time_stepper, dt,
+      dt_history[0] if dt_history else dt)
+
+   error = 0.0
+   for j, y_new in enumerate(values_new):
+
+      norm = np.linalg.norm(y_new)
+      if norm > 0.0:
+         y_ext = sum(w*values[j] for w, values in zip(weights, values_history))
+         error = max(error, A/(A + B)*np.linalg.norm(y_new - y_ext)/norm)
+
+   return error
+
+
+## Returns the time-steppers of the start-up steps, which are taken before
+#  there are enough solutions for an error estimate. BDF2 is started with a
+#  BE step.
+#
+#  @param[in] time_stepper  string identifier for the time-stepper
+#
+#  @return list of the string identifiers of the start-up time-steppers
+#
+def getStartupTimeSteppers(time_stepper):
+
+   n_startup = ERROR_ORDERS[time_stepper] - 1
+   if time_stepper == 'BDF2':
+      return ['BE'] + ['BDF2']*(n_startup - 1)
+   else:
+      return [time_stepper]*n_startup
+
+
+## Estimates the relative local errors of the start-up steps
+#
+#  The local error \f$A\,y^{(q)}\f$ of a start-up step is estimated with the
+#  derivative of the order \f$q\f$ of the local error of its time-stepper
+#  approximated by the divided difference of the first \f$q+1\f$ solutions,
+#  \f$y^{(q)} \approx q!\,y[t_0,\ldots,t_q]\f$. The error of each variable
+#  is taken relative to the \f$L^2\f$ norm of its value at the end of the
+#  step, and the largest error over all variables is returned for each step.
+#
+#  @param[in] values         list of the solutions from the initial time on,
+#                            oldest first, each a list of arrays of the error
+#                            control variables
+#  @param[in] dt_history     sizes of the steps between the solutions,
+#                            oldest first
+#  @param[in] time_steppers  string identifiers for the time-steppers of the
+#                            start-up steps
+#
+#  @return list of the relative error estimates of the start-up steps
+#
+def estimateStartupErrors(values, dt_history, time_steppers):
+
+   t = np.concatenate(([0.0], np.cumsum(dt_history)))
+
+   errors = list()
+   for k, time_stepper in enumerate(time_steppers):
+
+      q = ERROR_ORDERS[time_stepper]
+      A = computeErrorCoefficient(time_stepper, dt_history[k],
+         dt_history[k-1] if k > 0 else dt_history[k])
+
+      error = 0.0
+      for j, y_new in enumerate(values[k+1]):
+
+         norm = np.linalg.norm(y_new)
+         if norm > 0.0:
+
+            # divided difference of the first q+1 solutions
+            differences = [values[i][j] for i in xrange(q+1)]
+            for level in xrange(1, q+1):
+               differences = [(differences[i+1] - differences[i])
+                  /(t[i+level] - t[i]) for i in xrange(q+1-level)]
+            derivative = np.prod(np.arange(1, q+1))*differences[0]
+
+            error = max(error, A*np.linalg.norm(derivative)/norm)
+
+      errors.append(error)
+
+   return errors
+
+
+## Returns the variables used to estimate the local error: the density and
+#  specific internal energy of the material
+#
+#  The radiation energy density is not controlled: it relaxes to the emission
+#  of the material on the much shorter absorption time scale, so that its
+#  fast transients, e.g., at the start of a transient driven by a boundary
+#  source, dominate its error estimate although they are damped by the
+#  implicit time-stepper and do not affect the later solution. The specific
+#  internal energy, rather than the energy density, gives light and dense
+#  materials the same weight.
+#
+#  @param[in] hydro  hydro states
+#
+#  @return list of arrays of the error control variables
+#
+def getErrorControlVariables(hydro):
+
+   hydro = createHydroStateArray(hydro)
+
+   return [hydro.rho.copy(), hydro.e.copy()]
@@ -3,17 +3,24 @@
 
 from copy import deepcopy
 import numpy as np
-from math import sqrt
 
-from nonlinearSolve import nonlinearSolve
+from nonlinearSolve import nonlinearSolve, NonlinearWorkspace
 from utilityFunctions import computeL2RelDiff, computeAnalyticHydroSolution, getIndex
-from transientSource import computeRadiationExtraneousSource
+from transientSource import computeRadiationExtraneousSource, getBDF2Weights
 from hydroSource import computeMomentumExtraneousSource,\
    computeEnergyExtraneousSource
 from takeRadiationStep import takeRadiationStep
+from radiationSolveSS import S2FactorizationCache
+from discreteOrdinates import takeDiscreteOrdinatesStep, expandS2Source
+from radiation import DiscreteOrdinatesRadiation
 from hydroSlopes import HydroSlopes
-from musclHancock import hydroPredictor, hydroCorrector
+from hydroState import createHydroStateArray
+from musclHancock import hydroPredictor, hydroCorrector, HydroWorkspace,\
+   getConservativeVariableArrays, createUpdatedStates
 from balanceChecker import BalanceChecker
+from timeStepController import TimeStepController, LocalErrorEstimator,\
+   getErrorControlVariables
+from timeLevels import TimeLevels
 from plotUtilities import plotHydroSolutions, plotIntErgs
 from radUtilities import mu
 import globalConstants as GC
@@ -22,22 +29,45 @@ import globalConstants as GC
 #
 #  @param[in] psim_src  extraneous source function for \f$\Psi^-\f$
 #  @param[in] psip_src  extraneous source function for \f$\Psi^+\f$
+#  @param[in] rad_solver  string identifier for the radiation solver, e.g.,
+#                         'banded' or 'sweep'; see radiationSolveSS
+#  @param[in] quadrature  optional angular quadrature, e.g.,
+#                         GaussLegendreQuadrature. If provided, the S-N
+#                         equations are solved with the discrete ordinates
+#                         engine instead of the S-2 equations; rad_IC is then
+#                         a DiscreteOrdinatesRadiation, and the \f$+\f$ and
+#                         \f$-\f$ sources are applied to the positive and
+#                         negative directions, respectively.
+#  @param[in] sn_method   string identifier for the S-N iteration method,
+#                         'gmres' or 'source_iteration'; see solveSN
 #
 def runLinearTransient(mesh, time_stepper,
    rad_BC, cross_sects, rad_IC, psim_src, psip_src,
-   dt_option='constant', dt_constant=None, t_start=0.0, t_end=1.0, verbosity=2):
+   dt_option='constant', dt_constant=None, t_start=0.0, t_end=1.0, verbosity=2,
+   rad_solver='banded', quadrature=None, sn_method='gmres'):
 
    # check input arguments
    if dt_option == 'constant':
       assert dt_constant is not None, "If time step size option is chosen to \
          be 'constant', then a time step size must be provided."
 
-   # initialize time and solutions
+   # evaluates the extraneous source, for each direction if solving S-N
+   def computeSource(t):
+      Qpsi = computeRadiationExtraneousSource(psim_src, psip_src, mesh, t)
+      if quadrature is None:
+         return Qpsi
+      else:
+         return expandS2Source(Qpsi, quadrature)
+
+   # initialize time and solutions; the old and older solutions are kept in
+   # a ring of time levels, which is rotated by reference after each step
    t = t_start
-   rad_old = rad_IC
-   Qpsi_old = computeRadiationExtraneousSource(psim_src, psip_src, mesh, t_start)
-   rad_older  = None
-   Qpsi_older = None
+   levels = TimeLevels()
+   levels.old.update(rad=rad_IC, Qpsi=computeSource(t_start))
+
+   # cross sections and time step size are constant, so the radiation
+   # operator only needs to be refactored when the time-stepper changes
+   factor_cache = S2FactorizationCache()
    
    # transient loop
    time_index = 0
@@ -71,8 +101,13 @@ def runLinearTransient(mesh, time_stepper,
        if verbosity > 0:
           print("Time step %d: t = %f -> %f:" % (time_index,t-dt,t))
 
+       # get old and older solutions; the older solutions are None on the
+       # first step
+       rad_old, Qpsi_old = levels.old.get('rad', 'Qpsi')
+       rad_older, Qpsi_older = levels.older.get('rad', 'Qpsi')
+
        # compute new extraneous source
-       Qpsi_new = computeRadiationExtraneousSource(psim_src, psip_src, mesh, t)
+       Qpsi_new = computeSource(t)
   
        # take radiation step
        #
@@ -81,30 +116,45 @@ def runLinearTransient(mesh, time_stepper,
        #       functions of material properties, and there is no coupling
        #       to material physics in a radiation-only problem.
        #
-       rad_new = takeRadiationStep(
-          mesh          = mesh,
-          time_stepper  = time_stepper_this_step,
-          problem_type  = 'rad_only',
-          dt            = dt,
-          rad_BC        = rad_BC,
-          cx_older      = cross_sects,
-          cx_old        = cross_sects,
-          cx_new        = cross_sects,
-          rad_older     = rad_older,
-          rad_old       = rad_old,
-          Qpsi_older    = Qpsi_older,
-          Qpsi_old      = Qpsi_old,
-          Qpsi_new      = Qpsi_new)
-
-       # save older solutions
-       Qpsi_older = deepcopy(Qpsi_old)
-       rad_older  = deepcopy(rad_old)
-
-       # save old solutions
-       Qpsi_old   = deepcopy(Qpsi_new)
-       rad_old    = deepcopy(rad_new)
-
-   # return final solution
+       if quadrature is not None:
+          psi_new, iterations = takeDiscreteOrdinatesStep(
+             mesh         = mesh,
+             time_stepper = time_stepper_this_step,
+             dt           = dt,
+             cross_x      = cross_sects,
+             rad_BC       = rad_BC,
+             quadrature   = quadrature,
+             psi_old      = rad_old.psi,
+             Q_new        = Qpsi_new,
+             Q_old        = Qpsi_old,
+             psi_older    = None if rad_older is None else rad_older.psi,
+             Q_older      = Qpsi_older,
+             method       = sn_method)
+          rad_new = DiscreteOrdinatesRadiation(psi_new, quadrature)
+       else:
+          rad_new = takeRadiationStep(
+             mesh          = mesh,
+             rad_solver    = rad_solver,
+             time_stepper  = time_stepper_this_step,
+             problem_type  = 'rad_only',
+             dt            = dt,
+             rad_BC        = rad_BC,
+             cx_older      = cross_sects,
+             cx_old        = cross_sects,
+             cx_new        = cross_sects,
+             rad_older     = rad_older,
+             rad_old       = rad_old,
+             Qpsi_older    = Qpsi_older,
+             Qpsi_old      = Qpsi_old,
+             Qpsi_new      = Qpsi_new,
+             factor_cache  = factor_cache)
+
+       # store new solutions, which become the old solutions
+       levels.new.update(rad=rad_new, Qpsi=Qpsi_new)
+       levels.rotate()
+
+   # return final solution, which is writeable again
+   levels.release()
    return rad_new
 
 
@@ -117,6 +167,62 @@ def runLinearTransient(mesh, time_stepper,
 #                       of momentum equation
 #  @param[in] E_src     extraneous source function for the conservation
 #                       of total energy equation
+#  @param[in] rad_solver  string identifier for the radiation solver, e.g.,
+#                         'banded' or 'sweep'; see radiationSolveSS
+#  @param[in] riemann_solver  string identifier for the Riemann solver used
+#                         by the hydro corrector, e.g., 'hllc'; see
+#                         riemannSolvers.RIEMANN_SOLVERS
+#  @param[in] nonlinear_solver  string identifier for the solver of the
+#                         radiation-material systems, 'picard', 'anderson',
+#                         or 'jfnk'; see nonlinearSolve.nonlinearSolve()
+#  @param[in] anderson_depth  history depth of Anderson acceleration
+#  @param[in] nonlinear_tolerance  tolerance option of the nonlinear solves:
+#                         'fixed' or 'adaptive'. With 'adaptive', the
+#                         tolerance of each step is a fraction,
+#                         nonlinear_safety, of the local time discretization
+#                         error estimated for the previous step; see
+#                         nonlinearSolve.NonlinearConvergenceTest
+#  @param[in] nonlinear_safety  ratio of the adaptive nonlinear tolerance to
+#                         the local time discretization error
+#  @param[in] initial_guess  initial iterate of the nonlinear solves: 'old'
+#                         for the old solution, or 'extrapolated' for the
+#                         linear extrapolation of the old and older
+#                         solutions where they are available; see
+#                         nonlinearSolve.nonlinearSolve()
+#  @param[in] dt_option   time step size option: 'constant', 'CFL', or
+#                         'adaptive'. With 'adaptive', the time step size is
+#                         chosen by a timeStepController.TimeStepController
+#                         from estimates of the local error, and steps with
+#                         too large an error are repeated. The initial time
+#                         step size is dt_constant if given, and otherwise
+#                         the CFL time step size; if it is too large for the
+#                         first steps, which are taken before there is an
+#                         error estimate, the transient is restarted from
+#                         the initial conditions with a smaller time step
+#                         size. For 'rad_hydro' problems,
+#                         the time step size is also limited by the CFL
+#                         condition.
+#  @param[in] dt_tolerance  relative local error tolerance for 'adaptive'
+#  @param[in] dt_min      minimum time step size for 'adaptive'
+#  @param[in] dt_max      maximum time step size for 'adaptive'
+#  @param[in] subcycling  flag to advance 'rad_hydro' problems with several
+#                         explicit hydro steps per radiation-material solve,
+#                         or several radiation-material solves per hydro
+#                         step; see takeTimeStepSubcycled(). The numbers of
+#                         substeps are chosen from the CFL time step size and
+#                         the time scale of energy exchange between radiation
+#                         and material, which is measured in the previous
+#                         step. With 'CFL', the time step size is the largest
+#                         multiple of the CFL time step size, up to
+#                         max_substeps, that does not exceed the exchange
+#                         time step size.
+#  @param[in] max_substeps       maximum number of hydro steps per
+#                                radiation-material solve chosen with 'CFL',
+#                                and maximum number of radiation-material
+#                                solves per time step
+#  @param[in] exchange_fraction  largest relative change of the material
+#                                internal energy by the exchange with the
+#                                radiation in one radiation-material solve
 #
 def runNonlinearTransient(mesh, problem_type,
    rad_BC, cross_sects, rad_IC, hydro_IC, hydro_BC,
@@ -124,35 +230,83 @@ def runNonlinearTransient(mesh, problem_type,
    time_stepper='BE', dt_option='constant', dt_constant=None, CFL=0.5,
    slope_limiter="vanleer", t_start=0.0, t_end=1.0, use_2_cycles=False,
    rho_f=None,u_f=None,E_f=None,gamma_value=None,cv_value=None,
-   verbosity=2, check_balance=False,time_stepper_predictor='BE'):
+   verbosity=2, check_balance=False,time_stepper_predictor='BE',
+   rad_solver='banded', riemann_solver='hllc', dt_tolerance=1.0e-3,
+   dt_min=0.0, dt_max=None, subcycling=False, max_substeps=10,
+   exchange_fraction=0.1, nonlinear_solver='picard', anderson_depth=3,
+   nonlinear_tolerance='fixed', nonlinear_safety=0.1, initial_guess='old'):
 
    # check input arguments
    if dt_option == 'constant':
       assert dt_constant != None, "If time step size option is chosen to \
          be 'constant', then a time step size must be provided."
+   if subcycling:
+      assert problem_type == 'rad_hydro' and not use_2_cycles, "Subcycling \
+         is only implemented for 'rad_hydro' problems with 1 cycle."
+      if time_stepper not in ['BE', 'CN']:
+         raise NotImplementedError("Subcycling is only implemented for the "
+            "BE and CN time-steppers")
+      if dt_option not in ['constant', 'CFL']:
+         raise NotImplementedError("Subcycling requires the 'constant' or "
+            "'CFL' time step size option")
 
    # initialize old quantities
    t_old = t_start
-   cx_old = deepcopy(cross_sects)
-   rad_old = deepcopy(rad_IC)
-   hydro_old = deepcopy(hydro_IC)
-   Qpsi_old, Qmom_old, Qerg_old, Qrho_old = computeExtraneousSources(
-      psim_src, psip_src, mom_src, E_src, mesh, t_start, rho_src=rho_src,
-      verbosity=verbosity)
+   levels = createInitialTimeLevels(mesh, cross_sects, rad_IC, hydro_IC,
+      psim_src, psip_src, mom_src, E_src, rho_src, t_start, verbosity)
+   rad_old, hydro_old = levels.old.get('rad', 'hydro')
 
-   # Just guess e_rad old from hydro initial conditions
-   e_rad_old = np.array([(i.e, i.e) for i in hydro_old])
-   
-   # set older quantities to nothing; these shouldn't exist yet
-   cx_older       = None
-   rad_older      = None
-   hydro_older    = None
-   slopes_older   = None
-   e_rad_older    = None
-   Qpsi_older     = None
-   Qrho_older     = None
-   Qmom_older     = None
-   Qerg_older     = None
+   # the local error of the 2-cycle scheme is that of its last cycle, BDF2
+   if problem_type == 'rad_hydro' and use_2_cycles:
+      error_time_stepper = 'BDF2'
+   else:
+      error_time_stepper = time_stepper
+
+   # create time step size controller
+   if dt_option == 'adaptive':
+      if dt_constant is None:
+         dt_initial = computeCFLTimeStepSize(mesh, hydro_old, CFL)
+      else:
+         dt_initial = dt_constant
+
+      dt_controller = TimeStepController(dt_initial,
+         getErrorControlVariables(hydro_old),
+         time_stepper=error_time_stepper, tol=dt_tolerance, dt_min=dt_min,
+         dt_max=dt_max)
+
+      # save the initial radiation BC in case the transient is restarted
+      rad_BC_initial = dict(rad_BC.__dict__)
+
+   # create estimator of the local time discretization error, to which the
+   # nonlinear tolerance is adapted; the controller's estimator is shared
+   if nonlinear_tolerance == 'adaptive':
+      if dt_option == 'adaptive':
+         error_estimator = dt_controller.estimator
+      else:
+         error_estimator = LocalErrorEstimator(
+            getErrorControlVariables(hydro_old), error_time_stepper)
+   elif nonlinear_tolerance != 'fixed':
+      raise NotImplementedError("Invalid nonlinear tolerance option")
+
+   # estimate of the local time discretization error of the previous step;
+   # until there is one, the nonlinear tolerance is fixed
+   time_error = None
+
+   # size of the previous time step, needed for BDF2 and error estimates
+   dt_old = None
+
+   # time step size of the radiation-material solves for subcycling; the
+   # first step is not subcycled
+   dt_exchange = None
+
+   # preallocate the state buffers of the MUSCL-Hancock steps
+   if problem_type == 'rad_hydro':
+      hydro_workspace = HydroWorkspace(hydro_old)
+   else:
+      hydro_workspace = None
+
+   # buffer of the hydro iterates, reused by all nonlinear solves
+   nonlinear_workspace = NonlinearWorkspace()
    
    # transient loop
    time_index = 0
@@ -162,6 +316,13 @@ def runNonlinearTransient(mesh, problem_type,
        # increment time index
        time_index += 1
 
+       # get old and older quantities
+       cx_old, rad_old, hydro_old, e_rad_old, Qpsi_old, Qrho_old, Qmom_old,\
+          Qerg_old = levels.old.get(*TIME_LEVEL_QUANTITIES)
+       cx_older, rad_older, hydro_older, e_rad_older, Qpsi_older, Qrho_older,\
+          Qmom_older, Qerg_older = levels.older.get(*TIME_LEVEL_QUANTITIES)
+       slopes_older = levels.older.slopes
+
        # if first step, then can't use BDF2
        if time_index == 1 and time_stepper == 'BDF2':
           time_stepper_this_step = 'BE'
@@ -174,16 +335,32 @@ def runNonlinearTransient(mesh, problem_type,
           dt = dt_constant
        elif dt_option == 'CFL':
           # compute time step size according to CFL condition
-          sound_speed = [sqrt(i.p * i.gamma / i.rho) + abs(i.u) for i in hydro_old]
-          dt_vals = [CFL*(mesh.elements[i].dx)/sound_speed[i]
-             for i in xrange(len(hydro_old))]
-          dt = min(dt_vals)
+          dt = computeCFLTimeStepSize(mesh, hydro_old, CFL)
 
           # if using 2 cycles, then twice the time step size may be taken
           if use_2_cycles:
              dt *= 2.0
+       elif dt_option == 'adaptive':
+          # use the time step size chosen by the controller
+          dt = dt_controller.dt
+
+          # the explicit hydro step is still limited by the CFL condition
+          if problem_type == 'rad_hydro':
+             dt_CFL = computeCFLTimeStepSize(mesh, hydro_old, CFL)
+             if use_2_cycles:
+                dt_CFL *= 2.0
+             dt = min(dt, dt_CFL)
        else:
           raise NotImplementedError('Invalid time step size option')
+
+       # with subcycling, take as many hydro steps per radiation-material
+       # solve as the energy exchange between radiation and material allows
+       if subcycling:
+          dt_CFL = computeCFLTimeStepSize(mesh, hydro_old, CFL)
+          if dt_exchange is None:
+             dt_exchange = dt_CFL
+          if dt_option == 'CFL':
+             dt = dt_CFL*max(1, int(min(max_substeps, dt_exchange/dt_CFL)))
   
        # adjust time step size if it would overshoot the end of the transient
        if t_old + dt >= t_end:
@@ -193,6 +370,19 @@ def runNonlinearTransient(mesh, problem_type,
        else:
           t_new = t_old + dt
 
+       # numbers of hydro steps and radiation-material solves in the step
+       if subcycling:
+          n_hydro_substeps, n_rad_substeps = computeSubcycleCounts(dt,
+             dt_CFL, dt_exchange, max_substeps)
+
+       # ratio of the time step size to the previous time step size
+       dt_ratio = 1.0 if dt_old is None else dt/dt_old
+
+       # save the radiation BC, which is updated during the time step, in
+       # case the step is rejected
+       if dt_option == 'adaptive':
+          rad_BC_saved = dict(rad_BC.__dict__)
+
        # print each time step
        if verbosity > 0:
           print("Time step %d: t = %f -> %f:" % (time_index,t_old,t_new))
@@ -211,6 +401,13 @@ def runNonlinearTransient(mesh, problem_type,
               Qpsi_new, Qrho_new, Qmom_new, Qerg_new, src_totals_cycle1 =\
                  takeTimeStepRadiationMaterial(
                  mesh         = mesh,
+                 rad_solver   = rad_solver,
+                 nonlinear_solver = nonlinear_solver,
+                 anderson_depth   = anderson_depth,
+                 time_error       = time_error,
+                 nonlinear_safety = nonlinear_safety,
+                 initial_guess    = initial_guess,
+                 nonlinear_workspace = nonlinear_workspace,
                  time_stepper = 'CN',
                  dt           = 0.5*dt,
                  rad_BC       = rad_BC,
@@ -235,17 +432,24 @@ def runNonlinearTransient(mesh, problem_type,
               Qpsi_new, Qrho_new, Qmom_new, Qerg_new, src_totals_cycle2 =\
                  takeTimeStepRadiationMaterial(
                  mesh         = mesh,
+                 rad_solver   = rad_solver,
+                 nonlinear_solver = nonlinear_solver,
+                 anderson_depth   = anderson_depth,
+                 time_error       = time_error,
+                 nonlinear_safety = nonlinear_safety,
+                 initial_guess    = initial_guess,
+                 nonlinear_workspace = nonlinear_workspace,
                  time_stepper = 'BDF2',
                  dt           = dt,
                  rad_BC       = rad_BC,
                  hydro_BC     = hydro_BC,
                  cx_old       = cx_new,
-                 cx_older     = deepcopy(cx_old),
+                 cx_older     = cx_old,
                  hydro_old    = hydro_new,
-                 hydro_older  = deepcopy(hydro_old),
+                 hydro_older  = hydro_old,
                  rad_old      = rad_new,
-                 rad_older    = deepcopy(rad_old),
-                 slopes_older = deepcopy(slopes_old),
+                 rad_older    = rad_old,
+                 slopes_older = slopes_old,
                  e_rad_old = e_rad_new,
                  e_rad_older = e_rad_old,
                  slope_limiter= slope_limiter,
@@ -258,10 +462,10 @@ def runNonlinearTransient(mesh, problem_type,
                  Qpsi_old     = Qpsi_old,
                  Qmom_old     = Qmom_old,
                  Qerg_old     = Qerg_old,
-                 Qpsi_older   = deepcopy(Qpsi_old),
-                 Qmom_older   = deepcopy(Qmom_old),
-                 Qerg_older   = deepcopy(Qerg_old),
-                 Qrho_older   = deepcopy(Qrho_old))
+                 Qpsi_older   = Qpsi_old,
+                 Qmom_older   = Qmom_old,
+                 Qerg_older   = Qerg_old,
+                 Qrho_older   = Qrho_old)
 
               raise NotImplementedError("Balance checker is wrong, CN step is just a predictor, dont need the sources")
 
@@ -277,6 +481,13 @@ def runNonlinearTransient(mesh, problem_type,
               Qpsi_new, Qrho_new, Qmom_new, Qerg_new, src_totals =\
                  takeTimeStepRadiationMaterial(
                  mesh         = mesh,
+                 rad_solver   = rad_solver,
+                 nonlinear_solver = nonlinear_solver,
+                 anderson_depth   = anderson_depth,
+                 time_error       = time_error,
+                 nonlinear_safety = nonlinear_safety,
+                 initial_guess    = initial_guess,
+                 nonlinear_workspace = nonlinear_workspace,
                  time_stepper = time_stepper_this_step,
                  dt           = dt,
                  rad_BC       = rad_BC,
@@ -304,16 +515,9 @@ def runNonlinearTransient(mesh, problem_type,
                  Qpsi_older   = Qpsi_older,
                  Qmom_older   = Qmom_older,
                  Qerg_older   = Qerg_older,
-                 Qrho_older   = Qrho_older)
-
-              # compute balance
-              if check_balance and (time_stepper != 'BDF2' or time_index>1):
-                 bal = BalanceChecker(mesh, problem_type, time_stepper, dt)
-                 bal.computeBalance(rad_BC=rad_BC, hydro_old=hydro_old,
-                    hydro_new=hydro_new, rad_old=rad_old, rad_new=rad_new,
-                    hydro_older=hydro_older, rad_older=rad_older,
-                    hydro_F_right=hydro_F_right, hydro_F_left=hydro_F_left, 
-                    src_totals=src_totals, cx_new=cx_new,write=True)
+                 Qrho_older   = Qrho_older,
+                 dt_older     = dt_old,
+                 verbosity    = verbosity)
 
        else: # problem_type == 'rad_hydro'
 
@@ -328,6 +532,15 @@ def runNonlinearTransient(mesh, problem_type,
              src_totals_cycle1 =\
                 takeTimeStepMUSCLHancock(
                 mesh           = mesh,
+                rad_solver     = rad_solver,
+                nonlinear_solver = nonlinear_solver,
+                anderson_depth   = anderson_depth,
+                time_error       = time_error,
+                nonlinear_safety = nonlinear_safety,
+                initial_guess    = initial_guess,
+                nonlinear_workspace = nonlinear_workspace,
+                riemann_solver = riemann_solver,
+                hydro_workspace = hydro_workspace,
                 dt             = 0.5*dt, 
                 rad_BC         = rad_BC,
                 hydro_BC       = hydro_BC,
@@ -381,6 +594,15 @@ def runNonlinearTransient(mesh, problem_type,
              src_totals_cycle2 =\
                 takeTimeStepMUSCLHancock(
                 mesh           = mesh,
+                rad_solver     = rad_solver,
+                nonlinear_solver = nonlinear_solver,
+                anderson_depth   = anderson_depth,
+                time_error       = time_error,
+                nonlinear_safety = nonlinear_safety,
+                initial_guess    = initial_guess,
+                nonlinear_workspace = nonlinear_workspace,
+                riemann_solver = riemann_solver,
+                hydro_workspace = hydro_workspace,
                 dt             = 0.5*dt, 
                 rad_BC         = rad_BC,
                 hydro_BC       = hydro_BC,
@@ -396,6 +618,7 @@ def runNonlinearTransient(mesh, problem_type,
                 e_rad_older = e_rad_old,
                 time_stepper_predictor='BE',
                 time_stepper_corrector='BDF2',
+                dt_older     = 0.5*dt,
                 psim_src     = psim_src,
                 psip_src     = psip_src,
                 mom_src      = mom_src,
@@ -426,6 +649,57 @@ def runNonlinearTransient(mesh, problem_type,
                    hydro_F_right=hydro_F_right, hydro_F_left=hydro_F_left, 
                    src_totals=src_totals_cycle2, cx_new=cx_new,write=True)
 
+          elif subcycling:
+
+             if verbosity > 1:
+                print("  %d hydro substeps, %d radiation substeps" %
+                   (n_hydro_substeps, n_rad_substeps))
+
+             # take time step with subcycled hydro and radiation-material
+             # solves; the balance is checked for each radiation substep
+             hydro_new, rad_new, cx_new, slopes_old, e_rad_new,\
+             Qpsi_new, Qmom_new, Qerg_new, Qrho_new, hydro_F_left, hydro_F_right,\
+             src_totals, exchange =\
+                takeTimeStepSubcycled(
+                mesh             = mesh,
+                rad_solver       = rad_solver,
+                nonlinear_solver = nonlinear_solver,
+                anderson_depth   = anderson_depth,
+                time_error       = time_error,
+                nonlinear_safety = nonlinear_safety,
+                initial_guess    = initial_guess,
+                nonlinear_workspace = nonlinear_workspace,
+                riemann_solver   = riemann_solver,
+                hydro_workspace  = hydro_workspace,
+                time_stepper     = time_stepper,
+                dt               = dt,
+                n_hydro_substeps = n_hydro_substeps,
+                n_rad_substeps   = n_rad_substeps,
+                rad_BC           = rad_BC,
+                hydro_BC         = hydro_BC,
+                slope_limiter    = slope_limiter,
+                cx_old           = cx_old,
+                hydro_old        = hydro_old,
+                rad_old          = rad_old,
+                e_rad_old        = e_rad_old,
+                psim_src         = psim_src,
+                psip_src         = psip_src,
+                mom_src          = mom_src,
+                E_src            = E_src,
+                rho_src          = rho_src,
+                t_old            = t_old,
+                Qpsi_old         = Qpsi_old,
+                Qmom_old         = Qmom_old,
+                Qerg_old         = Qerg_old,
+                Qrho_old         = Qrho_old,
+                check_balance    = check_balance,
+                verbosity        = verbosity)
+
+             # time step size of the radiation-material solves of the next
+             # step, from the energy exchanged in this step
+             dt_exchange = computeExchangeTimeStepSize(dt, exchange,
+                exchange_fraction)
+
           else: # use only 1 cycle
 
              # for first step, can't use BDF2; use CN instead
@@ -437,18 +711,21 @@ def runNonlinearTransient(mesh, problem_type,
                 else:
                    time_stepper_corrector = 'BDF2'
 
-                #Because of bad coding, dirichlet_BC only work here for fixed dt
-                if dt_option == 'CFL':
-                   if rad_BC.has_mms_func:
-                      raise NotImplementedError("For 1 cycle, BDF2 does not work" \
-                           " with MMS, time-dependent radiation boundaries")
-            
              # take time step with MUSCL-Hancock
              hydro_new, rad_new, cx_new, slopes_old, e_rad_new,\
              Qpsi_new, Qmom_new, Qerg_new, Qrho_new, hydro_F_left, hydro_F_right,\
              src_totals =\
                 takeTimeStepMUSCLHancock(
                 mesh           = mesh,
+                rad_solver     = rad_solver,
+                nonlinear_solver = nonlinear_solver,
+                anderson_depth   = anderson_depth,
+                time_error       = time_error,
+                nonlinear_safety = nonlinear_safety,
+                initial_guess    = initial_guess,
+                nonlinear_workspace = nonlinear_workspace,
+                riemann_solver = riemann_solver,
+                hydro_workspace = hydro_workspace,
                 dt             = dt, 
                 rad_BC         = rad_BC,
                 hydro_BC       = hydro_BC,
@@ -464,6 +741,7 @@ def runNonlinearTransient(mesh, problem_type,
                 e_rad_older = e_rad_older,
                 time_stepper_predictor=time_stepper_predictor,
                 time_stepper_corrector=time_stepper_corrector,
+                dt_older     = dt_old,
                 psim_src     = psim_src,
                 psip_src     = psip_src,
                 mom_src      = mom_src,
@@ -483,14 +761,69 @@ def runNonlinearTransient(mesh, problem_type,
                 gamma_value = gamma_value,
                 cv_value=cv_value)
 
-             # compute balance
-             if check_balance and (time_stepper != 'BDF2' or time_index>1):
-                bal = BalanceChecker(mesh, problem_type, time_stepper, dt)
-                bal.computeBalance(rad_BC=rad_BC, hydro_old=hydro_old,
-                   hydro_new=hydro_new, rad_old=rad_old, rad_new=rad_new,
-                   hydro_older=hydro_older, rad_older=rad_older,
-                   hydro_F_right=hydro_F_right, hydro_F_left=hydro_F_left, 
-                   src_totals=src_totals, cx_new=cx_new,write=True)
+       # estimate the local error of the step for the nonlinear tolerance of
+       # the next step
+       if nonlinear_tolerance == 'adaptive':
+          error_values = getErrorControlVariables(hydro_new)
+          step_error = error_estimator.estimate(dt, error_values)
+
+       # estimate the local error of the step and repeat the step with a
+       # smaller time step size if the error is too large
+       if dt_option == 'adaptive':
+
+          if not dt_controller.update(dt,
+             getErrorControlVariables(hydro_new)):
+
+             if dt_controller.restart:
+
+                if verbosity > 0:
+                   print("  Start-up steps rejected; restarting with "
+                      "dt = %.3e" % dt_controller.dt)
+
+                # restore the initial conditions and radiation BC, and
+                # restart the transient
+                t_old = t_start
+                dt_old = None
+                time_error = None
+                levels.release()
+                levels = createInitialTimeLevels(mesh, cross_sects, rad_IC,
+                   hydro_IC, psim_src, psip_src, mom_src, E_src, rho_src,
+                   t_start, verbosity)
+                rad_BC.__dict__.update(rad_BC_initial)
+                time_index = 0
+
+             else:
+
+                if verbosity > 0:
+                   print("  Step rejected; retrying with dt = %.3e" %
+                      dt_controller.dt)
+
+                # restore the radiation BC and repeat the step
+                rad_BC.__dict__.update(rad_BC_saved)
+                time_index -= 1
+
+             transient_incomplete = True
+             continue
+
+       # the step is accepted
+       if nonlinear_tolerance == 'adaptive':
+          time_error = step_error
+          if dt_option != 'adaptive':
+             error_estimator.accept(dt, error_values)
+
+       # compute balance for single step methods
+       single_step = problem_type == 'rad_mat' and time_stepper != 'TRBDF2'\
+          or problem_type == 'rad_hydro' and not use_2_cycles and\
+          not subcycling
+       if check_balance and single_step and\
+          (time_stepper != 'BDF2' or time_index>1):
+          bal = BalanceChecker(mesh, problem_type, time_stepper, dt,
+             dt_ratio=dt_ratio)
+          bal.computeBalance(rad_BC=rad_BC, hydro_old=hydro_old,
+             hydro_new=hydro_new, rad_old=rad_old, rad_new=rad_new,
+             hydro_older=hydro_older, rad_older=rad_older,
+             hydro_F_right=hydro_F_right, hydro_F_left=hydro_F_left, 
+             src_totals=src_totals, cx_new=cx_new,write=True)
 
        #Check if in Steady State
        end_at_SS = True
@@ -510,43 +843,146 @@ def runNonlinearTransient(mesh, problem_type,
                          (trans_change, trans_tol))
                       break
 
-       # save older solutions
-       cx_older  = deepcopy(cx_old)
-       rad_older = deepcopy(rad_old)
-       hydro_older = deepcopy(hydro_old)
-       slopes_older = deepcopy(slopes_old)
-       e_rad_older = deepcopy(e_rad_old)
-       Qpsi_older = deepcopy(Qpsi_old)
-       Qrho_older = deepcopy(Qrho_old)
-       Qmom_older = deepcopy(Qmom_old)
-       Qerg_older = deepcopy(Qerg_old)
-
-       # save old solutions
+       # store the slopes of the old solutions, and the new solutions, which
+       # become the old solutions; the old solutions become the older ones
        t_old = t_new
-       cx_old  = deepcopy(cx_new)
-       rad_old = deepcopy(rad_new)
-       hydro_old = deepcopy(hydro_new)
-       e_rad_old = deepcopy(e_rad_new)
-       Qpsi_old = deepcopy(Qpsi_new)
-       Qrho_old = deepcopy(Qrho_new)
-       Qmom_old = deepcopy(Qmom_new)
-       Qerg_old = deepcopy(Qerg_new)
+       dt_old = dt
+       levels.old.update(slopes=slopes_old)
+       levels.new.update(cx=cx_new, rad=rad_new, hydro=hydro_new,
+          e_rad=e_rad_new, Qpsi=Qpsi_new, Qrho=Qrho_new, Qmom=Qmom_new,
+          Qerg=Qerg_new)
+       levels.rotate()
 
 
-   # return final solutions
+   if dt_option == 'adaptive' and verbosity > 0:
+      print("Adaptive time stepping: %d steps accepted, %d steps rejected" %
+         (dt_controller.n_accepted, dt_controller.n_rejected))
+
+   # return final solutions, which are writeable again
+   levels.release()
    return rad_new, hydro_new
 
 
+## Names of the quantities stored at each time level by
+#  runNonlinearTransient(), in addition to the slopes
+TIME_LEVEL_QUANTITIES = ('cx', 'rad', 'hydro', 'e_rad', 'Qpsi', 'Qrho', 'Qmom',
+   'Qerg')
+
+
+## Creates the ring of time levels of runNonlinearTransient() with the initial
+#  conditions stored as the old quantities. The initial conditions are copied
+#  so that they are not made read-only by the time levels, and so that the
+#  transient can be restarted from them.
+#
+#  The hydro states are stored as a HydroStateArray, given either as one or
+#  as a list of hydro states, so that the hydro steps, the slopes, and the
+#  error and balance computations of the transient use their arrays
+#  directly.
+#
+#  @return ring of time levels; the older quantities don't exist yet and are
+#          None
+#
+def createInitialTimeLevels(mesh, cross_sects, rad_IC, hydro_IC, psim_src,
+   psip_src, mom_src, E_src, rho_src, t_start, verbosity):
+
+   cx_old = deepcopy(cross_sects)
+   rad_old = deepcopy(rad_IC)
+   hydro_old = createHydroStateArray(hydro_IC).copy()
+   Qpsi_old, Qmom_old, Qerg_old, Qrho_old = computeExtraneousSources(
+      psim_src, psip_src, mom_src, E_src, mesh, t_start, rho_src=rho_src,
+      verbosity=verbosity)
+
+   # Just guess e_rad old from hydro initial conditions
+   e_rad_old = np.repeat(hydro_old.e[:,np.newaxis], 2, axis=1)
+
+   # the old and older quantities are kept in a ring of time levels, which
+   # is rotated by reference after each step
+   levels = TimeLevels()
+   levels.old.update(cx=cx_old, rad=rad_old, hydro=hydro_old,
+      e_rad=e_rad_old, Qpsi=Qpsi_old, Qrho=Qrho_old, Qmom=Qmom_old,
+      Qerg=Qerg_old)
+
+   return levels
+
+
+## Computes the time step size allowed by the CFL condition
+#
+#  @param[in] mesh   mesh object
+#  @param[in] hydro  hydro states
+#  @param[in] CFL    CFL number
+#
+#  @return CFL time step size
+#
+def computeCFLTimeStepSize(mesh, hydro, CFL):
+
+   hydro = createHydroStateArray(hydro)
+   wave_speeds = hydro.getSoundSpeed() + np.abs(hydro.u)
+
+   return np.min(CFL*mesh.getCellWidths()/wave_speeds)
+
+
+## Computes the time step size of the radiation-material solves from the
+#  energy exchanged between radiation and material in a time step
+#
+#  @param[in] dt        time step size
+#  @param[in] exchange  largest relative change of the material internal
+#                       energy by the exchange with the radiation in the step
+#  @param[in] fraction  largest relative change allowed in one solve
+#
+#  @return exchange time step size; infinite if no energy was exchanged
+#
+def computeExchangeTimeStepSize(dt, exchange, fraction):
+
+   if exchange <= 0.0:
+      return np.inf
+
+   return fraction*dt/exchange
+
+
+## Computes the numbers of hydro steps and radiation-material solves in a
+#  subcycled time step
+#
+#  @param[in] dt            time step size
+#  @param[in] dt_CFL        CFL time step size
+#  @param[in] dt_exchange   exchange time step size
+#  @param[in] max_substeps  maximum number of radiation-material solves
+#
+#  @return numbers of hydro substeps and of radiation substeps
+#
+def computeSubcycleCounts(dt, dt_CFL, dt_exchange, max_substeps):
+
+   # allow for round-off in time step sizes that are multiples of dt_CFL
+   ratio_tol = 1.0 - 1.0e-12
+
+   n_hydro_substeps = max(1, int(np.ceil(ratio_tol*dt/dt_CFL)))
+   n_rad_substeps = max(1, int(np.ceil(min(max_substeps,
+      ratio_tol*dt/dt_exchange))))
+
+   return n_hydro_substeps, n_rad_substeps
+
+
 ## Takes time step without any MUSCL-Hancock.
 #
 #  This should only be called if the problem type is 'rad_mat'.
 #
+#  @param[in] dt_older  size of the previous time step, used by BDF2; if None,
+#                       it is assumed to be equal to dt
+#  @param[in] nonlinear_workspace  optional nonlinearSolve.NonlinearWorkspace
+#                       reused by the nonlinear solves
+#
 def takeTimeStepRadiationMaterial(mesh, time_stepper, dt, rad_BC,
    cx_old=None, cx_older=None, hydro_old=None, hydro_older=None, rad_old=None, rad_older=None,
    hydro_BC=None, slopes_older=None, e_rad_old=None, e_rad_older=None,
    psim_src=None, psip_src=None, rho_src=None, mom_src=None, E_src=None,
    t_old=None, Qpsi_old=None, Qrho_old=None, Qmom_old=None, Qerg_old=None,
-   Qpsi_older=None, Qrho_older=None, Qmom_older=None, Qerg_older=None, slope_limiter=None):
+   Qpsi_older=None, Qrho_older=None, Qmom_older=None, Qerg_older=None, slope_limiter=None,
+   rad_solver='banded', dt_older=None, verbosity=2,
+   nonlinear_solver='picard', anderson_depth=3, time_error=None,
+   nonlinear_safety=0.1, initial_guess='old', nonlinear_workspace=None):
+
+    # size of the previous time step
+    if dt_older is None:
+       dt_older = dt
 
     # compute new extraneous sources
     Qpsi_new, Qmom_new, Qerg_new, Qrho_new = computeExtraneousSources(
@@ -557,18 +993,26 @@ def takeTimeStepRadiationMaterial(mesh, time_stepper, dt, rad_BC,
     hydro_BC.update(states=hydro_old, t=t_old)
 
     # update radiation boundary condition if necessary 
-    rad_BC.update(t_new=t_old+dt, t_old=t_old, t_older=t_old-dt)
+    rad_BC.update(t_new=t_old+dt, t_old=t_old, t_older=t_old-dt_older)
 
     # compute slopes
     slopes_old = HydroSlopes(hydro_old, bc=hydro_BC, limiter=slope_limiter)
 
     # if there is no material motion, then the homogeneous hydro solution
-    # should be equal to the old hydro solution
-    hydro_star = deepcopy(hydro_old)
+    # should be equal to the old hydro solution, which nonlinearSolve does
+    # not modify
+    hydro_star = hydro_old
 
     # perform nonlinear solve
     hydro_new, rad_new, cx_new, e_rad_new = nonlinearSolve(
        mesh         = mesh,
+       rad_solver   = rad_solver,
+       nonlinear_solver = nonlinear_solver,
+       anderson_depth   = anderson_depth,
+       time_error       = time_error,
+       nonlinear_safety = nonlinear_safety,
+       initial_guess    = initial_guess,
+       workspace        = nonlinear_workspace,
        time_stepper = time_stepper,
        problem_type = 'rad_mat',
        dt           = dt,
@@ -595,14 +1039,17 @@ def takeTimeStepRadiationMaterial(mesh, time_stepper, dt, rad_BC,
        Qpsi_older   = Qpsi_older,
        Qmom_older   = Qmom_older,
        Qrho_older   = Qrho_older,
-       Qerg_older   = Qerg_older)
+       Qerg_older   = Qerg_older,
+       dt_ratio     = dt/dt_older,
+       verbosity    = verbosity)
 
     # add up sources for entire time step for balance checker
     src_totals =  computeMMSSrcTotal(mesh,dt,time_stepper,
       Qmom_new=Qmom_new,Qmom_old=Qmom_old,Qmom_older=Qmom_older,
       Qpsi_new=Qpsi_new,Qpsi_old=Qpsi_old,Qpsi_older=Qpsi_older,
       Qerg_new=Qerg_new,Qerg_old=Qerg_old,Qerg_older=Qerg_older,
-      Qrho_new=Qrho_new,Qrho_old=Qrho_old,Qrho_older=Qrho_older)
+      Qrho_new=Qrho_new,Qrho_old=Qrho_old,Qrho_older=Qrho_older,
+      dt_ratio=dt/dt_older)
 
     #Store the radiation flux values if necessary
     rad_BC.storeAllIncidentFluxes(rad_new, rad_old=rad_old, rad_older=rad_older)
@@ -615,6 +1062,14 @@ def takeTimeStepRadiationMaterial(mesh, time_stepper, dt, rad_BC,
 #
 #  This should only be called if the problem type is 'rad_hydro'.
 #
+#  @param[in] hydro_workspace  optional musclHancock.HydroWorkspace into which
+#                              the predicted and corrected hydro states are
+#                              written; these are copied by nonlinearSolve
+#  @param[in] dt_older  size of the previous time step, used by BDF2 in the
+#                       corrector; if None, it is assumed to be equal to dt
+#  @param[in] nonlinear_workspace  optional nonlinearSolve.NonlinearWorkspace
+#                       reused by the nonlinear solves
+#
 def takeTimeStepMUSCLHancock(mesh, dt, rad_BC, 
    cx_old, cx_older, hydro_old, hydro_older, rad_old, rad_older,
    hydro_BC, slope_limiter, slopes_older, e_rad_old, e_rad_older,
@@ -622,7 +1077,15 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
    Qpsi_old, Qmom_old, Qerg_old, Qpsi_older, Qmom_older, Qerg_older,
    Qrho_old=None, Qrho_older=None,
    time_stepper_predictor='CN', time_stepper_corrector='BDF2',verbosity=2,
-   rho_f=None,u_f=None,E_f=None,gamma_value=None,cv_value=None):
+   rho_f=None,u_f=None,E_f=None,gamma_value=None,cv_value=None,
+   rad_solver='banded', riemann_solver='hllc', hydro_workspace=None,
+   dt_older=None, nonlinear_solver='picard', anderson_depth=3,
+   time_error=None, nonlinear_safety=0.1, initial_guess='old',
+   nonlinear_workspace=None):
+
+   # size of the previous time step
+   if dt_older is None:
+      dt_older = dt
     
    # assert that BDF2 was not chosen for the predictor time-stepper
    assert time_stepper_predictor != 'BDF2', 'BDF2 cannot be used in\
@@ -638,7 +1101,8 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
    slopes_old = HydroSlopes(hydro_old, bc=hydro_BC, limiter=slope_limiter)
 
    # perform predictor step of MUSCL-Hancock
-   hydro_star = hydroPredictor(mesh, hydro_old, slopes_old, dt)
+   hydro_star = hydroPredictor(mesh, hydro_old, slopes_old, dt,
+      workspace=hydro_workspace)
 
    # compute new extraneous sources
    Qpsi_half, Qmom_half, Qerg_half, Qrho_half = computeExtraneousSources(
@@ -651,6 +1115,13 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
    # perform nonlinear solve
    hydro_half, rad_half, cx_half, e_rad_half = nonlinearSolve(
       mesh         = mesh,
+      rad_solver   = rad_solver,
+      nonlinear_solver = nonlinear_solver,
+      anderson_depth   = anderson_depth,
+      time_error       = time_error,
+      nonlinear_safety = nonlinear_safety,
+      initial_guess    = initial_guess,
+      workspace        = nonlinear_workspace,
       time_stepper = time_stepper_predictor,
       problem_type = 'rad_hydro',
       dt           = 0.5*dt,
@@ -682,7 +1153,8 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
 
    # perform corrector step of MUSCL-Hancock
    hydro_star, hydro_F_left, hydro_F_right = hydroCorrector(
-      mesh, hydro_old, hydro_half, slopes_old, dt, bc=hydro_BC)
+      mesh, hydro_old, hydro_half, slopes_old, dt, bc=hydro_BC,
+      riemann_solver=riemann_solver, workspace=hydro_workspace)
 
    # compute new extraneous sources
    Qpsi_new, Qmom_new, Qerg_new, Qrho_new = computeExtraneousSources(
@@ -690,14 +1162,20 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
       verbosity=verbosity)
 
    #update rad BC to be at end of time step for implicit terms, old term is
-   #kept at beginning of time step. NOTE IF BDF2 in play, here we have assumed
-   #That you are using a step back of twice the size of dt. It is better
-   #to just use periodic BC 
-   rad_BC.update(t_new=t_old+dt, t_old=t_old, t_older=t_old-dt)
+   #kept at beginning of time step, and older term at the beginning of the
+   #previous time step
+   rad_BC.update(t_new=t_old+dt, t_old=t_old, t_older=t_old-dt_older)
 
    # perform nonlinear solve
    hydro_new, rad_new, cx_new, e_rad_new = nonlinearSolve(
       mesh         = mesh,
+      rad_solver   = rad_solver,
+      nonlinear_solver = nonlinear_solver,
+      anderson_depth   = anderson_depth,
+      time_error       = time_error,
+      nonlinear_safety = nonlinear_safety,
+      initial_guess    = initial_guess,
+      workspace        = nonlinear_workspace,
       time_stepper = time_stepper_corrector,
       problem_type = 'rad_hydro',
       dt           = dt,
@@ -726,6 +1204,7 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
       Qmom_older   = Qmom_older,
       Qerg_older   = Qerg_older,
       e_rad_save   = e_rad_half,
+      dt_ratio     = dt/dt_older,
       verbosity    = verbosity)
 
    # add up sources for entire time step for balance checker
@@ -733,7 +1212,8 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
          Qmom_new=Qmom_new,Qmom_old=Qmom_old,Qmom_older=Qmom_older,
          Qpsi_new=Qpsi_new,Qpsi_old=Qpsi_old,Qpsi_older=Qpsi_older,
          Qerg_new=Qerg_new,Qerg_old=Qerg_old,Qerg_older=Qerg_older,
-         Qrho_new=Qrho_new,Qrho_old=Qrho_old,Qrho_older=Qrho_older)
+         Qrho_new=Qrho_new,Qrho_old=Qrho_old,Qrho_older=Qrho_older,
+         dt_ratio=dt/dt_older)
 
    #Store the incident fluxes on boundary for computing balance
    rad_BC.storeAllIncidentFluxes(rad_new, rad_old=rad_old, rad_older=rad_older)
@@ -746,6 +1226,217 @@ def takeTimeStepMUSCLHancock(mesh, dt, rad_BC,
       src_totals
 
 
+## Takes time step with subcycled hydro and radiation-material solves.
+#
+#  The hydro states are first advanced over the whole time step with
+#  n_hydro_substeps explicit MUSCL-Hancock steps, which gives the homogeneous
+#  hydro solution \f$\mathbf{H}^*\f$. The radiation and its coupling to the
+#  material are then advanced with n_rad_substeps nonlinear solves, each of
+#  which adds an equal share of the hydro increment
+#  \f$\mathbf{H}^*-\mathbf{H}^n\f$ to its old states. The returned boundary
+#  fluxes are the hydro fluxes averaged over the time step, so that the
+#  balance of each radiation substep closes with the substep size.
+#
+#  This should only be called if the problem type is 'rad_hydro'.
+#
+#  @param[in] n_hydro_substeps  number of hydro steps
+#  @param[in] n_rad_substeps    number of radiation-material solves
+#  @param[in] time_stepper      time-stepper of the radiation-material
+#                               solves, 'BE' or 'CN'
+#  @param[in] check_balance     flag to check the balance of each
+#                               radiation-material solve
+#  @param[in] nonlinear_workspace  optional
+#                               nonlinearSolve.NonlinearWorkspace reused by
+#                               the nonlinear solves
+#
+#  @return new solutions as returned by takeTimeStepMUSCLHancock(); the slopes
+#          are those of the old hydro states, and the source totals are summed
+#          over the radiation substeps. The last return value is the largest
+#          relative change of the material internal energy by the
+#          radiation-material solves, summed over the radiation substeps.
+#
+def takeTimeStepSubcycled(mesh, dt, n_hydro_substeps, n_rad_substeps, rad_BC,
+   cx_old, hydro_old, rad_old, hydro_BC, slope_limiter, e_rad_old,
+   psim_src, psip_src, mom_src, E_src, rho_src, t_old,
+   Qpsi_old, Qmom_old, Qerg_old, Qrho_old=None, time_stepper='BE',
+   verbosity=2, rad_solver='banded', riemann_solver='hllc',
+   hydro_workspace=None, check_balance=False, nonlinear_solver='picard',
+   anderson_depth=3, time_error=None, nonlinear_safety=0.1,
+   initial_guess='old', nonlinear_workspace=None):
+
+   # advance the hydro states over the whole time step, averaging the
+   # boundary fluxes over the hydro substeps
+   dt_hydro = dt/n_hydro_substeps
+   hydro_star = hydro_old
+   hydro_F_left = {"rho":0.0, "mom":0.0, "erg":0.0}
+   hydro_F_right = {"rho":0.0, "mom":0.0, "erg":0.0}
+   for k in xrange(n_hydro_substeps):
+
+      hydro_star, F_left, F_right = takeTimeStepHydro(mesh, dt_hydro,
+         hydro_star, hydro_BC, t_old + k*dt_hydro, slope_limiter,
+         riemann_solver=riemann_solver, hydro_workspace=hydro_workspace)
+
+      for name in hydro_F_left:
+         hydro_F_left[name] += F_left[name]/n_hydro_substeps
+         hydro_F_right[name] += F_right[name]/n_hydro_substeps
+
+   # hydro increment added in each radiation substep
+   U_old = getConservativeVariableArrays(hydro_old)
+   U_star = getConservativeVariableArrays(hydro_star)
+   dU = [(U_star[j] - U_old[j])/n_rad_substeps for j in xrange(3)]
+
+   # solutions at the start of each radiation substep
+   dt_rad = dt/n_rad_substeps
+   hydro_sub = hydro_old
+   rad_sub = rad_old
+   cx_sub = cx_old
+   e_rad_sub = e_rad_old
+   Qpsi_sub, Qmom_sub, Qerg_sub, Qrho_sub = Qpsi_old, Qmom_old, Qerg_old,\
+      Qrho_old
+
+   src_totals = {"rad":0.0, "rho":0.0, "erg":0.0, "mom":0.0}
+   exchange = 0.0
+   for j in xrange(n_rad_substeps):
+
+      t_sub = t_old + j*dt_rad
+
+      if verbosity > 1 and n_rad_substeps > 1:
+         print("    Radiation substep %d:" % (j+1))
+
+      # homogeneous hydro solution of the substep
+      if n_rad_substeps == 1:
+         hydro_star_sub = hydro_star
+      else:
+         U_sub = getConservativeVariableArrays(hydro_sub)
+         hydro_star_sub = createUpdatedStates(hydro_sub, U_sub[0] + dU[0],
+            U_sub[1] + dU[1], U_sub[2] + dU[2])
+
+      # compute slopes of the old states of the substep
+      hydro_BC.update(states=hydro_sub, t=t_sub)
+      slopes_sub = HydroSlopes(hydro_sub, bc=hydro_BC, limiter=slope_limiter)
+      if j == 0:
+         slopes_old = slopes_sub
+
+      # compute new extraneous sources
+      Qpsi_new, Qmom_new, Qerg_new, Qrho_new = computeExtraneousSources(
+         psim_src, psip_src, mom_src, E_src, mesh, t_sub+dt_rad,
+         rho_src=rho_src, verbosity=verbosity)
+
+      # update rad BC to the end of the substep
+      rad_BC.update(t_new=t_sub+dt_rad, t_old=t_sub)
+
+      # perform nonlinear solve
+      hydro_new, rad_new, cx_new, e_rad_new = nonlinearSolve(
+         mesh         = mesh,
+         rad_solver   = rad_solver,
+         nonlinear_solver = nonlinear_solver,
+         anderson_depth   = anderson_depth,
+         time_error       = time_error,
+         nonlinear_safety = nonlinear_safety,
+         initial_guess    = initial_guess,
+         workspace        = nonlinear_workspace,
+         time_stepper = time_stepper,
+         problem_type = 'rad_hydro',
+         dt           = dt_rad,
+         rad_BC       = rad_BC,
+         cx_old       = cx_sub,
+         hydro_old    = hydro_sub,
+         hydro_star   = hydro_star_sub,
+         rad_old      = rad_sub,
+         slopes_old   = slopes_sub,
+         e_rad_old    = e_rad_sub,
+         Qpsi_new     = Qpsi_new,
+         Qmom_new     = Qmom_new,
+         Qerg_new     = Qerg_new,
+         Qrho_new     = Qrho_new,
+         Qpsi_old     = Qpsi_sub,
+         Qmom_old     = Qmom_sub,
+         Qerg_old     = Qerg_sub,
+         Qrho_old     = Qrho_sub,
+         Qpsi_older   = None,
+         Qmom_older   = None,
+         Qerg_older   = None,
+         verbosity    = verbosity)
+
+      # relative change of the internal energy by the solve
+      e_star_sub = createHydroStateArray(hydro_star_sub).e
+      e_new = createHydroStateArray(hydro_new).e
+      exchange += np.max(np.abs(e_new - e_star_sub)/e_new)
+
+      # add up sources for the substep
+      src_totals_sub = computeMMSSrcTotal(mesh, dt_rad, time_stepper,
+         Qmom_new=Qmom_new, Qmom_old=Qmom_sub,
+         Qpsi_new=Qpsi_new, Qpsi_old=Qpsi_sub,
+         Qerg_new=Qerg_new, Qerg_old=Qerg_sub,
+         Qrho_new=Qrho_new, Qrho_old=Qrho_sub)
+      for name in src_totals:
+         src_totals[name] += src_totals_sub[name]
+
+      #Store the incident fluxes on boundary for computing balance
+      rad_BC.storeAllIncidentFluxes(rad_new, rad_old=rad_sub)
+
+      if check_balance:
+         bal = BalanceChecker(mesh, 'rad_hydro', time_stepper, dt_rad)
+         bal.computeBalance(rad_BC=rad_BC, hydro_old=hydro_sub,
+            hydro_new=hydro_new, rad_old=rad_sub, rad_new=rad_new,
+            hydro_F_right=hydro_F_right, hydro_F_left=hydro_F_left,
+            src_totals=src_totals_sub, cx_new=cx_new, write=True)
+
+      # the new solutions are the old solutions of the next substep
+      hydro_sub = hydro_new
+      rad_sub = rad_new
+      cx_sub = cx_new
+      e_rad_sub = e_rad_new
+      Qpsi_sub, Qmom_sub, Qerg_sub, Qrho_sub = Qpsi_new, Qmom_new, Qerg_new,\
+         Qrho_new
+
+   if verbosity > 1:
+      print ""
+
+   return hydro_new, rad_new, cx_new, slopes_old, e_rad_new,\
+      Qpsi_new, Qmom_new, Qerg_new, Qrho_new, hydro_F_left, hydro_F_right,\
+      src_totals, exchange
+
+
+## Takes a MUSCL-Hancock time step for pure hydrodynamics
+#
+#  @param[in] mesh             mesh object
+#  @param[in] dt               time step size
+#  @param[in] hydro_old        old hydro states
+#  @param[in] hydro_BC         hydro BC object
+#  @param[in] t_old            old time
+#  @param[in] slope_limiter    string identifier for the slope limiter
+#  @param[in] riemann_solver   string identifier for the Riemann solver
+#  @param[in] hydro_workspace  optional musclHancock.HydroWorkspace into which
+#                              the predicted and new states are written
+#
+#  @return
+#     -# new hydro states
+#     -# dictionary of fluxes on the left boundary
+#     -# dictionary of fluxes on the right boundary
+#
+def takeTimeStepHydro(mesh, dt, hydro_old, hydro_BC, t_old, slope_limiter,
+   riemann_solver='hllc', hydro_workspace=None):
+
+   # update hydro BC
+   hydro_BC.update(states=hydro_old, t=t_old)
+
+   # compute slopes
+   slopes_old = HydroSlopes(hydro_old, bc=hydro_BC, limiter=slope_limiter)
+
+   # perform predictor step of MUSCL-Hancock
+   hydro_half = hydroPredictor(mesh, hydro_old, slopes_old, dt,
+      workspace=hydro_workspace)
+
+   # update hydro BC with edge values of the predicted states
+   hydro_BC.update(states=hydro_half, t=t_old+0.5*dt, slopes=slopes_old,
+      edge_value=True)
+
+   # perform corrector step of MUSCL-Hancock
+   return hydroCorrector(mesh, hydro_old, hydro_half, slopes_old, dt,
+      bc=hydro_BC, riemann_solver=riemann_solver, workspace=hydro_workspace)
+
+
 ## Computes all extraneous sources at time \f$t\f$
 #
 #  @param[in] psim_src
@@ -793,9 +1484,12 @@ def computeExtraneousSources(psim_src, psip_src, mom_src, E_src, mesh, t,
 #--------------------------------------------------------------------------------
 ## Function to compute the src totals for MMS sources
 #
+#  @param[in] dt_ratio  ratio of the time step size to the previous time step
+#                       size, used for BDF2
+#
 def computeMMSSrcTotal(mesh, dt, time_stepper, Qpsi_new=None, Qpsi_old=None,
         Qpsi_older=None, Qrho_new=None, Qrho_old=None, Qrho_older=None,Qmom_new=None, Qmom_old=None, Qmom_older=None,
-        Qerg_new=None,Qerg_old=None,Qerg_older=None):
+        Qerg_new=None,Qerg_old=None,Qerg_older=None, dt_ratio=1.0):
 
    vol = mesh.getElement(0).dx
    # add up sources for each equation, depending on time stepper
@@ -833,20 +1527,21 @@ def computeMMSSrcTotal(mesh, dt, time_stepper, Qpsi_new=None, Qpsi_old=None,
       #Rad source is vector passed to  needs to be integrated over angle and volume
       #If you work out the math, its just the sum *0.5
       vol = mesh.getElement(0).dx
-      srcs["rad"] = 2./3.*(0.5*vol*sum(Qpsi_new)*dt)
-      srcs["rad"] += 1./6.*(0.5*vol*sum(Qpsi_old)*dt)
-      srcs["rad"] += 1./6.*(0.5*vol*sum(Qpsi_older)*dt)
-      srcs["mom"] = 2./3*(sum([vol*dt*i for i in Qmom_new]))
-      srcs["mom"] += 1/6.*(sum([vol*dt*i for i in Qmom_old]))
-      srcs["mom"] += 1/6.*(sum([vol*dt*i for i in Qmom_older]))
-      srcs["mom"] += 2./3*sumRadMomQ(vol,dt,Qpsi_new)+1./6.*sumRadMomQ(vol,dt,Qpsi_old) \
-                    +1./6.*(sumRadMomQ(vol,dt,Qpsi_older))
-      srcs["erg"] = 2./3.*sum([vol*dt*0.5*(i[0]+i[1]) for i in Qerg_new])
-      srcs["erg"] += 1./6*sum([vol*dt*0.5*(i[0]+i[1]) for i in Qerg_old])
-      srcs["erg"] += 1./6*sum([vol*dt*0.5*(i[0]+i[1]) for i in Qerg_older])
-      srcs["rho"] = 2./3*(sum([vol*dt*i for i in Qrho_new]))
-      srcs["rho"] += 1/6.*(sum([vol*dt*i for i in Qrho_old]))
-      srcs["rho"] += 1/6.*(sum([vol*dt*i for i in Qrho_older]))
+      w_new, w_old, w_older = getBDF2Weights(dt_ratio)
+      srcs["rad"] = w_new*(0.5*vol*sum(Qpsi_new)*dt)
+      srcs["rad"] += w_old*(0.5*vol*sum(Qpsi_old)*dt)
+      srcs["rad"] += w_older*(0.5*vol*sum(Qpsi_older)*dt)
+      srcs["mom"] = w_new*(sum([vol*dt*i for i in Qmom_new]))
+      srcs["mom"] += w_old*(sum([vol*dt*i for i in Qmom_old]))
+      srcs["mom"] += w_older*(sum([vol*dt*i for i in Qmom_older]))
+      srcs["mom"] += w_new*sumRadMomQ(vol,dt,Qpsi_new)+w_old*sumRadMomQ(vol,dt,Qpsi_old) \
+                    +w_older*(sumRadMomQ(vol,dt,Qpsi_older))
+      srcs["erg"] = w_new*sum([vol*dt*0.5*(i[0]+i[1]) for i in Qerg_new])
+      srcs["erg"] += w_old*sum([vol*dt*0.5*(i[0]+i[1]) for i in Qerg_old])
+      srcs["erg"] += w_older*sum([vol*dt*0.5*(i[0]+i[1]) for i in Qerg_older])
+      srcs["rho"] = w_new*(sum([vol*dt*i for i in Qrho_new]))
+      srcs["rho"] += w_old*(sum([vol*dt*i for i in Qrho_old]))
+      srcs["rho"] += w_older*(sum([vol*dt*i for i in Qrho_older]))
 
    return srcs
 
@@ -29,6 +29,10 @@
 #   \frac{1}{6} A^{n-1}
 # \f]
 #
+# where the BDF2 weights given are for a constant time step size. For a ratio
+# \f$r = \Delta t_n/\Delta t_{n-1}\f$ of the current to the previous time step
+# size, the weights are given by getBDF2Weights().
+#
 # for the general problem 
 # \f[
 #   \frac{\partial Y}{c\partial t} = A[ Y(t)]
@@ -41,15 +45,27 @@
 #
 # In implementation, \f$Y^n/c\Delta t\f$
 # is also on the right hand side of the equation as a source term. This is
-# the only term for which its derived class overrides computeTerm
+# the only term for which its derived class overrides computeFixedTerm
 # rather than implement the eval*** functions, since the term is the same for all
 # stepping algorithms
 #
-# TODO: There is a lot of extra passing of argumetns around to functions here.
-# Although it would be less clean looking, moving the loops over all elements
-# into the evaluate terms can probably speed up the code overall quite a bit.
-# I would recommend looking at the profiler unittest to see where the time
-# is being spent
+# Each of the eval*** functions above evaluates the term for a single element.
+# For speed, each radiation source term also implements mesh-wide versions,
+# evalImplicitAll, evalOldAll, and evalOlderAll, which evaluate the term for all
+# elements at once using numpy array operations and return the full source
+# vector in the ordering of radiation dofs. The default computeTerm uses these
+# mesh-wide versions; the base class versions simply loop over the element
+# functions, so a derived class that only implements the element functions
+# still works.
+#
+# Within a time step, the old and older terms do not change between nonlinear
+# iterations; only the implicit term depends on the iterate. computeTerm
+# therefore builds each term as a fixed part, computeFixedTerm, which is the
+# weighted sum of the old and older terms, plus an iterate part,
+# computeIterateTerm, which is the weighted implicit term. A term on which
+# cacheFixedTerm has been called computes its fixed part on its next
+# evaluation and reuses it for all later evaluations, so such a term must
+# only be used for a single time step.
 #
 
 import re
@@ -60,7 +76,8 @@ import globalConstants as GC
 from radUtilities import mu
 from utilityFunctions import getIndex, getLocalIndex, computeRadiationVector
 from utilityFunctions import getNu, computeEdgeVelocities, computeEdgeTemperatures,\
-   computeEdgeDensities 
+   computeEdgeDensities, getCrossSectionArray, computeEdgeVelocitiesArray,\
+   computeEdgeDensitiesArray
 
 ## Computes the radiation transient source
 #
@@ -88,8 +105,45 @@ from utilityFunctions import getNu, computeEdgeVelocities, computeEdgeTemperatur
 #                           'rad_only', 'rad_mat', or 'rad_hydro'.
 #                           Descriptions are above.
 #
+#  @param[in] source_terms  list of transient source terms, e.g., terms that
+#                           cache their fixed parts, see
+#                           createRadiationSourceTerms(). If not provided,
+#                           new terms are created.
+#
 def computeRadiationSource(mesh, time_stepper, problem_type,
-   **kwargs):
+   source_terms=None, **kwargs):
+
+   # create list of transient source terms
+   if source_terms is None:
+      source_terms = createRadiationSourceTerms(mesh, time_stepper,
+         problem_type)
+
+   # compute the transient source
+   n = mesh.n_elems * 4
+   Q_tr = np.zeros(n)
+
+   for term in source_terms:
+       # compute source contribution for this term
+       Q_term = term.computeTerm(**kwargs)
+       # add to total
+       Q_tr += Q_term
+
+   return Q_tr
+
+## Creates the list of radiation transient source terms for a problem type
+#
+#  @param[in] mesh          mesh object
+#  @param[in] time_stepper  string identifier for the chosen time-stepper,
+#                           e.g., 'CN'
+#  @param[in] problem_type  type of transient problem being run, see
+#                           computeRadiationSource()
+#  @param[in] cache_fixed_terms  if True, the terms cache their fixed parts,
+#                           so they must only be used for a single time step
+#
+#  @return list of transient source terms
+#
+def createRadiationSourceTerms(mesh, time_stepper, problem_type,
+   cache_fixed_terms=False):
 
    # create list of transient source terms
    terms = [OldIntensityTerm(mesh, time_stepper), 
@@ -118,17 +172,35 @@ def computeRadiationSource(mesh, time_stepper, problem_type,
 
        raise NotImplementedError('Invalid problem_type specified')
 
-   # compute the transient source
-   n = mesh.n_elems * 4
-   Q_tr = np.zeros(n)
+   if cache_fixed_terms:
+       for term in terms:
+           term.cacheFixedTerm()
 
-   for term in terms:
-       # compute source contribution for this term
-       Q_term = term.computeTerm(**kwargs)
-       # add to total
-       Q_tr += Q_term
+   return terms
+
+## Returns the weights of the BDF2 time-stepper for variable time step sizes
+#
+#  The weights \f$w^{n+1}\f$, \f$w^n\f$, and \f$w^{n-1}\f$ in
+#  \f[
+#    \frac{Y^{n+1} - Y^{n}}{c\Delta t_n} = w^{n+1}A^{n+1} + w^n A^{n} +
+#    w^{n-1} A^{n-1}
+#  \f]
+#  are second-order accurate for any ratio \f$r = \Delta t_n/\Delta t_{n-1}\f$
+#  if they sum to one and \f$w^{n+1} - w^{n-1}/r = \frac{1}{2}\f$. The implicit
+#  weight is kept at \f$\frac{2}{3}\f$ so that the implicit system does not
+#  depend on the ratio, which gives \f$w^{n-1} = \frac{r}{6}\f$ and
+#  \f$w^n = \frac{1}{3} - \frac{r}{6}\f$. The old weight is non-negative for
+#  \f$r\le 2\f$.
+#
+#  @param[in] dt_ratio  ratio of the current to the previous time step size,
+#                       \f$r\f$
+#
+#  @return weights \f$w^{n+1}\f$, \f$w^n\f$, and \f$w^{n-1}\f$
+#
+def getBDF2Weights(dt_ratio=1.0):
+
+   return 2./3., 1./3. - dt_ratio/6., dt_ratio/6.
 
-   return Q_tr
 
 #=================================================================================
 ## Base class for source handlers. More info given in package documentation. Here, 
@@ -149,30 +221,163 @@ class TransientSourceTerm:
         self.mesh = mesh
         self.time_stepper = time_stepper
 
-        # Determine which time stepping function to use in derived class
+        # Determine which time stepping function to use in derived class, and
+        # the number of time levels before the new one that it uses
         self.func = None
+        self.func_all = None
         if re.search("BE", time_stepper):
             self.func = self.evalBE
+            self.func_all = self.evalBEAll
+            self.n_old_levels = 0
         elif re.search("CN", time_stepper):
             self.func = self.evalCN
+            self.func_all = self.evalCNAll
+            self.n_old_levels = 1
         elif re.search("BDF2", time_stepper):
             self.func = self.evalBDF2
+            self.func_all = self.evalBDF2All
+            self.n_old_levels = 2
         else:
            raise NotImplementedError("Specified an invalid time-stepper")
 
+        # cached fixed part of the term, see cacheFixedTerm
+        self.cache_fixed = False
+        self.fixed_term = None
+
     #----------------------------------------------------------------------------
     ## Function to evaluate source at all cells in the mesh. This is the main 
     #  function to be called on all sources.  
     #
     def computeTerm(self, **kwargs):
 
-        #Loop over all cells and build source 
-        Q = np.array([])
+        return self.getFixedTerm(self.computeFixedTerm, **kwargs) \
+           + self.computeIterateTerm(**kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Makes the term cache its fixed part, i.e., the part that does not
+    #  depend on the nonlinear iterate, on its next evaluation and reuse it
+    #  for all later evaluations. The term must then only be used within a
+    #  single time step.
+    #
+    def cacheFixedTerm(self):
+
+        self.cache_fixed = True
+        self.fixed_term = None
+
+    #----------------------------------------------------------------------------
+    ## Returns the fixed part of the term, computing it unless it is cached
+    #
+    #  @param[in] compute_func  function computing the fixed part, e.g.,
+    #                           self.computeFixedTerm
+    #
+    def getFixedTerm(self, compute_func, **kwargs):
+
+        if self.fixed_term is not None:
+            return self.fixed_term
+
+        fixed_term = compute_func(**kwargs)
+        if self.cache_fixed:
+            self.fixed_term = fixed_term
+        return fixed_term
+
+    #----------------------------------------------------------------------------
+    ## Returns the weights of the implicit, old, and older terms of the
+    #  time-stepper
+    #
+    def getWeights(self, dt_ratio=1.0):
+
+        if self.n_old_levels == 0:
+            return 1., 0., 0.
+        elif self.n_old_levels == 1:
+            return 0.5, 0.5, 0.
+        else:
+            return getBDF2Weights(dt_ratio)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the part of the source at all cells that does not
+    #  depend on the nonlinear iterate, i.e., the weighted old and older
+    #  terms
+    #
+    def computeFixedTerm(self, **kwargs):
+
+        w_new, w_old, w_older = self.getWeights(kwargs.get('dt_ratio', 1.0))
+        if self.n_old_levels == 0:
+            return 0.0
+        elif self.n_old_levels == 1:
+            return w_old*self.evalOldAll(**kwargs)
+        else:
+            return w_old*self.evalOldAll(**kwargs) \
+               + w_older*self.evalOlderAll(**kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the part of the source at all cells that depends
+    #  on the nonlinear iterate, i.e., the weighted implicit term
+    #
+    def computeIterateTerm(self, **kwargs):
+
+        w_new, w_old, w_older = self.getWeights(kwargs.get('dt_ratio', 1.0))
+        return w_new*self.evalImplicitAll(**kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the source for each element as the sum of its
+    #  fixed and iterate parts, see evalFixed and evalIterate. Used by
+    #  handlers that build their sources element by element.
+    #
+    #  @return list of the sources of the elements
+    #
+    def evalElementTerms(self, **kwargs):
+
+        # without old terms, there is no fixed part
+        if self.n_old_levels == 0:
+            return [self.func(i, **kwargs) for i in xrange(self.mesh.n_elems)]
+
+        def computeFixedTerms(**kwargs):
+            return [self.evalFixed(i, **kwargs)
+               for i in xrange(self.mesh.n_elems)]
+        fixed_terms = self.getFixedTerm(computeFixedTerms, **kwargs)
+
+        return [fixed_terms[i] + self.evalIterate(i, **kwargs)
+           for i in xrange(self.mesh.n_elems)]
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the fixed part of the source for element el, see
+    #  computeFixedTerm
+    #
+    #  @param[in] i  element id
+    #
+    def evalFixed(self, i, **kwargs):
+
+        w_new, w_old, w_older = self.getWeights(kwargs.get('dt_ratio', 1.0))
+        if self.n_old_levels == 0:
+            return 0.0
+        elif self.n_old_levels == 1:
+            return w_old*self.evalOld(i, **kwargs)
+        else:
+            return w_old*self.evalOld(i, **kwargs) \
+               + w_older*self.evalOlder(i, **kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the iterate part of the source for element el, see
+    #  computeIterateTerm
+    #
+    #  @param[in] i  element id
+    #
+    def evalIterate(self, i, **kwargs):
+
+        w_new, w_old, w_older = self.getWeights(kwargs.get('dt_ratio', 1.0))
+        return w_new*self.evalImplicit(i, **kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate source for all cells by looping over an element
+    #  function. Used by the default mesh-wide eval functions.
+    #
+    #  @param[in] eval_func  element function, e.g., self.evalOld
+    #
+    def evalByElement(self, eval_func, **kwargs):
 
+        Q = np.zeros(4*self.mesh.n_elems)
         for i in xrange(self.mesh.n_elems):
-            
-            Q_elem = self.func(i, **kwargs) #Append source of element i
-            Q = np.append(Q, Q_elem)          
+            Q[4*i:4*i+4] = eval_func(i, **kwargs)
 
         return Q
 
@@ -201,8 +406,59 @@ class TransientSourceTerm:
     #
     def evalBDF2(self, i, **kwargs):
 
-        return 1./6.*( self.evalOld(i, **kwargs) + self.evalOlder(i, **kwargs) ) \
-                 + 2./3.*(self.evalImplicit(i, **kwargs))
+        w_new, w_old, w_older = getBDF2Weights(kwargs.get('dt_ratio', 1.0))
+        return w_old*self.evalOld(i, **kwargs) \
+           + w_older*self.evalOlder(i, **kwargs) \
+           + w_new*self.evalImplicit(i, **kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate source in CN time stepping for all elements
+    #
+    def evalCNAll(self, **kwargs):
+
+        return 0.5*(self.evalOldAll(**kwargs) + self.evalImplicitAll(**kwargs))
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate source in backward Euler time stepping for all
+    #  elements
+    #
+    def evalBEAll(self, **kwargs):
+
+        return self.evalImplicitAll(**kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate source in BDF2 time stepping for all elements
+    #
+    def evalBDF2All(self, **kwargs):
+
+        w_new, w_old, w_older = getBDF2Weights(kwargs.get('dt_ratio', 1.0))
+        return w_old*self.evalOldAll(**kwargs) \
+           + w_older*self.evalOlderAll(**kwargs) \
+           + w_new*self.evalImplicitAll(**kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the implicit term for all elements. Derived classes
+    #  should override this with a vectorized version.
+    #
+    def evalImplicitAll(self, **kwargs):
+
+        return self.evalByElement(self.evalImplicit, **kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the old term for all elements. Derived classes
+    #  should override this with a vectorized version.
+    #
+    def evalOldAll(self, **kwargs):
+
+        return self.evalByElement(self.evalOld, **kwargs)
+
+    #----------------------------------------------------------------------------
+    ## Function to evaluate the older term for all elements. Derived classes
+    #  should override this with a vectorized version.
+    #
+    def evalOlderAll(self, **kwargs):
+
+        return self.evalByElement(self.evalOlder, **kwargs)
 
     #----------------------------------------------------------------------------
     ## Function to evaluate the implicit term, if it occurs on right hand side of
@@ -252,25 +508,25 @@ class OldIntensityTerm(TransientSourceTerm):
         # call base class constructor
         TransientSourceTerm.__init__(self, *args)
     
-    ## Override the build source function, since old intensity term is the same
-    #  for all time steppers
+    ## Override the fixed part of the source, since old intensity term is the
+    #  same for all time steppers
     #
     #  @param[in] dt        time step size
     #  @param[in] rad_old   old radiation
     #
-    def computeTerm(self, dt, rad_old, **kwargs):
+    def computeFixedTerm(self, dt, rad_old, **kwargs):
 
-        # Loop over all cells and build source 
-        Q = np.array([])
-        for i in xrange(self.mesh.n_elems):
+        # compute c*dt
+        c_dt = GC.SPD_OF_LGT * dt
 
-            # Evaluate source of element i
-            Q_local = self.computeOldIntensityTerm(i, dt=dt, rad_old=rad_old)
+        # old intensity term for all dofs at once
+        return buildSourceVector(rad_old.psim / c_dt, rad_old.psip / c_dt)
 
-            # Append source from element i
-            Q = np.append(Q, Q_local)
+    ## The old intensity term does not depend on the iterate
+    #
+    def computeIterateTerm(self, **kwargs):
 
-        return Q
+        return 0.0
 
     ## Computes old intensity term, \f$\frac{\Psi^{\pm,n}}{c\Delta t}\f$
     #
@@ -383,6 +639,50 @@ class StreamingTerm(TransientSourceTerm):
 
         return Q_local
 
+    #--------------------------------------------------------------------------------
+    ## Compute RHS term for all elements. See evalRHSTerm.
+    #
+    def evalRHSTermAll(self, rad_old, rad_BC, time_step, **kwargs):
+
+        #If it is a time dependent boundary condition, make a copy and
+        #update to the old time
+        if time_step == "old":
+           psi_left, psi_right = rad_BC.getOldIncidentFluxes()
+        elif time_step == "older":
+           psi_left, psi_right = rad_BC.getOlderIncidentFluxes()
+        else:
+           raise IOError("Invalid call of evalRHSTerm BC time")
+
+        psim_L = rad_old.psim[:,0] # psim_{i,L}
+        psip_L = rad_old.psip[:,0] # psip_{i,L}
+        psim_R = rad_old.psim[:,1] # psim_{i,R}
+        psip_R = rad_old.psip[:,1] # psip_{i,R}
+
+        # psip_{i-1/2} is psip_{i-1,R}, and psim_{i+1/2} is psim_{i+1,L};
+        # the rolled values at the boundaries are the periodic neighbors
+        psip_Lface = np.roll(psip_R, 1)
+        psim_Rface = np.roll(psim_L, -1)
+        if rad_BC.bc_type != "periodic":
+           psip_Lface[0]  = psi_left
+           psim_Rface[-1] = psi_right
+        psim_Lface = psim_L   # psim_{i-1/2}
+        psip_Rface = psip_R   # psip_{i+1/2}
+
+        # compute cell center values
+        psim_i = 0.5*(psim_L + psim_R)
+        psip_i = 0.5*(psip_L + psip_R)
+
+        # mesh sizes divided by 2
+        h_over_2 = self.mesh.getCellWidths()/2.0
+
+        # compute streaming source
+        Qm = np.column_stack((-1.*mu["-"]*(psim_i     - psim_Lface)/h_over_2,
+                              -1.*mu["-"]*(psim_Rface - psim_i)    /h_over_2))
+        Qp = np.column_stack((-1.*mu["+"]*(psip_i     - psip_Lface)/h_over_2,
+                              -1.*mu["+"]*(psip_Rface - psip_i)    /h_over_2))
+
+        return buildSourceVector(Qm, Qp)
+
     #--------------------------------------------------------------------------------
     ## Computes old streaming term,
     #  \f$\mu^\pm\frac{\partial\Psi^{\pm,n}}{\partial x}\f$
@@ -414,6 +714,36 @@ class StreamingTerm(TransientSourceTerm):
                   rad_BC    = rad_BC,
                   time_step = "older")
 
+    #--------------------------------------------------------------------------------
+    ## implicit term is on LHS, so return zeros
+    #
+    def evalImplicitAll(self, **kwargs):
+
+        return np.zeros(4*self.mesh.n_elems)
+
+    #--------------------------------------------------------------------------------
+    ## implicit term is on LHS, so there is no iterate part
+    #
+    def computeIterateTerm(self, **kwargs):
+
+        return 0.0
+
+    #--------------------------------------------------------------------------------
+    ## Computes old streaming term for all elements
+    #
+    def evalOldAll(self, rad_old, rad_BC, **kwargs):
+
+        return self.evalRHSTermAll(rad_old=rad_old, rad_BC=rad_BC,
+                  time_step="old")
+
+    #--------------------------------------------------------------------------------
+    ## Computes older streaming term for all elements
+    #
+    def evalOlderAll(self, rad_older, rad_BC, **kwargs):
+
+        return self.evalRHSTermAll(rad_old=rad_older, rad_BC=rad_BC,
+                  time_step="older")
+
 
 
 #====================================================================================
@@ -476,6 +806,39 @@ class ReactionTerm(TransientSourceTerm):
         # Use old function but with older arguments.
         return self.evalOld(i, rad_old=rad_older, cx_old=cx_older)
 
+    #--------------------------------------------------------------------------------
+    ## implicit term is on LHS, so return zeros
+    #
+    def evalImplicitAll(self, **kwargs):
+
+        return np.zeros(4*self.mesh.n_elems)
+
+    #--------------------------------------------------------------------------------
+    ## implicit term is on LHS, so there is no iterate part
+    #
+    def computeIterateTerm(self, **kwargs):
+
+        return 0.0
+
+    #--------------------------------------------------------------------------------
+    ## Computes old reaction term for all elements
+    #
+    def evalOldAll(self, rad_old, cx_old, **kwargs):
+
+        # left and right cross sections
+        sig_t = getCrossSectionArray(cx_old, "sig_t")
+
+        # compute reaction source
+        return buildSourceVector(-1.*rad_old.psim * sig_t,
+                                 -1.*rad_old.psip * sig_t)
+
+    #--------------------------------------------------------------------------------
+    ## Computes older reaction term for all elements
+    #
+    def evalOlderAll(self, rad_older, cx_older, **kwargs):
+
+        return self.evalOldAll(rad_old=rad_older, cx_old=cx_older)
+
 #====================================================================================
 ## Derived class for computing scattering source term, \f$\frac{\sigma_s}{2}\phi\f$
 #
@@ -542,6 +905,39 @@ class ScatteringTerm(TransientSourceTerm):
         # Use old function but with older arguments
         return self.evalOld(i, rad_old=rad_older, cx_old=cx_older)
 
+    #--------------------------------------------------------------------------------
+    ## implicit term is on LHS, so return zeros
+    #
+    def evalImplicitAll(self, **kwargs):
+
+        return np.zeros(4*self.mesh.n_elems)
+
+    #--------------------------------------------------------------------------------
+    ## implicit term is on LHS, so there is no iterate part
+    #
+    def computeIterateTerm(self, **kwargs):
+
+        return 0.0
+
+    #--------------------------------------------------------------------------------
+    ## Computes old scattering source term for all elements
+    #
+    def evalOldAll(self, rad_old, cx_old, **kwargs):
+
+        # left and right scattering cross sections
+        sig_s = getCrossSectionArray(cx_old, "sig_s")
+
+        # compute isotropic scattering source
+        Q_iso = 0.5*rad_old.phi*sig_s
+        return buildSourceVector(Q_iso, Q_iso)
+
+    #--------------------------------------------------------------------------------
+    ## Computes older scattering source term for all elements
+    #
+    def evalOlderAll(self, rad_older, cx_older, **kwargs):
+
+        return self.evalOldAll(rad_old=rad_older, cx_old=cx_older)
+
 #====================================================================================
 ## Derived class for computing source term, \f$\mathcal{Q}\f$
 #
@@ -594,6 +990,47 @@ class SourceTerm(TransientSourceTerm):
         # Use old function but with older arguments
         return self.evalOld(i, Qpsi_old=Qpsi_older)
 
+    #--------------------------------------------------------------------------------
+    ## Computes implicit source term for all elements
+    #
+    def evalImplicitAll(self, Qpsi_new, **kwargs):
+
+        return self.evalOldAll(Qpsi_old=Qpsi_new)
+
+    #--------------------------------------------------------------------------------
+    ## Computes old source term for all elements
+    #
+    def evalOldAll(self, Qpsi_old, **kwargs):
+
+        # for now, sources cannot be solution-dependent, so raise an error if
+        # no source is provided
+        if Qpsi_old is None:
+           raise NotImplementedError("Solution-dependent sources not yet implemented")
+
+        return np.array(Qpsi_old, dtype=float)
+
+    #--------------------------------------------------------------------------------
+    ## Computes older source term for all elements
+    #
+    def evalOlderAll(self, Qpsi_older, **kwargs):
+
+        return self.evalOldAll(Qpsi_old=Qpsi_older)
+
+    #--------------------------------------------------------------------------------
+    ## The sources are not solution-dependent, so the whole term, including
+    #  the implicit term, is fixed within a time step
+    #
+    def computeFixedTerm(self, **kwargs):
+
+        return self.func_all(**kwargs)
+
+    #--------------------------------------------------------------------------------
+    ## There is no iterate part, see computeFixedTerm
+    #
+    def computeIterateTerm(self, **kwargs):
+
+        return 0.0
+
 
 #====================================================================================
 ## Derived class for computing drift term,
@@ -679,6 +1116,41 @@ class DriftTerm(TransientSourceTerm):
        return self.evalImplicit(i, cx_prev=cx_older, hydro_prev=hydro_older,
            rad_prev=rad_older, slopes_old=slopes_older)
 
+    #--------------------------------------------------------------------------------
+    ## Computes implicit drift term for all elements
+    #
+    def evalImplicitAll(self, cx_prev, hydro_prev, rad_prev, slopes_old, **kwargs):
+
+        # get left and right total cross sections
+        cxt = getCrossSectionArray(cx_prev, "sig_t")
+
+        # compute left and right velocities
+        u = computeEdgeVelocitiesArray(hydro_prev, slopes_old)
+
+        # compute comoving flux
+        c = GC.SPD_OF_LGT
+        F0 = rad_prev.F - 4.0/3.0*rad_prev.E*u
+
+        # isotropic source
+        Q_iso = -cxt*u/c*F0*0.5
+        return buildSourceVector(Q_iso, Q_iso)
+
+    #--------------------------------------------------------------------------------
+    ## Computes old drift term for all elements
+    #
+    def evalOldAll(self, cx_old, hydro_old, rad_old, slopes_old, **kwargs):
+
+       return self.evalImplicitAll(cx_prev=cx_old, hydro_prev=hydro_old,
+           rad_prev=rad_old, slopes_old=slopes_old)
+
+    #--------------------------------------------------------------------------------
+    ## Computes older drift term for all elements
+    #
+    def evalOlderAll(self, cx_older, hydro_older, rad_older, slopes_older, **kwargs):
+
+       return self.evalImplicitAll(cx_prev=cx_older, hydro_prev=hydro_older,
+           rad_prev=rad_older, slopes_old=slopes_older)
+
 #====================================================================================
 ## Derived class for computing anisotropic source term,
 #  \f$2\mu^\pm\sigma_t\mathcal{E}u\f$
@@ -758,6 +1230,37 @@ class AnisotropicTerm(TransientSourceTerm):
        return self.evalImplicit(i, cx_prev=cx_older, hydro_prev=hydro_older,
            rad_prev=rad_older, slopes_old=slopes_older)
 
+    #--------------------------------------------------------------------------------
+    ## Computes implicit anisotropic source term for all elements
+    #
+    def evalImplicitAll(self, cx_prev, hydro_prev, rad_prev, slopes_old, **kwargs):
+
+        # get left and right total cross sections
+        cxt = getCrossSectionArray(cx_prev, "sig_t")
+
+        # compute left and right velocities
+        u = computeEdgeVelocitiesArray(hydro_prev, slopes_old)
+
+        # compute anisotropic source
+        E = rad_prev.E
+        return buildSourceVector(2.0*mu["-"]*cxt*E*u, 2.0*mu["+"]*cxt*E*u)
+
+    #--------------------------------------------------------------------------------
+    ## Computes old anisotropic source term for all elements
+    #
+    def evalOldAll(self, cx_old, hydro_old, rad_old, slopes_old, **kwargs):
+
+       return self.evalImplicitAll(cx_prev=cx_old, hydro_prev=hydro_old,
+           rad_prev=rad_old, slopes_old=slopes_old)
+
+    #--------------------------------------------------------------------------------
+    ## Computes older anisotropic source term for all elements
+    #
+    def evalOlderAll(self, cx_older, hydro_older, rad_older, slopes_older, **kwargs):
+
+       return self.evalImplicitAll(cx_prev=cx_older, hydro_prev=hydro_older,
+           rad_prev=rad_older, slopes_old=slopes_older)
+
 #====================================================================================
 ## Derived class for computing Planckian emission source term,
 #  \f$\frac{1}{2}\sigma_a a c T^4\f$
@@ -883,6 +1386,66 @@ class PlanckianTerm(TransientSourceTerm):
         return self.evalOld(i, hydro_old=hydro_older, cx_old=cx_older,
            e_rad_old=e_rad_older)
 
+    #--------------------------------------------------------------------------------
+    ## Computes the RHS portion of the implicit linearized Planckian term for
+    #  all elements. See evalImplicit.
+    #
+    def evalImplicitAll(self, dt, cx_prev=None, hydro_prev=None, hydro_star=None,
+            E_slopes_star=None, QE=None, slopes_old=None, e_rad_prev=None, hydro_new=None, **kwargs):
+
+        # get coefficient corresponding to time-stepper
+        scales = {"CN":0.5, "BE":1., "BDF2":2./3.}
+        scale = scales[self.time_stepper]
+
+        # get constants
+        a = GC.RAD_CONSTANT
+        c = GC.SPD_OF_LGT
+
+        # get specific heats as a column so that they broadcast over edges
+        spec_heat = np.array([s.spec_heat for s in hydro_prev])[:,np.newaxis]
+
+        #Compute edge velocities
+        u_new = computeEdgeVelocitiesArray(hydro_new, slopes_old)
+
+        #Compute left and right star energies
+        E_star_avg = np.array([s.E() for s in hydro_star])
+        E_slopes = np.asarray(E_slopes_star)
+        E_star = np.column_stack((E_star_avg - 0.5*E_slopes,
+                                  E_star_avg + 0.5*E_slopes))
+
+        # compute edge quantities, use newest density
+        rho = computeEdgeDensitiesArray(hydro_new, slopes_old)
+        e_rad = np.asarray(e_rad_prev, dtype=float)
+        T = e_rad / spec_heat
+
+        # compute effective scattering fraction
+        sig_a = getCrossSectionArray(cx_prev, "sig_a")
+        nu = getNu(T, sig_a, rho, spec_heat, dt, scale)
+
+        # compute Planckian
+        emission = (1.0 - nu)*sig_a*a*c*T**4
+        planckian = emission \
+            -   nu/(scale*dt)*( rho*(e_rad +0.5*u_new**2) - E_star ) \
+            + nu*np.asarray(QE, dtype=float)/scale
+
+        return buildSourceVector(0.5*planckian, 0.5*planckian)
+
+    #--------------------------------------------------------------------------------
+    ## Evaluate old Planckian for all elements
+    #
+    def evalOldAll(self, hydro_old, cx_old, e_rad_old=None, **kwargs):
+
+        planckian = evalPlanckianOldArray(hydro_old, cx_old, e_rad_old)
+        return buildSourceVector(0.5*planckian, 0.5*planckian)
+
+    #--------------------------------------------------------------------------------
+    ## Evaluate older Planckian for all elements
+    #
+    def evalOlderAll(self, hydro_older, cx_older, e_rad_older, **kwargs):
+
+        return self.evalOldAll(hydro_old=hydro_older, cx_old=cx_older,
+           e_rad_old=e_rad_older)
+
 
 #=====================================================================================
 # Functions used by source term builders as well as newton state handler. Thus they
@@ -915,6 +1478,44 @@ def evalPlanckianOld(i, hydro_old, cx_old, e_rad_old):
     return tuple(planckian)
 
 
+## Evaluates a Planckian term \f$\sigma_a^n a c (T^n)^4\f$ for all elements.
+#
+#  @param[in] hydro_old  old hydro states \f$\mathbf{H}^n\f$
+#  @param[in] cx_old     old cross sections \f$\sigma^n\f$
+#  @param[in] e_rad_old  value of e at edge values from radiation solve
+#
+#  @return array of left and right Planckian terms with shape (n_elems,2)
+#
+def evalPlanckianOldArray(hydro_old, cx_old, e_rad_old):
+
+    # compute edge temperatures
+    spec_heat = np.array([s.spec_heat for s in hydro_old])[:,np.newaxis]
+    T = np.asarray(e_rad_old, dtype=float) / spec_heat
+
+    # cross sections
+    sig_a = getCrossSectionArray(cx_old, "sig_a")
+
+    return sig_a*GC.RAD_CONSTANT*GC.SPD_OF_LGT*T**4.
+
+
+## Builds a source vector in the ordering of radiation dofs from left and
+#  right values for each direction.
+#
+#  @param[in] Q_minus  source for the minus direction, with shape (n_elems,2)
+#  @param[in] Q_plus   source for the plus direction, with shape (n_elems,2)
+#
+#  @return source vector with global dof indexing
+#
+def buildSourceVector(Q_minus, Q_plus):
+
+    # global dof index is 4*i + 2*side + direction
+    Q = np.empty((len(Q_minus), 2, 2))
+    Q[:,:,0] = Q_minus
+    Q[:,:,1] = Q_plus
+
+    return Q.ravel()
+
+
 ## Computes an extraneous source vector for radiation.
 #
 #  The input function handles are functions of (x,t), and the output source
@@ -0,0 +1,350 @@
+## @package src.transportSweep
+#  Provides a matrix-free solver for the S-2 equations using transport sweeps.
+#
+#  The streaming and collision operator for each direction is inverted by
+#  sweeping over the lumped linear discontinuous cells in the direction of
+#  flow: left to right for \f$\mu^+\f$ and right to left for \f$\mu^-\f$.
+#  Within a cell, the two unknowns are coupled by a 2x2 system, and cells are
+#  coupled only through the upwind face value, so a sweep is O(N).
+#
+#  The scattering source is converged with source iteration. Source iteration
+#  converges arbitrarily slowly for optically thick, highly scattering
+#  problems, so each iteration may be accelerated by a diffusion synthetic
+#  acceleration (DSA) step. The low-order correction is a diffusion equation
+#  for the scalar flux error, discretized on the left and right edge values
+#  of each cell like the lumped linear discontinuous scalar flux, with an
+#  interior penalty coupling across cell interfaces; see DiffusionCorrection.
+#  It is assembled from the cross sections and is tridiagonal, so it costs
+#  O(N) to factor and to solve, much less than a sweep.
+#
+#  The sweep itself, sweepAngles, is written for any number of directions and
+#  is shared with the S-N engine in discreteOrdinates.
+#
+
+import numpy as np
+
+from radUtilities import mu
+from utilityFunctions import getCrossSectionArray
+from bandedSolver import BandedFactorization
+
+## Flags for positive S-2 directions, in the order minus, plus
+S2_POSITIVE = np.array([False, True])
+
+## Solves the S-2 equations with source iteration and transport sweeps.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] cross_x         list of cross sections for each element
+#  @param[in] rhs             right hand side of the S-2 system, in global dof
+#                             ordering, including boundary terms
+#  @param[in] rad_BC          radiation BC object
+#  @param[in] diag_add_term   \f$\alpha\f$
+#  @param[in] implicit_scale  \f$\beta\f$
+#  @param[in] accelerate      flag to apply the DSA correction after each
+#                             sweep; if False, unaccelerated source iteration
+#                             is performed
+#  @param[in] tol             relative tolerance on the estimated error in
+#                             scalar flux
+#  @param[in] max_iterations  maximum number of source iterations
+#
+#  @return S-2 solution vector and number of source iterations taken
+#
+def solveS2SourceIteration(mesh, cross_x, rhs, rad_BC, diag_add_term=0.0,
+   implicit_scale=1.0, accelerate=True, tol=1.0e-12, max_iterations=1000):
+
+    # abbreviation for the scale term
+    beta = implicit_scale
+
+    # streaming coefficient and effective total cross sections for each cell
+    hm, sig_t = computeSweepCoefficients(mesh, cross_x, diag_add_term,
+       implicit_scale)
+    sig_s = getCrossSectionArray(cross_x, 'sig_s')
+
+    # sources indexed by [cell, side, direction]
+    rhs_elem = np.asarray(rhs, dtype=float).reshape(mesh.n_elems, 2, 2)
+    periodic = rad_BC.bc_type == 'periodic'
+
+    # low-order operator for the DSA correction
+    if accelerate:
+       dsa = DiffusionCorrection(mesh, sig_s, sig_t, diag_add_term,
+          implicit_scale, periodic)
+
+    # initial guess for scalar flux
+    phi = np.zeros((mesh.n_elems, 2))
+    change_old = np.inf
+
+    for iteration in xrange(1, max_iterations + 1):
+
+       # sweep with isotropic scattering source
+       scat = 0.5*beta*sig_s*phi
+       psi = sweepS2(hm, sig_t, rhs_elem + scat[:,:,np.newaxis], periodic)
+
+       # new scalar flux
+       phi_half = psi[:,:,0] + psi[:,:,1]
+
+       # check convergence of the error in the scalar flux, which is
+       # estimated from the change and the observed convergence rate
+       change = np.max(np.abs(phi_half - phi))
+       rate = change/change_old
+       change_old = change
+       if rate < 1.0:
+          error = change*max(1.0, rate/(1.0 - rate))
+       else:
+          error = np.inf if change > 0.0 else 0.0
+       converged = error <= tol*np.max(np.abs(phi_half))
+
+       # apply DSA correction, driven by the change in scattering source
+       if accelerate and not converged:
+          phi = phi_half + dsa.computeCorrection(beta*sig_s*(phi_half - phi))
+       else:
+          phi = phi_half
+
+       if converged:
+          return psi.ravel(), iteration
+
+    raise RuntimeError("Source iteration did not converge in %d iterations"
+       % max_iterations)
+
+
+## Low-order diffusion operator for the DSA correction of source iteration.
+#
+#  The scalar flux error \f$\delta\f$ after a sweep satisfies, in the P1
+#  approximation, which is exact for S-2 in the continuum,
+#  \f[
+#    -\frac{d}{dx}D\frac{d\delta}{dx} + \left(\beta\sigma_a + \alpha\right)\delta
+#       = \beta\sigma_s\left(\phi^{l+1/2} - \phi^l\right), \qquad
+#    D = \frac{\beta^2\mu^2}{\beta\sigma_t + \alpha}.
+#  \f]
+#  It is discretized on the same unknowns as the lumped linear discontinuous
+#  scalar flux, i.e., the values at the left and right edges of each cell.
+#  Within a cell, the two values are coupled by the linear finite element
+#  stiffness with the cell-averaged diffusion coefficient, and the mass
+#  matrix is lumped to the edges. Across a cell interface, the values on
+#  either side are coupled by the interior penalty
+#  \f[
+#    \kappa = \max\left(\frac{\beta\mu}{2},
+#       4\left\{\frac{D}{h}\right\}\right),
+#  \f]
+#  where \f$\{\cdot\}\f$ is the average over the two cells. The first term
+#  is the jump term of the upwind S-2 discretization and dominates for
+#  optically thick cells, in which source iteration leaves errors that are
+#  local to each cell edge; the second term dominates for optically thin
+#  cells, where it makes the correction nearly continuous, as the scalar
+#  flux is. The terms of interior penalty methods that couple the jumps to
+#  the averaged gradients are omitted, so each edge value is only coupled to
+#  its neighbors along the mesh and the matrix is tridiagonal, with
+#  wrap-around corners for periodic BC. The error has no incident flux, so
+#  vacuum (Marshak) conditions are applied at other boundaries.
+#
+#  The matrix is factored once, in O(N), with a BandedFactorization.
+#
+class DiffusionCorrection(object):
+
+   ## Constructor. Assembles and factors the diffusion operator.
+   #
+   #  @param[in] mesh            a mesh object
+   #  @param[in] sig_s           scattering cross sections, shape (n_elems,2)
+   #  @param[in] sig_t           effective total cross sections
+   #                             \f$\beta\sigma_t + \alpha\f$, shape (n_elems,2)
+   #  @param[in] diag_add_term   \f$\alpha\f$
+   #  @param[in] implicit_scale  \f$\beta\f$
+   #  @param[in] periodic        flag for periodic BC
+   #
+   def __init__(self, mesh, sig_s, sig_t, diag_add_term=0.0,
+      implicit_scale=1.0, periodic=False):
+
+      beta = implicit_scale
+      n_elems = mesh.n_elems
+      h = mesh.getCellWidths()
+      self.half_h = 0.5*h[:,np.newaxis]
+
+      # indices of the left and right edge values of each cell
+      iL = 2*np.arange(n_elems)
+      iR = iL + 1
+
+      # stiffness within each cell and lumped mass at each edge
+      stiffness = (beta*mu["+"])**2/(np.mean(sig_t, axis=1)*h)
+      mass = self.half_h*(sig_t - beta*sig_s)
+
+      # interior penalty between the right edge of each cell and the left
+      # edge of the next cell
+      if periodic:
+         iRp, iLn = iR, np.roll(iL, -1)
+         stiffness_n = np.roll(stiffness, -1)
+      else:
+         iRp, iLn = iR[:-1], iL[1:]
+         stiffness_n = stiffness[1:]
+      penalty = np.maximum(0.5*beta*mu["+"],
+         2.0*(stiffness[:len(iRp)] + stiffness_n))
+
+      rows = [iL, iR, iL, iR, iL, iR, iRp, iLn, iRp, iLn]
+      cols = [iL, iR, iR, iL, iL, iR, iRp, iLn, iLn, iRp]
+      vals = [stiffness, stiffness, -stiffness, -stiffness, mass[:,0],
+         mass[:,1], penalty, penalty, -penalty, -penalty]
+
+      # leakage through vacuum boundaries
+      if not periodic:
+         boundary = np.array([iL[0], iR[-1]])
+         rows.append(boundary)
+         cols.append(boundary)
+         vals.append(beta*mu["+"]*np.ones(2))
+
+      rows = np.concatenate(rows)
+      cols = np.concatenate(cols)
+      vals = np.concatenate(vals)
+
+      # sum duplicate entries and factor
+      n = 2*n_elems
+      index, inverse = np.unique(rows*n + cols, return_inverse=True)
+      self.factorization = BandedFactorization(n, index/n, index % n,
+         np.bincount(inverse, weights=vals), n_lower=1, n_upper=1)
+
+   ## Computes the correction to the scalar flux
+   #
+   #  @param[in] residual  source of the error equation,
+   #                       \f$\beta\sigma_s(\phi^{l+1/2} - \phi^l)\f$, at
+   #                       each cell edge, with shape (n_elems,2)
+   #
+   #  @return correction at each cell edge, with shape (n_elems,2)
+   #
+   def computeCorrection(self, residual):
+
+      return self.factorization.solve(
+         (self.half_h*residual).ravel()).reshape(-1, 2)
+
+
+## Computes the coefficients of the streaming and collision operator.
+#
+#  @param[in] mesh            a mesh object
+#  @param[in] cross_x         list of cross sections for each element
+#  @param[in] diag_add_term   \f$\alpha\f$
+#  @param[in] implicit_scale  \f$\beta\f$
+#
+#  @return streaming coefficient \f$h_\mu = \beta|\mu|/h\f$ for each cell,
+#          and effective total cross sections \f$\beta\sigma_t + \alpha\f$
+#          for each cell edge, with shape (n_elems,2)
+#
+def computeSweepCoefficients(mesh, cross_x, diag_add_term=0.0,
+   implicit_scale=1.0):
+
+    hm = implicit_scale*mu["+"]/mesh.getCellWidths()
+    sig_t = implicit_scale*getCrossSectionArray(cross_x, 'sig_t') \
+       + diag_add_term
+
+    return hm, sig_t
+
+
+## Inverts the streaming and collision operator by sweeping in both
+#  directions.
+#
+#  The two S-2 directions are swept together with sweepAngles.
+#
+#  @param[in] hm        streaming coefficient for each cell
+#  @param[in] sig_t     effective total cross sections, with shape (n_elems,2)
+#  @param[in] src       sources indexed by [cell, side, direction]
+#  @param[in] periodic  flag for periodic BC
+#
+#  @return angular fluxes indexed by [cell, side, direction]
+#
+def sweepS2(hm, sig_t, src, periodic=False):
+
+    # directions are ordered minus, plus, as in the global dof ordering
+    psi = sweepAngles(np.array([hm, hm]), sig_t, src.transpose(2,0,1),
+       S2_POSITIVE, 0.0, periodic)
+
+    return psi.transpose(1,2,0)
+
+
+## Inverts the streaming and collision operator for all directions with a
+#  transport sweep.
+#
+#  Each direction sweeps over cells in its direction of flow. In each cell,
+#  the unknowns on the inflow side and on the outflow side satisfy
+#  \f[
+#    (h_\mu + \sigma_{in})\Psi_{in} + h_\mu\Psi_{out}
+#      = S_{in} + 2h_\mu\Psi_{upwind}, \qquad
+#    -h_\mu\Psi_{in} + (h_\mu + \sigma_{out})\Psi_{out} = S_{out},
+#  \f]
+#  so the outflow is an affine function of the inflow. The recurrence for the
+#  outflow values is the only sequential part and advances all directions
+#  together. Since the recurrence is linear, it is computed once with zero
+#  incident flux, and the contribution of the incident flux is added
+#  afterwards. For periodic BC, the incident flux is the outflow of the last
+#  cell, which is solved for exactly.
+#
+#  @param[in] hm        streaming coefficients with shape (n_angles,n_elems)
+#  @param[in] sig_t     effective total cross sections with shape (n_elems,2)
+#  @param[in] src       sources with shape (n_angles,n_elems,2)
+#  @param[in] positive  flags for directions with positive \f$\mu\f$
+#  @param[in] inflow    incident flux for each direction; ignored for
+#                       periodic BC
+#  @param[in] periodic  flag for periodic BC
+#
+#  @return angular fluxes with shape (n_angles,n_elems,2)
+#
+def sweepAngles(hm, sig_t, src, positive, inflow=0.0, periodic=False):
+
+    n_angles, n_elems = hm.shape
+
+    # order everything in the direction of flow, so that side 0 is inflow
+    hm_flow  = orderInFlowDirection(hm, positive)
+    src_flow = orderInFlowDirection(src, positive)
+    sig_flow = orderInFlowDirection(
+       np.broadcast_to(sig_t, (n_angles, n_elems, 2)), positive)
+    src_in  = src_flow[:,:,0]
+    src_out = src_flow[:,:,1]
+
+    # coefficients of the 2x2 cell systems
+    d_in  = hm_flow + sig_flow[:,:,0]
+    d_out = hm_flow + sig_flow[:,:,1]
+    det   = d_in*d_out + hm_flow*hm_flow
+
+    # outflow is out_src + out_gain*inflow in each cell
+    out_src  = (d_in*src_out + hm_flow*src_in)/det
+    out_gain = 2.0*hm_flow*hm_flow/det
+
+    # outflow recurrence with zero incident flux, for all directions at once
+    inflows = np.empty((n_angles, n_elems))
+    outflow = np.zeros(n_angles)
+    for i in xrange(n_elems):
+       inflows[:,i] = outflow
+       outflow = out_src[:,i] + out_gain[:,i]*outflow
+
+    # gain from the incident flux to the inflow of each cell
+    gain = np.ones((n_angles, n_elems))
+    gain[:,1:] = np.cumprod(out_gain[:,:-1], axis=1)
+
+    # add contribution of incident flux
+    if periodic:
+       inflow = outflow/(1.0 - gain[:,-1]*out_gain[:,-1])
+    inflows += gain*np.reshape(inflow, (-1, 1))
+
+    # solve cell systems
+    r_in = src_in + 2.0*hm_flow*inflows
+    psi_flow = np.empty((n_angles, n_elems, 2))
+    psi_flow[:,:,0] = (d_out*r_in - hm_flow*src_out)/det
+    psi_flow[:,:,1] = (d_in*src_out + hm_flow*r_in)/det
+
+    return orderInFlowDirection(psi_flow, positive)
+
+
+## Reorders an array indexed by [angle, cell, ...] so that each direction is
+#  ordered in its direction of flow.
+#
+#  For negative directions, the cell order is reversed, and if a side index
+#  is present, the sides are swapped, so that side 0 is always the inflow
+#  side. Applying the function twice returns the original ordering.
+#
+#  @param[in] values    array with shape (n_angles,n_elems) or
+#                       (n_angles,n_elems,2)
+#  @param[in] positive  flags for directions with positive \f$\mu\f$
+#
+#  @return reordered array
+#
+def orderInFlowDirection(values, positive):
+
+    reversed_values = values[:,::-1,...]
+    if values.ndim == 3:
+       reversed_values = reversed_values[:,:,::-1]
+
+    flags = np.reshape(positive, (-1,) + (1,)*(values.ndim - 1))
+    return np.where(flags, values, reversed_values)
@@ -5,7 +5,7 @@ from math import log, sqrt
 import numpy as np
 import globalConstants as GC
 from crossXInterface import CrossXInterface
-from hydroState import HydroState
+from hydroState import HydroState, HydroStateArray, createHydroStateArray
 from radiation import Radiation
 from scipy.integrate import quad
 
@@ -52,6 +52,19 @@ def getLocalIndex(side, dir):
 
     return getIndex(0, side, dir)
 
+#-----------------------------------------------------------------------------------
+## Extracts edge values of a cross section from a list of cross section tuples
+#
+#  @param[in] cross_x  list of cross sections for each element, stored as tuple
+#                      for each cell
+#  @param[in] name     name of the cross section attribute, e.g., 'sig_t'
+#
+#  @return array of shape (n_elems,2) of the left and right cross section values
+#
+def getCrossSectionArray(cross_x, name):
+
+    return np.array([(getattr(cx[0],name), getattr(cx[1],name)) for cx in cross_x])
+
 #-----------------------------------------------------------------------------------
 ## Computes convergence rates
 #
@@ -330,9 +343,10 @@ def computeL2RelDiff(values1, values2, aux_func=None):
        aux_func = lambda x: x
    f = aux_func
 
-   # get values
-   vals1 = np.array([f(i) for i in values1])
-   vals2 = np.array([f(i) for i in values2])
+   # get values; for a HydroStateArray, the function is applied to all
+   # states at once
+   vals1 = applyToValues(f, values1)
+   vals2 = applyToValues(f, values2)
 
    #compute norm of the first value
    norm1 = np.linalg.norm(vals1)
@@ -340,6 +354,21 @@ def computeL2RelDiff(values1, values2, aux_func=None):
 
    return norm_diff/(norm1)
 
+## Applies a function to each value, or to all states of a HydroStateArray at
+#  once, since its attributes and functions are arrays.
+#
+#  @param[in] f       function of a single value or state
+#  @param[in] values  list of values, or HydroStateArray
+#
+#  @return array of function values
+#
+def applyToValues(f, values):
+
+   if isinstance(values, HydroStateArray):
+      return np.asarray(f(values))
+
+   return np.array([f(i) for i in values])
+
 ## Computes effective scattering fraction \f$\nu^k\f$ in linearization
 #
 #  @param[in] T      Previous iteration temperature \f$T^k\f$
@@ -381,37 +410,23 @@ def computeEffectiveOpacities(time_stepper, dt, cx_prev, hydro_prev,
     scales = {"CN":0.5, "BE":1., "BDF2":2./3.}
     scale = scales[time_stepper]
 
-    cx_effective = list()
-
-    # loop over cells:
-    for i in xrange(len(cx_prev)):
-
-        cx_i = list()
-
-        # get hydro state and specific heat
-        state = hydro_prev[i]
-        spec_heat = state.spec_heat
+    # get edge densities and temperatures, and previous cross sections
+    states = createHydroStateArray(hydro_prev)
+    spec_heat = states.spec_heat[:,np.newaxis]
+    rho = computeEdgeDensitiesArray(states, slopes_old)
+    T   = np.asarray(e_rad_prev) / spec_heat
+    sig_a = getCrossSectionArray(cx_prev, 'sig_a')
+    sig_s = getCrossSectionArray(cx_prev, 'sig_s')
 
-        # get density and temperature at edges
-        rho = computeEdgeDensities(i, state, slopes_old)
-        T   = computeEdgeTemperatures(state.spec_heat, e_rad_prev[i])
+    # compute effective scattering ratios
+    nu = getNu(T, sig_a, rho, spec_heat, dt, scale)
 
-        # loop over edges
-        for x in range(2): 
-
-            # get cross sections
-            sig_a = cx_prev[i][x].sig_a
-            sig_s = cx_prev[i][x].sig_s
-
-            # compute effective scattering ratio
-            nu = getNu(T[x], sig_a, rho[x], spec_heat, dt, scale)
-        
-            #Create new FIXED cross section instance. No need to add scale term
-            #here because it will be included in scattering source term
-            sig_s_effective = nu*sig_a + sig_s
-            cx_i.append( CrossXInterface(sig_s_effective, sig_s+sig_a) )
-
-        cx_effective.append(tuple(cx_i))
+    #Create new FIXED cross section instances. No need to add scale term
+    #here because it will be included in scattering source term
+    sig_s_effective = (nu*sig_a + sig_s).tolist()
+    sig_t = (sig_s + sig_a).tolist()
+    cx_effective = [tuple(CrossXInterface(sig_s_effective[i][x], sig_t[i][x])
+       for x in range(2)) for i in xrange(len(cx_prev))]
 
     return cx_effective
 
@@ -453,6 +468,44 @@ def computeEdgeVelocities(i, state, slopes):
    return (momL / rhoL, momR / rhoR)
 
 
+## Computes edge densities for all cells given hydro states and slopes
+#
+#  @param[in] states  average hydro states \f$\mathbf{H}_i\f$
+#  @param[in] slopes  HydroSlopes object
+#
+#  @return array of \f$(\rho_{i,L},\rho_{i,R})\f$ with shape (n_elems,2)
+#
+def computeEdgeDensitiesArray(states, slopes):
+
+   # compute edge densities
+   rho = createHydroStateArray(states).rho
+   rho_slopes = np.asarray(slopes.rho_slopes)
+   return np.column_stack((rho - 0.5*rho_slopes, rho + 0.5*rho_slopes))
+
+
+## Computes edge velocities for all cells given hydro states and slopes
+#
+#  @param[in] states  average hydro states \f$\mathbf{H}_i\f$
+#  @param[in] slopes  HydroSlopes object
+#
+#  @return array of \f$(u_{i,L},u_{i,R})\f$ with shape (n_elems,2)
+#
+def computeEdgeVelocitiesArray(states, slopes):
+
+   # compute edge velocities
+   states = createHydroStateArray(states)
+   rho = states.rho
+   u   = states.u
+   mom = rho*u
+   rho_slopes = np.asarray(slopes.rho_slopes)
+   mom_slopes = np.asarray(slopes.mom_slopes)
+   rhoL = rho - 0.5*rho_slopes
+   rhoR = rho + 0.5*rho_slopes
+   momL = mom - 0.5*mom_slopes
+   momR = mom + 0.5*mom_slopes
+   return np.column_stack((momL / rhoL, momR / rhoR))
+
+
 ## Computes edge temperatures for a cell given cv and edge internal energies
 #
 #  @param[in] cv           average hydro state for cell \f$i\f$
@@ -507,25 +560,23 @@ def computeHydroInternalEnergies(i, state, slopes):
 #
 def updateCrossSections(cx,hydro,slopes,e_rad):
 
+   # compute edge quantities of all cells
+   states = createHydroStateArray(hydro)
+   spec_heat = states.spec_heat.tolist()
+   gamma = states.gamma.tolist()
+   rho = computeEdgeDensitiesArray(states, slopes).tolist()
+   u = computeEdgeVelocitiesArray(states, slopes).tolist()
+   e = np.asarray(e_rad).tolist()
+
    # loop over cells
    for i in xrange(len(cx)):
 
-      # get edge stuff
-      state_avg = hydro[i]
-      spec_heat = state_avg.spec_heat
-      gamma = state_avg.gamma
-
-      # compute edge quantities
-      rho = computeEdgeDensities(i, state_avg, slopes)
-      u = computeEdgeVelocities(i, state_avg, slopes)
-      e = e_rad[i]
-
       # loop over edges and create state for each edge
       for edge in [0,1]:
 
          # create edge state
-         state = HydroState(rho=rho[edge],u=u[edge],e=e[edge],
-            spec_heat=spec_heat, gamma=gamma)
+         state = HydroState(rho=rho[i][edge],u=u[i][edge],e=e[i][edge],
+            spec_heat=spec_heat[i], gamma=gamma[i])
  
          # update edge cross section
          cx[i][edge].updateCrossX(state)
@@ -0,0 +1,66 @@
+## @package unittests.profileRadiationAssembly
+#  Times assembly and solution of the S-2 system for increasing mesh sizes to
+#  show that the cost grows linearly with the number of cells.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from time import time
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from scipy.sparse import linalg
+from radiationSolveSS import assembleS2Matrix, assembleS2RHS, factorS2Matrix
+from radBC import RadBC
+
+## Main function: assembles and solves the S-2 system for each mesh size and
+#  prints timings
+#
+def main():
+
+  # mesh sizes to time
+  n_elems_list = [10**3, 10**4, 10**5, 10**6]
+
+  # cross sections; the same object is shared by all cells to keep the
+  # memory footprint of the test itself small
+  cx = ConstantCrossSection(0.5, 1.0)
+
+  print("%10s %10s %12s %14s %12s %12s %12s" % ("bc", "n_elems", "assembly (s)",
+     "time/cell (s)", "nnz", "banded (s)", "sparse (s)"))
+
+  for bc_type in ['vacuum', 'periodic']:
+     for n_elems in n_elems_list:
+
+        # create mesh, cross sections, and BC
+        mesh = Mesh(n_elems, 10.0)
+        cross_sects = [(cx, cx)]*n_elems
+        rad_BC = RadBC(mesh, bc_type)
+        Q = [0.5]*(4*n_elems)
+
+        # time assembly of matrix and rhs
+        t_start = time()
+        matrix = assembleS2Matrix(mesh, cross_sects, rad_BC,
+           diag_add_term=1.0, implicit_scale=0.5)
+        rhs = assembleS2RHS(mesh, Q, rad_BC, implicit_scale=0.5)
+        t_elapsed = time() - t_start
+
+        # time banded factorization and solve
+        t_solve = dict()
+        t_start = time()
+        factorS2Matrix(mesh, cross_sects, rad_BC, diag_add_term=1.0,
+           implicit_scale=0.5).solve(rhs)
+        t_solve['banded'] = time() - t_start
+
+        # time general sparse solve of the assembled matrix
+        t_start = time()
+        linalg.spsolve(matrix, rhs)
+        t_solve['sparse'] = time() - t_start
+
+        print("%10s %10d %12.4e %14.4e %12d %12.4e %12.4e" % (bc_type, n_elems,
+           t_elapsed, t_elapsed/n_elems, matrix.nnz, t_solve['banded'],
+           t_solve['sparse']))
+
+# run main function
+if __name__ == '__main__':
+   main()
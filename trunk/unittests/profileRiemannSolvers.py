@@ -0,0 +1,178 @@
+## @package unittests.profileRiemannSolvers
+#  Compares the cost and accuracy of the Riemann solvers on two problems:
+#
+#  * the Sod-like shock tube of hydroExecutioner, run with hydro only;
+#  * the Mach 2 radiative shock of testRadHydroShock, run with
+#    runNonlinearTransient.
+#
+#  For each solver, the wall time per time step and the \f$L^1\f$ error of the
+#  density are printed. The error is measured against a reference solution
+#  computed with the exact Riemann solver on a mesh refined by
+#  REFINEMENT_FACTOR, averaged onto the coarse mesh.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from time import time
+from math import sqrt
+import numpy as np
+
+from mesh import Mesh
+from hydroState import HydroState
+from hydroSlopes import HydroSlopes
+from hydroBC import HydroBC
+from radiation import Radiation
+from radBC import RadBC
+from crossXInterface import ConstantCrossSection
+from musclHancock import hydroPredictor, hydroCorrector
+from transient import runNonlinearTransient
+from riemannSolvers import RIEMANN_SOLVERS
+import globalConstants as GC
+
+## Refinement factor of the reference solutions
+REFINEMENT_FACTOR = 4
+
+## Main function: runs both problems with each Riemann solver and prints
+#  timings and errors
+#
+def main():
+
+  solvers = sorted(RIEMANN_SOLVERS)
+
+  for name, runProblem, n_elems in [("Sod", runSodProblem, 200),
+     ("Mach 2 radiative shock", runMach2Problem, 50)]:
+
+     print("\n%s problem, %d cells" % (name, n_elems))
+     print("%10s %16s %14s" % ("solver", "time/step (s)", "L1 error"))
+
+     # reference solution averaged onto the coarse mesh
+     rho_ref = runProblem(REFINEMENT_FACTOR*n_elems, 'exact')[0]
+     rho_ref = rho_ref.reshape(n_elems, REFINEMENT_FACTOR).mean(axis=1)
+
+     for solver in solvers:
+        rho, dx, time_per_step = runProblem(n_elems, solver)
+        error = np.sum(np.abs(rho - rho_ref)*dx)
+        print("%10s %16.4e %14.4e" % (solver, time_per_step, error))
+
+
+## Runs the Sod-like problem of hydroExecutioner
+#
+#  @param[in] n_elems         number of cells
+#  @param[in] riemann_solver  string identifier for the Riemann solver
+#
+#  @return final densities, cell widths, and wall time per time step
+#
+def runSodProblem(n_elems, riemann_solver):
+
+  width = 1.0
+  t_end = 0.05
+  cfl = 0.5
+  gamma = 1.4
+
+  mesh = Mesh(n_elems, width)
+  i_left = int(0.3*n_elems)
+  states = [HydroState(u=0.75, p=1.0, gamma=gamma, rho=1.0, spec_heat=1.0)
+     for i in xrange(i_left)]
+  states += [HydroState(u=0.0, p=0.1, gamma=gamma, rho=0.125, spec_heat=1.0)
+     for i in xrange(n_elems - i_left)]
+  bc = HydroBC(bc_type='reflective', mesh=mesh)
+
+  t = 0.0
+  n_steps = 0
+  t_start = time()
+  while t < t_end:
+
+     # CFL time step, shortened to end exactly at the final time
+     dt = min(cfl*mesh.getElement(i).dx/(sqrt(s.gamma*s.p/s.rho) + abs(s.u))
+        for i, s in enumerate(states))
+     dt = min(dt, t_end - t)
+
+     bc.update(states=states, t=t)
+     slopes = HydroSlopes(states, bc=bc, limiter='vanleer')
+     states_half = hydroPredictor(mesh, states, slopes, dt)
+     bc.update(states=states_half, t=t+0.5*dt, slopes=slopes, edge_value=True)
+     states = hydroCorrector(mesh, states, states_half, slopes, dt, bc,
+        riemann_solver=riemann_solver)[0]
+
+     t += dt
+     n_steps += 1
+
+  time_per_step = (time() - t_start)/n_steps
+
+  return np.array([s.rho for s in states]), mesh.getCellWidths(),\
+     time_per_step
+
+
+## Runs the Mach 2 radiative shock problem of testRadHydroShock for a short
+#  time with a constant time step size
+#
+#  @param[in] n_elems         number of cells
+#  @param[in] riemann_solver  string identifier for the Riemann solver
+#
+#  @return final densities, cell widths, and wall time per time step
+#
+def runMach2Problem(n_elems, riemann_solver):
+
+  width = 0.04
+  x_start = -0.02
+  mesh = Mesh(n_elems, width, x_start=x_start)
+  n_steps = 10
+  dt = 1.0e-4
+
+  # material properties and pre- and post-shock states: Table 6.3
+  gam = 5.0/3.0
+  sig_a = 390.71164263502122
+  sig_s = 853.14410158161809 - sig_a
+  c_v = 0.12348
+  rho1, E1, u1 = 1.0, 3.9788000000000004e-002, 2.3426480742954117e-001
+  rho2, E2, u2 = 2.2860748989303659, 7.0649692950433357e-002,\
+     1.0247468599526272e-001
+  e1 = E1/rho1 - 0.5*u1*u1
+  e2 = E2/rho2 - 0.5*u2*u2
+  c = GC.SPD_OF_LGT
+  psi_left = 0.5*c*1.372E-06
+  psi_right = 0.5*c*2.5560936967521927e-005
+
+  cross_sects = [(ConstantCrossSection(sig_s, sig_s + sig_a),
+     ConstantCrossSection(sig_s, sig_s + sig_a))]*n_elems
+  hydro_IC = list()
+  psi_IC = list()
+  for i in xrange(n_elems):
+     if mesh.getElement(i).x_cent < x_start + 0.5*width:
+        hydro_IC.append(HydroState(u=u1, rho=rho1, e=e1, spec_heat=c_v,
+           gamma=gam))
+        psi_IC += [psi_left]*4
+     else:
+        hydro_IC.append(HydroState(u=u2, rho=rho2, e=e2, spec_heat=c_v,
+           gamma=gam))
+        psi_IC += [psi_right]*4
+
+  rad_BC = RadBC(mesh, "dirichlet", psi_left=psi_left, psi_right=psi_right)
+  hydro_BC = HydroBC(mesh=mesh, bc_type='reflective')
+
+  t_start = time()
+  rad_new, hydro_new = runNonlinearTransient(
+     mesh           = mesh,
+     problem_type   = 'rad_hydro',
+     dt_option      = 'constant',
+     dt_constant    = dt,
+     t_start        = 0.0,
+     t_end          = n_steps*dt,
+     rad_BC         = rad_BC,
+     cross_sects    = cross_sects,
+     rad_IC         = Radiation(psi_IC),
+     hydro_IC       = hydro_IC,
+     hydro_BC       = hydro_BC,
+     slope_limiter  = "double-minmod",
+     riemann_solver = riemann_solver,
+     verbosity      = 0)
+  time_per_step = (time() - t_start)/n_steps
+
+  return np.array([s.rho for s in hydro_new]), mesh.getCellWidths(),\
+     time_per_step
+
+
+# run main function
+if __name__ == '__main__':
+   main()
@@ -8,11 +8,26 @@ from unittest import TestSuite, defaultTestLoader, TextTestRunner
 def main():
    # list of test modules
    test_modules = ['testIntegrationUtilities',
+                   'testRadiation',
                    'testPureAbsorberProblem',
                    'testPureScatteringProblem',
                    'testDiffusionProblem',
                    'testSSConvergence',
+                   'testBandedSolver',
+                   'testFactorizationCache',
+                   'testSweepSolver',
+                   'testKrylovSolver',
+                   'testDiscreteOrdinates',
+                   'testMusclHancock',
+                   'testRiemannSolvers',
+                   'testHydroSlopes',
+                   'testHydroStateArray',
+                   'testHydroExecutioner',
                    'testTransientSource',
+                   'testTimeStepController',
+                   'testSubcycling',
+                   'testTimeLevels',
+                   'testNonlinearSolve',
                    'testRadTransient',
                    'testRadSpatialConvergence',
                    'testCreateMMSSourceFunctions',
@@ -0,0 +1,103 @@
+## @package unittests.testBandedSolver
+#  Tests that the banded S-2 solver gives the same solution as the general
+#  sparse direct solver for each radiation boundary condition type, and that
+#  solving for multiple sources at once matches solving for each separately.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from radiationSolveSS import radiationSolveSS, radiationSolveSSMultiple
+from radBC import RadBC
+
+## Derived unittest class to compare the banded and sparse S-2 solvers
+#
+class TestBandedSolver(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_BandedSolver(self):
+
+      # number of decimal places to test
+      n_decimal_places = 12
+
+      # create mesh
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0 + random())
+
+      # random cross sections
+      cross_sects = [(ConstantCrossSection(random(), 1.0 + random()),
+                      ConstantCrossSection(random(), 1.0 + random()))
+                      for i in xrange(mesh.n_elems)]
+
+      # random source
+      Q = np.array([random() for i in xrange(4*mesh.n_elems)])
+
+      # loop over each boundary condition type
+      rad_BCs = [RadBC(mesh, "vacuum"),
+                 RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random()),
+                 RadBC(mesh, "periodic")]
+      for rad_BC in rad_BCs:
+
+         # solve with both solvers
+         alpha = random()
+         rad_banded = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+            diag_add_term=alpha, implicit_scale=0.5, solver='banded')
+         rad_sparse = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+            diag_add_term=alpha, implicit_scale=0.5, solver='sparse')
+
+         # compare solutions
+         for i in xrange(4*mesh.n_elems):
+            self.assertAlmostEqual(rad_banded.psi[i], rad_sparse.psi[i],
+               n_decimal_places)
+
+   def test_MultipleSources(self):
+
+      # number of decimal places to test
+      n_decimal_places = 12
+
+      # create mesh
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0 + random())
+
+      # random cross sections
+      cross_sects = [(ConstantCrossSection(random(), 1.0 + random()),
+                      ConstantCrossSection(random(), 1.0 + random()))
+                      for i in xrange(mesh.n_elems)]
+
+      # random sources, one per row
+      n_sources = 5
+      Q = np.random.random((n_sources, 4*mesh.n_elems))
+
+      # loop over each boundary condition type and solver
+      rad_BCs = [RadBC(mesh, "vacuum"),
+                 RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random()),
+                 RadBC(mesh, "periodic")]
+      for rad_BC in rad_BCs:
+         for solver in ['banded', 'sparse']:
+
+            # solve for all sources at once
+            alpha = random()
+            rads = radiationSolveSSMultiple(mesh, cross_sects, Q, rad_BC,
+               diag_add_term=alpha, implicit_scale=0.5, solver=solver)
+            self.assertEqual(len(rads), n_sources)
+
+            # compare to solving for each source separately
+            for k in xrange(n_sources):
+               rad = radiationSolveSS(mesh, cross_sects, Q[k], rad_BC,
+                  diag_add_term=alpha, implicit_scale=0.5, solver=solver)
+               for i in xrange(4*mesh.n_elems):
+                  self.assertAlmostEqual(rads[k].psi[i], rad.psi[i],
+                     n_decimal_places)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,203 @@
+## @package unittests.testDiscreteOrdinates
+#  Tests the S-N discrete ordinates engine: the Gauss-Legendre quadrature,
+#  agreement of the S-2 case with the banded S-2 solver, that higher
+#  order solutions satisfy the discrete transport equations, and the S-N
+#  radiation-only transient.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+from math import sqrt
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from radiationSolveSS import radiationSolveSS
+from radiation import Radiation, DiscreteOrdinatesRadiation
+from transient import runLinearTransient
+from discreteOrdinates import GaussLegendreQuadrature, solveSN,\
+   computeStreamingCoefficients, computeIncidentFluxes,\
+   computeStreamingTerm, computeCollisionTerm, computeScatteringSource
+from utilityFunctions import getCrossSectionArray
+from radBC import RadBC
+
+## Derived unittest class to test the discrete ordinates engine
+#
+class TestDiscreteOrdinates(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_Quadrature(self):
+
+      # number of decimal places to test
+      n_decimal_places = 13
+
+      for n_angles in [2, 4, 8, 16]:
+         quadrature = GaussLegendreQuadrature(n_angles)
+
+         # directions are sorted and symmetric
+         self.assertTrue(np.all(np.diff(quadrature.mu) > 0.0))
+         self.assertEqual(np.sum(quadrature.positive), n_angles/2)
+
+         # even moments of mu are integrated exactly
+         for k in xrange(0, 2*n_angles, 2):
+            self.assertAlmostEqual(np.sum(quadrature.weights*quadrature.mu**k),
+               2.0/(k + 1.0), n_decimal_places)
+
+      # S-2 directions
+      quadrature = GaussLegendreQuadrature(2)
+      self.assertAlmostEqual(quadrature.mu[1], 1.0/sqrt(3.0), n_decimal_places)
+
+      # odd numbers of directions are not allowed
+      self.assertRaises(ValueError, GaussLegendreQuadrature, 3)
+
+   def test_S2MatchesBanded(self):
+
+      # number of decimal places to test
+      n_decimal_places = 10
+
+      # create mesh
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0 + random())
+
+      # random cross sections
+      cross_sects = [(ConstantCrossSection(random(), 1.0 + random()),
+                      ConstantCrossSection(random(), 1.0 + random()))
+                      for i in xrange(mesh.n_elems)]
+
+      # random source in S-2 global dof ordering and as [angle, cell, side]
+      Q = np.random.random(4*mesh.n_elems)
+      Q_angles = Q.reshape(mesh.n_elems, 2, 2).transpose(2,0,1)
+
+      quadrature = GaussLegendreQuadrature(2)
+      rad_BCs = [RadBC(mesh, "vacuum"),
+                 RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random()),
+                 RadBC(mesh, "periodic")]
+      for rad_BC in rad_BCs:
+         alpha = random()
+         rad_banded = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+            diag_add_term=alpha, implicit_scale=0.5, solver='banded')
+
+         for method in ['gmres', 'source_iteration']:
+            psi, iterations = solveSN(mesh, cross_sects, Q_angles, rad_BC,
+               quadrature, diag_add_term=alpha, implicit_scale=0.5,
+               method=method)
+            rad = DiscreteOrdinatesRadiation(psi, quadrature)
+
+            # compare angular fluxes and moments
+            for i in xrange(mesh.n_elems):
+               for side in xrange(2):
+                  self.assertAlmostEqual(rad.psi[0,i,side],
+                     rad_banded.psim[i,side], n_decimal_places)
+                  self.assertAlmostEqual(rad.psi[1,i,side],
+                     rad_banded.psip[i,side], n_decimal_places)
+                  self.assertAlmostEqual(rad.phi[i,side],
+                     rad_banded.phi[i,side], n_decimal_places)
+                  self.assertAlmostEqual(rad.F[i,side],
+                     rad_banded.F[i,side], n_decimal_places)
+
+   def test_SNResidual(self):
+
+      # number of decimal places to test
+      n_decimal_places = 10
+
+      # create mesh
+      n_elems = 25
+      mesh = Mesh(n_elems, 1.0 + random())
+
+      # random, highly scattering cross sections
+      cross_sects = [(ConstantCrossSection(0.99*random(), 1.0),
+                      ConstantCrossSection(0.99*random(), 1.0))
+                      for i in xrange(mesh.n_elems)]
+      sig_s = getCrossSectionArray(cross_sects, 'sig_s')
+
+      # random isotropic source
+      Q = np.random.random((mesh.n_elems, 2))
+
+      rad_BCs = [RadBC(mesh, "vacuum"),
+                 RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random()),
+                 RadBC(mesh, "periodic")]
+      for n_angles in [4, 8, 16]:
+         quadrature = GaussLegendreQuadrature(n_angles)
+         hm = computeStreamingCoefficients(mesh, quadrature)
+         sig_t = getCrossSectionArray(cross_sects, 'sig_t')
+
+         for rad_BC in rad_BCs:
+            psi, iterations = solveSN(mesh, cross_sects, Q, rad_BC, quadrature)
+            phi = quadrature.computeScalarFlux(psi)
+
+            # residual of the discrete transport equations
+            residual = computeStreamingTerm(psi, hm, quadrature.positive,
+               computeIncidentFluxes(rad_BC, quadrature),
+               rad_BC.bc_type == 'periodic') \
+               + computeCollisionTerm(psi, sig_t) \
+               - computeScatteringSource(phi, sig_s) - Q
+            self.assertAlmostEqual(np.max(np.abs(residual))/np.max(psi), 0.0,
+               n_decimal_places)
+
+            # source iteration converges to the same solution
+            psi_si, iterations_si = solveSN(mesh, cross_sects, Q, rad_BC,
+               quadrature, method='source_iteration')
+            self.assertAlmostEqual(np.max(np.abs(psi_si - psi))/np.max(psi),
+               0.0, n_decimal_places)
+            self.assertTrue(iterations < iterations_si)
+
+   def test_Transient(self):
+
+      # number of decimal places to test
+      n_decimal_places = 10
+
+      # create mesh
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+
+      # random cross sections
+      cross_sects = [(ConstantCrossSection(random(), 1.0 + random()),
+                      ConstantCrossSection(random(), 1.0 + random()))
+                      for i in xrange(mesh.n_elems)]
+
+      # time-dependent, anisotropic source and random initial condition
+      psim_src = lambda x, t: 1.0 + 100.0*x*t
+      psip_src = lambda x, t: 2.0 - x
+      psi_IC = np.random.random(4*mesh.n_elems)
+      psi_IC_angles = psi_IC.reshape(mesh.n_elems, 2, 2).transpose(2,0,1)
+
+      # S-2 transients with the discrete ordinates engine agree with the
+      # S-2 transients of the banded solver
+      quadrature = GaussLegendreQuadrature(2)
+      rad_BC = RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random())
+      for time_stepper in ['BE', 'CN', 'BDF2']:
+         kwargs = dict(mesh=mesh, time_stepper=time_stepper, rad_BC=rad_BC,
+            cross_sects=cross_sects, psim_src=psim_src, psip_src=psip_src,
+            dt_constant=0.001, t_end=0.005, verbosity=0)
+         rad_banded = runLinearTransient(rad_IC=Radiation(psi_IC), **kwargs)
+         rad = runLinearTransient(rad_IC=DiscreteOrdinatesRadiation(
+            psi_IC_angles, quadrature), quadrature=quadrature, **kwargs)
+         self.assertAlmostEqual(np.max(np.abs(rad.psi[0] - rad_banded.psim)),
+            0.0, n_decimal_places)
+         self.assertAlmostEqual(np.max(np.abs(rad.psi[1] - rad_banded.psip)),
+            0.0, n_decimal_places)
+
+      # higher order transients with a constant source converge to the
+      # steady-state solution
+      quadrature = GaussLegendreQuadrature(8)
+      Q = np.ones((mesh.n_elems, 2))
+      for rad_BC in [RadBC(mesh, "vacuum"), RadBC(mesh, "periodic")]:
+         psi_ss, iterations = solveSN(mesh, cross_sects, Q, rad_BC, quadrature)
+         rad = runLinearTransient(mesh=mesh, time_stepper='BDF2',
+            rad_BC=rad_BC, cross_sects=cross_sects,
+            rad_IC=DiscreteOrdinatesRadiation(np.zeros(psi_ss.shape),
+               quadrature),
+            psim_src=lambda x, t: 1.0, psip_src=lambda x, t: 1.0,
+            dt_constant=1.0, t_end=20.0, verbosity=0, quadrature=quadrature)
+         self.assertAlmostEqual(np.max(np.abs(rad.psi - psi_ss))/np.max(psi_ss),
+            0.0, 6)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
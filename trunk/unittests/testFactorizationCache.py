@@ -0,0 +1,107 @@
+## @package unittests.testFactorizationCache
+#  Tests that the S-2 factorization cache reuses the factorization when the
+#  operator is unchanged, refactors when any of its inputs change, including
+#  cross sections changed in place, and gives the same solution as an
+#  uncached solve.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from radiationSolveSS import radiationSolveSS, S2FactorizationCache
+from radBC import RadBC
+
+## Derived unittest class to test the S-2 factorization cache
+#
+class TestFactorizationCache(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_FactorizationCache(self):
+
+      # create mesh and BC
+      n_elems = 10
+      mesh = Mesh(n_elems, 1.0)
+      rad_BC = RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random())
+
+      # random cross sections
+      cross_sects = [(ConstantCrossSection(random(), 1.0 + random()),
+                      ConstantCrossSection(random(), 1.0 + random()))
+                      for i in xrange(mesh.n_elems)]
+
+      # create cache
+      factor_cache = S2FactorizationCache()
+
+      # solve several times with the same operator but different sources
+      alpha = random()
+      for k in xrange(3):
+         Q = np.array([random() for i in xrange(4*mesh.n_elems)])
+         rad_cached = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+            diag_add_term=alpha, implicit_scale=0.5, factor_cache=factor_cache)
+         rad = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+            diag_add_term=alpha, implicit_scale=0.5)
+         self.assertTrue(np.array_equal(rad_cached.psi, rad.psi))
+      self.assertEqual(factor_cache.n_factorizations, 1)
+
+      # changing the diagonal term must evict the factorization
+      radiationSolveSS(mesh, cross_sects, Q, rad_BC, diag_add_term=2.0*alpha,
+         implicit_scale=0.5, factor_cache=factor_cache)
+      self.assertEqual(factor_cache.n_factorizations, 2)
+
+      # changing the implicit scale must evict the factorization
+      radiationSolveSS(mesh, cross_sects, Q, rad_BC, diag_add_term=2.0*alpha,
+         implicit_scale=1.0, factor_cache=factor_cache)
+      self.assertEqual(factor_cache.n_factorizations, 3)
+
+      # updating constant cross sections must not evict the factorization
+      for cx in cross_sects:
+         cx[0].updateCrossX(None)
+         cx[1].updateCrossX(None)
+      radiationSolveSS(mesh, cross_sects, Q, rad_BC, diag_add_term=2.0*alpha,
+         implicit_scale=1.0, factor_cache=factor_cache)
+      self.assertEqual(factor_cache.n_factorizations, 3)
+
+      # changing one cross section in place must evict the factorization
+      # without invalidating the cache
+      rad_old = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+         diag_add_term=2.0*alpha, implicit_scale=1.0)
+      cross_sects[3][1].sig_t += 1.0
+      rad_cached = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+         diag_add_term=2.0*alpha, implicit_scale=1.0, factor_cache=factor_cache)
+      rad = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+         diag_add_term=2.0*alpha, implicit_scale=1.0)
+      self.assertEqual(factor_cache.n_factorizations, 4)
+      self.assertTrue(np.array_equal(rad_cached.psi, rad.psi))
+      self.assertFalse(np.array_equal(rad_cached.psi, rad_old.psi))
+
+      # changing the BC type must evict the factorization
+      radiationSolveSS(mesh, cross_sects, Q, RadBC(mesh, "periodic"),
+         diag_add_term=2.0*alpha, implicit_scale=1.0, factor_cache=factor_cache)
+      self.assertEqual(factor_cache.n_factorizations, 5)
+
+      # the sparse factorization is cached as well, and agrees with the banded
+      # solve
+      for k in xrange(2):
+         rad_sparse = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+            diag_add_term=2.0*alpha, implicit_scale=1.0, solver='sparse',
+            factor_cache=factor_cache)
+      self.assertEqual(factor_cache.n_factorizations, 6)
+      self.assertTrue(np.allclose(rad_sparse.psi, rad.psi, rtol=1.0e-12))
+
+      # a new cross section list must evict the factorization
+      radiationSolveSS(mesh, list(cross_sects), Q, rad_BC,
+         diag_add_term=2.0*alpha, implicit_scale=1.0, solver='sparse',
+         factor_cache=factor_cache)
+      self.assertEqual(factor_cache.n_factorizations, 7)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,59 @@
+## @package unittests.testHydroExecutioner
+#  Tests the pure hydrodynamics driver on the Sod shock tube.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from hydroBC import HydroBC
+from hydroState import createHydroStateArray
+from hydroExecutioner import runHydroTransient, createShockTubeIC
+
+## Derived unittest class to test the pure hydrodynamics driver
+#
+class TestHydroExecutioner(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_SodShockTube(self):
+
+      n_elems = 200
+      mesh = Mesh(n_elems, 1.0)
+      hydro_IC = createShockTubeIC(mesh, 0.5, (1.0, 0.0, 1.0),
+         (0.125, 0.0, 0.1))
+
+      hydro, n_steps = runHydroTransient(mesh, hydro_IC,
+         HydroBC(bc_type='reflective', mesh=mesh), t_end=0.2, verbosity=0)
+      x = np.array(mesh.getCellCenters())
+
+      # the densities in the star regions on either side of the contact,
+      # which lies at x = 0.685 at the final time, match the exact solution
+      self.assertTrue(abs(hydro[int(0.59*n_elems)].rho - 0.42632) < 0.005)
+      self.assertTrue(abs(hydro[int(0.77*n_elems)].rho - 0.26557) < 0.005)
+
+      # the waves have not reached the boundaries, so mass and total energy
+      # are conserved
+      dx = mesh.getCellWidths()
+      hydro_IC = createHydroStateArray(hydro_IC)
+      self.assertAlmostEqual(np.sum(hydro.rho*dx)/np.sum(hydro_IC.rho*dx), 1.0,
+         13)
+      self.assertAlmostEqual(np.sum(hydro.E()*dx)/np.sum(hydro_IC.E()*dx), 1.0,
+         13)
+
+      # the initial states may also be given as a HydroStateArray, and they
+      # are not modified
+      hydro_array, n_steps_array = runHydroTransient(mesh, hydro_IC,
+         HydroBC(bc_type='reflective', mesh=mesh), t_end=0.2, verbosity=0)
+      self.assertEqual(n_steps_array, n_steps)
+      self.assertTrue(np.array_equal(hydro_array.rho, hydro.rho))
+      self.assertTrue(np.array_equal(hydro_IC.rho[x < 0.5], np.ones(100)))
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
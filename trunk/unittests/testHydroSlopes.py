@@ -0,0 +1,189 @@
+## @package unittests.testHydroSlopes
+#  Tests the array slope limiters against the cell-by-cell evaluation that
+#  they replaced.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+from math import isinf
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from hydroState import HydroState
+from hydroBC import HydroBC
+from hydroSlopes import HydroSlopes, SLOPE_LIMITERS, minMod3
+
+## Computes slopes for a single conservative variable cell by cell; this is
+#  the implementation of HydroSlopes.computeSlopes() before it was
+#  vectorized, kept as a reference.
+#
+#  @param[in] u        cell-average values for each cell, \f$y_i\f$
+#  @param[in] bc_L     value for left boundary ghost cell, \f$y_0\f$
+#  @param[in] bc_R     value for right boundary ghost cell, \f$y_{N+1}\f$
+#  @param[in] limiter  string for choice of slope limiter
+#
+#  @return limited slopes for each cell, \f$\Delta y_i\f$
+#
+def computeSlopesReference(u, bc_L, bc_R, limiter):
+
+   # omega of 0 gives centered approximation
+   omega = 0.
+
+   # compute slopes
+   u_slopes = np.zeros(len(u))
+   for i in range(len(u)):
+
+      # get neighboring cell values
+      if i == 0: # left boundary
+         u_L = bc_L
+         u_R = u[i+1]
+      elif i == len(u)-1: # right boundary
+         u_L = u[i-1]
+         u_R = bc_R
+      else:
+         u_L = u[i-1]
+         u_R = u[i+1]
+
+      # compute differences over left and right edges of cell
+      del_L = u[i] - u_L
+      del_R = u_R  - u[i]
+
+      # compute un-limited slope
+      del_i = 0.5*(1.+omega)*del_L + 0.5*(1.-omega)*del_R
+
+      # compute ratio of slopes, avoiding division by zero
+      if abs(del_R) < 1.0e-15:
+         if abs(del_L) < 1.0e-15:
+            r = 1.0
+         else:
+            r = -1.
+      else:
+         r = del_L/del_R
+
+      # compute zeta_R, used by several limiters
+      beta = 1.
+      den = 1.-omega+(1.+omega)*r
+      if abs(den) < 1.0e-15:
+         zeta_R = 1.0e15 # arbitrary large number, just needs to be > 2
+      else:
+         zeta_R = 2.*beta/den
+
+      # compute limited slope
+      #---------------------------------------------
+
+      # minmod limiter
+      if limiter == "minmod":
+
+         del_i = minMod3(del_R,del_L,del_i)
+
+      elif limiter == "double-minmod":
+
+         #Implemented from McClarren Lowrie paper in JCP 227 (2008) 9711-9726
+         del_i = minMod3(2*del_R,2*del_L,del_i)
+
+      # MINBEE limiter
+      elif limiter == "minbee":
+
+         if r <= 0.0 or isinf(r):
+            zeta = 0.0
+         elif r <= 1.0:
+            zeta = r
+         else:
+            zeta = min(1.0,zeta_R)
+         del_i = zeta*del_i
+
+      # SUPERBEE limiter
+      elif limiter == "superbee":
+
+         if r <= 0.0 or isinf(r):
+            zeta = 0.0
+         elif r <= 0.5:
+            zeta = 2.0*r
+         elif r <= 1.0:
+            zeta = 1.0
+         else:
+            zeta = min(min(r,zeta_R),2.0)
+         del_i = zeta*del_i
+
+      # vanLeer limiter
+      elif limiter == "vanleer":
+
+         if r <= 0.0 or isinf(r):
+            del_i = 0.0
+         else:
+            zeta =  min(2.*r/(1.+r), zeta_R)
+            del_i = zeta*del_i
+
+      # no limiter; Lax-Wendroff
+      elif limiter == "none":
+         del_i = del_i
+
+      # zero slopes; Godunov scheme
+      elif limiter == "step":
+         del_i = 0.0
+
+      else:
+         raise ValueError("Invalid slope limiter\n")
+
+      # save slope
+      u_slopes[i] = del_i
+
+   return u_slopes
+
+
+## Derived unittest class to test the hydro slope limiters
+#
+class TestHydroSlopes(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_HydroSlopes(self):
+
+      # create states with random values
+      n_elems = 40
+      mesh = Mesh(n_elems, 1.0)
+      states = [HydroState(1.0 + random(), random() - 0.5, 1.4, 0.1,
+         p=1.0 + random()) for i in xrange(n_elems)]
+
+      # include a region of constant values, a cell equal to only its left
+      # neighbor, and cells differing from their neighbors by round-off only
+      states[10:15] = [states[10]]*5
+      states[21] = states[20]
+      states[30] = HydroState(states[29].rho*(1.0 + 2.0e-16), states[29].u,
+         1.4, 0.1, p=states[29].p*(1.0 - 2.0e-16))
+
+      # reflective boundaries make the boundary cells equal to their ghosts
+      hydro_BC = HydroBC('reflective', mesh)
+      hydro_BC.update(states=states, t=0.0)
+      rho = np.array([s.rho for s in states])
+      mom = np.array([s.rho*s.u for s in states])
+      erg = np.array([s.rho*(0.5*s.u*s.u + s.e) for s in states])
+      rho_L, rho_R, mom_L, mom_R, erg_L, erg_R = hydro_BC.getBoundaryValues()
+
+      for limiter in SLOPE_LIMITERS:
+
+         slopes = HydroSlopes(states, bc=hydro_BC, limiter=limiter)
+
+         # the slopes equal those of the cell-by-cell evaluation exactly
+         self.assertEqual(list(slopes.rho_slopes),
+            list(computeSlopesReference(rho, rho_L, rho_R, limiter)))
+         self.assertEqual(list(slopes.mom_slopes),
+            list(computeSlopesReference(mom, mom_L, mom_R, limiter)))
+         self.assertEqual(list(slopes.erg_slopes),
+            list(computeSlopesReference(erg, erg_L, erg_R, limiter)))
+
+         # a single variable gives the same slopes as the stacked variables
+         self.assertEqual(list(slopes.computeSlopes(rho, rho_L, rho_R)),
+            list(slopes.rho_slopes))
+
+      # invalid limiters are rejected
+      self.assertRaises(ValueError, HydroSlopes, states, hydro_BC, "invalid")
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,123 @@
+## @package unittests.testHydroStateArray
+#  Tests that HydroStateArray gives the same results as a list of HydroState
+#  objects, and that its per-cell views behave like HydroState objects.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+from copy import copy, deepcopy
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from hydroState import HydroState, HydroStateArray, createHydroStateArray,\
+   updateEachState
+from hydroBC import HydroBC
+from hydroSlopes import HydroSlopes
+from musclHancock import hydroPredictor, hydroCorrector
+from utilityFunctions import computeL2RelDiff
+
+## Derived unittest class to test HydroStateArray
+#
+class TestHydroStateArray(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_HydroStateArray(self):
+
+      n_elems = 20
+      states = [HydroState(1.0 + random(), random() - 0.5, 1.4, 0.1,
+         p=1.0 + random()) for i in xrange(n_elems)]
+      state_array = createHydroStateArray(states)
+      self.assertEqual(len(state_array), n_elems)
+
+      # array functions give the same values as the states
+      c = state_array.getSoundSpeed()
+      T = state_array.getTemperature()
+      E = state_array.E()
+      rho, mom, erg = state_array.getConservativeVariables()
+      for i, state in enumerate(states):
+         self.assertEqual(c[i], state.getSoundSpeed())
+         self.assertEqual(T[i], state.getTemperature())
+         self.assertEqual(E[i], state.E())
+         self.assertEqual((rho[i], mom[i], erg[i]),
+            state.getConservativeVariables())
+         self.assertTrue(state_array[i] == state)
+
+      # updating the array gives the same states as updating each state
+      state_array.updateState(1.1*rho, 0.9*mom, 1.2*erg)
+      for i, state in enumerate(states):
+         state.updateState(1.1*rho[i], 0.9*mom[i], 1.2*erg[i])
+         self.assertTrue(state_array[i] == state)
+
+      # the velocity, density, and internal energy updates of the array give
+      # the same states as those of each state
+      values = [1.0 + random() for i in xrange(n_elems)]
+      for method in ['updateVelocity', 'updateDensity',
+         'updateStateInternalEnergy']:
+         updateEachState(state_array, method, values)
+         updateEachState(states, method, values)
+         for i, state in enumerate(states):
+            self.assertTrue(state_array[i] == state)
+
+      # views update the arrays, and copies of views are independent
+      view = state_array[-1]
+      view.updateVelocity(2.0)
+      self.assertEqual(state_array.u[-1], 2.0)
+      state = deepcopy(view)
+      self.assertTrue(isinstance(state, HydroState))
+      state.updateVelocity(3.0)
+      self.assertEqual(state_array.u[-1], 2.0)
+
+      # copies of the array are independent
+      state_array_copy = state_array.copy()
+      state_array_copy.rho[0] = 5.0
+      self.assertNotEqual(state_array.rho[0], 5.0)
+
+      # differences may be computed from arrays
+      states_copy = [copy(s) for s in states]
+      states_copy[0].updateVelocity(0.5)
+      diff = computeL2RelDiff(states, states_copy, aux_func=lambda x: x.E())
+      diff_array = computeL2RelDiff(createHydroStateArray(states),
+         createHydroStateArray(states_copy), aux_func=lambda x: x.E())
+      self.assertAlmostEqual(diff, diff_array, 14)
+
+   def test_HydroStateArrayMusclHancock(self):
+
+      # a step with an array of states gives the same states as with a list
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+      dt = 0.002
+      states = [HydroState(1.0 + random(), random() - 0.5, 1.4, 0.1,
+         p=1.0 + random()) for i in xrange(n_elems)]
+      state_array = createHydroStateArray(states)
+
+      hydro_BC = HydroBC('periodic', mesh)
+      hydro_BC.update(states=states, t=0.0)
+      slopes = HydroSlopes(states, bc=hydro_BC, limiter='vanleer')
+      states_half = hydroPredictor(mesh, states, slopes, dt)
+      states_half_array = hydroPredictor(mesh, state_array, slopes, dt)
+      self.assertTrue(isinstance(states_half_array, HydroStateArray))
+
+      hydro_BC.update(states=states_half, t=0.5*dt, slopes=slopes,
+         edge_value=True)
+      states_new = hydroCorrector(mesh, states, states_half, slopes, dt,
+         hydro_BC)[0]
+      states_new_array = hydroCorrector(mesh, state_array, states_half_array,
+         slopes, dt, hydro_BC)[0]
+      self.assertTrue(isinstance(states_new_array, HydroStateArray))
+
+      for state, view in zip(states_new, states_new_array):
+         self.assertTrue(view == state)
+
+      # the old states are unchanged
+      for state, view in zip(states, state_array):
+         self.assertTrue(view == state)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,110 @@
+## @package unittests.testKrylovSolver
+#  Tests that the preconditioned Krylov solvers give the same solution as the
+#  banded direct solver, and that warm-starting from a nearby solution
+#  reduces the number of iterations.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from radiationSolveSS import radiationSolveSS, assembleS2RHS,\
+   computeS2MatrixEntries
+from krylovSolver import BlockJacobiPreconditioner, SweepPreconditioner,\
+   TwoStagePreconditioner, solveKrylov
+from radBC import RadBC
+from scipy.sparse import coo_matrix
+
+## Derived unittest class to test the Krylov solvers
+#
+class TestKrylovSolver(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_KrylovSolver(self):
+
+      # number of decimal places to test
+      n_decimal_places = 10
+
+      # create mesh
+      n_elems = 30
+      mesh = Mesh(n_elems, 1.0 + random())
+
+      # loop over optically thin and thick problems
+      for sig_t in [1.0, 1.0e4]:
+
+         # random, highly scattering cross sections
+         cross_sects = [(ConstantCrossSection(0.99*sig_t*random(), sig_t),
+                         ConstantCrossSection(0.99*sig_t*random(), sig_t))
+                         for i in xrange(mesh.n_elems)]
+
+         # random source
+         Q = np.array([random() for i in xrange(4*mesh.n_elems)])
+
+         # loop over each boundary condition type
+         rad_BCs = [RadBC(mesh, "vacuum"),
+                    RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random()),
+                    RadBC(mesh, "periodic")]
+         for rad_BC in rad_BCs:
+
+            # solve with the direct solver
+            alpha = random()
+            rad_banded = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+               diag_add_term=alpha, implicit_scale=0.5, solver='banded')
+            scale = np.max(np.abs(rad_banded.psi))
+
+            # compare each Krylov solver, relative to the solution magnitude
+            for solver in ['gmres', 'bicgstab']:
+               rad = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+                  diag_add_term=alpha, implicit_scale=0.5, solver=solver)
+               for i in xrange(4*mesh.n_elems):
+                  self.assertAlmostEqual(rad.psi[i]/scale,
+                     rad_banded.psi[i]/scale, n_decimal_places)
+
+   def test_KrylovWarmStart(self):
+
+      # create mesh
+      n_elems = 50
+      mesh = Mesh(n_elems, 1.0)
+      rad_BC = RadBC(mesh, "vacuum")
+
+      # random, highly scattering cross sections
+      cross_sects = [(ConstantCrossSection(0.99*random(), 1.0),
+                      ConstantCrossSection(0.99*random(), 1.0))
+                      for i in xrange(mesh.n_elems)]
+
+      # build system and preconditioner
+      n = 4*mesh.n_elems
+      rows, cols, vals = computeS2MatrixEntries(mesh, cross_sects, rad_BC)
+      matrix = coo_matrix((vals, (rows, cols)), shape=(n, n)).tocsr()
+      preconditioner = TwoStagePreconditioner(matrix,
+         BlockJacobiPreconditioner(n, rows, cols, vals),
+         SweepPreconditioner(mesh, cross_sects, rad_BC))
+      rhs = assembleS2RHS(mesh, np.random.random(n), rad_BC)
+
+      for method in ['gmres', 'bicgstab']:
+
+         # cold start
+         psi, n_cold = solveKrylov(matrix, rhs, preconditioner, method=method)
+
+         # warm start from a slightly perturbed solution
+         guess = psi*(1.0 + 1.0e-6*np.random.random(n))
+         psi_warm, n_warm = solveKrylov(matrix, rhs, preconditioner,
+            initial_guess=guess, method=method)
+         self.assertTrue(n_warm < n_cold)
+
+         # warm start from the solution itself needs no iterations
+         psi_exact, n_exact = solveKrylov(matrix, rhs, preconditioner,
+            initial_guess=psi, method=method)
+         self.assertEqual(n_exact, 0)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
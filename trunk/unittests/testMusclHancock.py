@@ -0,0 +1,246 @@
+## @package unittests.testMusclHancock
+#  Tests that the array kernels of the MUSCL-Hancock predictor and corrector
+#  give the same results as a cell-by-cell evaluation with HydroState objects,
+#  also for a ratio of specific heats that varies between cells.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+from copy import deepcopy
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from hydroState import HydroState, createHydroStateArray
+from hydroBC import HydroBC
+from hydroSlopes import HydroSlopes
+from musclHancock import hydroPredictor, hydroCorrector, HLLCSolver,\
+   rhoFlux, momFlux, ergFlux, advCons, HydroWorkspace
+
+## Derived unittest class to test the MUSCL-Hancock kernels
+#
+class TestMusclHancock(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_MusclHancock(self):
+
+      self.runMusclHancock(lambda i: 1.4)
+
+   def test_MixedGamma(self):
+
+      # random ratio of specific heats in each cell
+      self.runMusclHancock(lambda i: 1.4 if random() < 0.5 else 5.0/3.0)
+
+      # a stationary contact between two materials at the same pressure
+      # remains stationary, which requires the pressure of each cell to be
+      # computed with the ratio of specific heats of that cell
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+      dt = 0.002
+      states_init = [HydroState(1.0, 0.0, 1.4 if i < n_elems/2 else 5.0/3.0,
+         0.1, p=1.0) for i in xrange(n_elems)]
+      hydro_BC = HydroBC('reflective', mesh)
+      for riemann_solver in ['hllc', 'exact']:
+         for states in [states_init, createHydroStateArray(states_init)]:
+            for step in xrange(5):
+               hydro_BC.update(states=states, t=0.0)
+               slopes = HydroSlopes(states, bc=hydro_BC, limiter='vanleer')
+               states_half = hydroPredictor(mesh, states, slopes, dt)
+               hydro_BC.update(states=states_half, t=0.5*dt, slopes=slopes,
+                  edge_value=True)
+               states = hydroCorrector(mesh, states, states_half, slopes, dt,
+                  hydro_BC, riemann_solver=riemann_solver)[0]
+            state_array = createHydroStateArray(states)
+            self.assertTrue(np.allclose(state_array.u, 0.0, rtol=0.0,
+               atol=1.0e-13))
+            self.assertTrue(np.allclose(state_array.p, 1.0, rtol=1.0e-13))
+            self.assertTrue(np.array_equal(state_array.gamma,
+               createHydroStateArray(states_init).gamma))
+
+   ## Compares the predictor and corrector with the cell-by-cell evaluation
+   #
+   #  @param[in] getGamma  function returning the ratio of specific heats of
+   #                       a cell from its index
+   #
+   def runMusclHancock(self, getGamma):
+
+      # number of decimal places to test
+      n_decimal_places = 12
+
+      # create mesh
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+      dt = 0.002
+
+      for bc_type in ['reflective', 'periodic', 'dirichlet']:
+
+         # random states
+         states = [HydroState(1.0 + random(), random() - 0.5, getGamma(i), 0.1,
+            p=1.0 + random()) for i in xrange(n_elems)]
+
+         # create BC
+         if bc_type == 'dirichlet':
+            hydro_BC = HydroBC(bc_type, mesh, rho_BC=lambda x, t: 1.2,
+               mom_BC=lambda x, t: 0.1, erg_BC=lambda x, t: 3.0)
+         else:
+            hydro_BC = HydroBC(bc_type, mesh)
+
+         # predictor step
+         hydro_BC.update(states=states, t=0.0)
+         slopes = HydroSlopes(states, bc=hydro_BC, limiter='vanleer')
+         states_half = hydroPredictor(mesh, states, slopes, dt)
+         states_half_ref = computeReferencePredictor(mesh, states, slopes, dt)
+         for state, state_ref in zip(states_half, states_half_ref):
+            self.assertAlmostEqual(state.rho, state_ref.rho, n_decimal_places)
+            self.assertAlmostEqual(state.u, state_ref.u, n_decimal_places)
+            self.assertAlmostEqual(state.p, state_ref.p, n_decimal_places)
+
+         # corrector step
+         hydro_BC.update(states=states_half, t=0.5*dt, slopes=slopes,
+            edge_value=True)
+         states_new, F_left, F_right = hydroCorrector(mesh, states,
+            states_half, slopes, dt, hydro_BC)
+         states_new_ref, F_left_ref, F_right_ref = computeReferenceCorrector(
+            mesh, states, states_half, slopes, dt, hydro_BC)
+         for state, state_ref in zip(states_new, states_new_ref):
+            self.assertAlmostEqual(state.rho, state_ref.rho, n_decimal_places)
+            self.assertAlmostEqual(state.u, state_ref.u, n_decimal_places)
+            self.assertAlmostEqual(state.p, state_ref.p, n_decimal_places)
+         for key in ['rho', 'mom', 'erg']:
+            self.assertAlmostEqual(F_left[key], F_left_ref[key],
+               n_decimal_places)
+            self.assertAlmostEqual(F_right[key], F_right_ref[key],
+               n_decimal_places)
+
+         # old states are unchanged
+         self.assertFalse(states_half[0] is states[0])
+         self.assertFalse(states_new[0] is states[0])
+
+   def test_HydroWorkspace(self):
+
+      # create mesh and random states
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+      dt = 0.002
+      states_init = [HydroState(1.0 + random(), random() - 0.5, 1.4, 0.1,
+         p=1.0 + random()) for i in xrange(n_elems)]
+      hydro_BC = HydroBC('periodic', mesh)
+
+      for states in [states_init, createHydroStateArray(states_init)]:
+
+         # several steps with and without a workspace give the same states
+         workspace = HydroWorkspace(states)
+         states_ws = states
+         outputs = set()
+         for step in xrange(4):
+
+            hydro_BC.update(states=states, t=0.0)
+            slopes = HydroSlopes(states, bc=hydro_BC, limiter='vanleer')
+            states_half = hydroPredictor(mesh, states, slopes, dt)
+            states_half_ws = hydroPredictor(mesh, states_ws, slopes, dt,
+               workspace=workspace)
+            hydro_BC.update(states=states_half, t=0.5*dt, slopes=slopes,
+               edge_value=True)
+            states_new = hydroCorrector(mesh, states, states_half, slopes, dt,
+               hydro_BC)[0]
+            states_new_ws = hydroCorrector(mesh, states_ws, states_half_ws,
+               slopes, dt, hydro_BC, workspace=workspace)[0]
+
+            # the inputs of each step are not overwritten
+            self.assertFalse(states_half_ws is states_ws)
+            self.assertFalse(states_new_ws is states_ws)
+            self.assertFalse(states_new_ws is states_half_ws)
+            for state, state_ws in zip(states_new, states_new_ws):
+               self.assertEqual(state.rho, state_ws.rho)
+               self.assertEqual(state.u, state_ws.u)
+               self.assertEqual(state.p, state_ws.p)
+
+            outputs.update([id(states_half_ws), id(states_new_ws)])
+            states = states_new
+            states_ws = states_new_ws
+
+         # only the buffers of the workspace are used
+         self.assertEqual(outputs, set(id(b) for b in workspace.buffers))
+
+
+## Computes the predictor step cell by cell
+#
+def computeReferencePredictor(mesh, states, slopes, dt):
+
+   rho_L, rho_R, mom_L, mom_R, erg_L, erg_R =\
+      slopes.computeEdgeConservativeVariablesValues(states)
+
+   states_half = deepcopy(states)
+   for i in xrange(mesh.n_elems):
+
+      dx = mesh.getElement(i).dx
+      state_L = deepcopy(states[i])
+      state_R = deepcopy(states[i])
+      state_L.updateState(rho_L[i], mom_L[i], erg_L[i])
+      state_R.updateState(rho_R[i], mom_R[i], erg_R[i])
+
+      rho, mom, erg = states[i].getConservativeVariables()
+      states_half[i].updateState(
+         advCons(rho, dx, 0.5*dt, rhoFlux(state_L), rhoFlux(state_R)),
+         advCons(mom, dx, 0.5*dt, momFlux(state_L), momFlux(state_R)),
+         advCons(erg, dx, 0.5*dt, ergFlux(state_L), ergFlux(state_R)))
+
+   return states_half
+
+
+## Computes the corrector step interface by interface
+#
+def computeReferenceCorrector(mesh, states_old, states_half, slopes, dt, bc):
+
+   n = mesh.n_elems
+   edges = slopes.computeEdgeConservativeVariablesValues(states_half)
+   rho_L, rho_R, mom_L, mom_R, erg_L, erg_R = edges
+
+   # edge states
+   states_L = deepcopy(states_half)
+   states_R = deepcopy(states_half)
+   for i in xrange(n):
+      states_L[i].updateState(rho_L[i], mom_L[i], erg_L[i])
+      states_R[i].updateState(rho_R[i], mom_R[i], erg_R[i])
+
+   # values and states on the left and right of each interface
+   rho_BC_L, rho_BC_R, mom_BC_L, mom_BC_R, erg_BC_L, erg_BC_R =\
+      bc.getBoundaryValues()
+   state_BC_L, state_BC_R = bc.getBoundaryStates()
+   left = [(rho_BC_L, mom_BC_L, erg_BC_L, state_BC_L)] + [(rho_R[i],
+      mom_R[i], erg_R[i], states_R[i]) for i in xrange(n-1)] + [(rho_BC_R,
+      mom_BC_R, erg_BC_R, state_BC_R)]
+   right = [(rho_L[i], mom_L[i], erg_L[i], states_L[i]) for i in xrange(n)]\
+      + [(rho_R[-1], mom_R[-1], erg_R[-1], states_R[-1])]
+
+   F = np.zeros((n+1, 3))
+   for i in xrange(n+1):
+      for j, flux in enumerate([rhoFlux, momFlux, ergFlux]):
+         if bc.bc_type == 'reflective' and i == 0:
+            F[i,j] = flux(states_L[0])
+         elif bc.bc_type == 'reflective' and i == n:
+            F[i,j] = flux(states_R[-1])
+         else:
+            F[i,j] = HLLCSolver(left[i][j], right[i][j], left[i][3],
+               right[i][3], flux)
+
+   states_new = deepcopy(states_old)
+   for i in xrange(n):
+      dx = mesh.getElement(i).dx
+      U = states_old[i].getConservativeVariables()
+      states_new[i].updateState(*[advCons(U[j], dx, dt, F[i,j], F[i+1,j])
+         for j in xrange(3)])
+
+   F_left = dict(zip(['rho', 'mom', 'erg'], F[0]))
+   F_right = dict(zip(['rho', 'mom', 'erg'], F[-1]))
+
+   return states_new, F_left, F_right
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
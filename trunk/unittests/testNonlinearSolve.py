@@ -0,0 +1,218 @@
+## @package unittests.testNonlinearSolve
+#  Tests the nonlinear solvers of the radiation-material systems on a Marshak
+#  wave problem.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import InvCubedCrossX
+from hydroState import HydroState, HydroStateArray, createHydroStateArray
+from hydroBC import HydroBC
+from radBC import RadBC
+from radiation import Radiation
+from TRTUtilities import convSpecHeatErgsEvToJksKev, computeEquivIntensity
+from transient import runNonlinearTransient
+from nonlinearSolve import NonlinearConvergenceTest, extrapolateInitialIterate,\
+   NonlinearWorkspace
+
+## Derived unittest class to test the nonlinear solvers
+#
+class TestNonlinearSolve(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+
+   ## Runs a Marshak wave problem with opacities proportional to
+   #  \f$T^{-3}\f$
+   #
+   def runMarshakWave(self, time_stepper='BE', **kwargs):
+
+      n_elems = 50
+      mesh = Mesh(n_elems, 2.0)
+      T_init = 2.5e-5
+      c_v = convSpecHeatErgsEvToJksKev(1.3784e11)
+
+      hydro_IC = list()
+      cross_sects = list()
+      for i in xrange(n_elems):
+         hydro_IC.append(HydroState(u=0.0, rho=1.0, e=T_init*c_v,
+            spec_heat=c_v, gamma=1.4))
+         cross_sects.append((
+            InvCubedCrossX(0.0, hydro_IC[-1], scale_coeff=0.001),
+            InvCubedCrossX(0.0, hydro_IC[-1], scale_coeff=0.001)))
+
+      psi_right = computeEquivIntensity(T_init)
+      return runNonlinearTransient(
+         mesh         = mesh,
+         time_stepper = time_stepper,
+         problem_type = 'rad_mat',
+         dt_option    = 'constant',
+         rad_BC       = RadBC(mesh, "dirichlet",
+                              psi_left=computeEquivIntensity(0.15),
+                              psi_right=psi_right),
+         cross_sects  = cross_sects,
+         rad_IC       = Radiation([psi_right]*(4*n_elems)),
+         hydro_IC     = hydro_IC,
+         hydro_BC     = HydroBC(bc_type='reflective', mesh=mesh),
+         verbosity    = 0,
+         **kwargs)
+
+   def test_JFNK(self):
+
+      # JFNK converges to the same solution as Picard iteration
+      rad_picard, hydro_picard = self.runMarshakWave(nonlinear_solver='picard',
+         dt_constant=0.01, t_end=0.02)
+      rad, hydro = self.runMarshakWave(nonlinear_solver='jfnk',
+         dt_constant=0.01, t_end=0.02)
+      e_picard = np.array([s.e for s in hydro_picard])
+      e = np.array([s.e for s in hydro])
+      self.assertTrue(np.linalg.norm(e - e_picard)/np.linalg.norm(e_picard)
+         < 1.0e-10)
+      self.assertTrue(np.linalg.norm(rad.E - rad_picard.E)
+         /np.linalg.norm(rad_picard.E) < 1.0e-10)
+
+      # JFNK also converges for time step sizes for which Picard iteration
+      # oscillates without converging
+      rad, hydro = self.runMarshakWave(nonlinear_solver='jfnk',
+         dt_constant=0.05, t_end=0.1)
+      e = np.array([s.e for s in hydro])
+      self.assertTrue(np.all(np.isfinite(e)) and np.all(e > 0.0))
+      self.assertTrue(np.all(np.isfinite(rad.E)))
+
+   def test_Anderson(self):
+
+      # Anderson acceleration converges to the same solution as Picard
+      # iteration
+      rad_picard, hydro_picard = self.runMarshakWave(nonlinear_solver='picard',
+         dt_constant=0.01, t_end=0.02)
+      rad, hydro = self.runMarshakWave(nonlinear_solver='anderson',
+         dt_constant=0.01, t_end=0.02)
+      e_picard = np.array([s.e for s in hydro_picard])
+      e = np.array([s.e for s in hydro])
+      self.assertTrue(np.linalg.norm(e - e_picard)/np.linalg.norm(e_picard)
+         < 1.0e-10)
+      self.assertTrue(np.linalg.norm(rad.E - rad_picard.E)
+         /np.linalg.norm(rad_picard.E) < 1.0e-10)
+
+      # and to the same solution as JFNK where Picard iteration oscillates
+      rad_jfnk, hydro_jfnk = self.runMarshakWave(nonlinear_solver='jfnk',
+         dt_constant=0.05, t_end=0.1)
+      rad, hydro = self.runMarshakWave(nonlinear_solver='anderson',
+         dt_constant=0.05, t_end=0.1)
+      e_jfnk = np.array([s.e for s in hydro_jfnk])
+      e = np.array([s.e for s in hydro])
+      self.assertTrue(np.linalg.norm(e - e_jfnk)/np.linalg.norm(e_jfnk)
+         < 1.0e-10)
+
+   def test_AdaptiveTolerance(self):
+
+      # the adapted tolerance stops contracting iterations once the estimated
+      # iteration error is below the fraction of the time error, and
+      # iterations that do not contract only at the fixed tolerance
+      rad = Radiation(np.ones(8))
+      hydro = [HydroState(u=0.0, rho=1.0, e=1.0, spec_heat=1.0, gamma=1.4)
+         for i in xrange(2)]
+      def createIterate(e):
+         return [HydroState(u=0.0, rho=1.0, e=e, spec_heat=1.0, gamma=1.4)
+            for i in xrange(2)]
+      test = NonlinearConvergenceTest(tol=1.0e-12, time_error=1.0e-3,
+         safety=0.1)
+      self.assertFalse(test.check(createIterate(1.01), hydro, rad, rad)[1])
+      self.assertFalse(test.check(createIterate(1.005), hydro, rad, rad)[1])
+      self.assertTrue(test.check(createIterate(1.00005), hydro, rad, rad)[1])
+      self.assertFalse(test.check(createIterate(1.001), hydro, rad, rad)[1])
+      test = NonlinearConvergenceTest(tol=1.0e-12)
+      self.assertFalse(test.check(createIterate(1.001), hydro, rad, rad)[1])
+      self.assertFalse(test.check(createIterate(1.00001), hydro, rad, rad)[1])
+
+      # the radiation is part of the change between iterates
+      self.assertFalse(test.check(hydro, hydro, Radiation(1.001*np.ones(8)),
+         rad)[1])
+      self.assertTrue(test.check(hydro, hydro, rad, rad)[1])
+
+      # the solution with the adaptive tolerance differs from the one with
+      # the fixed tolerance by much less than the time discretization error
+      rad_fixed, hydro_fixed = self.runMarshakWave(time_stepper='BDF2',
+         dt_constant=0.01, t_end=0.1)
+      rad, hydro = self.runMarshakWave(time_stepper='BDF2',
+         nonlinear_tolerance='adaptive', dt_constant=0.01, t_end=0.1)
+      e_fixed = np.array([s.e for s in hydro_fixed])
+      e = np.array([s.e for s in hydro])
+      self.assertTrue(np.linalg.norm(e - e_fixed)/np.linalg.norm(e_fixed)
+         < 1.0e-3)
+
+   def test_ExtrapolatedInitialGuess(self):
+
+      # the extrapolation falls back to the old values where it is
+      # non-physical
+      rad, e_rad = extrapolateInitialIterate(Radiation([1.0, 2.0, 1.0, 1.0]),
+         Radiation([0.5, 5.0, 1.0, 1.0]), [(2.0, 1.0)], [(1.0, 3.0)], 1.0)
+      self.assertTrue(np.array_equal(rad.psi, [1.5, 2.0, 1.0, 1.0]))
+      self.assertTrue(np.array_equal(e_rad, [(3.0, 1.0)]))
+
+      # the extrapolated initial guess converges to the same solution as the
+      # old solution as initial guess
+      for time_stepper in ['BE', 'CN', 'BDF2']:
+         rad_old, hydro_old = self.runMarshakWave(time_stepper=time_stepper,
+            dt_constant=0.01, t_end=0.05)
+         rad, hydro = self.runMarshakWave(time_stepper=time_stepper,
+            initial_guess='extrapolated', dt_constant=0.01, t_end=0.05)
+         self.assertTrue(isinstance(hydro, HydroStateArray))
+         e_old = np.array([s.e for s in hydro_old])
+         e = np.array([s.e for s in hydro])
+         self.assertTrue(np.linalg.norm(e - e_old)/np.linalg.norm(e_old)
+            < 1.0e-10)
+         self.assertTrue(np.linalg.norm(rad.E - rad_old.E)
+            /np.linalg.norm(rad_old.E) < 1.0e-10)
+
+   def test_NonlinearWorkspace(self):
+
+      hydro = [HydroState(u=0.1*i, rho=1.0 + i, e=2.0 + i, spec_heat=1.0,
+         gamma=1.4) for i in xrange(3)]
+      def getValues(states):
+         return [(s.rho, s.u, s.e, s.p) for s in states]
+      def shareStates(states_a, states_b):
+         return bool(set(map(id, states_a)) & set(map(id, states_b)))
+
+      # the iterates are copies of the given states
+      workspace = NonlinearWorkspace()
+      hydro_new, hydro_prev = workspace.getIterates(hydro)
+      for states in [hydro_new, hydro_prev]:
+         self.assertEqual(getValues(states), getValues(hydro))
+         self.assertFalse(shareStates(states, hydro))
+      self.assertFalse(shareStates(hydro_new, hydro_prev))
+
+      # a released buffer is reset and reused for the previous iterate, but
+      # never for the new iterate, which is kept by the caller
+      hydro_prev[0].updateStateInternalEnergy(5.0)
+      workspace.release(hydro_prev)
+      hydro_new_2, hydro_prev_2 = workspace.getIterates(hydro_new)
+      self.assertTrue(hydro_prev_2 is hydro_prev)
+      self.assertEqual(getValues(hydro_prev_2), getValues(hydro))
+      self.assertFalse(hydro_new_2 is hydro_prev or hydro_new_2 is hydro_new)
+
+      # the buffers of a HydroStateArray are arrays, whose storage is reused
+      hydro = createHydroStateArray(hydro)
+      workspace = NonlinearWorkspace()
+      hydro_new, hydro_prev = workspace.getIterates(hydro)
+      for states in [hydro_new, hydro_prev]:
+         self.assertTrue(isinstance(states, HydroStateArray))
+         self.assertEqual(getValues(states), getValues(hydro))
+         self.assertFalse(np.shares_memory(states.e, hydro.e))
+      hydro_prev.updateStateInternalEnergy(5.0)
+      e_prev = hydro_prev.e
+      workspace.release(hydro_prev)
+      hydro_new_2, hydro_prev_2 = workspace.getIterates(hydro_new)
+      self.assertTrue(hydro_prev_2.e is e_prev)
+      self.assertEqual(getValues(hydro_prev_2), getValues(hydro))
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,55 @@
+## @package unittests.testRadiation
+#  Tests that the Radiation object computes angular fluxes and moments
+#  consistent with the global dof indexing.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+from math import sqrt
+import numpy as np
+import unittest
+
+from radiation import Radiation
+from globalConstants import SPD_OF_LGT as c
+
+## Derived unittest class to test the Radiation object
+#
+class TestRadiation(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_Radiation(self):
+
+      # create radiation object from a random list
+      n_elems = 7
+      psi = [random() for i in xrange(4*n_elems)]
+      rad = Radiation(psi)
+      self.assertEqual(rad.n_elems, n_elems)
+
+      # check quantities against global dof indexing
+      for i in xrange(n_elems):
+         for x in xrange(2):
+            psim = psi[4*i+2*x]
+            psip = psi[4*i+2*x+1]
+            self.assertEqual(rad.psim[i][x], psim)
+            self.assertEqual(rad.psip[i][x], psip)
+            self.assertEqual(rad.phi[i][x], psim + psip)
+            self.assertEqual(rad.E[i][x], (psim + psip)/c)
+            self.assertAlmostEqual(rad.F[i][x], (psip - psim)/sqrt(3.0), 14)
+
+      # check that changing the input does not change the radiation object
+      psi_array = np.array(psi)
+      rad = Radiation(psi_array)
+      psi_array[0] += 1.0
+      self.assertEqual(rad.psim[0][0], psi[0])
+
+      # check that an invalid length is rejected
+      self.assertRaises(ValueError, Radiation, psi[:-1])
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
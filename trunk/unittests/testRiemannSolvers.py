@@ -0,0 +1,92 @@
+## @package unittests.testRiemannSolvers
+#  Tests that the array Riemann solvers give the same fluxes as the
+#  interface-by-interface solvers, and that they are consistent with the
+#  physical flux.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+import numpy as np
+import unittest
+
+from hydroState import HydroState
+from musclHancock import HLLCSolver, HLLSolver, rhoFlux, momFlux, ergFlux
+from riemannSolvers import solveHLLC, solveHLL, solveRusanov, solveExact,\
+   computeFluxArrays, getRiemannSolver, RIEMANN_SOLVERS
+
+## Derived unittest class to test the array Riemann solvers
+#
+class TestRiemannSolvers(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_RiemannSolvers(self):
+
+      # number of decimal places to test
+      n_decimal_places = 12
+
+      # random states, with velocities ranging from supersonic to the left to
+      # supersonic to the right, and one interface with identical states
+      n = 50
+      gamma = 1.4
+      states_l = [HydroState(1.0 + random(), 8.0*(random() - 0.5), gamma, 0.1,
+         p=1.0 + random()) for i in xrange(n)]
+      states_r = [HydroState(1.0 + random(), 8.0*(random() - 0.5), gamma, 0.1,
+         p=1.0 + random()) for i in xrange(n)]
+      states_r[0] = states_l[0]
+      U_l = np.array([s.getConservativeVariables() for s in states_l]).T
+      U_r = np.array([s.getConservativeVariables() for s in states_r]).T
+
+      for solver, solver_ref in [(solveHLLC, HLLCSolver),
+         (solveHLL, HLLSolver)]:
+
+         F = solver(U_l[0], U_l[1], U_l[2], U_r[0], U_r[1], U_r[2], gamma)
+         self.assertEqual(F.shape, (3, n))
+
+         for i in xrange(n):
+            for j, flux in enumerate([rhoFlux, momFlux, ergFlux]):
+               F_ref = solver_ref(U_l[j,i], U_r[j,i], states_l[i],
+                  states_r[i], flux)
+               self.assertAlmostEqual(F[j,i], F_ref, n_decimal_places)
+
+      # all solvers give the physical flux for identical states
+      F_phys = np.array(computeFluxArrays(U_l[0], U_l[1], U_l[2], gamma))
+      for name in RIEMANN_SOLVERS:
+         solver = getRiemannSolver(name)
+         F = solver(U_l[0], U_l[1], U_l[2], U_l[0], U_l[1], U_l[2], gamma)
+         for j in xrange(3):
+            for i in xrange(n):
+               self.assertAlmostEqual(F[j,i], F_phys[j,i], n_decimal_places)
+
+      # invalid solvers are rejected
+      self.assertRaises(NotImplementedError, getRiemannSolver, 'invalid')
+
+   def test_ExactRiemannSolver(self):
+
+      # Sod problem, for which the interface lies in the left star region,
+      # with density 0.42632, velocity 0.92745, and pressure 0.30313
+      gamma = 1.4
+      rho_l, p_l = 1.0, 1.0
+      rho_r, p_r = 0.125, 0.1
+      F = solveExact(np.array([rho_l]), np.array([0.0]),
+         np.array([p_l/(gamma - 1.0)]), np.array([rho_r]), np.array([0.0]),
+         np.array([p_r/(gamma - 1.0)]), gamma)
+      rho, u, p = 0.42632, 0.92745, 0.30313
+      self.assertAlmostEqual(F[0,0], rho*u, 4)
+      self.assertAlmostEqual(F[1,0], rho*u*u + p, 4)
+
+      # the flux of the mirrored problem is mirrored
+      F_mirror = solveExact(np.array([rho_r]), np.array([0.0]),
+         np.array([p_r/(gamma - 1.0)]), np.array([rho_l]), np.array([0.0]),
+         np.array([p_l/(gamma - 1.0)]), gamma)
+      self.assertAlmostEqual(F_mirror[0,0], -F[0,0], 12)
+      self.assertAlmostEqual(F_mirror[1,0], F[1,0], 12)
+      self.assertAlmostEqual(F_mirror[2,0], -F[2,0], 12)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,191 @@
+## @package unittests.testSubcycling
+#  Tests the subcycling of hydro steps and radiation-material solves in
+#  runNonlinearTransient.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from hydroState import HydroState
+from hydroBC import HydroBC
+from radBC import RadBC
+from radiation import Radiation
+from balanceChecker import BalanceChecker
+import transient
+from transient import runNonlinearTransient, takeTimeStepSubcycled,\
+   computeCFLTimeStepSize, computeSubcycleCounts,\
+   computeExchangeTimeStepSize, computeExtraneousSources
+import globalConstants as GC
+
+## Derived unittest class to test subcycling
+#
+class TestSubcycling(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_SubcycleCounts(self):
+
+      # multiples of the CFL time step size are not rounded up
+      self.assertEqual(computeSubcycleCounts(3*0.1, 0.1, np.inf, 10), (3, 1))
+      self.assertEqual(computeSubcycleCounts(0.25, 0.1, 0.04, 10), (3, 7))
+      self.assertEqual(computeSubcycleCounts(0.1, 0.1, 1.0e-6, 10), (1, 10))
+
+      # no exchange allows any time step size
+      self.assertEqual(computeExchangeTimeStepSize(0.1, 0.0, 0.1), np.inf)
+      self.assertAlmostEqual(computeExchangeTimeStepSize(0.1, 0.2, 0.1), 0.05,
+         15)
+
+   def test_SubcycledBalance(self):
+
+      # material at rest with a hot region in the middle of the domain, and
+      # periodic radiation, so that radiation and material exchange energy
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+      rad, hydro, cross_sects = createHotSpotProblem(mesh)
+      e_rad = np.array([(s.e, s.e) for s in hydro])
+      rad_BC = RadBC(mesh, 'periodic')
+      hydro_BC = HydroBC(bc_type='reflective', mesh=mesh)
+      Qpsi, Qmom, Qerg, Qrho = computeExtraneousSources(None, None, None,
+         None, mesh, 0.0, verbosity=0)
+
+      # a time step of several CFL time step sizes with several radiation
+      # substeps
+      dt = 3.0*computeCFLTimeStepSize(mesh, hydro, 0.5)
+      hydro_new, rad_new, cx_new, slopes, e_rad_new, Qpsi_new, Qmom_new,\
+      Qerg_new, Qrho_new, hydro_F_left, hydro_F_right, src_totals,\
+      exchange = takeTimeStepSubcycled(mesh, dt, 3, 4, rad_BC, cross_sects,
+         hydro, rad, hydro_BC, 'vanleer', e_rad, None, None, None, None, None,
+         0.0, Qpsi, Qmom, Qerg, Qrho_old=Qrho, verbosity=0)
+      self.assertTrue(exchange > 0.0)
+
+      # the balance of the whole time step closes with the averaged hydro
+      # boundary fluxes
+      mass_bal, mom_bal, erg_bal = BalanceChecker(mesh, 'rad_hydro', 'BE',
+         dt).computeBalance(rad_BC=rad_BC, hydro_old=hydro,
+         hydro_new=hydro_new, rad_old=rad, rad_new=rad_new,
+         hydro_F_left=hydro_F_left, hydro_F_right=hydro_F_right,
+         src_totals=src_totals, cx_new=cx_new, write=False)
+      dx = mesh.getElement(0).dx
+      mass = sum(s.rho for s in hydro)*dx
+      erg = (sum(s.E() for s in hydro) + np.sum(rad.E)/2.0)*dx
+      self.assertTrue(abs(mass_bal) < 1.0e-13*mass)
+      self.assertTrue(abs(erg_bal) < 1.0e-13*erg)
+      self.assertTrue(abs(mom_bal) < 1.0e-13*abs(hydro_F_left["mom"]*dt))
+
+   def test_SubcycledTransient(self):
+
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+      rad_IC, hydro_IC, cross_sects = createHotSpotProblem(mesh)
+
+      # count the radiation-material solves and the subcycled hydro steps
+      counts = dict()
+      nonlinearSolve = transient.nonlinearSolve
+      takeTimeStepHydro = transient.takeTimeStepHydro
+      def countSolves(*args, **kwargs):
+         counts['solves'] += 1
+         return nonlinearSolve(*args, **kwargs)
+      def countHydroSteps(*args, **kwargs):
+         counts['hydro_steps'] += 1
+         return takeTimeStepHydro(*args, **kwargs)
+
+      def runProblem(**kwargs):
+
+         counts.update(solves=0, hydro_steps=0)
+         transient.nonlinearSolve = countSolves
+         transient.takeTimeStepHydro = countHydroSteps
+         try:
+            rad, hydro = runNonlinearTransient(
+               mesh         = mesh,
+               problem_type = 'rad_hydro',
+               time_stepper = 'BE',
+               t_end        = 0.5,
+               rad_BC       = RadBC(mesh, 'periodic'),
+               cross_sects  = cross_sects,
+               rad_IC       = rad_IC,
+               hydro_IC     = hydro_IC,
+               hydro_BC     = HydroBC(bc_type='reflective', mesh=mesh),
+               verbosity    = 0,
+               **kwargs)
+         finally:
+            transient.nonlinearSolve = nonlinearSolve
+            transient.takeTimeStepHydro = takeTimeStepHydro
+
+         return rad, hydro, counts['solves'], counts['hydro_steps']
+
+      def computeErrors(rad, hydro):
+         e = np.array([s.e for s in hydro])
+         return np.linalg.norm(e - e_ref)/np.linalg.norm(e_ref),\
+            np.linalg.norm(rad.E - rad_ref.E)/np.linalg.norm(rad_ref.E)
+
+      # reference solution with small time steps
+      rad_ref, hydro_ref, n_solves, n_hydro_steps = runProblem(
+         dt_option='constant', dt_constant=5.0e-3)
+      e_ref = np.array([s.e for s in hydro_ref])
+
+      # without subcycling, the end time is reached in 3 CFL steps with 2
+      # solves each
+      rad, hydro, n_solves, n_hydro_steps = runProblem(dt_option='CFL')
+      self.assertEqual(n_solves, 6)
+      error_CFL = computeErrors(rad, hydro)
+
+      # the first step is not subcycled. With a large exchange fraction, the
+      # remaining 2 hydro steps are taken with a single solve, at an error
+      # close to that of the steps without subcycling
+      rad, hydro, n_solves, n_hydro_steps = runProblem(dt_option='CFL',
+         subcycling=True, exchange_fraction=1.0, max_substeps=10)
+      self.assertEqual((n_solves, n_hydro_steps), (2, 3))
+      errors = computeErrors(rad, hydro)
+      self.assertTrue(errors[0] < 0.02 and errors[1] < 0.05)
+      self.assertTrue(errors[0] < 1.5*error_CFL[0])
+
+      # with a small exchange fraction, each of the remaining 2 hydro steps
+      # takes the maximum number of solves, which reduces the error of the
+      # radiation-material exchange
+      rad, hydro, n_solves, n_hydro_steps = runProblem(dt_option='CFL',
+         subcycling=True, exchange_fraction=1.0e-3, max_substeps=10)
+      self.assertEqual((n_solves, n_hydro_steps), (21, 3))
+      errors = computeErrors(rad, hydro)
+      self.assertTrue(errors[0] < 4.0e-3 and errors[1] < 7.0e-3)
+      self.assertTrue(errors[0] < 0.5*error_CFL[0])
+      self.assertTrue(errors[1] < 0.5*error_CFL[1])
+
+
+## Creates a problem of a material at rest with a hot region in the middle
+#  of the domain, which is initially not in equilibrium with the radiation
+#
+#  @param[in] mesh  mesh object
+#
+#  @return initial radiation, hydro states, and cross sections
+#
+def createHotSpotProblem(mesh):
+
+   c_v = 0.1
+   sig_a = 10.0
+   T_rad = 0.1
+   psi = 0.5*GC.SPD_OF_LGT*GC.RAD_CONSTANT*T_rad**4
+
+   hydro = list()
+   for i in xrange(mesh.n_elems):
+      x = mesh.getElement(i).x_cent
+      T = T_rad
+      if abs(x - 0.5) < 0.2:
+         T *= 1.0 + np.cos(2.5*np.pi*(x - 0.5))**2
+      hydro.append(HydroState(u=0.0, rho=1.0, e=c_v*T, spec_heat=c_v,
+         gamma=5.0/3.0))
+
+   cross_sects = [(ConstantCrossSection(0.0, sig_a),
+      ConstantCrossSection(0.0, sig_a)) for i in xrange(mesh.n_elems)]
+
+   return Radiation([psi]*(4*mesh.n_elems)), hydro, cross_sects
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
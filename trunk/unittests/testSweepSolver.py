@@ -0,0 +1,82 @@
+## @package unittests.testSweepSolver
+#  Tests that the transport sweep solver with DSA-accelerated source iteration
+#  gives the same solution as the banded direct solver, and that it converges
+#  in a few iterations for optically thick, highly scattering problems.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+from random import random
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from radiationSolveSS import radiationSolveSS, assembleS2RHS
+from transportSweep import solveS2SourceIteration
+from radBC import RadBC
+
+## Derived unittest class to test the transport sweep solver
+#
+class TestSweepSolver(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_SweepSolver(self):
+
+      # number of decimal places to test; the DSA correction is approximate,
+      # so source iteration only converges to its tolerance
+      n_decimal_places = 10
+
+      # create mesh
+      n_elems = 30
+      mesh = Mesh(n_elems, 1.0 + random())
+
+      # loop over optically thin and thick problems
+      for sig_t in [1.0, 1.0e4]:
+
+         # random, highly scattering cross sections
+         cross_sects = [(ConstantCrossSection(0.999*sig_t*random(), sig_t),
+                         ConstantCrossSection(0.999*sig_t*random(), sig_t))
+                         for i in xrange(mesh.n_elems)]
+
+         # random source
+         Q = np.array([random() for i in xrange(4*mesh.n_elems)])
+
+         # loop over each boundary condition type
+         rad_BCs = [RadBC(mesh, "vacuum"),
+                    RadBC(mesh, "dirichlet", psi_left=random(), psi_right=random()),
+                    RadBC(mesh, "periodic")]
+         for rad_BC in rad_BCs:
+
+            # solve with both solvers
+            alpha = random()
+            rad_banded = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+               diag_add_term=alpha, implicit_scale=0.5, solver='banded')
+            rad_sweep = radiationSolveSS(mesh, cross_sects, Q, rad_BC,
+               diag_add_term=alpha, implicit_scale=0.5, solver='sweep')
+
+            # compare solutions relative to the solution magnitude
+            scale = np.max(np.abs(rad_banded.psi))
+            for i in xrange(4*mesh.n_elems):
+               self.assertAlmostEqual(rad_sweep.psi[i]/scale,
+                  rad_banded.psi[i]/scale, n_decimal_places)
+
+            # check that DSA converges in a few iterations, whereas source
+            # iteration without acceleration does not converge in many more
+            # iterations for the optically thick problem
+            rhs = assembleS2RHS(mesh, Q, rad_BC, implicit_scale=0.5)
+            psi, n_iterations = solveS2SourceIteration(mesh, cross_sects, rhs,
+               rad_BC, alpha, 0.5)
+            self.assertTrue(n_iterations <= 30)
+            if sig_t > 1.0:
+               self.assertRaises(RuntimeError, solveS2SourceIteration, mesh,
+                  cross_sects, rhs, rad_BC, alpha, 0.5, accelerate=False,
+                  max_iterations=10*n_iterations)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
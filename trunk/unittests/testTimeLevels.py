@@ -0,0 +1,75 @@
+## @package unittests.testTimeLevels
+#  Tests the ring of time levels used by the transient drivers.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+import numpy as np
+import unittest
+
+from radiation import Radiation
+from timeLevels import TimeLevels
+
+## Derived unittest class to test the time levels
+#
+class TestTimeLevels(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_TimeLevels(self):
+
+      levels = TimeLevels()
+      containers = list(levels.levels)
+
+      # store solutions of three steps; each step's solutions are new objects
+      solutions = [(Radiation([float(n)]*8), np.array([n, n + 1.0]))
+         for n in xrange(3)]
+      levels.old.update(rad=solutions[0][0], e=solutions[0][1])
+      self.assertEqual(levels.older.rad, None)
+      for n in [1, 2]:
+         levels.new.update(rad=solutions[n][0], e=solutions[n][1])
+         levels.rotate()
+
+      # the levels hold the solutions by reference, and the containers of the
+      # levels are reused
+      self.assertTrue(levels.old.rad is solutions[2][0])
+      self.assertTrue(levels.older.get('rad', 'e')[1] is solutions[1][1])
+      self.assertEqual(levels.new.rad, None)
+      self.assertEqual(sorted(map(id, levels.levels)),
+         sorted(map(id, containers)))
+
+      # stored arrays, including views, are read-only
+      def modify(array):
+         array[0] = -1.0
+      self.assertRaises(ValueError, modify, levels.old.e)
+      self.assertRaises(ValueError, modify, levels.old.rad.psi)
+      self.assertRaises(ValueError, modify, levels.old.rad.psim[0])
+
+      # arrays are writeable again once they leave the ring
+      self.assertTrue(solutions[0][1].flags.writeable)
+      self.assertTrue(solutions[0][0].psi.flags.writeable)
+      levels.release()
+      modify(solutions[2][0].psim[0])
+      self.assertEqual(solutions[2][0].psi[0], -1.0)
+
+   def test_SharedArrays(self):
+
+      # an array stored at two levels stays read-only until it leaves both
+      levels = TimeLevels()
+      Q = np.zeros(4)
+      levels.old.update(Q=Q)
+      levels.new.update(Q=Q)
+      levels.rotate()
+      levels.new.update(Q=np.ones(4))
+      levels.rotate()
+      self.assertFalse(Q.flags.writeable)
+      levels.new.update(Q=np.ones(4))
+      levels.rotate()
+      self.assertTrue(Q.flags.writeable)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
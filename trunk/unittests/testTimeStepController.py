@@ -0,0 +1,264 @@
+## @package unittests.testTimeStepController
+#  Tests the variable-step BDF2 weights, the local error estimate, and the
+#  adaptive time step size controller.
+
+# add source directory to module search path
+import sys
+sys.path.append('../src')
+
+import numpy as np
+import unittest
+
+from mesh import Mesh
+from crossXInterface import ConstantCrossSection
+from hydroState import HydroState
+from hydroBC import HydroBC
+from radBC import RadBC
+from radiation import Radiation
+from TRTUtilities import convSpecHeatErgsEvToJksKev, computeEquivIntensity
+import transient
+from transient import runNonlinearTransient
+from transientSource import getBDF2Weights
+from timeStepController import TimeStepController, estimateLocalError,\
+   computeErrorCoefficient
+
+## Derived unittest class to test adaptive time stepping
+#
+class TestTimeStepController(unittest.TestCase):
+   def setUp(self):
+      pass
+   def tearDown(self):
+      pass
+   def test_BDF2Weights(self):
+
+      # constant time step sizes give the usual weights
+      w_new, w_old, w_older = getBDF2Weights()
+      self.assertAlmostEqual(w_new, 2./3., 15)
+      self.assertAlmostEqual(w_old, 1./6., 15)
+      self.assertAlmostEqual(w_older, 1./6., 15)
+
+      # the weights integrate linear functions exactly for any ratio: with
+      # t_n = 0, the integral of t over the step is dt^2/2
+      for r in [0.25, 0.5, 1.0, 1.5, 2.0]:
+         dt = 1.0
+         w_new, w_old, w_older = getBDF2Weights(r)
+         self.assertAlmostEqual(w_new + w_old + w_older, 1.0, 14)
+         self.assertAlmostEqual(dt*(w_new*dt - w_older*dt/r), 0.5*dt**2, 14)
+
+   def test_LocalErrorEstimate(self):
+
+      # polynomials of degree p-1 are extrapolated exactly, and for degree p
+      # the difference to the extrapolation is B y^(p)
+      t_old = 1.0
+      for time_stepper, p in [('BE', 2), ('CN', 3), ('BDF2', 3)]:
+         for dts in [(0.1, 0.1, 0.1), (0.1, 0.05, 0.2)]:
+
+            dt = dts[0]
+            times = t_old - np.cumsum((0.0,) + dts[1:])
+            t_new = t_old + dt
+            B = np.prod(t_new - times[:p])/np.prod(np.arange(1, p+1))
+            A = computeErrorCoefficient(time_stepper, dt, dts[1])
+
+            for degree in [p-1, p]:
+               y = lambda t: np.array([t**degree])
+               error = estimateLocalError([y(t_new)], [y(t) for t in times],
+                  dt, dts[1:], time_stepper)
+               if degree == p - 1:
+                  self.assertAlmostEqual(error, 0.0, 12)
+               else:
+                  error_ref = A/(A + B)*B*np.prod(np.arange(1, p+1))\
+                     /t_new**degree
+                  self.assertAlmostEqual(error/error_ref, 1.0, 10)
+
+   def test_TimeStepController(self):
+
+      # steps of the solution y = 1 + a t^2 with backward Euler, for which
+      # the error estimate is approximately 2a dt^2/3 for constant steps
+      def takeStep(controller, t, dt, a):
+         return controller.update(dt, [np.array([1.0 + a*(t + dt)**2])])
+
+      controller = TimeStepController(0.01, [np.array([1.0])],
+         time_stepper='BE', tol=1.0e-3, dt_min=0.001, dt_max=0.03)
+
+      # the first step is accepted without an estimate and the size is kept
+      self.assertTrue(takeStep(controller, 0.0, 0.01, 1.0e-4))
+      self.assertEqual(controller.dt, 0.01)
+
+      # small errors grow the step size, limited by the maximum growth and
+      # the maximum step size
+      self.assertTrue(takeStep(controller, 0.01, 0.01, 1.0e-4))
+      self.assertAlmostEqual(controller.dt, 0.02, 15)
+      self.assertTrue(takeStep(controller, 0.02, 0.02, 1.0e-4))
+      self.assertAlmostEqual(controller.dt, 0.03, 15)
+
+      # large errors reject the step and shrink the step size
+      self.assertFalse(takeStep(controller, 0.04, 0.03, 100.0))
+      dt = controller.dt
+      self.assertTrue(dt < 0.03)
+
+      # the step size does not grow directly after a rejection
+      self.assertTrue(takeStep(controller, 0.04, dt, 1.0e-4))
+      self.assertEqual(controller.dt, dt)
+      self.assertEqual((controller.n_accepted, controller.n_rejected), (4, 1))
+
+      # steps of the minimum size are always accepted
+      self.assertTrue(takeStep(controller, 0.04 + dt, 0.001, 1.0e8))
+      self.assertEqual(controller.dt, 0.001)
+
+   def test_StartupSteps(self):
+
+      # steps of the solution y = 2 - exp(-t/tau) with BDF2, which is started
+      # with a BE step
+      def takeStep(controller, t, dt):
+         return controller.update(dt,
+            [np.array([2.0 - np.exp(-(t + dt)/0.01)])])
+
+      # the start-up steps are accepted without an estimate, and the start-up
+      # BE step, whose error is about 0.1, is rejected with the first
+      # estimate: the transient is restarted with the step size reduced by
+      # the minimum shrink factor and the start-up steps are counted as
+      # rejected
+      controller = TimeStepController(0.01, [np.array([1.0])],
+         time_stepper='BDF2', tol=1.0e-3)
+      self.assertTrue(takeStep(controller, 0.0, 0.01))
+      self.assertTrue(takeStep(controller, 0.01, 0.01))
+      self.assertFalse(controller.restart)
+      self.assertFalse(takeStep(controller, 0.02, 0.01))
+      self.assertTrue(controller.restart)
+      self.assertAlmostEqual(controller.dt, 0.002, 15)
+      self.assertEqual((controller.n_accepted, controller.n_rejected), (0, 3))
+      self.assertEqual(len(controller.estimator.values_history), 1)
+
+      # small enough start-up steps are accepted with the first estimate
+      controller = TimeStepController(1.0e-4, [np.array([1.0])],
+         time_stepper='BDF2', tol=1.0e-3)
+      for i in xrange(3):
+         self.assertTrue(takeStep(controller, i*1.0e-4, 1.0e-4))
+         self.assertFalse(controller.restart)
+      self.assertEqual((controller.n_accepted, controller.n_rejected), (3, 0))
+
+   def test_AdaptiveTransient(self):
+
+      # a two-material radiation-material problem driven by a hot boundary
+      n_elems = 20
+      mesh = Mesh(n_elems, 1.0)
+      c_v = convSpecHeatErgsEvToJksKev(1.0e12)
+      T_init = 0.05
+      psi_left = computeEquivIntensity(0.5)
+      psi_right = computeEquivIntensity(T_init)
+
+      def runProblem(**kwargs):
+
+         cross_sects = list()
+         hydro_IC = list()
+         for i in xrange(n_elems):
+            if mesh.getElement(i).x_cent < 0.5:
+               sig_a, rho = 0.2, 0.01
+            else:
+               sig_a, rho = 2000.0, 10.0
+            cross_sects.append((ConstantCrossSection(0.0, sig_a),
+                                ConstantCrossSection(0.0, sig_a)))
+            hydro_IC.append(HydroState(u=0.0, rho=rho, e=T_init*c_v,
+               spec_heat=c_v, gamma=1.4))
+
+         return runNonlinearTransient(
+            mesh         = mesh,
+            time_stepper = 'BDF2',
+            problem_type = 'rad_mat',
+            t_start      = 0.0,
+            t_end        = 0.02,
+            rad_BC       = RadBC(mesh, "dirichlet", psi_left=psi_left,
+                                 psi_right=psi_right),
+            cross_sects  = cross_sects,
+            rad_IC       = Radiation([psi_right]*(4*n_elems)),
+            hydro_IC     = hydro_IC,
+            hydro_BC     = HydroBC(bc_type='reflective', mesh=mesh),
+            verbosity    = 0,
+            **kwargs)
+
+      # the adaptive solution agrees with a solution with small constant
+      # time steps to within the order of the tolerance
+      rad_ref, hydro_ref = runProblem(dt_option='constant', dt_constant=2.0e-4)
+      rad, hydro = runProblem(dt_option='adaptive', dt_constant=1.0e-4,
+         dt_tolerance=1.0e-3)
+
+      e_ref = np.array([s.e for s in hydro_ref])
+      e = np.array([s.e for s in hydro])
+      self.assertTrue(np.linalg.norm(e - e_ref)/np.linalg.norm(e_ref) < 1.0e-2)
+      self.assertTrue(np.linalg.norm(rad.E - rad_ref.E)
+         /np.linalg.norm(rad_ref.E) < 1.0e-2)
+
+   def test_AdaptiveStepCount(self):
+
+      # a closed radiation-material problem heated by a source that decays on
+      # a time scale much shorter than the transient, so that the error of
+      # the absorbed energy persists
+      n_elems = 10
+      mesh = Mesh(n_elems, 1.0)
+      c_v = convSpecHeatErgsEvToJksKev(1.0e12)
+      T_init = 0.05
+      psi_init = computeEquivIntensity(T_init)
+
+      def computeSource(x, t):
+         return 100.0*np.exp(-t/0.01) if x < 0.25 else 0.0
+
+      # count the nonlinear solves, including those of rejected steps
+      n_solves = [0]
+      nonlinearSolve = transient.nonlinearSolve
+      def countSolves(**kwargs):
+         n_solves[0] += 1
+         return nonlinearSolve(**kwargs)
+
+      def runProblem(**kwargs):
+
+         cross_sects = list()
+         hydro_IC = list()
+         for i in xrange(n_elems):
+            cross_sects.append((ConstantCrossSection(0.0, 10.0),
+                                ConstantCrossSection(0.0, 10.0)))
+            hydro_IC.append(HydroState(u=0.0, rho=1.0, e=T_init*c_v,
+               spec_heat=c_v, gamma=1.4))
+
+         n_solves[0] = 0
+         transient.nonlinearSolve = countSolves
+         try:
+            rad, hydro = runNonlinearTransient(
+               mesh         = mesh,
+               time_stepper = 'BDF2',
+               problem_type = 'rad_mat',
+               t_start      = 0.0,
+               t_end        = 1.0,
+               rad_BC       = RadBC(mesh, "periodic"),
+               cross_sects  = cross_sects,
+               rad_IC       = Radiation([psi_init]*(4*n_elems)),
+               hydro_IC     = hydro_IC,
+               hydro_BC     = HydroBC(bc_type='reflective', mesh=mesh),
+               psim_src     = computeSource,
+               psip_src     = computeSource,
+               verbosity    = 0,
+               **kwargs)
+         finally:
+            transient.nonlinearSolve = nonlinearSolve
+
+         return np.array([s.e for s in hydro]), n_solves[0]
+
+      # the adaptive steps resolve the decay of the source and then grow,
+      # which gives a smaller error than constant steps with twice as many
+      # solves
+      e_ref, n_ref = runProblem(dt_option='adaptive', dt_constant=0.01,
+         dt_tolerance=1.0e-4)
+      e_adaptive, n_adaptive = runProblem(dt_option='adaptive',
+         dt_constant=0.01, dt_tolerance=1.0e-2)
+      e_constant, n_constant = runProblem(dt_option='constant',
+         dt_constant=1.0/(2*n_adaptive))
+
+      self.assertTrue(n_constant >= 2*n_adaptive)
+      error_adaptive = np.linalg.norm(e_adaptive - e_ref)/np.linalg.norm(e_ref)
+      error_constant = np.linalg.norm(e_constant - e_ref)/np.linalg.norm(e_ref)
+      self.assertTrue(error_adaptive < 1.0e-2)
+      self.assertTrue(error_adaptive < 0.5*error_constant)
+
+
+# run main function from unittest module
+if __name__ == '__main__':
+   unittest.main()
@@ -22,10 +22,16 @@ import unittest
 from mesh import Mesh
 from crossXInterface import ConstantCrossSection
 from radiationSolveSS import radiationSolveSS
-from transientSource import computeRadiationSource 
+from transientSource import computeRadiationSource, OldIntensityTerm,\
+   StreamingTerm, ReactionTerm, ScatteringTerm, SourceTerm, DriftTerm,\
+   AnisotropicTerm, PlanckianTerm, createRadiationSourceTerms
 from utilityFunctions import getIndex
 import globalConstants as GC
 from radBC import RadBC
+from radiation import Radiation
+from hydroState import HydroState
+from hydroBC import HydroBC
+from hydroSlopes import HydroSlopes
 
 ## Derived unittest class to test source builder
 #
@@ -102,7 +108,92 @@ class TestTransientSource(unittest.TestCase):
          self.assertAlmostEqual(Q_tr[iLp], QiLp_expected, n_decimal_places)
          self.assertAlmostEqual(Q_tr[iRm], QiRm_expected, n_decimal_places)
          self.assertAlmostEqual(Q_tr[iRp], QiRp_expected, n_decimal_places)
-  
+
+   ## Tests that the mesh-wide evaluation of each source term gives the same
+   #  result as the element-by-element evaluation
+   #
+   def test_TransientSourceVectorized(self):
+
+      # create mesh
+      n_elems = 6
+      mesh = Mesh(n_elems, random())
+
+      # create random quantities for each time level
+      def createRandomCrossSections():
+         return [(ConstantCrossSection(random(), 1.0 + random()),
+                  ConstantCrossSection(random(), 1.0 + random()))
+                  for i in xrange(n_elems)]
+      def createRandomHydro():
+         return [HydroState(rho=1.0+random(), u=random(), gamma=1.4,
+                  spec_heat=1.0+random(), p=1.0+random())
+                  for i in xrange(n_elems)]
+      def createSlopes(states):
+         bc = HydroBC('periodic', mesh)
+         bc.update(states, 0.0)
+         return HydroSlopes(states, bc, 'minmod')
+      hydro_older = createRandomHydro()
+      hydro_old   = createRandomHydro()
+      hydro_prev  = createRandomHydro()
+      hydro_star  = createRandomHydro()
+      hydro_new   = createRandomHydro()
+      args = dict(
+         dt            = random(),
+         cx_older      = createRandomCrossSections(),
+         cx_old        = createRandomCrossSections(),
+         cx_prev       = createRandomCrossSections(),
+         rad_older     = Radiation(np.random.random(4*n_elems)),
+         rad_old       = Radiation(np.random.random(4*n_elems)),
+         rad_prev      = Radiation(np.random.random(4*n_elems)),
+         hydro_older   = hydro_older,
+         hydro_old     = hydro_old,
+         hydro_prev    = hydro_prev,
+         hydro_star    = hydro_star,
+         hydro_new     = hydro_new,
+         slopes_older  = createSlopes(hydro_older),
+         slopes_old    = createSlopes(hydro_old),
+         E_slopes_star = np.random.random(n_elems),
+         e_rad_older   = [(1.0+random(), 1.0+random()) for i in xrange(n_elems)],
+         e_rad_old     = [(1.0+random(), 1.0+random()) for i in xrange(n_elems)],
+         e_rad_prev    = [(1.0+random(), 1.0+random()) for i in xrange(n_elems)],
+         QE            = [(random(), random()) for i in xrange(n_elems)],
+         Qpsi_older    = np.random.random(4*n_elems),
+         Qpsi_old      = np.random.random(4*n_elems),
+         Qpsi_new      = np.random.random(4*n_elems))
+
+      term_classes = [StreamingTerm, ReactionTerm, ScatteringTerm, SourceTerm,
+                      DriftTerm, AnisotropicTerm, PlanckianTerm]
+      for bc_type in ["dirichlet", "periodic"]:
+         args["rad_BC"] = RadBC(mesh, bc_type, psi_left=random(),
+            psi_right=random())
+         for time_stepper in ["BE", "CN", "BDF2"]:
+
+            # old intensity term has its own element function
+            term = OldIntensityTerm(mesh, time_stepper)
+            Q_elem = np.concatenate([term.computeOldIntensityTerm(i,
+               dt=args["dt"], rad_old=args["rad_old"]) for i in xrange(n_elems)])
+            self.assertTrue(np.allclose(term.computeTerm(**args), Q_elem,
+               rtol=1.0e-13, atol=0.0))
+
+            # all other terms
+            for term_class in term_classes:
+               term = term_class(mesh, time_stepper)
+               Q_elem = term.evalByElement(term.func, **args)
+               self.assertTrue(np.allclose(term.computeTerm(**args), Q_elem,
+                  rtol=1.0e-13, atol=0.0), term_class.__name__)
+
+            # terms that cache their fixed parts give the same source as new
+            # terms when the iterate changes
+            terms = createRadiationSourceTerms(mesh, time_stepper,
+               'rad_hydro', cache_fixed_terms=True)
+            for k in xrange(2):
+               args["cx_prev"] = createRandomCrossSections()
+               args["rad_prev"] = Radiation(np.random.random(4*n_elems))
+               args["hydro_prev"] = createRandomHydro()
+               Q_tr = computeRadiationSource(mesh, time_stepper, 'rad_hydro',
+                  **args)
+               self.assertTrue(np.array_equal(computeRadiationSource(mesh,
+                  time_stepper, 'rad_hydro', source_terms=terms, **args), Q_tr))
+
 # run main function from unittest module
 if __name__ == '__main__':
    unittest.main()